@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Links are handed out until this long before Stripe expires them, so the
+# user has time to open one
+ACCOUNT_LINK_MARGIN_SECONDS = float(os.environ.get('ACCOUNT_LINK_MARGIN_SECONDS', '60'))
+ACCOUNT_LINK_CACHE_ENTRIES = int(os.environ.get('ACCOUNT_LINK_CACHE_ENTRIES', '2048'))
+
+UNIQUE_VIOLATION = '23505'
+
+def link_key(account_id: str, refresh_url: str, return_url: str) -> str:
+    return hashlib.sha256('\0'.join((account_id, refresh_url, return_url)).encode('utf-8')).hexdigest()
+
+class AccountLinkCache:
+    """
+    Onboarding links per (account_id, refresh_url, return_url), reused
+    until ACCOUNT_LINK_MARGIN_SECONDS before they expire or until the user
+    comes back through refresh_url, which means the link was used.
+
+    A bounded in-process LRU sits in front of the stripe_account_links
+    table, which lets every instance, warm or cold, share a link. Without
+    a Supabase client only the in-process layer is used.
+    """
+
+    table = 'stripe_account_links'
+
+    def __init__(
+        self,
+        margin_seconds: float = ACCOUNT_LINK_MARGIN_SECONDS,
+        max_entries: int = ACCOUNT_LINK_CACHE_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.margin_seconds = margin_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'store_hits': 0, 'misses': 0}
+
+    def get(self, supabase: Optional['Client'], key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """(`{'url', 'expires_at'}` or None, where it came from: memory, store or miss)"""
+        fresh_after = self.clock() + self.margin_seconds
+
+        with self._lock:
+            link = self._entries.get(key)
+            if link is not None and link['expires_at'] > fresh_after:
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return dict(link), 'memory'
+
+        if supabase is not None:
+            result = supabase.table(self.table).select('url, expires_at').eq('cache_key', key).gt(
+                'expires_at', _timestamp(fresh_after)
+            ).limit(1).execute()
+            if result.data:
+                row = result.data[0]
+                link = {'url': row['url'], 'expires_at': _epoch(row['expires_at'])}
+                self._remember(key, link)
+                with self._lock:
+                    self.stats['store_hits'] += 1
+                return dict(link), 'store'
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None, 'miss'
+
+    def put(self, supabase: Optional['Client'], key: str, account_id: str, link: Dict[str, Any]) -> None:
+        self._remember(key, link)
+        if supabase is None:
+            return
+
+        row = {'url': link['url'], 'expires_at': _timestamp(link['expires_at'])}
+        try:
+            supabase.table(self.table).insert({'cache_key': key, 'account_id': account_id, **row}).execute()
+        except Exception as e:
+            if getattr(e, 'code', None) != UNIQUE_VIOLATION:
+                raise
+            supabase.table(self.table).update(row).eq('cache_key', key).execute()
+
+    def discard(self, supabase: Optional['Client'], key: str) -> None:
+        """
+        Forget a link the user already opened. Account links are single
+        use, so once Stripe sends the user to refresh_url the cached one
+        must not be handed out again, even if creating its replacement fails.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+        if supabase is not None:
+            supabase.table(self.table).delete().eq('cache_key', key).execute()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters plus hit rate; every hit is a Stripe call saved"""
+        with self._lock:
+            stats = dict(self.stats)
+        hits = stats['memory_hits'] + stats['store_hits']
+        lookups = hits + stats['misses']
+        return {
+            **stats,
+            'stripe_calls_saved': hits,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, link: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = dict(link)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+ACCOUNT_LINKS = AccountLinkCache()
+
+def _timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    return float(value)
@@ -0,0 +1,199 @@
+import bisect
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+from api._lib.ranking import AgentRanker, tokenize
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Upper bound on how long a warm instance serves the pool without reloading,
+# even if no version bump was observed
+AGENT_POOL_TTL_SECONDS = float(os.environ.get('AGENT_POOL_TTL_SECONDS', '60'))
+
+# Rows per select when loading the pool. PostgREST silently caps every
+# response at its max-rows setting (1000 on Supabase), so this must not
+# exceed it: a capped page would look like the last one
+AGENT_POOL_BATCH_ROWS = int(os.environ.get('AGENT_POOL_BATCH_ROWS', '1000'))
+
+AGENT_POOL_COLUMNS = (
+    'id, name, specialization, certification_status, user_id, company_id, hourly_rate, '
+    'users!inner(email), agent_stats(completed_campaigns, rating)'
+)
+
+def _embedded_one(value: Any) -> Dict[str, Any]:
+    """A to-one PostgREST embed, which may arrive as an object, a list or null"""
+    if isinstance(value, list):
+        return value[0] if value else {}
+    return value or {}
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+class PoolEntry:
+    """A certified agent, formatted for the marketplace listing, with its ranking features"""
+    __slots__ = ('id', 'company_id', 'specialization', 'tokens', 'rate', 'rating', 'completed', 'listing')
+
+    def __init__(self, row: Dict[str, Any]):
+        # Precomputed by triggers on campaign_invitations (see agent_stats)
+        stats = _embedded_one(row.get('agent_stats'))
+        self.id = row['id']
+        self.company_id = row.get('company_id')
+        self.specialization = (row.get('specialization') or '').lower()
+        self.tokens = tokenize(row.get('specialization'))
+        self.rate = _number(row.get('hourly_rate'))
+        self.rating = _number(stats.get('rating'))
+        self.completed = stats.get('completed_campaigns') or 0
+        self.listing = {
+            'id': row['id'],
+            'name': row['name'],
+            'specialization': row['specialization'],
+            'email': row['users']['email'],
+            'certification_status': row['certification_status'],
+            'rating': self.rating,
+            'completed_campaigns': self.completed,
+            'hourly_rate': self.rate
+        }
+
+class PoolSnapshot:
+    """One load of the pool: entries in id order, their ids, and a ranker built on first use"""
+
+    def __init__(self, entries: List[PoolEntry]):
+        self.entries = entries
+        self.ids = [entry.id for entry in entries]
+        self._ranker: Optional[AgentRanker] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ranker(self) -> AgentRanker:
+        if self._ranker is None:
+            with self._lock:
+                if self._ranker is None:
+                    self._ranker = AgentRanker(self.entries)
+        return self._ranker
+
+class AgentPoolCache:
+    """
+    Per-process cache of every certified agent, ordered by id.
+
+    The pool is the same for every campaign, so it is loaded once and the
+    per-company exclusion, specialization filter and paging run in memory.
+    It is reloaded when the caller observes a new `agents` listing version
+    (bumped by a trigger whenever an agent's row, including its
+    certification, changes) or when it is older than `ttl_seconds`, which
+    bounds how stale the embedded agent_stats can be.
+    Each load reads the pool in keyset batches of `batch_rows` and gets
+    its own AgentRanker for campaign-ranked listings.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = AGENT_POOL_TTL_SECONDS,
+        batch_rows: int = AGENT_POOL_BATCH_ROWS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.batch_rows = batch_rows
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._snapshot = PoolSnapshot([])
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self.stats = {'hits': 0, 'loads': 0}
+
+    def snapshot(self, supabase: 'Client', version: int) -> PoolSnapshot:
+        """The pool at `version`, loading it if stale"""
+        if self._is_fresh(version):
+            self.stats['hits'] += 1
+            return self._snapshot
+
+        with self._lock:
+            # Another request may have reloaded while we waited
+            if not self._is_fresh(version):
+                self._load(supabase, version)
+            else:
+                self.stats['hits'] += 1
+            return self._snapshot
+
+    def page(
+        self,
+        supabase: 'Client',
+        version: int,
+        exclude_company_id: Optional[str],
+        specializations: Sequence[str] = (),
+        after_id: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Up to `limit` listings after `after_id`, and whether more follow"""
+        snapshot = self.snapshot(supabase, version)
+        entries, ids = snapshot.entries, snapshot.ids
+        wanted = {s.lower() for s in specializations}
+
+        start = bisect.bisect_right(ids, after_id) if after_id is not None else 0
+        page: List[Dict[str, Any]] = []
+        for index in range(start, len(entries)):
+            entry = entries[index]
+            if entry.company_id is not None and entry.company_id == exclude_company_id:
+                continue
+            if wanted and entry.specialization not in wanted:
+                continue
+            if len(page) == limit:
+                return page, True
+            page.append(entry.listing)
+        return page, False
+
+    def ranked_page(
+        self,
+        supabase: 'Client',
+        version: int,
+        campaign: Dict[str, Any],
+        exclude_company_id: Optional[str],
+        specializations: Sequence[str] = (),
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Listings ranked offset..offset+limit by match with `campaign`, and whether more follow"""
+        snapshot = self.snapshot(supabase, version)
+        top, has_more = snapshot.ranker.top(campaign, exclude_company_id, specializations, offset, limit)
+        return [
+            {**snapshot.entries[position].listing, 'match_score': round(score, 4)}
+            for position, score in top
+        ], has_more
+
+    def stats_epoch(self) -> int:
+        """
+        Agent stats change with every invitation write and do not bump the
+        agents version, so listings pick them up within `ttl_seconds`. This
+        wall-clock period number goes into listing ETags, so clients
+        revalidate into fresh stats on the same schedule on every instance.
+        """
+        return int(time.time() // self.ttl_seconds)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def _is_fresh(self, version: int) -> bool:
+        return self._version == version and self.clock() - self._loaded_at < self.ttl_seconds
+
+    def _load(self, supabase: 'Client', version: int) -> None:
+        # Keyset batches in id order until a short one comes back
+        entries: List[PoolEntry] = []
+        last_id: Optional[str] = None
+        while True:
+            query = supabase.table('agents').select(AGENT_POOL_COLUMNS).eq('certification_status', 'certified')
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.order('id').limit(self.batch_rows).execute().data or []
+            entries.extend(PoolEntry(row) for row in rows)
+            if len(rows) < self.batch_rows:
+                break
+            last_id = rows[-1]['id']
+        entries.sort(key=lambda entry: entry.id)
+        self._snapshot = PoolSnapshot(entries)
+        self._version = version
+        self._loaded_at = self.clock()
+        self.stats['loads'] += 1
+
+AGENT_POOL = AgentPoolCache()
@@ -0,0 +1,220 @@
+import gzip
+import json
+import os
+import zlib
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 'auto' uses orjson when it is installed, 'json' forces the standard library
+JSON_ENCODER = os.environ.get('API_JSON_ENCODER', 'auto')
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.environ.get('API_COMPRESSION_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('API_GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.environ.get('API_BROTLI_QUALITY', '4'))
+
+# List responses with at least this many items are streamed in batches
+STREAM_MIN_ITEMS = int(os.environ.get('API_STREAM_MIN_ITEMS', '500'))
+STREAM_BATCH_ITEMS = int(os.environ.get('API_STREAM_BATCH_ITEMS', '250'))
+
+def _dumps_json(data: Any) -> bytes:
+    return json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+
+def _dumps_orjson(data: Any) -> bytes:
+    return orjson.dumps(data, default=str)
+
+def select_json_encoder(name: str = JSON_ENCODER) -> Callable[[Any], bytes]:
+    """Return the JSON encoder for `name` ('auto', 'orjson' or 'json')"""
+    if name == 'json' or (name == 'auto' and orjson is None):
+        return _dumps_json
+    if orjson is None:
+        raise ImportError("API_JSON_ENCODER=orjson but orjson is not installed")
+    return _dumps_orjson
+
+def supported_encodings() -> List[str]:
+    """Content codings this instance can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported coding from an Accept-Encoding header"""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+
+    for coding in supported_encodings():
+        if coding in accepted or '*' in accepted:
+            return coding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+class _StreamWriter:
+    """Writes a response body incrementally, compressed and/or chunked"""
+
+    def __init__(self, handler: 'BaseHandler', encoding: Optional[str], chunked: bool):
+        self.handler = handler
+        self.chunked = chunked
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress, self._flush = compressor.process, compressor.finish
+        elif encoding == 'gzip':
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress, self._flush = compressor.compress, compressor.flush
+        else:
+            self._compress = self._flush = None
+
+    def write(self, data: bytes) -> None:
+        if self._compress is not None:
+            data = self._compress(data)
+        self._emit(data)
+
+    def close(self) -> None:
+        if self._flush is not None:
+            self._emit(self._flush())
+        if self.chunked:
+            self.handler.wfile_write(b'0\r\n\r\n')
+
+    def _emit(self, data: bytes) -> None:
+        if not data:
+            return
+        if self.chunked:
+            data = b'%x\r\n%s\r\n' % (len(data), data)
+        self.handler.wfile_write(data)
+
+class BaseHandler(BaseHTTPRequestHandler):
+    """
+    Shared request handling for the Vercel Python functions under api/.
+
+    Provides CORS preflight handling and JSON responses with a pluggable
+    encoder, Content-Length, Accept-Encoding negotiated gzip/brotli
+    compression and batched streaming of large list payloads.
+    """
+
+    # Methods and headers advertised on CORS preflight
+    ALLOWED_METHODS = 'POST, OPTIONS'
+    ALLOWED_HEADERS = 'Content-Type, Authorization'
+
+    encode_json = staticmethod(select_json_encoder())
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight requests"""
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', self.ALLOWED_METHODS)
+        self.send_header('Access-Control-Allow-Headers', self.ALLOWED_HEADERS)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_json_response(self, status_code: int, data: dict, headers: Optional[Dict[str, str]] = None):
+        """Send JSON response with CORS headers"""
+        body = self.encode_json(data)
+        encoding = self.response_encoding() if len(body) >= COMPRESSION_MIN_BYTES else None
+        if encoding:
+            body = compress(body, encoding)
+
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_extra_headers(headers)
+        self.end_headers()
+        self.wfile_write(body)
+
+    def send_json_list(
+        self,
+        status_code: int,
+        list_key: str,
+        items: List[Any],
+        extra: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Send `{list_key: items, **extra}`, streaming large lists.
+
+        Lists below STREAM_MIN_ITEMS go through send_json_response. Larger
+        lists are encoded STREAM_BATCH_ITEMS at a time and written as they
+        are produced, so the full body is never held in one buffer.
+        """
+        extra = extra or {}
+        if len(items) < STREAM_MIN_ITEMS:
+            self.send_json_response(status_code, {list_key: items, **extra}, headers)
+            return
+
+        encoding = self.response_encoding()
+        chunked = self.protocol_version == 'HTTP/1.1' and getattr(self, 'request_version', '') == 'HTTP/1.1'
+
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            # Without chunking the end of the body is marked by closing
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.send_extra_headers(headers)
+        self.end_headers()
+
+        writer = _StreamWriter(self, encoding, chunked)
+        writer.write(b'{' + self.encode_json(list_key) + b':[')
+        for start in range(0, len(items), STREAM_BATCH_ITEMS):
+            batch = self.encode_json(items[start:start + STREAM_BATCH_ITEMS])
+            writer.write((b',' if start else b'') + batch[1:-1])
+        writer.write(b']')
+        for key, value in extra.items():
+            writer.write(b',' + self.encode_json(key) + b':' + self.encode_json(value))
+        writer.write(b'}')
+        writer.close()
+
+    def send_not_modified(self, headers: Dict[str, str]):
+        """Send 304 Not Modified with the validator `headers` (ETag, Cache-Control) of the 200"""
+        self.send_response(304)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_extra_headers(headers)
+        self.end_headers()
+
+    def send_extra_headers(self, headers: Optional[Dict[str, str]]):
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+
+    def send_error_response(self, status_code: int, message: str):
+        """Send error response"""
+        self.send_json_response(status_code, {
+            'error': message,
+            'status': 'error'
+        })
+
+    def response_encoding(self) -> Optional[str]:
+        """Content coding to use for this request's response, if any"""
+        headers = getattr(self, 'headers', None)
+        if not headers:
+            return None
+        return negotiate_encoding(headers.get('Accept-Encoding', ''))
+
+    def wfile_write(self, data: bytes):
+        """Write raw body bytes to the client"""
+        self.wfile.write(data)
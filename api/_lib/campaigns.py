@@ -0,0 +1,79 @@
+import math
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Fields every new campaign must provide
+REQUIRED_FIELDS = ('name', 'company_id', 'budget')
+
+# SQLSTATE classes PostgREST answers with a 4xx for a row the database
+# rejected: 22 data exception, 23 integrity constraint violation
+ROW_ERROR_CLASSES = ('22', '23')
+
+def build_campaign(data: Any) -> Dict[str, Any]:
+    """
+    Validate a create-campaign payload and return the row to insert.
+
+    Raises ValueError with the message sent back to the client.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Campaign must be a JSON object")
+    
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            raise ValueError(f"Missing required field: {field}")
+    
+    try:
+        budget = float(data['budget'])
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid data: {str(e)}")
+    if not math.isfinite(budget):
+        raise ValueError("Invalid data: budget must be a finite number")
+    
+    return {
+        'name': data['name'],
+        'company_id': data['company_id'],
+        'description': data.get('description', ''),
+        'budget': budget,
+        'target_audience': data.get('target_audience', ''),
+        'status': 'draft',
+        'start_date': data.get('start_date'),
+        'end_date': data.get('end_date')
+    }
+
+def insert_rows(supabase: 'Client', table: str, rows: List[Dict[str, Any]], chunk_size: int) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Insert `rows` with one PostgREST call per `chunk_size` rows.
+
+    Returns (inserted row, None) or (None, error) per input row, in order.
+    A batch insert is all-or-nothing, so a chunk the database rejects is
+    split in half and retried until the failing rows are isolated; the
+    rest still land. Any other error (timeouts, 5xx, connection failures)
+    is raised, since the chunk may have been written and a retry could
+    insert it twice.
+    """
+    results: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = []
+    for start in range(0, len(rows), chunk_size):
+        results.extend(_insert_chunk(supabase, table, rows[start:start + chunk_size]))
+    return results
+
+def _insert_chunk(supabase: 'Client', table: str, rows: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    try:
+        inserted = supabase.table(table).insert(rows).execute().data or []
+    except Exception as e:
+        if not is_row_error(e):
+            raise
+        if len(rows) == 1:
+            return [(None, getattr(e, 'message', None) or str(e))]
+        middle = len(rows) // 2
+        return _insert_chunk(supabase, table, rows[:middle]) + _insert_chunk(supabase, table, rows[middle:])
+    
+    if len(inserted) != len(rows):
+        return [(None, "Insert returned no row")] * len(rows)
+    return [(row, None) for row in inserted]
+
+def is_row_error(error: Exception) -> bool:
+    """True when PostgREST rejected the rows themselves (constraint or data errors)"""
+    code = getattr(error, 'code', None)
+    return isinstance(code, str) and code[:2] in ROW_ERROR_CLASSES
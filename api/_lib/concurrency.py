@@ -0,0 +1,46 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+# Threads shared by every request in a warm instance for fanning out
+# independent blocking lookups (Supabase, Stripe)
+LOOKUP_WORKERS = int(os.environ.get('API_LOOKUP_WORKERS', '8'))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=LOOKUP_WORKERS, thread_name_prefix='lookup')
+    return _pool
+
+def gather(*calls: Callable[[], Any]) -> List[Any]:
+    """
+    Run independent blocking calls concurrently and return their results in order.
+
+    The first call runs on the request thread, so a single call costs no
+    hand-off. If any call raises, the first exception (in call order) is
+    re-raised once all of them have finished.
+    """
+    if not calls:
+        return []
+    
+    futures = [_get_pool().submit(call) for call in calls[1:]]
+    results: List[Any] = []
+    errors: List[BaseException] = []
+    
+    for run in [calls[0]] + [future.result for future in futures]:
+        try:
+            results.append(run())
+        except BaseException as e:
+            errors.append(e)
+            results.append(None)
+    
+    if errors:
+        raise errors[0]
+    return results
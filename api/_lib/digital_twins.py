@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+STEP_FUNCTIONS_REGION = 'us-east-1'
+DEFAULT_STATE_MACHINE_ARN = 'arn:aws:states:us-east-1:ACCOUNT_ID:stateMachine:CreateDigitalTwin'
+
+# HTTP connections the shared client keeps to Step Functions; batch fan-out
+# is capped at this so no call waits for a free connection
+STEP_FUNCTIONS_POOL_SIZE = int(os.environ.get('STEP_FUNCTIONS_POOL_SIZE', '16'))
+
+REQUIRED_FIELDS = ('name', 'company_id', 'training_data_url')
+
+_client: Optional[Any] = None
+_lock = threading.Lock()
+
+def get_step_functions_client() -> Any:
+    """The Step Functions client shared by every request in this warm instance"""
+    global _client
+
+    if _client is not None:
+        return _client
+
+    with _lock:
+        if _client is None:
+            # Imported here so preflights and validation errors skip boto3
+            import boto3
+            from botocore.config import Config
+
+            _client = boto3.client('stepfunctions', region_name=STEP_FUNCTIONS_REGION, config=Config(
+                max_pool_connections=STEP_FUNCTIONS_POOL_SIZE,
+                retries={'mode': 'standard'}
+            ))
+
+    return _client
+
+def reset_step_functions_client() -> None:
+    """Drop the shared client (used by tests)"""
+    global _client
+
+    with _lock:
+        _client = None
+
+def validate_twin(spec: Any) -> None:
+    """Raise ValueError if `spec` cannot start a digital twin"""
+    if not isinstance(spec, dict):
+        raise ValueError("Digital twin must be a JSON object")
+    for field in REQUIRED_FIELDS:
+        if field not in spec:
+            raise ValueError(f"Missing required field: {field}")
+
+def twin_ids(key: Optional[str] = None) -> Tuple[str, str]:
+    """
+    (job_id, digital_twin_id) for a new twin.
+
+    With an idempotency key the IDs derive from it, so a retry reuses the
+    execution name and Step Functions rejects the duplicate.
+    """
+    if key is None:
+        return str(uuid.uuid4()), str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f'{key}:job')), str(uuid.uuid5(uuid.NAMESPACE_URL, f'{key}:digital-twin'))
+
+def start_twin(spec: Dict[str, Any], job_id: str, digital_twin_id: str) -> Dict[str, Any]:
+    """Start one CreateDigitalTwin execution and return the job's tracking fields"""
+    # Prepare Step Function input
+    step_function_input = {
+        'digital_twin_id': digital_twin_id,
+        'name': spec['name'],
+        'company_id': spec['company_id'],
+        'training_data_url': spec['training_data_url'],
+        'description': spec.get('description', ''),
+        'job_id': job_id
+    }
+    # Skip the cached result of an earlier, identical generation
+    if spec.get('force_regenerate'):
+        step_function_input['force_regenerate'] = True
+
+    response = get_step_functions_client().start_execution(
+        stateMachineArn=os.environ.get('STEP_FUNCTION_ARN', DEFAULT_STATE_MACHINE_ARN),
+        name=f"digital-twin-{job_id}",
+        input=json.dumps(step_function_input)
+    )
+
+    return {
+        'job_id': job_id,
+        'digital_twin_id': digital_twin_id,
+        'execution_arn': response['executionArn']
+    }
+
+def start_twins(
+    launches: List[Tuple[Dict[str, Any], str, str]],
+    concurrency: int,
+) -> List[Tuple[Optional[Dict[str, Any]], str]]:
+    """
+    Start many executions, at most `concurrency` in flight.
+
+    Returns (started job, '') or (None, error) per launch, in order.
+    """
+    def launch(item: Tuple[Dict[str, Any], str, str]) -> Tuple[Optional[Dict[str, Any]], str]:
+        try:
+            return start_twin(*item), ''
+        except Exception as e:
+            return None, str(e)
+
+    workers = max(1, min(concurrency, STEP_FUNCTIONS_POOL_SIZE, len(launches)))
+    if workers == 1:
+        return [launch(item) for item in launches]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='twins') as pool:
+        return list(pool.map(launch, launches))
@@ -0,0 +1,447 @@
+import hashlib
+import os
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+from api._lib.supabase_client import get_supabase_client
+
+if TYPE_CHECKING:
+    from supabase import Client
+    from api._lib.base_handler import BaseHandler
+
+# 'postgres' (the idempotency_keys table) or 'sqlite' (a local file, for
+# development and tests)
+IDEMPOTENCY_STORE = os.environ.get('IDEMPOTENCY_STORE', 'postgres')
+IDEMPOTENCY_SQLITE_PATH = os.environ.get('IDEMPOTENCY_SQLITE_PATH', '/tmp/idempotency.sqlite3')
+
+# How long a key and its recorded response are kept
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600)))
+
+# How long an in-progress claim holds its key. A request killed before it
+# completes or releases (a timeout or crash) blocks retries only this long;
+# keep it above the functions' maxDuration
+IDEMPOTENCY_LEASE_SECONDS = float(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', '60'))
+
+# Each instance deletes expired keys from the store at most this often
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = float(os.environ.get('IDEMPOTENCY_PURGE_INTERVAL_SECONDS', '3600'))
+
+# Completed responses kept in memory so warm-instance replays skip the store
+IDEMPOTENCY_CACHE_ENTRIES = int(os.environ.get('IDEMPOTENCY_CACHE_ENTRIES', '1024'))
+
+# How long a duplicate waits for the first request to finish before 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '10'))
+IDEMPOTENCY_POLL_SECONDS = 0.05
+
+# Verified caller ids kept per token, so retries and a handler's repeated
+# request_key calls skip the Supabase Auth round trip
+IDEMPOTENCY_CALLER_CACHE_SECONDS = float(os.environ.get('IDEMPOTENCY_CALLER_CACHE_SECONDS', '60'))
+IDEMPOTENCY_CALLER_CACHE_ENTRIES = int(os.environ.get('IDEMPOTENCY_CALLER_CACHE_ENTRIES', '1024'))
+
+MAX_KEY_LENGTH = 255
+
+UNIQUE_VIOLATION = '23505'
+
+class Record:
+    """What a store knows about a key"""
+    __slots__ = ('request_hash', 'completed', 'response_status', 'response_body')
+
+    def __init__(self, request_hash: str, completed: bool, response_status: Optional[int] = None, response_body: Any = None):
+        self.request_hash = request_hash
+        self.completed = completed
+        self.response_status = response_status
+        self.response_body = response_body
+
+class PostgresIdempotencyStore:
+    """Keys in the idempotency_keys table; the primary key makes claims atomic"""
+
+    table = 'idempotency_keys'
+
+    def __init__(self, supabase: 'Client'):
+        self.supabase = supabase
+
+    def claim(self, key: str, request_hash: str, lease_seconds: float) -> Optional[Record]:
+        """
+        Claim `key` for this request for `lease_seconds` (None), or return
+        the record that holds it. A claim whose lease ran out is taken over.
+        """
+        for _ in range(2):
+            try:
+                self.supabase.table(self.table).insert({
+                    'key': key,
+                    'request_hash': request_hash,
+                    'status': 'in_progress',
+                    'expires_at': _timestamp(time.time() + lease_seconds)
+                }).execute()
+                return None
+            except Exception as e:
+                if getattr(e, 'code', None) != UNIQUE_VIOLATION:
+                    raise
+            
+            record = self.get(key)
+            if record is not None:
+                return record
+            
+            # The holder expired, or its lease ran out; clear it and claim again
+            self.supabase.table(self.table).delete().eq('key', key).lte('expires_at', _timestamp(time.time())).execute()
+        raise RuntimeError("Could not claim idempotency key")
+
+    def get(self, key: str) -> Optional[Record]:
+        result = self.supabase.table(self.table).select(
+            'request_hash, status, response_status, response_body'
+        ).eq('key', key).gt('expires_at', _timestamp(time.time())).limit(1).execute()
+        rows = result.data or []
+        if not rows:
+            return None
+        row = rows[0]
+        return Record(row['request_hash'], row['status'] == 'completed', row.get('response_status'), row.get('response_body'))
+
+    def complete(self, key: str, response_status: int, response_body: Any, ttl_seconds: float) -> None:
+        self.supabase.table(self.table).update({
+            'status': 'completed',
+            'response_status': response_status,
+            'response_body': response_body,
+            'expires_at': _timestamp(time.time() + ttl_seconds)
+        }).eq('key', key).execute()
+
+    def release(self, key: str) -> None:
+        self.supabase.table(self.table).delete().eq('key', key).eq('status', 'in_progress').execute()
+
+    def purge_expired(self) -> int:
+        result = self.supabase.rpc('purge_expired_idempotency_keys').execute()
+        return result.data or 0
+
+class SQLiteIdempotencyStore:
+    """The same store in a local SQLite file, for development and tests"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS idempotency_keys ('
+            ' key TEXT PRIMARY KEY, request_hash TEXT NOT NULL, status TEXT NOT NULL,'
+            ' response_status INTEGER, response_body TEXT, expires_at REAL NOT NULL)'
+        )
+
+    def claim(self, key: str, request_hash: str, lease_seconds: float) -> Optional[Record]:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so claims from other
+            # processes sharing the file serialize too
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM idempotency_keys WHERE key = ? AND expires_at <= ?', (key, now))
+                try:
+                    self._conn.execute(
+                        "INSERT INTO idempotency_keys (key, request_hash, status, expires_at) VALUES (?, ?, 'in_progress', ?)",
+                        (key, request_hash, now + lease_seconds)
+                    )
+                    record = None
+                except sqlite3.IntegrityError:
+                    record = self._get(key)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return record
+
+    def get(self, key: str) -> Optional[Record]:
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[Record]:
+        row = self._conn.execute(
+            'SELECT request_hash, status, response_status, response_body FROM idempotency_keys WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return Record(row[0], row[1] == 'completed', row[2], json.loads(row[3]) if row[3] is not None else None)
+
+    def complete(self, key: str, response_status: int, response_body: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET status = 'completed', response_status = ?, response_body = ?, expires_at = ? WHERE key = ?",
+                (response_status, json.dumps(response_body, default=str), time.time() + ttl_seconds, key)
+            )
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND status = 'in_progress'", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute('DELETE FROM idempotency_keys WHERE expires_at <= ?', (time.time(),)).rowcount
+
+class Outcome:
+    """Result of starting a request under an idempotency key"""
+    PROCEED = 'proceed'
+    REPLAY = 'replay'
+    MISMATCH = 'mismatch'
+    IN_PROGRESS = 'in_progress'
+
+    __slots__ = ('kind', 'record')
+
+    def __init__(self, kind: str, record: Optional[Record] = None):
+        self.kind = kind
+        self.record = record
+
+class IdempotencyKeys:
+    """
+    Records the first response per key and replays it for retries.
+
+    A bounded in-memory LRU of completed responses sits in front of the
+    store. A duplicate that arrives while the first request is still
+    running waits up to `wait_seconds` for its response, then gives up.
+    The first request holds the key for `lease_seconds` until it completes,
+    when the response is kept for `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        lease_seconds: float = IDEMPOTENCY_LEASE_SECONDS,
+        purge_interval_seconds: float = IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+        cache_entries: int = IDEMPOTENCY_CACHE_ENTRIES,
+        wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.cache_entries = cache_entries
+        self.wait_seconds = wait_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self._cache: 'OrderedDict[str, Tuple[float, Record]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self.stats = {'cache_hits': 0, 'replays': 0, 'claims': 0, 'waits': 0, 'purged': 0}
+
+    def begin(self, key: str, request_hash: str) -> Outcome:
+        record = self._cached(key)
+        if record is not None:
+            self.stats['cache_hits'] += 1
+            return self._finished(record, request_hash)
+        
+        deadline = self.clock() + self.wait_seconds
+        while True:
+            record = self.store.claim(key, request_hash, self.lease_seconds)
+            if record is None:
+                self.stats['claims'] += 1
+                return Outcome(Outcome.PROCEED)
+            if record.request_hash != request_hash:
+                return Outcome(Outcome.MISMATCH)
+            if record.completed:
+                self._remember(key, record)
+                return self._finished(record, request_hash)
+            if self.clock() >= deadline:
+                return Outcome(Outcome.IN_PROGRESS)
+            self.stats['waits'] += 1
+            self.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+    def complete(self, key: str, request_hash: str, response_status: int, response_body: Any) -> None:
+        self.store.complete(key, response_status, response_body, self.ttl_seconds)
+        self._remember(key, Record(request_hash, True, response_status, response_body))
+
+    def release(self, key: str) -> None:
+        self.store.release(key)
+
+    def purge_expired(self) -> int:
+        """Delete expired keys from the store, at most once per purge interval"""
+        with self._lock:
+            now = self.clock()
+            if now < self._next_purge:
+                return 0
+            self._next_purge = now + self.purge_interval_seconds
+        purged = self.store.purge_expired()
+        self.stats['purged'] += purged
+        return purged
+
+    def _finished(self, record: Record, request_hash: str) -> Outcome:
+        if record.request_hash != request_hash:
+            return Outcome(Outcome.MISMATCH)
+        self.stats['replays'] += 1
+        return Outcome(Outcome.REPLAY, record)
+
+    def _cached(self, key: str) -> Optional[Record]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _remember(self, key: str, record: Record) -> None:
+        with self._lock:
+            self._cache[key] = (self.clock() + self.ttl_seconds, record)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+_keys: Optional[IdempotencyKeys] = None
+_keys_lock = threading.Lock()
+
+def get_idempotency_keys() -> Optional[IdempotencyKeys]:
+    """The instance's IdempotencyKeys, or None if its store is not configured"""
+    global _keys
+    
+    if _keys is not None:
+        return _keys
+    
+    with _keys_lock:
+        if _keys is None:
+            if IDEMPOTENCY_STORE == 'sqlite':
+                _keys = IdempotencyKeys(SQLiteIdempotencyStore(IDEMPOTENCY_SQLITE_PATH))
+            else:
+                supabase = get_supabase_client()
+                if supabase is None:
+                    return None
+                _keys = IdempotencyKeys(PostgresIdempotencyStore(supabase))
+    
+    return _keys
+
+_callers: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+_callers_lock = threading.Lock()
+
+def reset_idempotency_keys() -> None:
+    global _keys
+    
+    with _keys_lock:
+        _keys = None
+    with _callers_lock:
+        _callers.clear()
+
+def caller_id(handler: 'BaseHandler') -> Optional[str]:
+    """
+    Supabase user id for the request's bearer token, or None if the token
+    is missing or does not verify.
+    """
+    auth_header = handler.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    token = auth_header[7:]
+    digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    now = time.monotonic()
+    
+    with _callers_lock:
+        cached = _callers.get(digest)
+        if cached is not None and cached[0] > now:
+            _callers.move_to_end(digest)
+            return cached[1]
+    
+    supabase = get_supabase_client()
+    if supabase is None:
+        return None
+    try:
+        user = supabase.auth.get_user(token).user
+    except Exception as e:
+        print(f"Idempotency caller verification failed: {str(e)}")
+        return None
+    if user is None:
+        return None
+    
+    with _callers_lock:
+        _callers[digest] = (now + IDEMPOTENCY_CALLER_CACHE_SECONDS, user.id)
+        _callers.move_to_end(digest)
+        while len(_callers) > IDEMPOTENCY_CALLER_CACHE_ENTRIES:
+            _callers.popitem(last=False)
+    return user.id
+
+def request_key(handler: 'BaseHandler', scope: str) -> Optional[str]:
+    """
+    Store key for the request's Idempotency-Key header, or None if the
+    header is absent or the caller cannot be verified.
+
+    Keys are namespaced by endpoint and verified user id, so one user's
+    key can never replay another user's response, while a retry with a
+    refreshed token (or from another device) still finds the original.
+    """
+    key = handler.headers.get('Idempotency-Key')
+    if key is None:
+        return None
+    caller = caller_id(handler)
+    if caller is None:
+        return None
+    return f'{scope}:{caller}:{key}'
+
+def respond_idempotently(
+    handler: 'BaseHandler',
+    scope: str,
+    request_body: bytes,
+    action: Callable[[], Tuple[int, Dict[str, Any]]],
+) -> None:
+    """
+    Run `action` and send its (status, data) once per Idempotency-Key.
+
+    Without the header `action` simply runs. With it, a token that does
+    not verify is a 401, a retry gets the recorded first response (marked Idempotent-Replayed), reusing a key
+    for a different body is a 422, and a duplicate still running after
+    IDEMPOTENCY_WAIT_SECONDS is a 409 (until the first request's lease
+    runs out). 5xx responses are not recorded, so the client can retry them.
+    """
+    raw_key = handler.headers.get('Idempotency-Key')
+    if raw_key is None:
+        status, data = action()
+        handler.send_json_response(status, data)
+        return
+    
+    if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+        handler.send_error_response(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+        return
+    
+    key = request_key(handler, scope)
+    if key is None:
+        handler.send_error_response(401, "Invalid or expired authorization token")
+        return
+    
+    keys = get_idempotency_keys()
+    if keys is None:
+        handler.send_error_response(500, "Idempotency store unavailable")
+        return
+    
+    request_hash = hashlib.sha256(request_body).hexdigest()
+    outcome = keys.begin(key, request_hash)
+    
+    if outcome.kind == Outcome.REPLAY:
+        handler.send_json_response(outcome.record.response_status, outcome.record.response_body, {
+            'Idempotent-Replayed': 'true'
+        })
+        return
+    if outcome.kind == Outcome.MISMATCH:
+        handler.send_error_response(422, "Idempotency-Key was already used with a different request body")
+        return
+    if outcome.kind == Outcome.IN_PROGRESS:
+        handler.send_error_response(409, "A request with this Idempotency-Key is still in progress")
+        return
+    
+    try:
+        status, data = action()
+    except BaseException:
+        keys.release(key)
+        raise
+    
+    if status >= 500:
+        keys.release(key)
+    else:
+        keys.complete(key, request_hash, status, data)
+    handler.send_json_response(status, data)
+    
+    # Expired keys are only cleared in place when reused; purge the rest
+    # once the response is out
+    try:
+        keys.purge_expired()
+    except Exception as e:
+        print(f"Purging expired idempotency keys failed: {str(e)}")
+
+def _timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
@@ -0,0 +1,45 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Optional
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Lets handlers keep `stripe.checkout.Session.create(...)`-style call
+    sites while OPTIONS preflights and early validation errors never pay
+    for importing the SDK.
+    """
+
+    def __init__(self, name: str, on_load: Optional[Callable[[ModuleType], None]] = None):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_on_load', on_load)
+        object.__setattr__(self, '_module', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with self._lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    object.__setattr__(self, '_module', module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+def lazy_import(name: str, on_load: Optional[Callable[[ModuleType], None]] = None) -> LazyModule:
+    """Return a LazyModule for `name`; `on_load` runs once after the real import"""
+    return LazyModule(name, on_load)
@@ -0,0 +1,55 @@
+import hashlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Version scopes maintained by the triggers in
+# supabase/migrations/*_listing_versions.sql
+AGENTS_SCOPE = 'agents'
+
+def campaigns_scope(company_id: str) -> str:
+    return f'campaigns:{company_id}'
+
+def listing_version(supabase: 'Client', scope: str) -> int:
+    """
+    Current version stamp for `scope`, bumped by a trigger on every write
+    to the rows behind it. A scope that was never written is version 0.
+    """
+    result = supabase.table('listing_versions').select('version').eq('scope', scope).limit(1).execute()
+    rows = result.data or []
+    return int(rows[0]['version']) if rows else 0
+
+def make_etag(scope: str, version: int, *variant: Any) -> str:
+    """
+    Strong ETag for a listing at `version`.
+
+    `variant` covers everything else that changes the bytes sent for the
+    same data (page parameters, content coding), so each representation
+    gets its own validator.
+    """
+    key = '\x1f'.join(str(part) for part in (scope, version) + variant)
+    return '"' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match evaluation (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def validator_headers(etag: str) -> dict:
+    """Headers sent with both the 200 and the 304 for a versioned listing"""
+    return {
+        'ETag': etag,
+        # Browsers revalidate every poll; the ETag turns repeats into 304s
+        'Cache-Control': 'private, no-cache',
+        'Access-Control-Expose-Headers': 'ETag',
+    }
@@ -0,0 +1,53 @@
+import base64
+import json
+from typing import Any, Iterable, List, Optional, Sequence
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort-key values of the last row on a page"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort-key values from `cursor`; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+def parse_page_size(value: Optional[str], default: int, maximum: int) -> int:
+    """Requested page size, clamped to [1, maximum]; raises ValueError if not a number"""
+    if value in (None, ''):
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return max(1, min(size, maximum))
+
+def parse_fields(value: Optional[str], allowed: Iterable[str], required: Sequence[str]) -> str:
+    """
+    PostgREST select list for a `fields=` projection.
+
+    Unknown columns raise ValueError; `required` columns (the sort keys the
+    cursor is built from) are always included. No projection selects '*'.
+    """
+    if not value:
+        return '*'
+
+    allowed = set(allowed)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    columns = list(required) + [field for field in fields if field not in required]
+    return ','.join(dict.fromkeys(columns))
+
+def quote_filter_value(value: Any) -> str:
+    """Quote a value for use inside a PostgREST or=/and= logic tree"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# How long a warm instance trusts a cached agent payout account. The
+# account.updated webhook invalidates entries early on the instance that
+# receives it; the TTL bounds staleness everywhere else.
+PAYOUT_ACCOUNT_TTL_SECONDS = float(os.environ.get('PAYOUT_ACCOUNT_TTL_SECONDS', '30'))
+PAYOUT_ACCOUNT_CACHE_ENTRIES = int(os.environ.get('PAYOUT_ACCOUNT_CACHE_ENTRIES', '4096'))
+
+class PayoutAccountCache:
+    """
+    Per-process cache of each agent's name and `stripe_account_id`.
+
+    Only agents that have finished Stripe onboarding are cached, so an
+    agent who completes it is picked up on their next checkout. A load
+    that races an invalidation is not stored.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = PAYOUT_ACCOUNT_TTL_SECONDS,
+        max_entries: int = PAYOUT_ACCOUNT_CACHE_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0}
+
+    def get(self, supabase: 'Client', agent_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        `({'name', 'stripe_account_id'}, cached)` for the agent; the account
+        is None if the agent does not exist
+        """
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(agent_id)
+                self.stats['hits'] += 1
+                return dict(entry[1]), True
+            generation = self._generation
+        
+        result = supabase.table('agents').select('name, stripe_account_id').eq('id', agent_id).single().execute()
+        account = result.data
+        
+        with self._lock:
+            self.stats['loads'] += 1
+            if account and account.get('stripe_account_id') and generation == self._generation:
+                self._entries[agent_id] = (self.clock() + self.ttl_seconds, dict(account))
+                self._entries.move_to_end(agent_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        
+        return account, False
+
+    def invalidate_account(self, stripe_account_id: str) -> None:
+        """Drop every agent paid out to `stripe_account_id`"""
+        with self._lock:
+            self._generation += 1
+            for agent_id, (_, account) in list(self._entries.items()):
+                if account.get('stripe_account_id') == stripe_account_id:
+                    del self._entries[agent_id]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+PAYOUT_ACCOUNTS = PayoutAccountCache()
@@ -0,0 +1,152 @@
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from api._lib.lazy import lazy_import
+
+# Imported on first ranking so the listing endpoint's cold start skips it
+np = lazy_import('numpy')
+
+# Relative weight of each signal in an agent's match score (they sum to 1)
+RANKING_WEIGHTS = {
+    'match': float(os.environ.get('RANKING_WEIGHT_MATCH', '0.5')),
+    'budget': float(os.environ.get('RANKING_WEIGHT_BUDGET', '0.2')),
+    'rating': float(os.environ.get('RANKING_WEIGHT_RATING', '0.2')),
+    'experience': float(os.environ.get('RANKING_WEIGHT_EXPERIENCE', '0.1')),
+}
+
+# Hours of agent time a campaign budget is assumed to pay for
+CAMPAIGN_HOURS = float(os.environ.get('RANKING_CAMPAIGN_HOURS', '40'))
+
+# Rating assumed for agents without completed campaigns
+RATING_PRIOR = 3.5
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased word tokens of `text`, without stopwords and single letters"""
+    return [
+        token for token in _TOKEN.findall((text or '').lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+def campaign_terms(campaign: Dict[str, Any]) -> List[str]:
+    """Distinct tokens a campaign is matched on"""
+    text = ' '.join(str(campaign.get(field) or '') for field in ('name', 'description', 'target_audience'))
+    return sorted(set(tokenize(text)))
+
+class AgentRanker:
+    """
+    Scores a certified-agent pool against a campaign in one vectorized pass.
+
+    Built once per pool load: specialization tokens become an inverted
+    index (token -> agent positions) with idf weights, and rate, rating
+    and completed campaigns become float arrays. Ranking a campaign adds
+    idf^2 along the postings of its tokens (a cosine match), combines it
+    with budget fit, rating and experience, then finds the k-th best score
+    with np.partition and lexsorts only the candidates at or above it
+    instead of sorting the whole pool.
+
+    `entries` are pool entries with `company_id`, `specialization`,
+    `tokens`, `rate`, `rating` and `completed` attributes, in pool order.
+    """
+
+    def __init__(self, entries: Sequence[Any]):
+        count = len(entries)
+        self.size = count
+
+        postings: Dict[str, List[int]] = {}
+        for position, entry in enumerate(entries):
+            for token in set(entry.tokens):
+                postings.setdefault(token, []).append(position)
+
+        self.postings = {token: np.asarray(positions, dtype=np.int64) for token, positions in postings.items()}
+        self.idf = {token: math.log(1.0 + count / len(positions)) for token, positions in postings.items()}
+
+        norm_squared = np.zeros(count, dtype=np.float64)
+        for token, positions in self.postings.items():
+            norm_squared[positions] += self.idf[token] ** 2
+        self.norm = np.sqrt(norm_squared)
+
+        rates = np.array([entry.rate if entry.rate is not None else np.nan for entry in entries], dtype=np.float64)
+        median_rate = float(np.nanmedian(rates)) if count and not np.isnan(rates).all() else 0.0
+        self.rate = np.where(np.isnan(rates), median_rate, rates)
+
+        ratings = np.array([entry.rating if entry.rating is not None else RATING_PRIOR for entry in entries], dtype=np.float64)
+        self.rating = ratings / 5.0
+
+        completed = np.log1p(np.array([entry.completed for entry in entries], dtype=np.float64))
+        self.experience = completed / completed.max() if count and completed.max() > 0 else completed
+
+        self.company_codes, self.company_index = self._codes(entry.company_id for entry in entries)
+        self.specialization_codes, self.specialization_index = self._codes(entry.specialization for entry in entries)
+
+    @staticmethod
+    def _codes(values) -> Tuple[Any, Dict[Any, int]]:
+        index: Dict[Any, int] = {}
+        codes = [index.setdefault(value, len(index)) for value in values]
+        return np.asarray(codes, dtype=np.int64), index
+
+    def scores(self, campaign: Dict[str, Any]):
+        """Match score in [0, 1] for every agent in the pool"""
+        match = np.zeros(self.size, dtype=np.float64)
+        terms = [token for token in campaign_terms(campaign) if token in self.postings]
+        if terms:
+            for token in terms:
+                match[self.postings[token]] += self.idf[token] ** 2
+            campaign_norm = math.sqrt(sum(self.idf[token] ** 2 for token in terms))
+            np.divide(match, self.norm * campaign_norm, out=match, where=self.norm > 0)
+
+        budget = float(campaign.get('budget') or 0)
+        if budget > 0:
+            affordable_rate = budget / CAMPAIGN_HOURS
+            budget_fit = np.minimum(1.0, affordable_rate / np.maximum(self.rate, 1e-9))
+        else:
+            budget_fit = np.ones(self.size, dtype=np.float64)
+
+        return (
+            RANKING_WEIGHTS['match'] * match
+            + RANKING_WEIGHTS['budget'] * budget_fit
+            + RANKING_WEIGHTS['rating'] * self.rating
+            + RANKING_WEIGHTS['experience'] * self.experience
+        )
+
+    def top(
+        self,
+        campaign: Dict[str, Any],
+        exclude_company_id: Optional[str] = None,
+        specializations: Sequence[str] = (),
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[List[Tuple[int, float]], bool]:
+        """
+        (pool position, score) for ranks offset..offset+limit of the eligible
+        agents, best first with ties in pool order, and whether more follow.
+        """
+        scores = self.scores(campaign)
+
+        eligible = np.ones(self.size, dtype=bool)
+        excluded = self.company_index.get(exclude_company_id) if exclude_company_id is not None else None
+        if excluded is not None:
+            eligible &= self.company_codes != excluded
+        if specializations:
+            wanted = [self.specialization_index[s.lower()] for s in specializations if s.lower() in self.specialization_index]
+            eligible &= np.isin(self.specialization_codes, wanted)
+
+        candidates = np.flatnonzero(eligible)
+        k = offset + limit + 1
+        if k < len(candidates):
+            # Only the best k need ordering. Keep everything tied with the
+            # k-th score so ties resolve in pool order on every page
+            candidate_scores = scores[candidates]
+            kth = np.partition(-candidate_scores, k - 1)[k - 1]
+            candidates = candidates[candidate_scores >= -kth]
+        ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+        page = ordered[offset:offset + limit]
+        has_more = len(ordered) > offset + limit
+        return [(int(position), float(scores[position])) for position in page], has_more
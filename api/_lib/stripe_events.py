@@ -0,0 +1,360 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+from api._lib.supabase_client import get_supabase_client
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# 'postgres' (the stripe_events table) or 'sqlite' (a local file, for
+# development and tests)
+STRIPE_EVENT_QUEUE = os.environ.get('STRIPE_EVENT_QUEUE', 'postgres')
+STRIPE_EVENT_QUEUE_PATH = os.environ.get('STRIPE_EVENT_QUEUE_PATH', '/tmp/stripe_events.sqlite3')
+
+# Events claimed per round trip, and how long a claim hides them from other
+# workers before they are retried as if the worker had crashed
+STRIPE_EVENTS_BATCH_SIZE = int(os.environ.get('STRIPE_EVENTS_BATCH_SIZE', '100'))
+STRIPE_EVENTS_LEASE_SECONDS = float(os.environ.get('STRIPE_EVENTS_LEASE_SECONDS', '120'))
+
+# Failed events are retried after BACKOFF * 2^(attempt-1) seconds, capped,
+# and parked as 'dead' after MAX_ATTEMPTS
+STRIPE_EVENTS_BACKOFF_SECONDS = float(os.environ.get('STRIPE_EVENTS_BACKOFF_SECONDS', '30'))
+STRIPE_EVENTS_MAX_BACKOFF_SECONDS = float(os.environ.get('STRIPE_EVENTS_MAX_BACKOFF_SECONDS', '3600'))
+STRIPE_EVENTS_MAX_ATTEMPTS = int(os.environ.get('STRIPE_EVENTS_MAX_ATTEMPTS', '8'))
+
+# Recently handled event ids remembered per instance, so redeliveries are
+# acked (and re-claimed events skipped) without touching the database
+STRIPE_SEEN_EVENT_IDS = int(os.environ.get('STRIPE_SEEN_EVENT_IDS', '10000'))
+
+UNIQUE_VIOLATION = '23505'
+
+class QueuedEvent:
+    __slots__ = ('event_id', 'type', 'payload', 'attempts')
+
+    def __init__(self, event_id: str, type: str, payload: Dict[str, Any], attempts: int):
+        self.event_id = event_id
+        self.type = type
+        self.payload = payload
+        self.attempts = attempts
+
+class SeenEvents:
+    """Bounded set of recently handled event ids; the oldest are forgotten first"""
+
+    def __init__(self, max_entries: int = STRIPE_SEEN_EVENT_IDS):
+        self.max_entries = max_entries
+        self._ids: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, event_id: str) -> bool:
+        with self._lock:
+            return event_id in self._ids
+
+    def add(self, event_ids: Iterable[str]) -> None:
+        with self._lock:
+            for event_id in event_ids:
+                self._ids[event_id] = None
+                self._ids.move_to_end(event_id)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+# Events this instance has queued (webhook) and applied (worker). Kept
+# apart so a warm instance serving both never skips an unapplied event.
+QUEUED_EVENTS = SeenEvents()
+APPLIED_EVENTS = SeenEvents()
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retrying an event that has failed `attempts` times"""
+    return min(STRIPE_EVENTS_BACKOFF_SECONDS * 2 ** (attempts - 1), STRIPE_EVENTS_MAX_BACKOFF_SECONDS)
+
+class PostgresEventQueue:
+    """Events in the stripe_events table; claims use FOR UPDATE SKIP LOCKED"""
+
+    table = 'stripe_events'
+
+    def __init__(self, supabase: 'Client'):
+        self.supabase = supabase
+
+    def enqueue(self, event_id: str, type: str, payload: Dict[str, Any]) -> bool:
+        """Append an event; False if it was already queued (a Stripe redelivery)"""
+        try:
+            self.supabase.table(self.table).insert({
+                'event_id': event_id,
+                'type': type,
+                'payload': payload
+            }).execute()
+            return True
+        except Exception as e:
+            if getattr(e, 'code', None) == UNIQUE_VIOLATION:
+                return False
+            raise
+
+    def claim(self, batch_size: int, lease_seconds: float) -> List[QueuedEvent]:
+        result = self.supabase.rpc('claim_stripe_events', {
+            'batch_size': batch_size,
+            'lease_seconds': lease_seconds
+        }).execute()
+        return [
+            QueuedEvent(row['event_id'], row['type'], row['payload'], row['attempts'])
+            for row in result.data or []
+        ]
+
+    def complete(self, event_ids: List[str]) -> None:
+        if event_ids:
+            self.supabase.table(self.table).update({
+                'status': 'done',
+                'processed_at': _timestamp(time.time())
+            }).in_('event_id', event_ids).execute()
+
+    def retry(self, event_id: str, error: str, delay_seconds: float) -> None:
+        self.supabase.table(self.table).update({
+            'available_at': _timestamp(time.time() + delay_seconds),
+            'last_error': error
+        }).eq('event_id', event_id).execute()
+
+    def bury(self, event_id: str, error: str) -> None:
+        self.supabase.table(self.table).update({
+            'status': 'dead',
+            'last_error': error
+        }).eq('event_id', event_id).execute()
+
+class SQLiteEventQueue:
+    """The same queue in a local SQLite file, for development and tests"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS stripe_events ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT, event_id TEXT NOT NULL UNIQUE, type TEXT NOT NULL,'
+            " payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,"
+            ' available_at REAL NOT NULL, last_error TEXT, received_at REAL NOT NULL, processed_at REAL)'
+        )
+
+    def enqueue(self, event_id: str, type: str, payload: Dict[str, Any]) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO stripe_events (event_id, type, payload, available_at, received_at) VALUES (?, ?, ?, ?, ?)',
+                (event_id, type, json.dumps(payload), now, now)
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, batch_size: int, lease_seconds: float) -> List[QueuedEvent]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    "SELECT event_id, type, payload, attempts FROM stripe_events"
+                    " WHERE status = 'pending' AND available_at <= ? ORDER BY seq LIMIT ?",
+                    (now, batch_size)
+                ).fetchall()
+                self._conn.executemany(
+                    'UPDATE stripe_events SET attempts = attempts + 1, available_at = ? WHERE event_id = ?',
+                    [(now + lease_seconds, row[0]) for row in rows]
+                )
+            except BaseException:
+                # A half-applied claim would lease some rows without returning them
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return [QueuedEvent(row[0], row[1], json.loads(row[2]), row[3] + 1) for row in rows]
+
+    def complete(self, event_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE stripe_events SET status = 'done', processed_at = ? WHERE event_id = ?",
+                [(time.time(), event_id) for event_id in event_ids]
+            )
+
+    def retry(self, event_id: str, error: str, delay_seconds: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE stripe_events SET available_at = ?, last_error = ? WHERE event_id = ?',
+                (time.time() + delay_seconds, error, event_id)
+            )
+
+    def bury(self, event_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE stripe_events SET status = 'dead', last_error = ? WHERE event_id = ?",
+                (error, event_id)
+            )
+
+_queue: Optional[Any] = None
+_queue_lock = threading.Lock()
+
+def get_event_queue() -> Optional[Any]:
+    """The instance's event queue, or None if its store is not configured"""
+    global _queue
+
+    if _queue is not None:
+        return _queue
+
+    with _queue_lock:
+        if _queue is None:
+            if STRIPE_EVENT_QUEUE == 'sqlite':
+                _queue = SQLiteEventQueue(STRIPE_EVENT_QUEUE_PATH)
+            else:
+                supabase = get_supabase_client()
+                if supabase is None:
+                    return None
+                _queue = PostgresEventQueue(supabase)
+
+    return _queue
+
+def reset_event_queue() -> None:
+    global _queue
+
+    with _queue_lock:
+        _queue = None
+
+def apply_event(supabase: 'Client', event: QueuedEvent) -> None:
+    """Write one verified Stripe event's effects to Supabase"""
+    if event.type == 'checkout.session.completed':
+        session = event.payload['data']['object']
+
+        # Extract metadata
+        campaign_id = session['metadata']['campaign_id']
+        agent_id = session['metadata']['agent_id']
+
+        # Update campaign invitation status to 'paid'
+        supabase.table('campaign_invitations').update({
+            'status': 'paid',
+            'payment_session_id': session['id'],
+            'amount_paid': session['amount_total']
+        }).eq('campaign_id', campaign_id).eq('agent_id', agent_id).execute()
+
+        print(f"Payment completed for campaign {campaign_id}, agent {agent_id}")
+
+    elif event.type == 'account.updated':
+        account = event.payload['data']['object']
+
+        # Update agent onboarding status if charges are enabled
+        if account['charges_enabled']:
+            supabase.table('agents').update({
+                'onboarding_completed': True
+            }).eq('stripe_account_id', account['id']).execute()
+
+            print(f"Agent onboarding completed for account {account['id']}")
+
+def apply_events(supabase: 'Client', events: List[QueuedEvent]) -> Dict[str, int]:
+    """
+    Write a batch of events' effects with one set-based statement per kind.
+
+    Payments are collapsed to the latest session per (campaign_id,
+    agent_id) and applied through apply_stripe_payments(); accounts are
+    collapsed per stripe_account_id and marked onboarded with a single
+    update. Onboarding is never revoked, so an account counts as onboarded
+    if any of its events had charges enabled. Returns the round trips made.
+    """
+    payments: Dict[Tuple[str, str], Tuple[int, Dict[str, Any]]] = {}
+    onboarded = set()
+
+    for event in events:
+        if event.type == 'checkout.session.completed':
+            session = event.payload['data']['object']
+            key = (session['metadata']['campaign_id'], session['metadata']['agent_id'])
+            created = event.payload.get('created') or 0
+            # Later events win; claim order breaks ties
+            if key not in payments or created >= payments[key][0]:
+                payments[key] = (created, {
+                    'campaign_id': key[0],
+                    'agent_id': key[1],
+                    'payment_session_id': session['id'],
+                    'amount_paid': session['amount_total']
+                })
+
+        elif event.type == 'account.updated':
+            account = event.payload['data']['object']
+            if account['charges_enabled']:
+                onboarded.add(account['id'])
+
+    writes = {'payments': 0, 'accounts': 0}
+
+    if payments:
+        supabase.rpc('apply_stripe_payments', {
+            'payments': [payment for _, payment in payments.values()]
+        }).execute()
+        writes['payments'] = len(payments)
+
+    if onboarded:
+        supabase.table('agents').update({
+            'onboarding_completed': True
+        }).in_('stripe_account_id', sorted(onboarded)).execute()
+        writes['accounts'] = len(onboarded)
+
+    print(f"Applied {len(events)} Stripe events: {writes['payments']} payments, {writes['accounts']} onboarded accounts")
+    return writes
+
+def drain(
+    queue: Any,
+    supabase: 'Client',
+    batch_size: int = STRIPE_EVENTS_BATCH_SIZE,
+    time_budget_seconds: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Apply queued events batch by batch until the queue is empty or the
+    time budget is spent.
+
+    Each batch is coalesced and applied with apply_events and marked done
+    with one write. If that fails, the batch falls back to one event at a
+    time so a single bad event cannot hold up the rest: a failed event is
+    retried with exponential backoff, and parked as 'dead' once it has
+    failed STRIPE_EVENTS_MAX_ATTEMPTS times.
+    """
+    deadline = time.monotonic() + time_budget_seconds if time_budget_seconds is not None else None
+    report = {'batches': 0, 'processed': 0, 'retried': 0, 'dead': 0}
+
+    while deadline is None or time.monotonic() < deadline:
+        events = queue.claim(batch_size, STRIPE_EVENTS_LEASE_SECONDS)
+        if not events:
+            break
+
+        # Already applied by this instance (e.g. its lease ran out before
+        # the batch was marked done)
+        done = [event.event_id for event in events if event.event_id in APPLIED_EVENTS]
+        fresh = [event for event in events if event.event_id not in APPLIED_EVENTS]
+
+        try:
+            if fresh:
+                apply_events(supabase, fresh)
+            done.extend(event.event_id for event in fresh)
+        except Exception as e:
+            print(f"Batch of {len(fresh)} Stripe events failed, applying one by one: {str(e)}")
+            for event in fresh:
+                try:
+                    apply_event(supabase, event)
+                    done.append(event.event_id)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+                    if event.attempts >= STRIPE_EVENTS_MAX_ATTEMPTS:
+                        print(f"Stripe event {event.event_id} failed {event.attempts} times, giving up: {error}")
+                        queue.bury(event.event_id, error)
+                        report['dead'] += 1
+                    else:
+                        queue.retry(event.event_id, error, backoff_seconds(event.attempts))
+                        report['retried'] += 1
+
+        APPLIED_EVENTS.add(done)
+        queue.complete(done)
+        report['batches'] += 1
+        report['processed'] += len(done)
+
+        if len(events) < batch_size:
+            break
+
+    return report
+
+def _timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
@@ -0,0 +1,318 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import stripe
+from stripe import APIConnectionError, HTTPClient
+
+# Connection pool and timeouts for the shared Stripe HTTP client
+STRIPE_POOL_SIZE = int(os.environ.get('STRIPE_POOL_SIZE', '10'))
+STRIPE_CONNECT_TIMEOUT = float(os.environ.get('STRIPE_CONNECT_TIMEOUT', '5'))
+STRIPE_READ_TIMEOUT = float(os.environ.get('STRIPE_READ_TIMEOUT', '30'))
+STRIPE_KEEPALIVE_EXPIRY = float(os.environ.get('STRIPE_KEEPALIVE_EXPIRY', '60'))
+
+# Retries for 409, 429, 5xx and connection errors: full-jitter exponential
+# backoff, unless Stripe sends Retry-After (capped at STRIPE_MAX_RETRY_AFTER)
+STRIPE_MAX_RETRIES = int(os.environ.get('STRIPE_MAX_RETRIES', '3'))
+STRIPE_RETRY_BASE_SECONDS = float(os.environ.get('STRIPE_RETRY_BASE_SECONDS', '0.5'))
+STRIPE_RETRY_MAX_SECONDS = float(os.environ.get('STRIPE_RETRY_MAX_SECONDS', '8'))
+STRIPE_MAX_RETRY_AFTER = float(os.environ.get('STRIPE_MAX_RETRY_AFTER', '30'))
+
+# Client-side request budget shared by every call, matching Stripe's own
+# limit of 100 requests/s in live mode and 25 in test mode. API families
+# (the first path segment after /v1, e.g. accounts, account_links,
+# checkout) can be held to a lower rate within it with e.g.
+# STRIPE_RATE_LIMITS="accounts=10,checkout=20".
+STRIPE_RATE_PER_SECOND = float(os.environ.get('STRIPE_RATE_PER_SECOND', '25'))
+STRIPE_RATE_LIMITS = os.environ.get('STRIPE_RATE_LIMITS', '')
+
+# Latency samples kept per family for percentiles
+LATENCY_SAMPLES = 1024
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """`'accounts=10,checkout=40'` -> `{'accounts': 10.0, 'checkout': 40.0}`"""
+    limits = {}
+    for part in spec.split(','):
+        family, _, rate = part.partition('=')
+        if family.strip() and rate.strip():
+            limits[family.strip()] = float(rate)
+    return limits
+
+def api_family(url: str) -> str:
+    """The rate-limit family of a Stripe URL: `/v1/checkout/sessions` -> `checkout`"""
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    if segments and segments[0] in ('v1', 'v2'):
+        segments = segments[1:]
+    return segments[0] if segments else 'root'
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), if any"""
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    `rate` tokens per second with a burst of `capacity`; acquire() blocks.
+
+    pause() empties the bucket for a while, so after a 429 every caller
+    sharing the bucket backs off, not just the one that was throttled.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, waiting as needed; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                if now > self._updated:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate if now >= self._updated else self._updated - now
+            self.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = max(self._updated, self.clock() + seconds)
+
+class FamilyMetrics:
+    """Per-family call counts and latency samples"""
+    __slots__ = ('calls', 'errors', 'retries', 'throttled', 'wait_seconds', 'latencies')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(pct: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))] * 1000, 2)
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'wait_ms': round(self.wait_seconds * 1000, 2),
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        }
+
+class StripeGateway(HTTPClient):
+    """
+    HTTP client for the Stripe SDK shared by every request in a warm instance.
+
+    Installed as `stripe.default_http_client`, so existing
+    `stripe.Account.create(...)` call sites go through it unchanged. It
+    keeps a pooled keep-alive httpx client, spaces calls with one token
+    bucket for the instance (plus one per API family given its own limit)
+    and retries 409/429/5xx and connection errors
+    with jittered exponential backoff, honouring Retry-After and
+    Stripe-Should-Retry. POSTs are safe to retry because the SDK sends an
+    Idempotency-Key with each one. Per-family latency and retry counts
+    are available from metrics().
+    """
+
+    name = 'gateway'
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.Client] = None,
+        rate_per_second: float = STRIPE_RATE_PER_SECOND,
+        rate_limits: Optional[Dict[str, float]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self._client = http_client or _create_http_client()
+        self.rate_per_second = rate_per_second
+        self.rate_limits = rate_limits if rate_limits is not None else parse_rate_limits(STRIPE_RATE_LIMITS)
+        self.sleep = sleep
+        self.clock = clock
+        self.global_bucket = TokenBucket(rate_per_second, clock=clock, sleep=sleep)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._metrics: Dict[str, FamilyMetrics] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, family: str) -> Optional[TokenBucket]:
+        """The family's own bucket, or None if only the global budget applies"""
+        with self._lock:
+            bucket = self._buckets.get(family)
+            if bucket is None:
+                rate = self.rate_limits.get(family)
+                if rate is None:
+                    return None
+                bucket = self._buckets[family] = TokenBucket(rate, clock=self.clock, sleep=self.sleep)
+            return bucket
+
+    def _family_metrics(self, family: str) -> FamilyMetrics:
+        with self._lock:
+            metrics = self._metrics.get(family)
+            if metrics is None:
+                metrics = self._metrics[family] = FamilyMetrics()
+            return metrics
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {family: metrics.snapshot() for family, metrics in self._metrics.items()}
+
+    def request_with_retries(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        post_data: Any = None,
+        max_network_retries: Optional[int] = None,
+        *,
+        _usage: Optional[List[str]] = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        family = api_family(url)
+        bucket = self.bucket(family)
+        metrics = self._family_metrics(family)
+        max_retries = STRIPE_MAX_RETRIES if max_network_retries is None else max_network_retries
+        attempt = 0
+
+        while True:
+            waited = self.global_bucket.acquire()
+            if bucket is not None:
+                waited += bucket.acquire()
+            start = self.clock()
+            try:
+                response = self.request(method, url, headers, post_data)
+                error = None
+            except APIConnectionError as e:
+                response, error = None, e
+            elapsed = self.clock() - start
+
+            with self._lock:
+                metrics.calls += 1
+                metrics.wait_seconds += waited
+                metrics.latencies.append(elapsed)
+                if error is not None or response[1] >= 400:
+                    metrics.errors += 1
+                if response is not None and response[1] == 429:
+                    metrics.throttled += 1
+
+            delay = self._retry_delay(response, error, attempt, max_retries)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            if response is not None and response[1] == 429:
+                (bucket or self.global_bucket).pause(delay)
+            attempt += 1
+            with self._lock:
+                metrics.retries += 1
+            self.sleep(delay)
+
+    def _retry_delay(
+        self,
+        response: Optional[Tuple[bytes, int, Mapping[str, str]]],
+        error: Optional[APIConnectionError],
+        attempt: int,
+        max_retries: int,
+    ) -> Optional[float]:
+        """Seconds to wait before retrying, or None to return/raise now"""
+        if attempt >= max_retries:
+            return None
+        if error is not None:
+            if not error.should_retry:
+                return None
+            return self._backoff(attempt)
+
+        _, status, response_headers = response
+        should_retry = response_headers.get('Stripe-Should-Retry')
+        if should_retry == 'false':
+            return None
+        if should_retry != 'true' and status not in (409, 429) and status < 500:
+            return None
+
+        retry_after = retry_after_seconds(response_headers)
+        if retry_after is not None:
+            return min(retry_after, STRIPE_MAX_RETRY_AFTER)
+        return self._backoff(attempt)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(STRIPE_RETRY_MAX_SECONDS, STRIPE_RETRY_BASE_SECONDS * 2 ** attempt))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        post_data: Any = None,
+    ) -> Tuple[bytes, int, Mapping[str, str]]:
+        try:
+            response = self._client.request(method, url, headers=headers, content=post_data)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # Nothing reached Stripe, so retrying cannot duplicate work
+            raise APIConnectionError(f"Could not connect to Stripe ({type(e).__name__}: {e})", should_retry=True) from e
+        except httpx.TimeoutException as e:
+            # Requests carry an Idempotency-Key, so a replay is safe
+            raise APIConnectionError(f"Request to Stripe timed out ({type(e).__name__}: {e})", should_retry=True) from e
+        except httpx.HTTPError as e:
+            raise APIConnectionError(f"Unexpected error communicating with Stripe ({type(e).__name__}: {e})", should_retry=False) from e
+        return response.content, response.status_code, response.headers
+
+    def close(self):
+        self._client.close()
+
+def _create_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=STRIPE_POOL_SIZE,
+            max_keepalive_connections=STRIPE_POOL_SIZE,
+            keepalive_expiry=STRIPE_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(STRIPE_READ_TIMEOUT, connect=STRIPE_CONNECT_TIMEOUT),
+    )
+
+def install(module: Any = stripe) -> StripeGateway:
+    """Route the Stripe SDK's requests through a new StripeGateway"""
+    gateway = StripeGateway()
+    module.default_http_client = gateway
+    module.max_network_retries = STRIPE_MAX_RETRIES
+    return gateway
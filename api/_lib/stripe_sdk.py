@@ -0,0 +1,12 @@
+import os
+from api._lib.lazy import lazy_import
+
+def _configure(module):
+    from api._lib import stripe_gateway
+    
+    module.api_key = os.environ.get('STRIPE_SECRET_KEY')
+    # Pooled connections, retries and per-family rate limiting (see StripeGateway)
+    stripe_gateway.install(module)
+
+# The Stripe SDK, imported and configured on first use
+stripe = lazy_import('stripe', on_load=_configure)
@@ -0,0 +1,73 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Optional
+
+# supabase and httpx are imported when the first client is built, not at
+# module import, so preflights and early 4xx responses skip them
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+# Connection pool and timeouts for the shared PostgREST/Storage HTTP client
+SUPABASE_POOL_SIZE = int(os.environ.get('SUPABASE_POOL_SIZE', '10'))
+SUPABASE_CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', '5'))
+SUPABASE_READ_TIMEOUT = float(os.environ.get('SUPABASE_READ_TIMEOUT', '15'))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.environ.get('SUPABASE_KEEPALIVE_EXPIRY', '60'))
+
+_client: Optional['Client'] = None
+_lock = threading.Lock()
+
+def get_supabase_client() -> Optional['Client']:
+    """
+    Return the Supabase client shared by every request in this warm instance.
+
+    The client is built on first use over a pooled keep-alive httpx client,
+    so later requests reuse both the client and its open TLS connections.
+    Returns None when the Supabase environment is not configured.
+    """
+    global _client
+    
+    if _client is not None:
+        return _client
+    
+    supabase_url = os.environ.get('VITE_SUPABASE_URL')
+    supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        return None
+    
+    with _lock:
+        if _client is None:
+            _client = create_client(supabase_url, supabase_key)
+    
+    return _client
+
+def reset_supabase_client() -> None:
+    """Close and drop the shared client (used by tests and on config changes)"""
+    global _client
+    
+    with _lock:
+        if _client is not None:
+            _client.options.httpx_client.close()
+        _client = None
+
+def create_client(supabase_url: str, supabase_key: str) -> 'Client':
+    """Build a Supabase client over a pooled keep-alive HTTP client"""
+    from supabase import create_client as create_supabase_client, ClientOptions
+    
+    return create_supabase_client(supabase_url, supabase_key, options=ClientOptions(
+        httpx_client=_create_http_client()
+    ))
+
+def _create_http_client() -> 'httpx.Client':
+    import httpx
+    
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_POOL_SIZE,
+            max_keepalive_connections=SUPABASE_POOL_SIZE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(SUPABASE_READ_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+        follow_redirects=True
+    )
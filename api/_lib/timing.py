@@ -0,0 +1,35 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+class PhaseTimer:
+    """
+    Wall-clock time per request phase (db, stripe, serialize, ...).
+
+    Time spent in a phase that is entered more than once accumulates.
+    `log` prints one JSON line per request, which the Vercel runtime
+    collects with the function logs.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + self.clock() - start
+
+    def summary(self) -> Dict[str, float]:
+        """Milliseconds per phase, plus `total` since the timer was created"""
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()}
+        timings['total'] = round((self.clock() - self.started) * 1000, 2)
+        return timings
+
+    def log(self, route: str, **fields: Any) -> None:
+        print(json.dumps({'route': route, 'timings_ms': self.summary(), **fields}, default=str))
@@ -1,24 +1,50 @@
-import json
 import os
-from http.server import BaseHTTPRequestHandler
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.listing_versions import AGENTS_SCOPE, etag_matches, listing_version, make_etag, validator_headers
+from api._lib.pagination import decode_cursor, encode_cursor, parse_page_size
+from api._lib.agent_pool import AGENT_POOL
 
-class handler(BaseHTTPRequestHandler):
+if TYPE_CHECKING:
+    from supabase import Client
+
+# `sort` values: best match for the campaign first, or stable id order
+SORT_ORDERS = ('match', 'id')
+
+# Campaign fields the ranking reads
+RANKING_FIELDS = ('name', 'description', 'target_audience', 'budget')
+
+# Page size when `limit` is not given, and the most a client may ask for
+DEFAULT_PAGE_SIZE = int(os.environ.get('AGENTS_DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('AGENTS_MAX_PAGE_SIZE', '200'))
+
+class handler(BaseHandler):
+    ALLOWED_METHODS = 'GET, OPTIONS'
+    ALLOWED_HEADERS = 'Content-Type, Authorization, If-None-Match'
+    
     def do_GET(self):
         """
         Vercel-native Python function to get certified agents for a campaign
+        
+        Responses carry an ETag derived from the agents version stamp and
+        the current stats period; a matching If-None-Match is answered with
+        304 without running the agents query.
+        
+        Agents come from the per-process certified-agent pool (reloaded when
+        the agents version changes), filtered by optional `specialization`
+        values and paged with `limit` and `cursor`. `sort=match` (default)
+        ranks them against the campaign's text and budget; `sort=id` lists
+        them in id order.
         """
         try:
-            # Initialize Supabase client
-            supabase_url = os.environ.get('VITE_SUPABASE_URL')
-            supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+            # Shared Supabase client (reused across requests in a warm instance)
+            supabase: Client = get_supabase_client()
             
-            if not supabase_url or not supabase_key:
+            if supabase is None:
                 self.send_error_response(500, "Supabase configuration missing")
                 return
             
-            supabase: Client = create_client(supabase_url, supabase_key)
-            
             # Validate authorization
             auth_header = self.headers.get('Authorization', '')
             if not auth_header.startswith('Bearer '):
@@ -26,8 +52,9 @@ class handler(BaseHTTPRequestHandler):
                 return
             
             # Extract campaign_id from path
-            from urllib.parse import urlparse
-            path_parts = urlparse(self.path).path.split('/')
+            from urllib.parse import urlparse, parse_qs
+            parsed_url = urlparse(self.path)
+            path_parts = parsed_url.path.split('/')
             campaign_id = None
             
             # Find campaign ID in path (format: /api/campaigns/{id}/certified-agents)
@@ -40,70 +67,72 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Missing campaign ID in path")
                 return
             
+            # Paging and specialization filters
+            query_params = parse_qs(parsed_url.query)
+            specializations = sorted({
+                value.strip()
+                for param in query_params.get('specialization', [])
+                for value in param.split(',') if value.strip()
+            })
+            sort = query_params.get('sort', ['match'])[0]
+            if sort not in SORT_ORDERS:
+                self.send_error_response(400, f"sort must be one of: {', '.join(SORT_ORDERS)}")
+                return
+            try:
+                limit = parse_page_size(query_params.get('limit', [None])[0], DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+                cursor = query_params.get('cursor', [None])[0]
+                after = decode_cursor(cursor, 1) if cursor else None
+                # Ranked pages continue from a rank offset, id pages from an id
+                if after is not None and sort == 'match' and not (isinstance(after[0], int) and after[0] >= 0):
+                    raise ValueError("Invalid cursor")
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            
             # First, verify the campaign exists and get company_id
-            campaign_result = supabase.table('campaigns').select('company_id').eq('id', campaign_id).single().execute()
+            campaign_result = supabase.table('campaigns').select('company_id, ' + ', '.join(RANKING_FIELDS)).eq('id', campaign_id).single().execute()
             
             if not campaign_result.data:
                 self.send_error_response(404, "Campaign not found")
                 return
             
-            company_id = campaign_result.data['company_id']
+            campaign = campaign_result.data
+            company_id = campaign['company_id']
             
-            # Get certified agents (not assigned to this company)
-            # In a real marketplace, this would be more sophisticated
-            agents_result = supabase.table('agents').select('''
-                id,
-                name,
-                specialization,
-                certification_status,
-                user_id,
-                users!inner(email)
-            ''').eq('certification_status', 'certified').neq('company_id', company_id).execute()
-            
-            agents = agents_result.data or []
+            # Revalidation: the listing changes when an agent row does, and
+            # with agent stats, which are refreshed once per pool TTL
+            version = listing_version(supabase, AGENTS_SCOPE)
+            etag = make_etag(
+                AGENTS_SCOPE, version, AGENT_POOL.stats_epoch(), campaign_id, company_id, sort,
+                *(campaign.get(field) for field in RANKING_FIELDS),
+                limit, cursor or '', ','.join(specializations), self.response_encoding() or 'identity'
+            )
+            headers = validator_headers(etag)
+            if etag_matches(self.headers.get('If-None-Match', ''), etag):
+                self.send_not_modified(headers)
+                return
             
-            # Format the response
-            formatted_agents = []
-            for agent in agents:
-                formatted_agents.append({
-                    'id': agent['id'],
-                    'name': agent['name'],
-                    'specialization': agent['specialization'],
-                    'email': agent['users']['email'],
-                    'certification_status': agent['certification_status'],
-                    'rating': 4.8,  # Mock rating
-                    'completed_campaigns': 12,  # Mock data
-                    'hourly_rate': 75  # Mock rate
-                })
+            # Certified agents not assigned to this company, from the shared pool
+            if sort == 'match':
+                offset = after[0] if after else 0
+                agents, has_more = AGENT_POOL.ranked_page(
+                    supabase, version, campaign, company_id,
+                    specializations=specializations, offset=offset, limit=limit
+                )
+                next_cursor = encode_cursor([offset + len(agents)]) if has_more else None
+            else:
+                agents, has_more = AGENT_POOL.page(
+                    supabase, version, company_id,
+                    specializations=specializations, after_id=after[0] if after else None, limit=limit
+                )
+                next_cursor = encode_cursor([agents[-1]['id']]) if has_more else None
             
-            self.send_json_response(200, {
-                'agents': formatted_agents,
+            self.send_json_list(200, 'agents', agents, {
                 'campaign_id': campaign_id,
-                'count': len(formatted_agents)
-            })
+                'count': len(agents),
+                'has_more': has_more,
+                'next_cursor': next_cursor
+            }, headers)
             
         except Exception as e:
             self.send_error_response(500, f"Internal server error: {str(e)}")
-    
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-    
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-    
-    def send_error_response(self, status_code: int, message: str):
-        """Send error response"""
-        self.send_json_response(status_code, {
-            'error': message,
-            'status': 'error'
-        })
\ No newline at end of file
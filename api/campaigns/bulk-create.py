@@ -0,0 +1,104 @@
+import json
+import os
+from typing import TYPE_CHECKING, Any, List, Tuple
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.campaigns import build_campaign, insert_rows
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Rows per PostgREST insert call, and the most rows one request may carry
+BULK_CHUNK_SIZE = int(os.environ.get('CAMPAIGNS_BULK_CHUNK_SIZE', '500'))
+BULK_MAX_ROWS = int(os.environ.get('CAMPAIGNS_BULK_MAX_ROWS', '5000'))
+
+def parse_rows(body: bytes, content_type: str) -> List[Tuple[Any, str]]:
+    """
+    (row, parse error) pairs from a JSON array or NDJSON body.
+
+    A malformed NDJSON line becomes an error for that row only; a
+    malformed JSON array raises json.JSONDecodeError.
+    """
+    text = body.decode('utf-8')
+    if 'ndjson' not in content_type and text.lstrip().startswith('['):
+        return [(row, '') for row in json.loads(text)]
+    
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append((json.loads(line), ''))
+        except json.JSONDecodeError as e:
+            rows.append((None, f"Invalid JSON: {e.msg}"))
+    return rows
+
+class handler(BaseHandler):
+    def do_POST(self):
+        """
+        Vercel-native Python function for bulk campaign creation
+        
+        Accepts a JSON array of campaigns or NDJSON (one campaign per line),
+        validates each row like /api/campaigns/create and inserts the valid
+        rows BULK_CHUNK_SIZE at a time. Responds 201 when every row was
+        created, otherwise 207 with a per-row result.
+        """
+        try:
+            # Shared Supabase client (reused across requests in a warm instance)
+            supabase: Client = get_supabase_client()
+            
+            if supabase is None:
+                self.send_error_response(500, "Supabase configuration missing")
+                return
+            
+            # Validate authorization (in production, extract from JWT)
+            auth_header = self.headers.get('Authorization', '')
+            if not auth_header.startswith('Bearer '):
+                self.send_error_response(401, "Missing or invalid authorization header")
+                return
+            
+            # Parse request body
+            content_length = int(self.headers['Content-Length'])
+            post_data = self.rfile.read(content_length)
+            rows = parse_rows(post_data, self.headers.get('Content-Type', ''))
+            
+            if not rows:
+                self.send_error_response(400, "No campaigns in request body")
+                return
+            if len(rows) > BULK_MAX_ROWS:
+                self.send_error_response(413, f"Too many campaigns: {len(rows)} > {BULK_MAX_ROWS}")
+                return
+            
+            # Validate every row with the single-create rules
+            results: List[Any] = [None] * len(rows)
+            valid_indexes = []
+            campaigns = []
+            for index, (row, error) in enumerate(rows):
+                if not error:
+                    try:
+                        campaigns.append(build_campaign(row))
+                        valid_indexes.append(index)
+                        continue
+                    except ValueError as e:
+                        error = str(e)
+                results[index] = {'index': index, 'status': 'error', 'error': error}
+            
+            # Insert the valid rows in batched round trips
+            for index, (campaign, error) in zip(valid_indexes, insert_rows(supabase, 'campaigns', campaigns, BULK_CHUNK_SIZE)):
+                if error:
+                    results[index] = {'index': index, 'status': 'error', 'error': error}
+                else:
+                    results[index] = {'index': index, 'status': 'created', 'id': campaign['id']}
+            
+            created = sum(1 for result in results if result['status'] == 'created')
+            self.send_json_list(201 if created == len(results) else 207, 'results', results, {
+                'created': created,
+                'failed': len(results) - created
+            })
+            
+        except json.JSONDecodeError:
+            self.send_error_response(400, "Invalid JSON in request body")
+        except UnicodeDecodeError:
+            self.send_error_response(400, "Request body must be UTF-8")
+        except Exception as e:
+            self.send_error_response(500, f"Internal server error: {str(e)}")
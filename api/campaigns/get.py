@@ -1,31 +1,58 @@
-import json
 import os
-from http.server import BaseHTTPRequestHandler
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.pagination import decode_cursor, encode_cursor, parse_fields, parse_page_size, quote_filter_value
+from api._lib.listing_versions import campaigns_scope, etag_matches, listing_version, make_etag, validator_headers
 
-class handler(BaseHTTPRequestHandler):
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Page size when `limit` is not given, and the most a client may ask for
+DEFAULT_PAGE_SIZE = int(os.environ.get('CAMPAIGNS_DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('CAMPAIGNS_MAX_PAGE_SIZE', '200'))
+
+# Columns a client may request with `fields=`
+CAMPAIGN_FIELDS = (
+    'id', 'company_id', 'name', 'description', 'budget', 'status',
+    'target_audience', 'start_date', 'end_date', 'created_at', 'updated_at',
+)
+
+# Sort keys; always selected so the next cursor can be built from the last row
+CURSOR_FIELDS = ('created_at', 'id')
+
+class handler(BaseHandler):
+    ALLOWED_METHODS = 'GET, OPTIONS'
+    ALLOWED_HEADERS = 'Content-Type, Authorization, If-None-Match'
+    
     def do_GET(self):
         """
         Vercel-native Python function to get campaigns for a company
+        
+        Results are newest first and keyset-paginated on (created_at, id):
+        pass the returned `next_cursor` as `cursor` to fetch the next page.
+        `limit` sets the page size (capped at MAX_PAGE_SIZE) and `fields`
+        a comma-separated column projection.
+        
+        Responses carry an ETag derived from the company's campaigns
+        version stamp; a matching If-None-Match is answered with 304
+        after reading only that stamp.
         """
         try:
-            # Initialize Supabase client
-            supabase_url = os.environ.get('VITE_SUPABASE_URL')
-            supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+            # Shared Supabase client (reused across requests in a warm instance)
+            supabase: Client = get_supabase_client()
             
-            if not supabase_url or not supabase_key:
+            if supabase is None:
                 self.send_error_response(500, "Supabase configuration missing")
                 return
             
-            supabase: Client = create_client(supabase_url, supabase_key)
-            
             # Validate authorization
             auth_header = self.headers.get('Authorization', '')
             if not auth_header.startswith('Bearer '):
                 self.send_error_response(401, "Missing or invalid authorization header")
                 return
             
-            # Extract company_id from query parameters
+            # Extract company_id and paging parameters from query parameters
             from urllib.parse import urlparse, parse_qs
             parsed_url = urlparse(self.path)
             query_params = parse_qs(parsed_url.query)
@@ -35,38 +62,52 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Missing company_id parameter")
                 return
             
-            # Fetch campaigns from Supabase
-            result = supabase.table('campaigns').select('*').eq('company_id', company_id).order('created_at', desc=True).execute()
+            try:
+                limit = parse_page_size(query_params.get('limit', [None])[0], DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+                columns = parse_fields(query_params.get('fields', [None])[0], CAMPAIGN_FIELDS, CURSOR_FIELDS)
+                cursor = query_params.get('cursor', [None])[0]
+                after = decode_cursor(cursor, len(CURSOR_FIELDS)) if cursor else None
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            
+            # Revalidation: one primary-key read instead of the listing query
+            scope = campaigns_scope(company_id)
+            etag = make_etag(
+                scope, listing_version(supabase, scope),
+                limit, columns, cursor or '', self.response_encoding() or 'identity'
+            )
+            headers = validator_headers(etag)
+            if etag_matches(self.headers.get('If-None-Match', ''), etag):
+                self.send_not_modified(headers)
+                return
+            
+            # Fetch one extra row to learn whether another page exists
+            query = supabase.table('campaigns').select(columns).eq('company_id', company_id)
+            if after is not None:
+                # The lte bound gives the index a range to scan; the or_ drops
+                # rows at the boundary timestamp already sent on earlier pages
+                query = query.lte('created_at', after[0])
+                created_at, campaign_id = (quote_filter_value(value) for value in after)
+                query = query.or_(
+                    f"created_at.lt.{created_at},and(created_at.eq.{created_at},id.gt.{campaign_id})"
+                )
+            result = query.order('created_at', desc=True).order('id').limit(limit + 1).execute()
             
             campaigns = result.data or []
+            has_more = len(campaigns) > limit
+            campaigns = campaigns[:limit]
+            
+            next_cursor = None
+            if has_more:
+                last = campaigns[-1]
+                next_cursor = encode_cursor([last[field] for field in CURSOR_FIELDS])
             
-            self.send_json_response(200, {
-                'campaigns': campaigns,
-                'count': len(campaigns)
-            })
+            self.send_json_list(200, 'campaigns', campaigns, {
+                'count': len(campaigns),
+                'has_more': has_more,
+                'next_cursor': next_cursor
+            }, headers)
             
         except Exception as e:
             self.send_error_response(500, f"Internal server error: {str(e)}")
-    
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-    
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-    
-    def send_error_response(self, status_code: int, message: str):
-        """Send error response"""
-        self.send_json_response(status_code, {
-            'error': message,
-            'status': 'error'
-        })
\ No newline at end of file
@@ -0,0 +1,85 @@
+import json
+import os
+from typing import Any, Dict, List
+from api._lib.base_handler import BaseHandler
+from api._lib.digital_twins import start_twins, twin_ids, validate_twin
+from api._lib.idempotency import request_key, respond_idempotently
+
+# Most twins one request may launch, and executions started in parallel
+BATCH_MAX_TWINS = int(os.environ.get('DIGITAL_TWINS_BATCH_MAX', '100'))
+BATCH_CONCURRENCY = int(os.environ.get('DIGITAL_TWINS_BATCH_CONCURRENCY', '8'))
+
+class handler(BaseHandler):
+    ALLOWED_HEADERS = 'Content-Type, Authorization, Idempotency-Key'
+
+    def do_POST(self):
+        """
+        Vercel-native Python function to launch many digital twins at once
+        
+        Accepts `{"twins": [...]}` or a bare JSON array of twin specs (same
+        fields as /api/digital-twins/create) and starts one Step Functions
+        execution per valid spec, BATCH_CONCURRENCY at a time. Responds 200
+        with every job ID when all twins started, otherwise 207 with a
+        per-twin result.
+        """
+        try:
+            # Parse request body
+            content_length = int(self.headers['Content-Length'])
+            post_data = self.rfile.read(content_length)
+            data = json.loads(post_data.decode('utf-8'))
+            specs = data.get('twins') if isinstance(data, dict) else data
+            
+            if not isinstance(specs, list) or not specs:
+                self.send_error_response(400, "Request body must contain a non-empty 'twins' array")
+                return
+            if len(specs) > BATCH_MAX_TWINS:
+                self.send_error_response(413, f"Too many digital twins: {len(specs)} > {BATCH_MAX_TWINS}")
+                return
+            
+            # Validate authorization (in production, extract from JWT)
+            auth_header = self.headers.get('Authorization', '')
+            if not auth_header.startswith('Bearer '):
+                self.send_error_response(401, "Missing or invalid authorization header")
+                return
+            
+            key = request_key(self, 'digital-twins.batch-create')
+            
+            def start():
+                # Validate every twin with the single-create rules
+                results: List[Any] = [None] * len(specs)
+                launch_indexes = []
+                launches = []
+                for index, spec in enumerate(specs):
+                    try:
+                        validate_twin(spec)
+                    except ValueError as e:
+                        results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+                        continue
+                    job_id, digital_twin_id = twin_ids(f'{key}:{index}' if key else None)
+                    launch_indexes.append(index)
+                    launches.append((spec, job_id, digital_twin_id))
+                
+                # Start the executions on the instance's shared client
+                for index, (job, error) in zip(launch_indexes, start_twins(launches, BATCH_CONCURRENCY)):
+                    if error:
+                        results[index] = {'index': index, 'status': 'error', 'error': error}
+                    else:
+                        results[index] = {'index': index, 'status': 'started', **job}
+                
+                started = sum(1 for result in results if result['status'] == 'started')
+                response: Dict[str, Any] = {
+                    'results': results,
+                    'job_ids': [result['job_id'] for result in results if result['status'] == 'started'],
+                    'started': started,
+                    'failed': len(results) - started
+                }
+                return 200 if started == len(results) else 207, response
+            
+            respond_idempotently(self, 'digital-twins.batch-create', post_data, start)
+            
+        except json.JSONDecodeError:
+            self.send_error_response(400, "Invalid JSON in request body")
+        except UnicodeDecodeError:
+            self.send_error_response(400, "Request body must be UTF-8")
+        except Exception as e:
+            self.send_error_response(500, f"Internal server error: {str(e)}")
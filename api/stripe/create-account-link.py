@@ -1,16 +1,21 @@
 import json
-import os
-import stripe
-from http.server import BaseHTTPRequestHandler
+from typing import TYPE_CHECKING, Optional
+from api._lib.account_links import ACCOUNT_LINKS, link_key
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.stripe_sdk import stripe
+from api._lib.timing import PhaseTimer
 
-# Initialize Stripe
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
+if TYPE_CHECKING:
+    from supabase import Client
 
-class handler(BaseHTTPRequestHandler):
+class handler(BaseHandler):
     def do_POST(self):
         """
         Create a Stripe Connect account link for onboarding
         """
+        timer = PhaseTimer()
+        source = None
         try:
             if not stripe.api_key:
                 self.send_error_response(500, "Stripe configuration missing")
@@ -29,18 +34,35 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Missing required fields")
                 return
             
-            # Create account link
-            account_link = stripe.AccountLink.create(
-                account=account_id,
-                refresh_url=refresh_url,
-                return_url=return_url,
-                type='account_onboarding',
-            )
+            # Shared link store; without Supabase links are only reused in-process
+            supabase: Optional[Client] = get_supabase_client()
+            key = link_key(account_id, refresh_url, return_url)
             
-            self.send_json_response(200, {
-                'url': account_link.url,
-                'expires_at': account_link.expires_at
-            })
+            # Reuse an unexpired link, unless the caller landed on refresh_url
+            # (Stripe sends users there once a link has been used or expired):
+            # links are single use, so that one is dropped
+            link = None
+            with timer.phase('db'):
+                if data.get('refresh'):
+                    ACCOUNT_LINKS.discard(supabase, key)
+                else:
+                    link, source = ACCOUNT_LINKS.get(supabase, key)
+            
+            if link is None:
+                # Create account link
+                with timer.phase('stripe'):
+                    account_link = stripe.AccountLink.create(
+                        account=account_id,
+                        refresh_url=refresh_url,
+                        return_url=return_url,
+                        type='account_onboarding',
+                    )
+                link = {'url': account_link.url, 'expires_at': account_link.expires_at}
+                source = source or 'refresh'
+                with timer.phase('db'):
+                    ACCOUNT_LINKS.put(supabase, key, account_id, link)
+            
+            self.send_json_response(200, link)
             
         except stripe.error.StripeError as e:
             self.send_error_response(400, f"Stripe error: {str(e)}")
@@ -48,26 +70,5 @@ class handler(BaseHTTPRequestHandler):
             self.send_error_response(400, "Invalid JSON in request body")
         except Exception as e:
             self.send_error_response(500, f"Internal server error: {str(e)}")
-    
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-    
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-    
-    def send_error_response(self, status_code: int, message: str):
-        """Send error response"""
-        self.send_json_response(status_code, {
-            'error': message,
-            'status': 'error'
-        })
\ No newline at end of file
+        finally:
+            timer.log('stripe.create_account_link', link_source=source, link_cache=ACCOUNT_LINKS.metrics())
@@ -1,23 +1,28 @@
 import json
 import os
-import stripe
-from http.server import BaseHTTPRequestHandler
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.concurrency import gather
+from api._lib.payout_accounts import PAYOUT_ACCOUNTS
+from api._lib.stripe_sdk import stripe
+from api._lib.timing import PhaseTimer
 
-# Initialize Stripe
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
+if TYPE_CHECKING:
+    from supabase import Client
 
-class handler(BaseHTTPRequestHandler):
+class handler(BaseHandler):
     def do_POST(self):
         """
         Create a Stripe Checkout session for campaign payments
         """
+        timer = PhaseTimer()
+        agent_cached = None
         try:
-            # Initialize Supabase client
-            supabase_url = os.environ.get('VITE_SUPABASE_URL')
-            supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+            # Shared Supabase client (reused across requests in a warm instance)
+            supabase: Client = get_supabase_client()
             
-            if not supabase_url or not supabase_key:
+            if supabase is None:
                 self.send_error_response(500, "Supabase configuration missing")
                 return
             
@@ -25,8 +30,6 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(500, "Stripe configuration missing")
                 return
             
-            supabase: Client = create_client(supabase_url, supabase_key)
-            
             # Parse request body
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
@@ -40,16 +43,19 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Missing required fields")
                 return
             
-            # Get campaign and agent details
-            campaign_result = supabase.table('campaigns').select('name, company_id').eq('id', campaign_id).single().execute()
-            agent_result = supabase.table('agents').select('name, stripe_account_id').eq('id', agent_id).single().execute()
+            # Get campaign and agent details concurrently; the agent's payout
+            # account usually comes from the per-instance cache
+            with timer.phase('db'):
+                campaign_result, (agent, agent_cached) = gather(
+                    lambda: supabase.table('campaigns').select('name, company_id').eq('id', campaign_id).single().execute(),
+                    lambda: PAYOUT_ACCOUNTS.get(supabase, agent_id)
+                )
             
-            if not campaign_result.data or not agent_result.data:
+            if not campaign_result.data or not agent:
                 self.send_error_response(404, "Campaign or agent not found")
                 return
             
             campaign = campaign_result.data
-            agent = agent_result.data
             
             if not agent['stripe_account_id']:
                 self.send_error_response(400, "Agent has not completed Stripe onboarding")
@@ -59,39 +65,41 @@ class handler(BaseHTTPRequestHandler):
             platform_fee = int(amount * 0.10)
             
             # Create Checkout session
-            session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': f'Campaign: {campaign["name"]}',
-                            'description': f'Payment to agent: {agent["name"]}',
+            with timer.phase('stripe'):
+                session = stripe.checkout.Session.create(
+                    payment_method_types=['card'],
+                    line_items=[{
+                        'price_data': {
+                            'currency': 'usd',
+                            'product_data': {
+                                'name': f'Campaign: {campaign["name"]}',
+                                'description': f'Payment to agent: {agent["name"]}',
+                            },
+                            'unit_amount': amount,
+                        },
+                        'quantity': 1,
+                    }],
+                    mode='payment',
+                    success_url=f'{os.environ.get("FRONTEND_URL", "http://localhost:5173")}/company/campaigns/{campaign_id}?payment=success',
+                    cancel_url=f'{os.environ.get("FRONTEND_URL", "http://localhost:5173")}/company/campaigns/{campaign_id}?payment=cancelled',
+                    payment_intent_data={
+                        'application_fee_amount': platform_fee,
+                        'transfer_data': {
+                            'destination': agent['stripe_account_id'],
                         },
-                        'unit_amount': amount,
-                    },
-                    'quantity': 1,
-                }],
-                mode='payment',
-                success_url=f'{os.environ.get("FRONTEND_URL", "http://localhost:5173")}/company/campaigns/{campaign_id}?payment=success',
-                cancel_url=f'{os.environ.get("FRONTEND_URL", "http://localhost:5173")}/company/campaigns/{campaign_id}?payment=cancelled',
-                payment_intent_data={
-                    'application_fee_amount': platform_fee,
-                    'transfer_data': {
-                        'destination': agent['stripe_account_id'],
                     },
-                },
-                metadata={
-                    'campaign_id': campaign_id,
-                    'agent_id': agent_id,
-                    'company_id': campaign['company_id'],
-                }
-            )
+                    metadata={
+                        'campaign_id': campaign_id,
+                        'agent_id': agent_id,
+                        'company_id': campaign['company_id'],
+                    }
+                )
             
-            self.send_json_response(200, {
-                'checkout_url': session.url,
-                'session_id': session.id
-            })
+            with timer.phase('serialize'):
+                self.send_json_response(200, {
+                    'checkout_url': session.url,
+                    'session_id': session.id
+                })
             
         except stripe.error.StripeError as e:
             self.send_error_response(400, f"Stripe error: {str(e)}")
@@ -99,26 +107,5 @@ class handler(BaseHTTPRequestHandler):
             self.send_error_response(400, "Invalid JSON in request body")
         except Exception as e:
             self.send_error_response(500, f"Internal server error: {str(e)}")
-    
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-    
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-    
-    def send_error_response(self, status_code: int, message: str):
-        """Send error response"""
-        self.send_json_response(status_code, {
-            'error': message,
-            'status': 'error'
-        })
\ No newline at end of file
+        finally:
+            timer.log('stripe.create_checkout_session', agent_cached=agent_cached)
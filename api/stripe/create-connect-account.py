@@ -1,23 +1,22 @@
 import json
-import os
-import stripe
-from http.server import BaseHTTPRequestHandler
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.stripe_sdk import stripe
 
-# Initialize Stripe
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
+if TYPE_CHECKING:
+    from supabase import Client
 
-class handler(BaseHTTPRequestHandler):
+class handler(BaseHandler):
     def do_POST(self):
         """
         Create a Stripe Connect account for agents
         """
         try:
-            # Initialize Supabase client
-            supabase_url = os.environ.get('VITE_SUPABASE_URL')
-            supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+            # Shared Supabase client (reused across requests in a warm instance)
+            supabase: Client = get_supabase_client()
             
-            if not supabase_url or not supabase_key:
+            if supabase is None:
                 self.send_error_response(500, "Supabase configuration missing")
                 return
             
@@ -25,8 +24,6 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(500, "Stripe configuration missing")
                 return
             
-            supabase: Client = create_client(supabase_url, supabase_key)
-            
             # Validate authorization
             auth_header = self.headers.get('Authorization', '')
             if not auth_header.startswith('Bearer '):
@@ -100,26 +97,3 @@ class handler(BaseHTTPRequestHandler):
             self.send_error_response(400, "Invalid JSON in request body")
         except Exception as e:
             self.send_error_response(500, f"Internal server error: {str(e)}")
-    
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-    
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-    
-    def send_error_response(self, status_code: int, message: str):
-        """Send error response"""
-        self.send_json_response(status_code, {
-            'error': message,
-            'status': 'error'
-        })
\ No newline at end of file
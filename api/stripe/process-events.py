@@ -0,0 +1,57 @@
+import os
+from typing import TYPE_CHECKING
+from api._lib.supabase_client import get_supabase_client
+from api._lib.base_handler import BaseHandler
+from api._lib.stripe_events import drain, get_event_queue
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Keep in step with functions["api/stripe/process-events.py"].maxDuration
+# in vercel.json
+MAX_DURATION_SECONDS = 60
+
+# Stop claiming new batches this long before the function times out, so
+# the batch in flight can finish and the report can be sent
+DRAIN_HEADROOM_SECONDS = float(os.environ.get('STRIPE_EVENTS_DRAIN_HEADROOM_SECONDS', '15'))
+DRAIN_SECONDS = MAX_DURATION_SECONDS - DRAIN_HEADROOM_SECONDS
+
+class handler(BaseHandler):
+    ALLOWED_METHODS = 'GET, POST, OPTIONS'
+    
+    def do_GET(self):
+        """
+        Apply queued Stripe webhook events (run every minute by Vercel Cron)
+        """
+        try:
+            # Vercel Cron sends CRON_SECRET as a bearer token
+            cron_secret = os.environ.get('CRON_SECRET')
+            if not cron_secret:
+                self.send_error_response(500, "Cron secret not configured")
+                return
+            
+            if self.headers.get('Authorization', '') != f'Bearer {cron_secret}':
+                self.send_error_response(401, "Missing or invalid authorization header")
+                return
+            
+            # Shared Supabase client (reused across requests in a warm instance)
+            supabase: Client = get_supabase_client()
+            
+            if supabase is None:
+                self.send_error_response(500, "Supabase configuration missing")
+                return
+            
+            queue = get_event_queue()
+            if queue is None:
+                self.send_error_response(500, "Event queue not configured")
+                return
+            
+            report = drain(queue, supabase, time_budget_seconds=DRAIN_SECONDS)
+            
+            self.send_json_response(200, report)
+            
+        except Exception as e:
+            print(f"Stripe event worker error: {str(e)}")
+            self.send_error_response(500, f"Internal server error: {str(e)}")
+    
+    do_POST = do_GET
@@ -1,29 +1,24 @@
 import json
 import os
-import stripe
-from http.server import BaseHTTPRequestHandler
-from supabase import create_client, Client
+from api._lib.base_handler import BaseHandler
+from api._lib.payout_accounts import PAYOUT_ACCOUNTS
+from api._lib.stripe_events import QUEUED_EVENTS, get_event_queue
+from api._lib.stripe_sdk import stripe
 
-# Initialize Stripe
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
 webhook_secret = os.environ.get('STRIPE_WEBHOOK_SECRET')
 
-class handler(BaseHTTPRequestHandler):
+class handler(BaseHandler):
+    ALLOWED_HEADERS = 'Content-Type, Authorization, Stripe-Signature'
+    
     def do_POST(self):
         """
-        Handle Stripe webhooks for payment processing
+        Verify Stripe webhooks and queue them for the event worker.
+
+        Only the signature check and one append happen before the 200, so
+        a slow database no longer makes Stripe time out and redeliver.
+        api/stripe/process-events.py applies the queued events.
         """
         try:
-            # Initialize Supabase client
-            supabase_url = os.environ.get('VITE_SUPABASE_URL')
-            supabase_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-            
-            if not supabase_url or not supabase_key:
-                self.send_error_response(500, "Supabase configuration missing")
-                return
-            
-            supabase: Client = create_client(supabase_url, supabase_key)
-            
             # Get request body and signature
             content_length = int(self.headers['Content-Length'])
             payload = self.rfile.read(content_length)
@@ -45,61 +40,27 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Invalid signature")
                 return
             
-            # Handle the event
-            if event['type'] == 'checkout.session.completed':
-                session = event['data']['object']
-                
-                # Extract metadata
-                campaign_id = session['metadata']['campaign_id']
-                agent_id = session['metadata']['agent_id']
-                company_id = session['metadata']['company_id']
-                
-                # Update campaign invitation status to 'paid'
-                supabase.table('campaign_invitations').update({
-                    'status': 'paid',
-                    'payment_session_id': session['id'],
-                    'amount_paid': session['amount_total']
-                }).eq('campaign_id', campaign_id).eq('agent_id', agent_id).execute()
-                
-                # Log the successful payment
-                print(f"Payment completed for campaign {campaign_id}, agent {agent_id}")
-                
-            elif event['type'] == 'account.updated':
-                account = event['data']['object']
-                
-                # Update agent onboarding status if charges are enabled
-                if account['charges_enabled']:
-                    supabase.table('agents').update({
-                        'onboarding_completed': True
-                    }).eq('stripe_account_id', account['id']).execute()
-                    
-                    print(f"Agent onboarding completed for account {account['id']}")
+            if event['type'] == 'account.updated':
+                # Checkout must not keep paying out to a stale account
+                PAYOUT_ACCOUNTS.invalidate_account(event['data']['object']['id'])
+            
+            # Redeliveries this instance has already queued are acked
+            # without a database round trip
+            if event['id'] in QUEUED_EVENTS:
+                self.send_json_response(200, {'received': True, 'duplicate': True})
+                return
+            
+            queue = get_event_queue()
+            if queue is None:
+                self.send_error_response(500, "Event queue not configured")
+                return
+            
+            # Other redeliveries hit the queue's primary key and are acked too
+            queued = queue.enqueue(event['id'], event['type'], json.loads(payload))
+            QUEUED_EVENTS.add([event['id']])
             
-            self.send_json_response(200, {'received': True})
+            self.send_json_response(200, {'received': True, 'duplicate': not queued})
             
         except Exception as e:
             print(f"Webhook error: {str(e)}")
             self.send_error_response(500, f"Webhook error: {str(e)}")
-    
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, Stripe-Signature')
-        self.end_headers()
-    
-    def send_json_response(self, status_code: int, data: dict):
-        """Send JSON response with CORS headers"""
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-    
-    def send_error_response(self, status_code: int, message: str):
-        """Send error response"""
-        self.send_json_response(status_code, {
-            'error': message,
-            'status': 'error'
-        })
\ No newline at end of file
@@ -0,0 +1,77 @@
+import os
+import json
+import logging
+import requests
+from typing import Dict, Any, List
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SUPABASE_URL = os.environ.get('SUPABASE_URL', 'YOUR_SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY', '')
+
+# A full rebuild aggregates every invitation in one statement
+RPC_TIMEOUT_SECONDS = float(os.environ.get('AGENT_STATS_RPC_TIMEOUT_SECONDS', '240'))
+
+# Drifted agents included in the result and logs
+DRIFT_SAMPLE_SIZE = 20
+
+def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Maintenance for the trigger-maintained agent_stats table
+
+    action 'backfill' rebuilds every row from campaign_invitations.
+    action 'check' (the default) compares stored stats with a fresh
+    aggregate and, when `repair` is set, rebuilds if anything drifted.
+    """
+    try:
+        action = event.get('action', 'check')
+        logger.info(f"Agent stats job: {json.dumps(event)}")
+        
+        if action == 'backfill':
+            rebuilt = call_rpc('rebuild_agent_stats')
+            logger.info(f"Rebuilt stats for {rebuilt} agents")
+            return {
+                'statusCode': 200,
+                'action': action,
+                'rebuilt': rebuilt
+            }
+        
+        if action != 'check':
+            raise ValueError(f"Unknown action: {action}")
+        
+        drift: List[Dict[str, Any]] = call_rpc('agent_stats_drift')
+        repaired = False
+        
+        if drift:
+            logger.warning(f"agent_stats drift for {len(drift)} agents: {json.dumps(drift[:DRIFT_SAMPLE_SIZE])}")
+            if event.get('repair'):
+                call_rpc('rebuild_agent_stats')
+                repaired = True
+        
+        return {
+            'statusCode': 200,
+            'action': action,
+            'drifted': len(drift),
+            'sample': drift[:DRIFT_SAMPLE_SIZE],
+            'repaired': repaired
+        }
+        
+    except Exception as e:
+        logger.error(f"Agent stats job failed: {str(e)}")
+        raise Exception(f"Agent stats job failed: {str(e)}")
+
+def call_rpc(function: str) -> Any:
+    """Call a Postgres function through PostgREST with the service role"""
+    response = requests.post(
+        f"{SUPABASE_URL}/rest/v1/rpc/{function}",
+        json={},
+        headers={
+            'apikey': SUPABASE_SERVICE_KEY,
+            'Authorization': f"Bearer {SUPABASE_SERVICE_KEY}",
+            'Content-Type': 'application/json'
+        },
+        timeout=RPC_TIMEOUT_SECONDS
+    )
+    response.raise_for_status()
+    return response.json()
@@ -1,14 +1,46 @@
-import json
+import os
 import jwt
-import requests
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
+from jwks_cache import JWKSCache
+from token_cache import TokenDecisionCache, token_digest
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Cache for JWKS keys
-JWKS_CACHE = {}
+SUPABASE_URL = os.environ.get('SUPABASE_URL', 'YOUR_SUPABASE_URL')
+
+# Parsed signing keys, shared across invocations of a warm container
+JWKS_CACHE = JWKSCache(
+    f"{SUPABASE_URL}/.well-known/jwks.json",
+    ttl_seconds=float(os.environ.get('JWKS_CACHE_TTL_SECONDS', '600')),
+    min_refetch_interval=float(os.environ.get('JWKS_MIN_REFETCH_SECONDS', '30'))
+)
+
+# Verified-token decisions, so repeat bearer tokens skip RS256 verification
+TOKEN_CACHE = TokenDecisionCache(
+    max_entries=int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', '10000')),
+    max_bytes=int(os.environ.get('TOKEN_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    negative_ttl_seconds=float(os.environ.get('TOKEN_CACHE_NEGATIVE_TTL_SECONDS', '30'))
+)
+
+# How far an Allow policy reaches. API Gateway caches the policy per token for
+# AuthorizerResultTtlInSeconds and reuses it on every route, so anything wider
+# than 'method' lets calls to other routes hit that cache:
+#   method - only the invoked methodArn
+#   stage  - every route in the invoked API stage
+#   role   - the routes in ROLE_ROUTES for the caller's role
+POLICY_MODE = os.environ.get('AUTHORIZER_POLICY_MODE', 'method')
+
+# '{HTTP method}/{resource path}' patterns per role, relative to the stage
+ROLE_ROUTES = {
+    'admin': ('*/*',),
+    'company': ('*/campaigns', '*/campaigns/*', '*/digital-twins', '*/digital-twins/*', '*/stripe/*'),
+    'agent': ('GET/campaigns', 'GET/campaigns/*', '*/stripe/*'),
+}
+
+# Role resource lists, built once per (stage ARN, role) and shared by every policy
+ROLE_RESOURCES: Dict[Tuple[str, str], List[str]] = {}
 
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
@@ -21,26 +53,20 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
         if not token:
             return generate_policy('user', 'Deny', event['methodArn'])
         
-        # Validate JWT token
-        payload = validate_jwt_token(token)
-        if not payload:
+        # Reuse an earlier decision for this token if we have one
+        digest = token_digest(token)
+        decision = TOKEN_CACHE.get(digest)
+        if decision is None:
+            # Validate JWT token
+            payload = validate_jwt_token(token)
+            if not payload:
+                return generate_policy('user', 'Deny', event['methodArn'])
+            decision = TOKEN_CACHE.put_allowed(digest, payload)
+        elif not decision.allowed:
             return generate_policy('user', 'Deny', event['methodArn'])
         
-        # Extract user information
-        user_id = payload.get('sub')
-        user_role = payload.get('user_metadata', {}).get('role', 'user')
-        
-        logger.info(f"Authorized user: {user_id} with role: {user_role}")
-        
         # Generate allow policy with user context
-        policy = generate_policy(user_id, 'Allow', event['methodArn'])
-        policy['context'] = {
-            'userId': user_id,
-            'userRole': user_role,
-            'email': payload.get('email', '')
-        }
-        
-        return policy
+        return decision.policy_for(policy_scope(event['methodArn']), build_allow_policy)
         
     except Exception as e:
         logger.error(f"Authorization error: {str(e)}")
@@ -59,28 +85,12 @@ def extract_token(event: Dict[str, Any]) -> Optional[str]:
 def validate_jwt_token(token: str) -> Optional[Dict[str, Any]]:
     """Validate JWT token using Supabase JWKS"""
     try:
-        # Get JWKS from Supabase
-        supabase_url = "YOUR_SUPABASE_URL"  # Replace with actual URL
-        jwks_url = f"{supabase_url}/.well-known/jwks.json"
-        
-        # Fetch JWKS (with caching in production)
-        if jwks_url not in JWKS_CACHE:
-            response = requests.get(jwks_url, timeout=10)
-            response.raise_for_status()
-            JWKS_CACHE[jwks_url] = response.json()
-        
-        jwks = JWKS_CACHE[jwks_url]
-        
         # Decode token header to get key ID
         unverified_header = jwt.get_unverified_header(token)
         kid = unverified_header.get('kid')
         
-        # Find the correct key
-        key = None
-        for jwk in jwks['keys']:
-            if jwk['kid'] == kid:
-                key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
-                break
+        # Look up the parsed key (refetches the JWKS on expiry or rotation)
+        key = JWKS_CACHE.get_signing_key(kid)
         
         if not key:
             logger.error("Unable to find appropriate key")
@@ -92,22 +102,67 @@ def validate_jwt_token(token: str) -> Optional[Dict[str, Any]]:
             key,
             algorithms=['RS256'],
             audience='authenticated',
-            issuer=supabase_url
+            issuer=SUPABASE_URL
         )
         
         return payload
         
     except jwt.ExpiredSignatureError:
         logger.error("Token has expired")
+        TOKEN_CACHE.put_denied(token_digest(token))
         return None
     except jwt.InvalidTokenError as e:
         logger.error(f"Invalid token: {str(e)}")
+        TOKEN_CACHE.put_denied(token_digest(token))
         return None
     except Exception as e:
         logger.error(f"Token validation error: {str(e)}")
         return None
 
-def generate_policy(principal_id: str, effect: str, resource: str) -> Dict[str, Any]:
+def policy_scope(method_arn: str) -> str:
+    """Part of the methodArn a policy is built for: the ARN itself or its stage"""
+    if POLICY_MODE == 'method':
+        return method_arn
+    
+    # arn:aws:execute-api:{region}:{account}:{api_id}/{stage}/{method}/{path}
+    api_arn, stage = method_arn.split('/')[:2]
+    return f"{api_arn}/{stage}"
+
+def policy_resources(scope: str, role: str) -> Union[str, List[str]]:
+    """Resources an Allow policy for `role` covers within `scope`"""
+    if POLICY_MODE == 'method':
+        return scope
+    if POLICY_MODE == 'stage':
+        return f"{scope}/*"
+    
+    key = (scope, role)
+    resources = ROLE_RESOURCES.get(key)
+    if resources is None:
+        resources = [f"{scope}/{route}" for route in ROLE_ROUTES.get(role, ())]
+        ROLE_RESOURCES[key] = resources
+    return resources
+
+def build_allow_policy(payload: Dict[str, Any], scope: str) -> Dict[str, Any]:
+    """Build the Allow policy and authorizer context for verified claims"""
+    user_id = payload.get('sub')
+    user_role = payload.get('user_metadata', {}).get('role', 'user')
+    
+    resources = policy_resources(scope, user_role)
+    if not resources:
+        logger.info(f"No routes allowed for user: {user_id} with role: {user_role}")
+        return generate_policy(user_id, 'Deny', f"{scope}/*")
+    
+    logger.info(f"Authorized user: {user_id} with role: {user_role}")
+    
+    policy = generate_policy(user_id, 'Allow', resources)
+    policy['context'] = {
+        'userId': user_id,
+        'userRole': user_role,
+        'email': payload.get('email', '')
+    }
+    return policy
+
+def generate_policy(principal_id: str, effect: str, resource: Union[str, List[str]]) -> Dict[str, Any]:
     """Generate IAM policy for API Gateway"""
     return {
         'principalId': principal_id,
@@ -0,0 +1,25 @@
+import threading
+from typing import Any, Dict, Tuple
+
+# boto3 is imported on first use rather than at module import, so handlers
+# that never reach AWS don't pay for it during cold start
+_clients: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Any] = {}
+_lock = threading.Lock()
+
+def get_client(service_name: str, **kwargs) -> Any:
+    """Return a boto3 client for `service_name`, created once per container"""
+    key = (service_name, tuple(sorted(kwargs.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                import boto3
+                client = boto3.client(service_name, **kwargs)
+                _clients[key] = client
+    return client
+
+def reset_clients() -> None:
+    """Drop cached clients (used by tests)"""
+    with _lock:
+        _clients.clear()
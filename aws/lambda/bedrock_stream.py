@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger()
+
+# Generate with invoke_model_with_response_stream (default) or invoke_model
+BEDROCK_STREAMING = os.environ.get('BEDROCK_STREAMING', 'true').lower() == 'true'
+
+# Streamed text is written to the job's chunk log once this much is
+# buffered, or this long after the last write
+GENERATION_FLUSH_CHARS = int(os.environ.get('GENERATION_FLUSH_CHARS', '2048'))
+GENERATION_FLUSH_SECONDS = float(os.environ.get('GENERATION_FLUSH_SECONDS', '2'))
+
+# Stop reading and checkpoint when the invocation has this little time left,
+# so the continuation resumes from what was written rather than starting over
+GENERATION_DEADLINE_MARGIN_SECONDS = float(os.environ.get('GENERATION_DEADLINE_MARGIN_SECONDS', '5'))
+
+# Rough characters per token, for models whose stream carries no token counts
+CHARS_PER_TOKEN = 4
+
+
+class StreamInterrupted(Exception):
+    """The response stream failed part way; what had arrived is in the sink"""
+
+
+class ChunkSink:
+    """
+    Appends a job's generated text to its chunk log in batches, one row
+    per flush. Without a store (inline generation) text is only counted.
+    """
+
+    def __init__(self, store: Optional[Any], name: Optional[str], clock: Callable[[], float] = time.monotonic):
+        self.store = store if name else None
+        self.name = name
+        self.clock = clock
+        self.seq = 0
+        self.flushes = 0
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._last_flush = clock()
+
+    def resume(self) -> str:
+        """Text already written by earlier invocations of this job"""
+        if self.store is None:
+            return ''
+        chunks = self.store.get_chunks(self.name)
+        if chunks:
+            self.seq = chunks[-1]['seq'] + 1
+        return ''.join(chunk['content'] for chunk in chunks)
+
+    def append(self, text: str) -> None:
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars >= GENERATION_FLUSH_CHARS or self.clock() - self._last_flush >= GENERATION_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self.store is not None:
+            self.store.append_chunks(self.name, [{'seq': self.seq, 'content': ''.join(self._pending)}])
+        self.seq += 1
+        self.flushes += 1
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = self.clock()
+
+
+def parse_event(event: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """(text, invocation metrics) of one response-stream event"""
+    if 'chunk' not in event:
+        # Modelled stream errors arrive as events: throttlingException, ...
+        error = next(iter(event), 'unknown')
+        raise RuntimeError(f"Bedrock stream error: {error}: {event.get(error)}")
+
+    payload = json.loads(event['chunk']['bytes'])
+    delta = payload.get('delta') or {}
+    text = payload.get('completion') or delta.get('text') or ''
+    return text, payload.get('amazon-bedrock-invocationMetrics')
+
+
+def stream_completion(
+    bedrock: Any,
+    model_id: str,
+    request: Dict[str, Any],
+    sink: ChunkSink,
+    remaining_seconds: Optional[Callable[[], float]] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> Dict[str, Any]:
+    """
+    Stream a completion into `sink`, continuing from the text it already holds.
+
+    Earlier output is appended to the prompt so the model carries on where
+    the last invocation stopped. When `remaining_seconds()` drops below
+    GENERATION_DEADLINE_MARGIN_SECONDS the stream is abandoned after a
+    flush and `finished` is False. If the stream fails part way (a
+    throttlingException event, a dropped connection) the text so far is
+    flushed and StreamInterrupted raised, so a continuation can resume.
+
+    Returns `{'text', 'finished', 'metrics'}`; `text` includes the resumed
+    prefix.
+    """
+    prefix = sink.resume()
+    if prefix:
+        request = {**request, 'prompt': request['prompt'] + prefix}
+
+    start = clock()
+    response = bedrock.invoke_model_with_response_stream(
+        modelId=model_id,
+        contentType='application/json',
+        accept='application/json',
+        body=json.dumps(request)
+    )
+    stream = response['body']
+
+    parts = [prefix]
+    first_token_at = None
+    invocation_metrics = None
+    chunks = 0
+    finished = False
+    try:
+        for event in stream:
+            text, event_metrics = parse_event(event)
+            if text:
+                if first_token_at is None:
+                    first_token_at = clock()
+                parts.append(text)
+                sink.append(text)
+                chunks += 1
+            if event_metrics:
+                invocation_metrics = event_metrics
+            if remaining_seconds is not None and remaining_seconds() < GENERATION_DEADLINE_MARGIN_SECONDS:
+                break
+        else:
+            finished = True
+    except Exception as e:
+        raise StreamInterrupted(str(e)) from e
+    finally:
+        # Keep what arrived even if the stream failed, so a continuation resumes from it
+        sink.flush()
+        if not finished and hasattr(stream, 'close'):
+            stream.close()
+
+    end = clock()
+    generated_chars = sum(len(part) for part in parts[1:])
+    output_tokens = (invocation_metrics or {}).get('outputTokenCount')
+    if output_tokens is None:
+        output_tokens = round(generated_chars / CHARS_PER_TOKEN)
+    generating = end - first_token_at if first_token_at is not None else 0.0
+
+    return {
+        'text': ''.join(parts),
+        'finished': finished,
+        'metrics': {
+            'time_to_first_token_ms': round((first_token_at - start) * 1000, 2) if first_token_at is not None else None,
+            'tokens_per_second': round(output_tokens / generating, 1) if generating > 0 else None,
+            'output_tokens': output_tokens,
+            'output_chars': generated_chars,
+            'chunks': chunks,
+            'flushes': sink.flushes,
+            'resumed_chars': len(prefix),
+            'finished': finished,
+        },
+    }
@@ -0,0 +1,85 @@
+import json
+import logging
+import time
+from typing import Dict, Any
+from generation_cache import cache_key, get_generation_cache
+from start_training_job import MODEL_ID, build_request, model_endpoint
+from training_data import content_fingerprint
+from training_jobs import COMPLETED, record_completed_job
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Looks for a cached generation of the same training data and prompt
+
+    Returns the execution input with `cache: {key, hit, source}` added. On
+    a hit the cached output is recorded as the new twin's completed job,
+    the result carries the twin's model endpoint, and the state machine
+    goes straight to UpdateStatusToActive. `force_regenerate` skips the
+    lookup; the key is still returned so the fresh result replaces the
+    cached one. Training data without an ETag or Last-Modified has no key
+    and is always generated. Cache problems are logged and treated as a miss.
+    """
+    started = time.monotonic()
+    cache = get_generation_cache()
+    force = bool(event.get('force_regenerate'))
+    lookup = {'key': None, 'hit': False, 'source': None}
+    fingerprint = {}
+    result = None
+
+    try:
+        fingerprint = content_fingerprint(event['training_data_url']) or {}
+        if fingerprint:
+            lookup['key'] = cache_key(fingerprint['fingerprint'], MODEL_ID, build_request(event))
+
+        if not fingerprint:
+            lookup['source'] = 'uncacheable'
+        elif force:
+            cache.bypass()
+            lookup['source'] = 'bypassed'
+        else:
+            cached, lookup['source'] = cache.get(lookup['key'])
+            if cached is not None:
+                result = reuse_result(event['digital_twin_id'], cached)
+                lookup['hit'] = True
+
+    except Exception as e:
+        logger.warning(f"Generation cache unavailable for {event.get('digital_twin_id')}: {str(e)}")
+        lookup['error'] = str(e)
+
+    logger.info(json.dumps({
+        'stage': 'generation_cache',
+        'digital_twin_id': event.get('digital_twin_id'),
+        'hit': lookup['hit'],
+        'source': lookup['source'],
+        'forced': force,
+        'fingerprint_method': fingerprint.get('method'),
+        'lookup_ms': round((time.monotonic() - started) * 1000, 2),
+        **cache.metrics()
+    }))
+
+    output = {**event, 'cache': lookup}
+    if lookup['hit']:
+        output.update({
+            'training_status': COMPLETED,
+            'model_endpoint': result['model_endpoint'],
+            'generated_for': result['generated_for']
+        })
+    return output
+
+def reuse_result(digital_twin_id: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a cached generation as `digital_twin_id`'s own result, shaped like a generated one"""
+    result = {
+        'statusCode': 200,
+        'digital_twin_id': digital_twin_id,
+        'model_output': cached.get('model_output'),
+        'model_endpoint': model_endpoint(digital_twin_id),
+        'training_status': COMPLETED,
+        'generation': cached.get('generation'),
+        'generated_for': cached.get('generated_for'),
+        'estimated_completion_time': None
+    }
+    record_completed_job(digital_twin_id, result)
+    return result
@@ -1,51 +1,57 @@
 import json
-import boto3
 import logging
-import random
 from typing import Dict, Any
+from training_jobs import COMPLETED, FAILED, get_job_store, next_poll, training_job_name
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-sagemaker = boto3.client('sagemaker')
-
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
     Checks the status of the AI training job
+
+    Only runs when the job's completion callback did not arrive in time:
+    the state machine loops through here and a Wait state, waiting
+    `poll.wait_seconds` (exponential backoff with a cap) between checks,
+    and fails the job once `poll.exhausted` is reached.
     """
     try:
         logger.info(f"Checking training status: {json.dumps(event)}")
         
-        training_job_name = event['training_job_name']
         digital_twin_id = event['digital_twin_id']
+        name = event.get('training_job_name') or training_job_name(digital_twin_id)
+        poll = next_poll(event.get('poll'))
         
-        # Mock training status check
-        # In production: response = sagemaker.describe_training_job(TrainingJobName=training_job_name)
-        
-        # Simulate random completion for demo
-        completion_chance = random.random()
+        # Read the status the training job recorded
+        job = get_job_store().get(name)
+        training_status = job['status'] if job else FAILED
+        model_endpoint = None
+        error = None
         
-        if completion_chance > 0.7:  # 30% chance of completion each check
-            training_status = 'COMPLETED'
-            model_endpoint = f"https://api.reelagents.com/models/{digital_twin_id}"
-        elif completion_chance < 0.1:  # 10% chance of failure
-            training_status = 'FAILED'
-            model_endpoint = None
-        else:
-            training_status = 'IN_PROGRESS'
-            model_endpoint = None
+        if job is None:
+            error = f"Training job {name} not found"
+        elif training_status == COMPLETED:
+            model_endpoint = (job.get('result') or {}).get('model_endpoint')
+        elif training_status == FAILED:
+            error = job.get('failure_reason') or 'Unknown training error'
+        elif poll['exhausted']:
+            training_status = FAILED
+            error = f"Training did not finish after {poll['attempt']} status checks"
         
-        logger.info(f"Training status for {training_job_name}: {training_status}")
+        logger.info(f"Training status for {name}: {training_status} (check {poll['attempt']})")
         
-        return {
+        result = {
             'statusCode': 200,
             'digital_twin_id': digital_twin_id,
-            'training_job_name': training_job_name,
+            'training_job_name': name,
             'training_status': training_status,
             'model_endpoint': model_endpoint,
-            'progress_percentage': 85 if training_status == 'IN_PROGRESS' else 100
+            'poll': poll
         }
+        if error is not None:
+            result['Error'] = error
+        return result
         
     except Exception as e:
         logger.error(f"Error checking training status: {str(e)}")
-        raise Exception(f"Failed to check training status: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Failed to check training status: {str(e)}")
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from training_jobs import get_job_store
+
+# How long a generated result is reused for identical inputs
+GENERATION_CACHE_TTL_SECONDS = int(os.environ.get('GENERATION_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+
+# Per-container front of the durable cache: at most this many results,
+# each kept for at most this long before the store is asked again
+GENERATION_CACHE_MEMORY_ENTRIES = int(os.environ.get('GENERATION_CACHE_MEMORY_ENTRIES', '256'))
+GENERATION_CACHE_MEMORY_TTL_SECONDS = int(os.environ.get('GENERATION_CACHE_MEMORY_TTL_SECONDS', '300'))
+
+# Bumped when cached results stop being valid for reasons the key can't
+# see (e.g. how results are post-processed). 2: generations are prompted
+# with the ingested training data summary, which the key (computed before
+# ingestion) does not cover
+CACHE_KEY_VERSION = 2
+
+
+def cache_key(content_fingerprint: str, model_id: str, request: Dict[str, Any]) -> str:
+    """
+    Key of a generation: the training data's content, the model and the
+    exact request body (prompt, with the twin's name and description, and
+    sampling parameters). A prompt change therefore never serves stale results.
+    """
+    material = json.dumps({
+        'version': CACHE_KEY_VERSION,
+        'content': content_fingerprint,
+        'model_id': model_id,
+        'request': request,
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    """
+    Generated results by cache key: a bounded in-memory LRU in front of the
+    job store's digital_twin_generation_cache table, which owns expiry.
+    """
+
+    def __init__(
+        self,
+        store_getter: Callable[[], Any] = get_job_store,
+        ttl_seconds: float = GENERATION_CACHE_TTL_SECONDS,
+        memory_entries: int = GENERATION_CACHE_MEMORY_ENTRIES,
+        memory_ttl_seconds: float = GENERATION_CACHE_MEMORY_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._store_getter = store_getter
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.memory_ttl_seconds = min(memory_ttl_seconds, ttl_seconds)
+        self._clock = clock
+
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'store_hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'writes': 0,
+        }
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """(result, 'memory' or 'store'), or (None, 'miss')"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry[1], 'memory'
+            if entry is not None:
+                del self._entries[key]
+
+        row = self._store_getter().get_cached_result(key)
+        if row is None:
+            self._count('misses')
+            return None, 'miss'
+
+        self._remember(key, row['result'])
+        self._count('store_hits')
+        return row['result'], 'store'
+
+    def bypass(self) -> None:
+        """Record a lookup skipped because a fresh generation was requested"""
+        self._count('bypassed')
+
+    def put(self, key: str, result: Dict[str, Any], model_id: Optional[str] = None) -> None:
+        """Store `result` durably for the TTL, replacing any earlier result for `key`"""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        self._store_getter().save_cached_result({
+            'cache_key': key,
+            'model_id': model_id,
+            'result': result,
+            'expires_at': expires_at.isoformat(),
+        })
+        self._remember(key, result)
+        self._count('writes')
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters plus hit rate; every hit is a Bedrock generation saved"""
+        with self._lock:
+            stats = dict(self.stats)
+        hits = stats['memory_hits'] + stats['store_hits']
+        lookups = hits + stats['misses']
+        return {
+            **stats,
+            'generations_saved': hits,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.memory_ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.memory_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+
+_cache: Optional[GenerationCache] = None
+_lock = threading.Lock()
+
+
+def get_generation_cache() -> GenerationCache:
+    """The cache shared by every invocation in this container"""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = GenerationCache()
+    return _cache
+
+
+def reset_generation_cache() -> None:
+    """Drop the shared cache (used by tests)"""
+    global _cache
+    with _lock:
+        _cache = None
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+from typing import Dict, Any
+from aws_clients import get_client
+from ingestion import plan_splits, reduce_level, summarize_split
+from start_training_job import MODEL_ID
+from training_data import head
+from training_jobs import get_job_store, training_job_name
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Model that summarizes the training data; a cheaper one than the
+# generation model can be used
+INGEST_MODEL_ID = os.environ.get('INGEST_MODEL_ID', MODEL_ID)
+
+def plan_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Plans the ingestion of a twin's training data
+    
+    Splits the object into byte ranges for the IngestChunks Map state and
+    clears summaries left by an earlier run of the same twin.
+    """
+    try:
+        url = event['training_data_url']
+        ingestion_id = training_job_name(event['digital_twin_id'])
+        
+        info = head(url)
+        splits = plan_splits(info['size'], info['ranges'])
+        get_job_store().delete_summaries(ingestion_id)
+        
+        logger.info(f"Ingesting {url} ({info['size']} bytes) for {ingestion_id} in {len(splits)} splits")
+        
+        return {
+            'ingestion_id': ingestion_id,
+            'size': info['size'],
+            'splits': splits,
+            'level': 0
+        }
+    
+    except Exception as e:
+        logger.error(f"Error planning ingestion: {str(e)}")
+        raise Exception(f"Failed to read training data: {str(e)}")
+
+def split_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Summarizes one split of the training data (an IngestChunks Map iteration)
+    
+    Streams the split in bounded chunks and summarizes them in parallel;
+    memory stays flat however large the split is.
+    """
+    try:
+        stats = summarize_split(
+            get_job_store(),
+            get_client('bedrock-runtime', region_name='us-east-1'),
+            INGEST_MODEL_ID,
+            event['ingestion_id'],
+            event['training_data_url'],
+            event['split']
+        )
+        logger.info(json.dumps({'stage': 'ingest_split', 'ingestion_id': event['ingestion_id'], **stats}))
+        return stats
+    
+    except Exception as e:
+        logger.error(f"Error summarizing split {event.get('split')}: {str(e)}")
+        raise Exception(f"Failed to summarize training data: {str(e)}")
+
+def reduce_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Merges one level of training data summaries into the next
+    
+    The state machine calls this until a single summary is left, which
+    StartTrainingJob passes to the generation as `training_summary`.
+    """
+    try:
+        ingestion_id = event['ingestion_id']
+        result = reduce_level(
+            get_job_store(),
+            get_client('bedrock-runtime', region_name='us-east-1'),
+            INGEST_MODEL_ID,
+            ingestion_id,
+            event.get('level', 0)
+        )
+        done = 'summary' in result
+        logger.info(json.dumps({'stage': 'ingest_reduce', 'ingestion_id': ingestion_id, 'level': result['level'], 'count': result['count'], 'done': done}))
+        
+        return {
+            'ingestion_id': ingestion_id,
+            'level': result['level'],
+            'count': result['count'],
+            'done': done,
+            'summary': result.get('summary')
+        }
+    
+    except Exception as e:
+        logger.error(f"Error reducing summaries: {str(e)}")
+        raise Exception(f"Failed to summarize training data: {str(e)}")
@@ -0,0 +1,218 @@
+import codecs
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+from training_data import iter_bytes
+
+# Training data is summarized in chunks of about this many characters,
+# well inside the model's context window
+INGEST_CHUNK_CHARS = int(os.environ.get('INGEST_CHUNK_CHARS', '100000'))
+
+# Bytes of the object each IngestChunks Map iteration streams; objects too
+# large for INGEST_MAX_SPLITS splits get proportionally larger ones
+INGEST_SPLIT_BYTES = int(os.environ.get('INGEST_SPLIT_BYTES', str(16 * 1024 * 1024)))
+INGEST_MAX_SPLITS = int(os.environ.get('INGEST_MAX_SPLITS', '1000'))
+
+# Bedrock calls in flight per invocation, which also bounds how many chunks
+# are held in memory at once
+INGEST_CONCURRENCY = int(os.environ.get('INGEST_CONCURRENCY', '8'))
+
+# Summaries merged per reduce call
+INGEST_REDUCE_FANIN = int(os.environ.get('INGEST_REDUCE_FANIN', '16'))
+
+SUMMARY_MAX_TOKENS = 512
+
+SUMMARIZE_PROMPT = """
+        Summarize this excerpt of a brand's marketing training data. Keep the facts, products, audience, tone and brand voice a digital twin of the brand would need; leave out boilerplate.
+
+        <excerpt>
+        {text}
+        </excerpt>
+        """
+
+MERGE_PROMPT = """
+        These are summaries of consecutive parts of a brand's marketing training data. Merge them into one summary that keeps the facts, products, audience, tone and brand voice a digital twin of the brand would need.
+
+        <summaries>
+        {text}
+        </summaries>
+        """
+
+
+def plan_splits(size: Optional[int], ranges: bool) -> List[Dict[str, Any]]:
+    """
+    Byte ranges `{'index', 'start', 'end'}` covering an object of `size`
+    bytes. Without a known size or range support there is one split, read
+    start to finish (`end` None).
+    """
+    if size is None or not ranges:
+        return [{'index': 0, 'start': 0, 'end': None}]
+
+    split_bytes = max(INGEST_SPLIT_BYTES, -(-size // INGEST_MAX_SPLITS))
+    return [
+        {'index': index, 'start': start, 'end': min(start + split_bytes, size)}
+        for index, start in enumerate(range(0, size, split_bytes))
+    ]
+
+
+def iter_text_chunks(pieces: Iterable[bytes], chunk_chars: Optional[int] = None, skip_partial: bool = False) -> Iterator[str]:
+    """
+    Decode streamed UTF-8 `pieces` into chunks of at most `chunk_chars`,
+    cut at a line break or space when one falls in the chunk's second half.
+
+    Only one chunk plus one piece is held at a time. With `skip_partial`
+    (a split that starts mid-object) leading UTF-8 continuation bytes are
+    dropped; a character cut at the end of a split is dropped too.
+    """
+    chunk_chars = chunk_chars or INGEST_CHUNK_CHARS
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    buffer = ''
+    for piece in pieces:
+        if skip_partial:
+            skipped = 0
+            while skipped < min(3, len(piece)) and piece[skipped] & 0xC0 == 0x80:
+                skipped += 1
+            piece = piece[skipped:]
+            skip_partial = not piece
+        buffer += decoder.decode(piece)
+        while len(buffer) >= chunk_chars:
+            cut = _cut(buffer, chunk_chars)
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+    buffer += decoder.decode(b'', final=True)
+    while buffer.strip():
+        cut = _cut(buffer, chunk_chars) if len(buffer) > chunk_chars else len(buffer)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+
+
+def _cut(text: str, limit: int) -> int:
+    for separator in ('\n', ' '):
+        position = text.rfind(separator, limit // 2, limit)
+        if position >= 0:
+            return position + 1
+    return limit
+
+
+def summarize(bedrock: Any, model_id: str, prompt: str, text: str) -> str:
+    response = bedrock.invoke_model(
+        modelId=model_id,
+        contentType='application/json',
+        accept='application/json',
+        body=json.dumps({
+            "prompt": prompt.format(text=text),
+            "max_tokens_to_sample": SUMMARY_MAX_TOKENS,
+            "temperature": 0.2
+        })
+    )
+    return json.loads(response['body'].read()).get('completion', '').strip()
+
+
+def bounded_map(
+    function: Callable[[Any], Any],
+    items: Iterable[Any],
+    on_result: Callable[[Any, Any], None],
+    concurrency: Optional[int] = None,
+) -> None:
+    """
+    Call `function` on each item with at most `concurrency` in flight, and
+    `on_result(item, result)` as each finishes. Items are pulled from the
+    iterable only when a slot is free, so a streamed input is never read
+    ahead of the calls it feeds. The first failure is raised.
+    """
+    concurrency = max(1, concurrency or INGEST_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ingest') as pool:
+        pending: Dict[Future, Any] = {}
+
+        def drain() -> None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                on_result(pending.pop(future), future.result())
+
+        for item in items:
+            if len(pending) >= concurrency:
+                drain()
+            pending[pool.submit(function, item)] = item
+        while pending:
+            drain()
+
+
+def summarize_split(
+    store: Any,
+    bedrock: Any,
+    model_id: str,
+    ingestion_id: str,
+    url: str,
+    split: Dict[str, Any],
+    chunk_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Stream one split of the training data and store a level-0 summary per
+    chunk. Chunks summarized by an earlier attempt are skipped, so a
+    retried split only pays for what it had not finished.
+    """
+    started = time.monotonic()
+    done: Set[int] = {row['seq'] for row in store.get_summary_positions(ingestion_id, 0, split['index'])}
+    stats = {'split': split['index'], 'bytes': 0, 'chunks': 0, 'summarized': 0, 'skipped': 0}
+
+    def pieces() -> Iterator[bytes]:
+        for piece in iter_bytes(url, start=split['start'], end=split['end']):
+            stats['bytes'] += len(piece)
+            yield piece
+
+    def todo() -> Iterator[Dict[str, Any]]:
+        for seq, text in enumerate(iter_text_chunks(pieces(), chunk_chars, skip_partial=split['start'] > 0)):
+            stats['chunks'] += 1
+            if seq in done:
+                stats['skipped'] += 1
+                continue
+            yield {'seq': seq, 'text': text}
+
+    def store_summary(chunk: Dict[str, Any], summary: str) -> None:
+        store.append_summaries(ingestion_id, [{'level': 0, 'split': split['index'], 'seq': chunk['seq'], 'content': summary}])
+        stats['summarized'] += 1
+
+    bounded_map(lambda chunk: summarize(bedrock, model_id, SUMMARIZE_PROMPT, chunk['text']), todo(), store_summary)
+    return {**stats, 'seconds': round(time.monotonic() - started, 3)}
+
+
+def reduce_level(store: Any, bedrock: Any, model_id: str, ingestion_id: str, level: int) -> Dict[str, Any]:
+    """
+    Merge a level's summaries INGEST_REDUCE_FANIN at a time into the next
+    level, reading them a page at a time. Returns `{'level', 'count'}` of
+    the level written, plus `summary` once a level holds a single one: the
+    final summary of the training data.
+    """
+    page_size = INGEST_REDUCE_FANIN * INGEST_CONCURRENCY
+    first = store.get_summaries(ingestion_id, level, 0, 2)
+    if len(first) <= 1:
+        return {'level': level, 'count': len(first), 'summary': first[0]['content'] if first else ''}
+
+    done = {row['split'] for row in store.get_summary_positions(ingestion_id, level + 1)}
+    written = 0
+    offset = 0
+    while True:
+        page = store.get_summaries(ingestion_id, level, offset, page_size)
+        groups = [
+            {'split': (offset + start) // INGEST_REDUCE_FANIN, 'rows': page[start:start + INGEST_REDUCE_FANIN]}
+            for start in range(0, len(page), INGEST_REDUCE_FANIN)
+        ]
+        written += len(groups)
+
+        def merge(group: Dict[str, Any]) -> str:
+            return summarize(bedrock, model_id, MERGE_PROMPT, '\n\n'.join(row['content'] for row in group['rows']))
+
+        def store_summary(group: Dict[str, Any], summary: str) -> None:
+            store.append_summaries(ingestion_id, [{'level': level + 1, 'split': group['split'], 'seq': 0, 'content': summary}])
+
+        bounded_map(merge, [group for group in groups if group['split'] not in done], store_summary)
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    if written == 1:
+        return {'level': level + 1, 'count': 1, 'summary': store.get_summaries(ingestion_id, level + 1, 0, 1)[0]['content']}
+    return {'level': level + 1, 'count': written}
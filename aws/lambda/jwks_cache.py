@@ -0,0 +1,159 @@
+import threading
+import time
+import logging
+import jwt
+import requests
+from typing import Dict, Any, Optional, Callable
+
+logger = logging.getLogger()
+
+
+class JWKSCache:
+    """
+    Parsed JWKS signing keys indexed by kid.
+
+    Keys are parsed once per fetch and served from memory until the TTL
+    expires. Inside the refresh window the current keys keep being served
+    while a background thread refetches. An unknown kid (key rotation)
+    triggers at most one refetch per `min_refetch_interval`, as does a
+    failed cold fetch, and all fetches are single-flight so concurrent
+    misses share one request.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        ttl_seconds: float = 600,
+        refresh_window_seconds: float = 60,
+        min_refetch_interval: float = 30,
+        fetch_timeout: float = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl_seconds = ttl_seconds
+        self.refresh_window_seconds = refresh_window_seconds
+        self.min_refetch_interval = min_refetch_interval
+        self.fetch_timeout = fetch_timeout
+        self._clock = clock
+
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._background_refresh: Optional[threading.Thread] = None
+        # Counters are bumped by the background refresh thread too
+        self._stats_lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'fetches': 0,
+            'background_refreshes': 0,
+            'rotation_refetches': 0,
+            'fetch_errors': 0,
+        }
+
+    def get_signing_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Return the parsed public key for `kid`, fetching the JWKS if needed"""
+        now = self._clock()
+        generation = self._generation
+
+        if self._fetched_at is None:
+            # A failed cold fetch is retried at most once per interval, so
+            # a JWKS outage doesn't put a fetch on every request; callers
+            # arriving during the first fetch still wait for it
+            if self._failed_at is None or now - self._failed_at >= self.min_refetch_interval:
+                self._refresh(generation)
+        elif now - self._fetched_at >= self.ttl_seconds:
+            if self._can_refetch():
+                self._refresh(generation)
+        elif now - self._fetched_at >= self.ttl_seconds - self.refresh_window_seconds:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is not None:
+            self._count('hits')
+            return key
+
+        self._count('misses')
+
+        # Unknown kid: the signing key may have rotated, refetch once
+        if self._can_refetch():
+            self._count('rotation_refetches')
+            self._refresh(generation)
+            key = self._keys.get(kid)
+
+        return key
+
+    def clear(self) -> None:
+        """Drop all cached keys and reset counters"""
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+            self._last_attempt_at = None
+            self._failed_at = None
+            self._generation += 1
+            with self._stats_lock:
+                for name in self.stats:
+                    self.stats[name] = 0
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _can_refetch(self) -> bool:
+        if self._last_attempt_at is None:
+            return True
+        return self._clock() - self._last_attempt_at >= self.min_refetch_interval
+
+    def _refresh(self, seen_generation: int) -> None:
+        """Fetch the JWKS unless another caller already did since `seen_generation`"""
+        with self._lock:
+            if self._generation != seen_generation:
+                return
+            self._fetch_locked()
+
+    def _refresh_in_background(self) -> None:
+        thread = self._background_refresh
+        if thread is not None and thread.is_alive():
+            return
+
+        self._count('background_refreshes')
+        generation = self._generation
+        thread = threading.Thread(target=self._refresh, args=(generation,), daemon=True)
+        self._background_refresh = thread
+        thread.start()
+
+    def _fetch_locked(self) -> None:
+        self._last_attempt_at = self._clock()
+        self._count('fetches')
+        try:
+            response = requests.get(self.jwks_url, timeout=self.fetch_timeout)
+            response.raise_for_status()
+            jwks = response.json()
+        except Exception as e:
+            self._count('fetch_errors')
+            logger.error(f"JWKS fetch failed: {str(e)}")
+            self._failed_at = self._clock()
+            self._generation += 1
+            # Keep serving the previous keys; a stale key set beats none
+            if not self._keys:
+                raise
+            return
+
+        keys = {}
+        for jwk in jwks.get('keys', []):
+            kid = jwk.get('kid')
+            if not kid or jwk.get('kty') != 'RSA':
+                continue
+            try:
+                keys[kid] = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping unparseable JWK {kid}: {str(e)}")
+
+        self._keys = keys
+        self._fetched_at = self._clock()
+        self._generation += 1
+        logger.info(f"Loaded {len(keys)} JWKS signing keys")
@@ -1,52 +1,203 @@
 import json
-import boto3
 import logging
+import os
 from typing import Dict, Any
+from aws_clients import get_client
+from bedrock_stream import BEDROCK_STREAMING, ChunkSink, StreamInterrupted, stream_completion
+from generation_cache import get_generation_cache
+from training_jobs import COMPLETED, FAILED, IN_PROGRESS, complete_job, get_job_store, start_job
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+MODEL_ID = 'anthropic.claude-v3'
+
+# Self-invocations allowed when generation keeps hitting the function timeout
+# or its stream keeps failing
+GENERATION_MAX_CONTINUATIONS = int(os.environ.get('GENERATION_MAX_CONTINUATIONS', '5'))
 
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
-    Calls Bedrock Claude 3.7 to generate a digital twin output using a system prompt and training data URL.
+    Starts the digital twin generation
+
+    The state machine invokes this with a Step Functions task token: the
+    job is recorded with the token and handed to the training worker, and
+    the execution resumes when the worker reports completion. Without a
+    token the generation runs inline.
     """
+    if not event.get('task_token'):
+        return generate(event)
+    
     try:
-        logger.info(f"Starting digital twin LLM job: {json.dumps(event)}")
-        digital_twin_id = event['digital_twin_id']
-        training_data_url = event['training_data_url']
-        name = event.get('name', 'Digital Twin')
-        description = event.get('description', '')
+        job = start_job(event, event['task_token'])
+        logger.info(f"Started training job {job['training_job_name']}")
+        
+        return {
+            'statusCode': 200,
+            'digital_twin_id': job['digital_twin_id'],
+            'training_job_name': job['training_job_name'],
+            'training_status': IN_PROGRESS
+        }
+        
+    except Exception as e:
+        logger.error(f"Error starting training job: {str(e)}")
+        raise Exception(f"Failed to start training job: {str(e)}")
+
+def worker_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Training worker, invoked asynchronously by start_job
+
+    Runs the generation and reports the outcome through complete_job,
+    which resumes the waiting execution. Failures are reported rather
+    than raised, so Lambda's async retries don't run the job twice.
+
+    Generated text is persisted as it streams. If this invocation nears
+    its timeout first, or the stream fails part way, it invokes itself
+    again to carry on from the persisted text, up to
+    GENERATION_MAX_CONTINUATIONS times.
+    
+    A finished generation is cached under the `cache_key` chosen by
+    CheckGenerationCache, so identical resubmissions skip it.
+    """
+    name = event['training_job_name']
+    try:
+        try:
+            result = generate(event, context)
+        except StreamInterrupted as e:
+            logger.warning(f"Generation stream for {name} failed: {str(e)}")
+            result = {
+                'statusCode': 202,
+                'digital_twin_id': event['digital_twin_id'],
+                'training_job_name': name,
+                'training_status': IN_PROGRESS,
+                'error': str(e)
+            }
+        
+        if result['training_status'] == IN_PROGRESS:
+            continuations = event.get('continuations', 0) + 1
+            if continuations > GENERATION_MAX_CONTINUATIONS:
+                last_error = f" (last error: {result['error']})" if result.get('error') else ''
+                raise Exception(f"Generation did not finish within {GENERATION_MAX_CONTINUATIONS} continuations{last_error}")
+            get_client('lambda').invoke(
+                FunctionName=context.function_name,
+                InvocationType='Event',
+                Payload=json.dumps({**event, 'continuations': continuations}).encode('utf-8')
+            )
+            logger.info(f"Checkpointed {name}; continuation {continuations} started")
+            return result
+    except Exception as e:
+        complete_job(name, error=str(e))
+        return {'statusCode': 500, 'training_job_name': name, 'training_status': FAILED, 'error': str(e)}
+    
+    if event.get('cache_key'):
+        remember_result(event['cache_key'], result)
+    complete_job(name, result)
+    return result
+
+def remember_result(key: str, result: Dict[str, Any]) -> None:
+    """Cache a finished generation for CheckGenerationCache; a failed write only costs a future hit"""
+    try:
+        get_generation_cache().put(key, {
+            'model_output': result.get('model_output'),
+            'generated_for': result.get('digital_twin_id'),
+            'generation': result.get('generation')
+        }, model_id=MODEL_ID)
+    except Exception as e:
+        logger.warning(f"Could not cache generation {key}: {str(e)}")
 
-        # Compose system prompt for Claude
+def build_request(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The Bedrock request body for a twin; without a `training_summary` it is
+    also what the twin's cached result is keyed on
+    """
+    training_data_url = event['training_data_url']
+    name = event.get('name', 'Digital Twin')
+    description = event.get('description', '')
+    training_summary = event.get('training_summary')
+    
+    # Compose system prompt for Claude
+    if training_summary is None:
         system_prompt = f"""
         You are a digital twin for a marketing campaign. Your job is to analyze the data at {training_data_url} and generate a summary or insights for the campaign named '{name}'. Description: {description}
         """
+    else:
+        # The training data as summarized by the ingestion states; the
+        # model cannot fetch the URL itself
+        system_prompt = f"""
+        You are a digital twin for a marketing campaign. Your job is to analyze the campaign's training data, summarized below, and generate a summary or insights for the campaign named '{name}'. Description: {description}
+
+        <training_data_summary>
+        {training_summary}
+        </training_data_summary>
+        """
+    return {
+        "prompt": system_prompt,
+        "max_tokens_to_sample": 1024,
+        "temperature": 0.7
+    }
+
+def model_endpoint(digital_twin_id: str) -> str:
+    return f"https://api.reelagents.com/models/{digital_twin_id}"
+
+def generate(event: Dict[str, Any], context=None) -> Dict[str, Any]:
+    """
+    Calls Bedrock Claude 3.7 to generate a digital twin output using a system prompt and training data URL.
+
+    With BEDROCK_STREAMING the response is streamed; for a worker-run job
+    (`training_job_name` set) the text is appended to the job's chunk log
+    as it arrives and generation stops early, with training_status
+    IN_PROGRESS, when the invocation is about to time out. A stream that
+    fails part way raises StreamInterrupted once its text is persisted.
+    """
+    try:
+        logger.info(f"Starting digital twin LLM job: {json.dumps(event)}")
+        digital_twin_id = event['digital_twin_id']
+        job_name = event.get('training_job_name')
+
+        request = build_request(event)
+
+        bedrock = get_client('bedrock-runtime', region_name='us-east-1')
+        if BEDROCK_STREAMING:
+            remaining = None
+            if job_name and context is not None:
+                remaining = lambda: context.get_remaining_time_in_millis() / 1000
+            stream = stream_completion(bedrock, MODEL_ID, request, ChunkSink(get_job_store(), job_name), remaining)
+            model_output = stream['text']
+            metrics = stream['metrics']
+        else:
+            response = bedrock.invoke_model(
+                modelId=MODEL_ID,
+                contentType='application/json',
+                accept='application/json',
+                body=json.dumps(request)
+            )
+            result = json.loads(response['body'].read())
+            model_output = result.get('completion', '')
+            metrics = {'output_chars': len(model_output), 'finished': True}
+
+        logger.info(json.dumps({'stage': 'generate', 'training_job_name': job_name, **metrics}))
 
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-v3',
-            contentType='application/json',
-            accept='application/json',
-            body=json.dumps({
-                "prompt": system_prompt,
-                "max_tokens_to_sample": 1024,
-                "temperature": 0.7
-            })
-        )
-        result = json.loads(response['body'].read())
-        model_output = result.get('completion', '')
-
-        logger.info(f"Bedrock LLM output: {model_output}")
+        if not metrics['finished']:
+            return {
+                'statusCode': 202,
+                'digital_twin_id': digital_twin_id,
+                'training_job_name': job_name,
+                'training_status': IN_PROGRESS,
+                'generation': metrics
+            }
 
         return {
             'statusCode': 200,
             'digital_twin_id': digital_twin_id,
             'model_output': model_output,
-            'training_status': 'COMPLETED',
+            'model_endpoint': model_endpoint(digital_twin_id),
+            'training_status': COMPLETED,
+            'generation': metrics,
             'estimated_completion_time': None
         }
 
+    except StreamInterrupted:
+        raise
     except Exception as e:
         logger.error(f"Error running Bedrock LLM: {str(e)}")
-        raise Exception(f"Bedrock LLM job failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Bedrock LLM job failed: {str(e)}")
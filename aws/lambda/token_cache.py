@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable
+
+# Rough per-entry cost of the digest, entry object and cached policy dict
+ENTRY_OVERHEAD_BYTES = 1024
+
+
+def token_digest(token: str) -> bytes:
+    """Cache key for a bearer token; the raw token is never stored"""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class TokenDecision:
+    """Outcome of verifying one token: claims (None for a denial) plus the last policy built"""
+
+    __slots__ = ('claims', 'expires_at', 'size', 'resource', 'policy')
+
+    def __init__(self, claims: Optional[Dict[str, Any]], expires_at: float, size: int):
+        self.claims = claims
+        self.expires_at = expires_at
+        self.size = size
+        self.resource: Optional[str] = None
+        self.policy: Optional[Dict[str, Any]] = None
+
+    @property
+    def allowed(self) -> bool:
+        return self.claims is not None
+
+    def policy_for(
+        self,
+        resource: str,
+        build_policy: Callable[[Dict[str, Any], str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Return the cached policy for `resource`, building it from the claims if needed"""
+        if self.policy is None or self.resource != resource:
+            self.policy = build_policy(self.claims, resource)
+            self.resource = resource
+        return self.policy
+
+
+class TokenDecisionCache:
+    """
+    Bounded LRU of verified-token decisions.
+
+    Allowed tokens are kept until their own `exp` (capped at `max_ttl_seconds`),
+    denied tokens for `negative_ttl_seconds`. The cache is bounded both by
+    entry count and by an approximate byte budget; least recently used
+    entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 16 * 1024 * 1024,
+        negative_ttl_seconds: float = 30,
+        max_ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_ttl_seconds = max_ttl_seconds
+        self._clock = clock
+
+        self._entries: 'OrderedDict[bytes, TokenDecision]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+        }
+
+    def get(self, digest: bytes) -> Optional[TokenDecision]:
+        """Return the live decision for `digest`, or None on a miss"""
+        with self._lock:
+            decision = self._entries.get(digest)
+            if decision is None:
+                self.stats['misses'] += 1
+                return None
+
+            if decision.expires_at <= self._clock():
+                self._remove(digest)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(digest)
+            if decision.allowed:
+                self.stats['hits'] += 1
+            else:
+                self.stats['negative_hits'] += 1
+            return decision
+
+    def put_allowed(self, digest: bytes, claims: Dict[str, Any]) -> TokenDecision:
+        """Cache verified claims until the token's own expiry"""
+        now = self._clock()
+        expires_at = now + self.max_ttl_seconds
+        if isinstance(claims.get('exp'), (int, float)):
+            expires_at = min(expires_at, claims['exp'])
+
+        size = ENTRY_OVERHEAD_BYTES + len(json.dumps(claims, separators=(',', ':')))
+        decision = TokenDecision(claims, expires_at, size)
+        if expires_at > now:
+            self._store(digest, decision)
+        return decision
+
+    def put_denied(self, digest: bytes) -> TokenDecision:
+        """Cache a definitive rejection briefly"""
+        decision = TokenDecision(None, self._clock() + self.negative_ttl_seconds, ENTRY_OVERHEAD_BYTES)
+        if self.negative_ttl_seconds > 0:
+            self._store(digest, decision)
+        return decision
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for name in self.stats:
+                self.stats[name] = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters plus current size, for logging and sizing"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes)
+
+    def _store(self, digest: bytes, decision: TokenDecision) -> None:
+        with self._lock:
+            if digest in self._entries:
+                self._remove(digest)
+            self._entries[digest] = decision
+            self._bytes += decision.size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats['evictions'] += 1
+
+    def _remove(self, digest: bytes) -> None:
+        decision = self._entries.pop(digest)
+        self._bytes -= decision.size
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+from aws_clients import get_client
+
+# Bytes read per chunk when streaming a training data object
+TRAINING_DATA_CHUNK_BYTES = 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 30
+
+_session: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def get_http_session() -> Any:
+    """The requests session shared by every invocation in this container"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                # Imported here so functions that only read S3 skip requests
+                import requests
+
+                _session = requests.Session()
+    return _session
+
+
+def reset_http_session() -> None:
+    """Drop the shared session (used by tests)"""
+    global _session
+    with _lock:
+        _session = None
+
+
+def parse_s3_url(url: str) -> Tuple[str, str]:
+    """(bucket, key) of an s3://bucket/key URL"""
+    parsed = urlparse(url)
+    return parsed.netloc, parsed.path.lstrip('/')
+
+
+def head(url: str) -> Dict[str, Any]:
+    """
+    `{'etag', 'size', 'last_modified', 'ranges'}` of a training data
+    object, without reading it. `etag`, `size` and `last_modified` may be
+    None; `ranges` is whether byte ranges of it can be fetched.
+    """
+    if url.startswith('s3://'):
+        bucket, key = parse_s3_url(url)
+        response = get_client('s3').head_object(Bucket=bucket, Key=key)
+        last_modified = response.get('LastModified')
+        return {
+            'etag': response.get('ETag'),
+            'size': response.get('ContentLength'),
+            'last_modified': last_modified.isoformat() if last_modified is not None else None,
+            'ranges': True,
+        }
+
+    response = get_http_session().head(url, allow_redirects=True, timeout=FETCH_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    size = response.headers.get('Content-Length')
+    etag = response.headers.get('ETag')
+    # A weak validator only promises equivalent content, not the same bytes
+    if etag and etag.startswith('W/'):
+        etag = None
+    return {
+        'etag': etag,
+        'size': int(size) if size is not None else None,
+        'last_modified': response.headers.get('Last-Modified'),
+        'ranges': response.headers.get('Accept-Ranges') == 'bytes',
+    }
+
+
+def iter_bytes(
+    url: str,
+    chunk_bytes: int = TRAINING_DATA_CHUNK_BYTES,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Stream bytes [start, end) of a training data object in chunks of at most `chunk_bytes`"""
+    ranged = start > 0 or end is not None
+    byte_range = f"bytes={start}-{end - 1 if end is not None else ''}"
+
+    if url.startswith('s3://'):
+        bucket, key = parse_s3_url(url)
+        params = {'Range': byte_range} if ranged else {}
+        body = get_client('s3').get_object(Bucket=bucket, Key=key, **params)['Body']
+        try:
+            yield from body.iter_chunks(chunk_bytes)
+        finally:
+            body.close()
+        return
+
+    headers = {'Range': byte_range} if ranged else {}
+    response = get_http_session().get(url, stream=True, headers=headers, timeout=FETCH_TIMEOUT_SECONDS)
+    try:
+        response.raise_for_status()
+        # An origin that ignores Range sends the whole object: trim it here
+        position = 0 if ranged and response.status_code != 206 else start
+        for chunk in response.iter_content(chunk_bytes):
+            if position < start:
+                skipped = min(len(chunk), start - position)
+                chunk = chunk[skipped:]
+                position += skipped
+            if end is not None and position + len(chunk) > end:
+                chunk = chunk[:end - position]
+            if chunk:
+                yield chunk
+            position += len(chunk)
+            if end is not None and position >= end:
+                return
+    finally:
+        response.close()
+
+
+def content_fingerprint(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Identify the bytes currently at `url` from its metadata alone.
+
+    A strong ETag (and S3's) already identifies the object's content, so
+    it is used with the URL it belongs to. Without one, the size and
+    Last-Modified stand in for it. An object with neither gets None, and
+    is not cached: hashing it would mean reading all of it. Returns
+    `{'fingerprint', 'method'}`.
+    """
+    info = head(url)
+    if info['etag']:
+        digest = hashlib.sha256(f"{url}\n{info['etag']}\n{info['size']}".encode('utf-8')).hexdigest()
+        return {'fingerprint': f'etag:{digest}', 'method': 'etag'}
+    if info['last_modified'] and info['size'] is not None:
+        digest = hashlib.sha256(f"{url}\n{info['last_modified']}\n{info['size']}".encode('utf-8')).hexdigest()
+        return {'fingerprint': f'modified:{digest}', 'method': 'last_modified'}
+    return None
@@ -0,0 +1,338 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from aws_clients import get_client
+
+logger = logging.getLogger()
+
+SUPABASE_URL = os.environ.get('SUPABASE_URL', 'YOUR_SUPABASE_URL')
+SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY', '')
+STORE_TIMEOUT_SECONDS = 10
+
+# Function that runs the generation, invoked asynchronously so the state
+# machine waits on a task token rather than on a Lambda invocation
+TRAINING_WORKER_FUNCTION = os.environ.get('TRAINING_WORKER_FUNCTION', 'run-training-job')
+
+# Fallback polling for jobs whose callback never arrives: the wait doubles
+# from TRAINING_POLL_INITIAL_SECONDS up to TRAINING_POLL_MAX_SECONDS, and
+# the job is failed after TRAINING_POLL_MAX_ATTEMPTS status checks
+TRAINING_POLL_INITIAL_SECONDS = int(os.environ.get('TRAINING_POLL_INITIAL_SECONDS', '30'))
+TRAINING_POLL_MAX_SECONDS = int(os.environ.get('TRAINING_POLL_MAX_SECONDS', '300'))
+TRAINING_POLL_MAX_ATTEMPTS = int(os.environ.get('TRAINING_POLL_MAX_ATTEMPTS', '12'))
+
+IN_PROGRESS = 'IN_PROGRESS'
+COMPLETED = 'COMPLETED'
+FAILED = 'FAILED'
+
+# SendTaskSuccess/SendTaskFailure errors meaning nothing waits on the token
+# any more (the state timed out into the polling loop, or the execution ended)
+STALE_TOKEN_ERRORS = ('TaskTimedOut', 'TaskDoesNotExist', 'InvalidToken')
+
+# Step Functions caps a task failure's cause at 32768 characters
+MAX_FAILURE_CAUSE = 32768
+
+
+def training_job_name(digital_twin_id: str) -> str:
+    """Deterministic, so the fallback poller can find a job from the execution input alone"""
+    return f"twin-{digital_twin_id}"
+
+
+def next_poll(poll: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The fallback loop's next check: attempt number, seconds to wait and whether it is the last"""
+    attempt = (poll or {}).get('attempt', 0) + 1
+    return {
+        'attempt': attempt,
+        'wait_seconds': min(TRAINING_POLL_MAX_SECONDS, TRAINING_POLL_INITIAL_SECONDS * 2 ** (attempt - 1)),
+        'exhausted': attempt >= TRAINING_POLL_MAX_ATTEMPTS,
+    }
+
+
+class TrainingJobStore:
+    """
+    digital_twin_training_jobs rows, the generated text of each job in
+    digital_twin_generation_chunks, reusable results in
+    digital_twin_generation_cache and the training data summaries of each
+    ingestion in digital_twin_ingestion_summaries, through PostgREST with
+    the service role
+    """
+
+    table = 'digital_twin_training_jobs'
+    chunks_table = 'digital_twin_generation_chunks'
+    cache_table = 'digital_twin_generation_cache'
+    summaries_table = 'digital_twin_ingestion_summaries'
+
+    def __init__(self, url: str = SUPABASE_URL, service_key: str = SUPABASE_SERVICE_KEY):
+        # requests is imported here so the status checker's cold start stays small
+        import requests
+
+        self.url = f"{url}/rest/v1/{self.table}"
+        self.chunks_url = f"{url}/rest/v1/{self.chunks_table}"
+        self.cache_url = f"{url}/rest/v1/{self.cache_table}"
+        self.summaries_url = f"{url}/rest/v1/{self.summaries_table}"
+        self.session = requests.Session()
+        self.session.headers.update({
+            'apikey': service_key,
+            'Authorization': f"Bearer {service_key}",
+            'Content-Type': 'application/json'
+        })
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Insert `job`, replacing an earlier run of the same job (e.g. a retried state)"""
+        response = self.session.post(
+            self.url,
+            params={'on_conflict': 'training_job_name'},
+            data=json.dumps(job),
+            headers={'Prefer': 'resolution=merge-duplicates'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        response = self.session.get(
+            self.url,
+            params={'training_job_name': f'eq.{name}', 'limit': 1},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        rows = response.json()
+        return rows[0] if rows else None
+
+    def update(self, name: str, fields: Dict[str, Any]) -> None:
+        response = self.session.patch(
+            self.url,
+            params={'training_job_name': f'eq.{name}'},
+            data=json.dumps(fields),
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+    def append_chunks(self, name: str, chunks: List[Dict[str, Any]]) -> None:
+        """Append `{'seq', 'content'}` rows; rows already written (a replayed flush) are skipped"""
+        response = self.session.post(
+            self.chunks_url,
+            params={'on_conflict': 'training_job_name,seq'},
+            data=json.dumps([{'training_job_name': name, **chunk} for chunk in chunks]),
+            headers={'Prefer': 'resolution=ignore-duplicates'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+    def delete_chunks(self, name: str) -> None:
+        response = self.session.delete(
+            self.chunks_url,
+            params={'training_job_name': f'eq.{name}'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+    def get_chunks(self, name: str) -> List[Dict[str, Any]]:
+        """The job's chunks in order"""
+        response = self.session.get(
+            self.chunks_url,
+            params={'training_job_name': f'eq.{name}', 'select': 'seq,content', 'order': 'seq.asc'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """The unexpired cache row for `key`, if any"""
+        response = self.session.get(
+            self.cache_url,
+            params={'cache_key': f'eq.{key}', 'expires_at': f'gt.{_now()}', 'select': 'cache_key,result,expires_at', 'limit': 1},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        rows = response.json()
+        return rows[0] if rows else None
+
+    def save_cached_result(self, row: Dict[str, Any]) -> None:
+        """Insert a cache row, replacing an earlier (e.g. expired or forced-out) result for its key"""
+        response = self.session.post(
+            self.cache_url,
+            params={'on_conflict': 'cache_key'},
+            data=json.dumps(row),
+            headers={'Prefer': 'resolution=merge-duplicates'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+    def append_summaries(self, ingestion_id: str, summaries: List[Dict[str, Any]]) -> None:
+        """Append `{'level', 'split', 'seq', 'content'}` rows; rows already written (a retried split) are skipped"""
+        response = self.session.post(
+            self.summaries_url,
+            params={'on_conflict': 'ingestion_id,level,split,seq'},
+            data=json.dumps([{'ingestion_id': ingestion_id, **summary} for summary in summaries]),
+            headers={'Prefer': 'resolution=ignore-duplicates'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+    def get_summaries(self, ingestion_id: str, level: int, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """One page of a level's summaries, in document order"""
+        response = self.session.get(
+            self.summaries_url,
+            params={
+                'ingestion_id': f'eq.{ingestion_id}',
+                'level': f'eq.{level}',
+                'select': 'split,seq,content',
+                'order': 'split.asc,seq.asc',
+                'offset': offset,
+                'limit': limit,
+            },
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def get_summary_positions(self, ingestion_id: str, level: int, split: Optional[int] = None) -> List[Dict[str, Any]]:
+        """`{'split', 'seq'}` of the summaries already written at `level` (of one split, if given)"""
+        params = {'ingestion_id': f'eq.{ingestion_id}', 'level': f'eq.{level}', 'select': 'split,seq'}
+        if split is not None:
+            params['split'] = f'eq.{split}'
+        response = self.session.get(self.summaries_url, params=params, timeout=STORE_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return response.json()
+
+    def delete_summaries(self, ingestion_id: str) -> None:
+        response = self.session.delete(
+            self.summaries_url,
+            params={'ingestion_id': f'eq.{ingestion_id}'},
+            timeout=STORE_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()
+
+
+class LambdaTrainingBackend:
+    """Runs each job in the training worker Lambda, which calls complete_job when done"""
+
+    def start(self, job: Dict[str, Any]) -> None:
+        get_client('lambda').invoke(
+            FunctionName=TRAINING_WORKER_FUNCTION,
+            InvocationType='Event',
+            Payload=json.dumps(job).encode('utf-8')
+        )
+
+
+_store: Optional[TrainingJobStore] = None
+_backend: Optional[LambdaTrainingBackend] = None
+_lock = threading.Lock()
+
+
+def get_job_store() -> TrainingJobStore:
+    """The job store shared by every invocation in this container"""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = TrainingJobStore()
+    return _store
+
+
+def get_training_backend() -> LambdaTrainingBackend:
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = LambdaTrainingBackend()
+    return _backend
+
+
+def reset_training_jobs() -> None:
+    """Drop the cached store and backend (used by tests)"""
+    global _store, _backend
+    with _lock:
+        _store = None
+        _backend = None
+
+
+def start_job(spec: Dict[str, Any], task_token: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Record a training job for `spec` and hand it to the training backend.
+
+    With `task_token` the job's completion resumes the execution waiting
+    on it; see complete_job.
+    """
+    job = {
+        'training_job_name': training_job_name(spec['digital_twin_id']),
+        'digital_twin_id': spec['digital_twin_id'],
+        'status': IN_PROGRESS,
+        'task_token': task_token,
+        'result': None,
+        'failure_reason': None,
+        'started_at': _now(),
+        'finished_at': None,
+    }
+    store = get_job_store()
+    store.save(job)
+    # A new run starts from scratch rather than resuming an earlier one's output
+    store.delete_chunks(job['training_job_name'])
+
+    payload = {key: value for key, value in spec.items() if key != 'task_token'}
+    get_training_backend().start({**payload, 'training_job_name': job['training_job_name']})
+    return job
+
+
+def record_completed_job(digital_twin_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Record a twin's job as already finished with `result`, for a twin whose
+    generation was reused rather than run, so its output is stored under
+    its own id like any generated twin's
+    """
+    now = _now()
+    job = {
+        'training_job_name': training_job_name(digital_twin_id),
+        'digital_twin_id': digital_twin_id,
+        'status': COMPLETED,
+        'task_token': None,
+        'result': result,
+        'failure_reason': None,
+        'started_at': now,
+        'finished_at': now,
+    }
+    get_job_store().save(job)
+    return job
+
+
+def complete_job(name: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> bool:
+    """
+    Record a job's outcome and resume the execution waiting on its token.
+
+    Returns whether the execution was resumed. A stale token (the state
+    already timed out into the polling loop) is not an error: the poller
+    reads the recorded outcome instead.
+    """
+    store = get_job_store()
+    job = store.get(name)
+    if job is None:
+        raise ValueError(f"Unknown training job: {name}")
+
+    if error is None:
+        store.update(name, {'status': COMPLETED, 'result': result, 'finished_at': _now()})
+    else:
+        store.update(name, {'status': FAILED, 'failure_reason': error, 'finished_at': _now()})
+
+    token = job.get('task_token')
+    if not token:
+        return False
+
+    step_functions = get_client('stepfunctions')
+    try:
+        if error is None:
+            step_functions.send_task_success(taskToken=token, output=json.dumps(result))
+        else:
+            step_functions.send_task_failure(taskToken=token, error='TrainingFailed', cause=error[:MAX_FAILURE_CAUSE])
+    except Exception as e:
+        code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+        if code not in STALE_TOKEN_ERRORS:
+            raise
+        logger.warning(f"Training job {name} finished after its callback expired ({code})")
+        return False
+    return True
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
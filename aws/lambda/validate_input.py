@@ -1,5 +1,4 @@
 import json
-import boto3
 import logging
 from typing import Dict, Any
 
@@ -38,6 +37,7 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
             'company_id': event['company_id'],
             'training_data_url': event['training_data_url'],
             'description': event.get('description', ''),
+            'force_regenerate': bool(event.get('force_regenerate', False)),
             'validation_status': 'PASSED'
         }
         
@@ -1,8 +1,9 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { CreditCard, CheckCircle, AlertCircle, ExternalLink } from 'lucide-react';
 import { Button } from '../ui/Button';
 import { Card, CardHeader, CardTitle, CardContent } from '../ui/Card';
 import { useAuth } from '../../hooks/useAuth';
+import { createConnectAccountLink } from '../../lib/stripe';
 
 interface StripeOnboardingProps {
   userType: 'agent' | 'company';
@@ -18,6 +19,38 @@ export const StripeOnboarding: React.FC<StripeOnboardingProps> = ({
   const [error, setError] = useState<string | null>(null);
   const [accountId, setAccountId] = useState<string | null>(null);
 
+  // Stripe sends users back to refresh_url once their link has been used or
+  // has expired. It is a distinct URL so the page can ask for a new link:
+  // reloading with the same request would get the used one back.
+  const pageUrl = window.location.origin + window.location.pathname;
+
+  const createOnboardingLink = (account: string, refresh = false) =>
+    createConnectAccountLink(
+      account,
+      `${pageUrl}?onboarding=refresh&account=${encodeURIComponent(account)}`,
+      `${pageUrl}?onboarding=complete`,
+      refresh,
+    );
+
+  useEffect(() => {
+    const params = new URLSearchParams(window.location.search);
+    const account = params.get('account');
+    if (params.get('onboarding') !== 'refresh' || !account) {
+      return;
+    }
+
+    setLoading(true);
+    setAccountId(account);
+    createOnboardingLink(account, true)
+      .then((linkData) => {
+        window.location.href = linkData.url;
+      })
+      .catch((err) => {
+        setError(err instanceof Error ? err.message : 'An error occurred');
+        setLoading(false);
+      });
+  }, []);
+
   const handleCreateAccount = async () => {
     setLoading(true);
     setError(null);
@@ -44,23 +77,7 @@ export const StripeOnboarding: React.FC<StripeOnboardingProps> = ({
       setAccountId(data.account_id);
 
       // Create account link for onboarding
-      const linkResponse = await fetch('/api/stripe/create-account-link', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          account_id: data.account_id,
-          refresh_url: window.location.href,
-          return_url: window.location.href + '?onboarding=complete',
-        }),
-      });
-
-      if (!linkResponse.ok) {
-        throw new Error('Failed to create onboarding link');
-      }
-
-      const linkData = await linkResponse.json();
+      const linkData = await createOnboardingLink(data.account_id);
       
       // Redirect to Stripe onboarding
       window.location.href = linkData.url;
@@ -8,6 +8,15 @@ interface ApiResponse<T = any> {
   status: number;
 }
 
+// One page of GET /api/campaigns; pass next_cursor back as `cursor` for the
+// next page while has_more is true
+export interface CampaignPage {
+  campaigns: any[];
+  count: number;
+  has_more: boolean;
+  next_cursor: string | null;
+}
+
 class ApiClient {
   private async getAuthHeaders(): Promise<HeadersInit> {
     const { data: { session } } = await supabase.auth.getSession();
@@ -59,10 +68,38 @@ class ApiClient {
     company_id: string;
     training_data_url: string;
     description?: string;
-  }): Promise<ApiResponse<{ job_id: string; digital_twin_id: string }>> {
+    force_regenerate?: boolean;
+  }, idempotencyKey?: string): Promise<ApiResponse<{ job_id: string; digital_twin_id: string }>> {
     return this.request('/api/digital-twins/create', {
       method: 'POST',
       body: JSON.stringify(data),
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
+    });
+  }
+
+  async batchCreateDigitalTwins(twins: Array<{
+    name: string;
+    company_id: string;
+    training_data_url: string;
+    description?: string;
+    force_regenerate?: boolean;
+  }>, idempotencyKey?: string): Promise<ApiResponse<{
+    results: Array<{
+      index: number;
+      status: 'started' | 'error';
+      job_id?: string;
+      digital_twin_id?: string;
+      execution_arn?: string;
+      error?: string;
+    }>;
+    job_ids: string[];
+    started: number;
+    failed: number;
+  }>> {
+    return this.request('/api/digital-twins/batch-create', {
+      method: 'POST',
+      body: JSON.stringify({ twins }),
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
     });
   }
 
@@ -79,15 +116,43 @@ class ApiClient {
     target_audience?: string;
     start_date?: string;
     end_date?: string;
-  }): Promise<ApiResponse<any>> {
+  }, idempotencyKey?: string): Promise<ApiResponse<any>> {
     return this.request('/api/campaigns/create', {
       method: 'POST',
       body: JSON.stringify(data),
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
+    });
+  }
+
+  async bulkCreateCampaigns(campaigns: Array<{
+    name: string;
+    company_id: string;
+    budget: number;
+    description?: string;
+    target_audience?: string;
+    start_date?: string;
+    end_date?: string;
+  }>): Promise<ApiResponse<{
+    results: Array<{ index: number; status: 'created' | 'error'; id?: string; error?: string }>;
+    created: number;
+    failed: number;
+  }>> {
+    return this.request('/api/campaigns/bulk-create', {
+      method: 'POST',
+      body: JSON.stringify(campaigns),
     });
   }
 
-  async getCampaigns(companyId: string): Promise<ApiResponse<any[]>> {
-    return this.request(`/api/campaigns?company_id=${companyId}`);
+  async getCampaigns(companyId: string, page: {
+    cursor?: string;
+    limit?: number;
+    fields?: string[];
+  } = {}): Promise<ApiResponse<CampaignPage>> {
+    const params = new URLSearchParams({ company_id: companyId });
+    if (page.cursor) params.set('cursor', page.cursor);
+    if (page.limit) params.set('limit', String(page.limit));
+    if (page.fields?.length) params.set('fields', page.fields.join(','));
+    return this.request(`/api/campaigns?${params.toString()}`);
   }
 
   // Job Status API (for tracking async operations)
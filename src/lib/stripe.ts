@@ -15,8 +15,10 @@ export const getStripe = () => {
   return stripePromise;
 };
 
-// Stripe Connect onboarding URL helper
-export const createConnectAccountLink = async (accountId: string, refreshUrl: string, returnUrl: string) => {
+// Stripe Connect onboarding URL helper. Unexpired links are reused; pass
+// `refresh` from the refresh_url page, where Stripe sends users whose link
+// was already used, to force a new one.
+export const createConnectAccountLink = async (accountId: string, refreshUrl: string, returnUrl: string, refresh = false) => {
   const response = await fetch('/api/stripe/create-account-link', {
     method: 'POST',
     headers: {
@@ -26,6 +28,7 @@ export const createConnectAccountLink = async (accountId: string, refreshUrl: st
       account_id: accountId,
       refresh_url: refreshUrl,
       return_url: returnUrl,
+      refresh,
     }),
   });
 
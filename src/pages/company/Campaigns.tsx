@@ -1,21 +1,35 @@
 import React from 'react';
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery } from '@tanstack/react-query';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/Card';
 import { Button } from '../../components/ui/Button';
 import { CampaignWizard } from '../../components/campaigns/CampaignWizard';
 import { useAuth } from '../../hooks/useAuth';
-import { apiClient } from '../../lib/apiClient';
+import { apiClient, CampaignPage } from '../../lib/apiClient';
 
 const CompanyCampaigns: React.FC = () => {
   const { user, profile } = useAuth();
-  const fetchCampaigns = async () => {
-    const { data } = await apiClient.getCampaigns(profile?.company_id || '');
-    return data || [];
+  // The API returns campaigns a page at a time; follow next_cursor on "Load more"
+  const fetchCampaigns = async ({ pageParam }: { pageParam?: string }): Promise<CampaignPage> => {
+    const { data, error } = await apiClient.getCampaigns(profile?.company_id || '', { cursor: pageParam });
+    if (!data) {
+      throw new Error(error || 'Failed to load campaigns');
+    }
+    return data;
   };
-  const { data: campaigns = [], isLoading, isError } = useQuery({
-    queryKey: ['company-campaigns'],
+  const {
+    data,
+    isLoading,
+    isError,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
+    queryKey: ['company-campaigns', profile?.company_id],
     queryFn: fetchCampaigns,
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => (lastPage.has_more && lastPage.next_cursor ? lastPage.next_cursor : undefined),
   });
+  const campaigns = data?.pages.flatMap((page) => page.campaigns) ?? [];
 
   if (!user || user.role !== 'company') {
     return (
@@ -68,6 +82,13 @@ const CompanyCampaigns: React.FC = () => {
                 ))}
               </div>
             )}
+            {hasNextPage && (
+              <div className="flex justify-center mt-6">
+                <Button variant="secondary" onClick={() => fetchNextPage()} loading={isFetchingNextPage}>
+                  Load more
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       </div>
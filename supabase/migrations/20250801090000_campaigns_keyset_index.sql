@@ -0,0 +1,16 @@
+/*
+  # Keyset Pagination Index for Campaigns
+
+  1. Indexes
+    - Add composite index on `campaigns(company_id, created_at DESC, id)` so
+      `GET /api/campaigns` pages (`ORDER BY created_at DESC, id` with a
+      `(created_at, id)` cursor) are a single index range scan regardless of
+      how many campaigns a company has
+    - Drop `idx_campaigns_company_id`; the composite index's leading column
+      serves the same lookups
+*/
+
+CREATE INDEX IF NOT EXISTS idx_campaigns_company_created_at_id
+  ON public.campaigns(company_id, created_at DESC, id);
+
+DROP INDEX IF EXISTS public.idx_campaigns_company_id;
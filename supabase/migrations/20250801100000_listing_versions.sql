@@ -0,0 +1,82 @@
+/*
+  # Listing Version Stamps for Conditional GETs
+
+  1. New Tables
+    - `listing_versions` - one counter per listing scope, bumped on every
+      write to the rows behind it:
+      - `campaigns:<company_id>` for GET /api/campaigns
+      - `agents` for GET /api/campaigns/{id}/certified-agents
+
+  2. Triggers
+    - campaigns insert/update/delete bumps the owning company's scope
+      (both companies if a campaign moves)
+    - agents writes, and email changes on users, bump `agents` once per
+      statement
+
+  3. Security
+    - RLS enabled with no policies; the API reads it with the service role
+      and the trigger function runs as SECURITY DEFINER
+*/
+
+CREATE TABLE IF NOT EXISTS public.listing_versions (
+  scope text PRIMARY KEY,
+  version bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE public.listing_versions ENABLE ROW LEVEL SECURITY;
+
+-- Increment (or create) the version for a scope
+CREATE OR REPLACE FUNCTION public.bump_listing_version(target_scope text)
+RETURNS void AS $$
+BEGIN
+  INSERT INTO public.listing_versions (scope, version, updated_at)
+  VALUES (target_scope, 1, now())
+  ON CONFLICT (scope) DO UPDATE
+    SET version = public.listing_versions.version + 1,
+        updated_at = now();
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION public.bump_campaigns_listing_version()
+RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.bump_listing_version('campaigns:' || NEW.company_id);
+  END IF;
+  IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.company_id IS DISTINCT FROM NEW.company_id) THEN
+    PERFORM public.bump_listing_version('campaigns:' || OLD.company_id);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION public.bump_agents_listing_version()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM public.bump_listing_version('agents');
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER bump_campaigns_listing_version
+  AFTER INSERT OR UPDATE OR DELETE ON public.campaigns
+  FOR EACH ROW EXECUTE FUNCTION public.bump_campaigns_listing_version();
+
+CREATE TRIGGER bump_agents_listing_version
+  AFTER INSERT OR UPDATE OR DELETE ON public.agents
+  FOR EACH STATEMENT EXECUTE FUNCTION public.bump_agents_listing_version();
+
+-- The certified-agents listing includes users.email
+CREATE TRIGGER bump_agents_listing_version_on_email
+  AFTER UPDATE OF email ON public.users
+  FOR EACH STATEMENT EXECUTE FUNCTION public.bump_agents_listing_version();
+
+-- Start existing companies at version 1 so stamps are never missing
+INSERT INTO public.listing_versions (scope, version)
+SELECT DISTINCT 'campaigns:' || company_id, 1 FROM public.campaigns
+ON CONFLICT (scope) DO NOTHING;
+
+INSERT INTO public.listing_versions (scope, version)
+VALUES ('agents', 1)
+ON CONFLICT (scope) DO NOTHING;
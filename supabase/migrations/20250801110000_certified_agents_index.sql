@@ -0,0 +1,18 @@
+/*
+  # Partial Index for the Certified-Agent Pool
+
+  1. Indexes
+    - Add partial index on `agents(certification_status, id)` limited to
+      certified agents. The marketplace pool query
+      (`WHERE certification_status = 'certified' ORDER BY id`) reads only
+      the certified rows, already in id order, instead of scanning agents
+
+  2. Notes
+    - API instances cache the pool and reload it when the `agents` listing
+      version changes (see `listing_versions`), which the agents trigger
+      bumps on every write, including certification changes
+*/
+
+CREATE INDEX IF NOT EXISTS idx_agents_certified
+  ON public.agents(certification_status, id)
+  WHERE certification_status = 'certified';
@@ -0,0 +1,223 @@
+/*
+  # Incrementally Maintained Agent Stats
+
+  1. Schema Updates
+    - Allow `paid` in `campaign_invitations.status` and add the
+      `payment_session_id` / `amount_paid` columns the Stripe webhook
+      already writes on `checkout.session.completed`
+
+  2. New Tables
+    - `agent_stats` - one row per agent with invitation counts by status,
+      completed (paid) campaigns, total paid and the sum/count of agreed
+      hourly rates; `rating` is derived from them
+
+  3. Triggers
+    - Every insert, delete, or status/rate/amount/agent change on
+      `campaign_invitations` applies the difference between the old and
+      new row to `agent_stats`, so reads never aggregate invitations
+    - Writes to `agent_stats` bump the `agents` listing version so cached
+      marketplace listings pick up new stats
+
+  4. Functions
+    - `rebuild_agent_stats()` recomputes every row from
+      `campaign_invitations` in one pass (backfill / repair)
+    - `agent_stats_drift()` lists agents whose stored stats differ from a
+      fresh aggregate (consistency check)
+
+  5. Security
+    - RLS enabled; stats are readable by authenticated users like the
+      marketplace listing they feed
+    - The maintenance functions and the aggregate view are service-role only
+*/
+
+-- Statuses and payment fields written by the Stripe webhook
+ALTER TABLE campaign_invitations DROP CONSTRAINT IF EXISTS campaign_invitations_status_check;
+ALTER TABLE campaign_invitations ADD CONSTRAINT campaign_invitations_status_check
+  CHECK (status IN ('pending', 'accepted', 'declined', 'paid'));
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'campaign_invitations' AND column_name = 'payment_session_id'
+  ) THEN
+    ALTER TABLE campaign_invitations ADD COLUMN payment_session_id text;
+  END IF;
+  
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'campaign_invitations' AND column_name = 'amount_paid'
+  ) THEN
+    -- Stripe amount_total, in the smallest currency unit
+    ALTER TABLE campaign_invitations ADD COLUMN amount_paid bigint;
+  END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS public.agent_stats (
+  agent_id uuid PRIMARY KEY REFERENCES public.agents(id) ON DELETE CASCADE,
+  invitations_count integer NOT NULL DEFAULT 0,
+  pending_count integer NOT NULL DEFAULT 0,
+  accepted_count integer NOT NULL DEFAULT 0,
+  declined_count integer NOT NULL DEFAULT 0,
+  completed_campaigns integer NOT NULL DEFAULT 0,
+  total_paid bigint NOT NULL DEFAULT 0,
+  -- Agreed rates on accepted and paid invitations
+  rate_sum numeric(14,2) NOT NULL DEFAULT 0,
+  rate_count integer NOT NULL DEFAULT 0,
+  -- Share of taken-on campaigns carried through to payment, on a 0-5 scale
+  rating numeric(2,1) GENERATED ALWAYS AS (
+    CASE WHEN accepted_count + completed_campaigns = 0 THEN NULL
+    ELSE round(5.0 * completed_campaigns / (accepted_count + completed_campaigns), 1)
+    END
+  ) STORED,
+  updated_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE public.agent_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can read agent stats"
+  ON public.agent_stats
+  FOR SELECT
+  TO authenticated
+  USING (true);
+
+-- Add (sign = 1) or remove (sign = -1) one invitation's contribution
+CREATE OR REPLACE FUNCTION public.agent_stats_apply(
+  target_agent_id uuid,
+  sign integer,
+  invitation_status text,
+  invitation_rate numeric,
+  invitation_amount bigint
+)
+RETURNS void AS $$
+DECLARE
+  engaged boolean := invitation_status IN ('accepted', 'paid');
+BEGIN
+  INSERT INTO public.agent_stats AS s (
+    agent_id, invitations_count, pending_count, accepted_count, declined_count,
+    completed_campaigns, total_paid, rate_sum, rate_count, updated_at
+  )
+  VALUES (
+    target_agent_id,
+    sign,
+    CASE WHEN invitation_status = 'pending' THEN sign ELSE 0 END,
+    CASE WHEN invitation_status = 'accepted' THEN sign ELSE 0 END,
+    CASE WHEN invitation_status = 'declined' THEN sign ELSE 0 END,
+    CASE WHEN invitation_status = 'paid' THEN sign ELSE 0 END,
+    CASE WHEN invitation_status = 'paid' THEN sign * COALESCE(invitation_amount, 0) ELSE 0 END,
+    CASE WHEN engaged THEN sign * invitation_rate ELSE 0 END,
+    CASE WHEN engaged THEN sign ELSE 0 END,
+    now()
+  )
+  ON CONFLICT (agent_id) DO UPDATE SET
+    invitations_count = s.invitations_count + EXCLUDED.invitations_count,
+    pending_count = s.pending_count + EXCLUDED.pending_count,
+    accepted_count = s.accepted_count + EXCLUDED.accepted_count,
+    declined_count = s.declined_count + EXCLUDED.declined_count,
+    completed_campaigns = s.completed_campaigns + EXCLUDED.completed_campaigns,
+    total_paid = s.total_paid + EXCLUDED.total_paid,
+    rate_sum = s.rate_sum + EXCLUDED.rate_sum,
+    rate_count = s.rate_count + EXCLUDED.rate_count,
+    updated_at = now();
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION public.agent_stats_on_invitation_change()
+RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM public.agent_stats_apply(OLD.agent_id, -1, OLD.status, OLD.hourly_rate, OLD.amount_paid);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.agent_stats_apply(NEW.agent_id, 1, NEW.status, NEW.hourly_rate, NEW.amount_paid);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER agent_stats_on_invitation_change
+  AFTER INSERT OR DELETE OR UPDATE OF agent_id, status, hourly_rate, amount_paid
+  ON campaign_invitations
+  FOR EACH ROW EXECUTE FUNCTION public.agent_stats_on_invitation_change();
+
+-- Marketplace listings embed stats; see listing_versions
+CREATE TRIGGER bump_agents_listing_version_on_stats
+  AFTER INSERT OR UPDATE OR DELETE ON public.agent_stats
+  FOR EACH STATEMENT EXECUTE FUNCTION public.bump_agents_listing_version();
+
+-- Stats as they would be computed from scratch
+CREATE OR REPLACE VIEW public.agent_stats_expected AS
+SELECT
+  agent_id,
+  count(*)::integer AS invitations_count,
+  (count(*) FILTER (WHERE status = 'pending'))::integer AS pending_count,
+  (count(*) FILTER (WHERE status = 'accepted'))::integer AS accepted_count,
+  (count(*) FILTER (WHERE status = 'declined'))::integer AS declined_count,
+  (count(*) FILTER (WHERE status = 'paid'))::integer AS completed_campaigns,
+  COALESCE(sum(amount_paid) FILTER (WHERE status = 'paid'), 0)::bigint AS total_paid,
+  COALESCE(sum(hourly_rate) FILTER (WHERE status IN ('accepted', 'paid')), 0) AS rate_sum,
+  (count(*) FILTER (WHERE status IN ('accepted', 'paid')))::integer AS rate_count
+FROM campaign_invitations
+GROUP BY agent_id;
+
+-- Recompute every row in one pass; writers wait for the rebuild to finish
+CREATE OR REPLACE FUNCTION public.rebuild_agent_stats()
+RETURNS integer AS $$
+DECLARE
+  rebuilt integer;
+BEGIN
+  LOCK TABLE campaign_invitations IN SHARE MODE;
+  
+  DELETE FROM public.agent_stats s
+  WHERE NOT EXISTS (SELECT 1 FROM campaign_invitations i WHERE i.agent_id = s.agent_id);
+  
+  INSERT INTO public.agent_stats AS s (
+    agent_id, invitations_count, pending_count, accepted_count, declined_count,
+    completed_campaigns, total_paid, rate_sum, rate_count, updated_at
+  )
+  SELECT
+    agent_id, invitations_count, pending_count, accepted_count, declined_count,
+    completed_campaigns, total_paid, rate_sum, rate_count, now()
+  FROM public.agent_stats_expected
+  ON CONFLICT (agent_id) DO UPDATE SET
+    invitations_count = EXCLUDED.invitations_count,
+    pending_count = EXCLUDED.pending_count,
+    accepted_count = EXCLUDED.accepted_count,
+    declined_count = EXCLUDED.declined_count,
+    completed_campaigns = EXCLUDED.completed_campaigns,
+    total_paid = EXCLUDED.total_paid,
+    rate_sum = EXCLUDED.rate_sum,
+    rate_count = EXCLUDED.rate_count,
+    updated_at = now();
+  
+  GET DIAGNOSTICS rebuilt = ROW_COUNT;
+  RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Agents whose stored stats differ from a fresh aggregate
+CREATE OR REPLACE FUNCTION public.agent_stats_drift()
+RETURNS TABLE (agent_id uuid, stored jsonb, expected jsonb) AS $$
+  SELECT
+    COALESCE(s.agent_id, e.agent_id),
+    to_jsonb(s) - 'rating' - 'updated_at',
+    to_jsonb(e)
+  FROM public.agent_stats s
+  FULL OUTER JOIN public.agent_stats_expected e ON e.agent_id = s.agent_id
+  WHERE (COALESCE(s.invitations_count, 0), COALESCE(s.pending_count, 0), COALESCE(s.accepted_count, 0),
+         COALESCE(s.declined_count, 0), COALESCE(s.completed_campaigns, 0), COALESCE(s.total_paid, 0),
+         COALESCE(s.rate_sum, 0), COALESCE(s.rate_count, 0))
+        IS DISTINCT FROM
+        (COALESCE(e.invitations_count, 0), COALESCE(e.pending_count, 0), COALESCE(e.accepted_count, 0),
+         COALESCE(e.declined_count, 0), COALESCE(e.completed_campaigns, 0), COALESCE(e.total_paid, 0),
+         COALESCE(e.rate_sum, 0), COALESCE(e.rate_count, 0));
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+-- Maintenance is for the service role only
+REVOKE ALL ON public.agent_stats_expected FROM anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.agent_stats_apply(uuid, integer, text, numeric, bigint) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rebuild_agent_stats() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.agent_stats_drift() FROM PUBLIC, anon, authenticated;
+
+-- Backfill existing invitations
+SELECT public.rebuild_agent_stats();
@@ -0,0 +1,50 @@
+/*
+  # Idempotency Keys for Create Endpoints
+
+  1. New Tables
+    - `idempotency_keys` - one row per `Idempotency-Key` sent to
+      POST /api/campaigns/create and POST /api/digital-twins/create:
+      - `key` (text, primary key) - endpoint, caller hash and client key;
+        the primary key is what makes concurrent claims atomic
+      - `request_hash` (text) - sha256 of the request body, so a reused
+        key with a different body is rejected
+      - `status` (text) - in_progress while the first request runs, then
+        completed with its response recorded
+      - `response_status`, `response_body` - the response replayed to retries
+      - `expires_at` (timestamptz) - after this the key may be claimed again
+
+  2. Maintenance
+    - `purge_expired_idempotency_keys()` deletes expired rows; the API
+      also clears an expired key in place when it is reused
+
+  3. Security
+    - RLS enabled with no policies; only the API (service role) uses it
+*/
+
+CREATE TABLE IF NOT EXISTS public.idempotency_keys (
+  key text PRIMARY KEY,
+  request_hash text NOT NULL,
+  status text NOT NULL DEFAULT 'in_progress' CHECK (status IN ('in_progress', 'completed')),
+  response_status integer,
+  response_body jsonb,
+  created_at timestamptz DEFAULT now(),
+  expires_at timestamptz NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON public.idempotency_keys(expires_at);
+
+ALTER TABLE public.idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.purge_expired_idempotency_keys()
+RETURNS bigint
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH purged AS (
+    DELETE FROM public.idempotency_keys WHERE expires_at <= now() RETURNING 1
+  )
+  SELECT count(*) FROM purged;
+$$;
+
+REVOKE ALL ON FUNCTION public.purge_expired_idempotency_keys() FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,65 @@
+/*
+  # Durable Queue for Stripe Webhook Events
+
+  1. New Tables
+    - `stripe_events` - every verified webhook, appended by
+      /api/stripe/webhook before it acknowledges Stripe:
+      - `event_id` (text, primary key) - Stripe's event id; redeliveries
+        of the same event are ignored
+      - `type`, `payload` (jsonb) - the raw event
+      - `status` - pending until applied, then done; dead after too many
+        failures
+      - `attempts`, `available_at`, `last_error` - retry bookkeeping;
+        a claim pushes `available_at` forward as a lease, so an event whose
+        worker crashed is picked up again when the lease runs out
+
+  2. Functions
+    - `claim_stripe_events(batch_size, lease_seconds)` - leases the oldest
+      available events with FOR UPDATE SKIP LOCKED, so concurrent workers
+      never claim the same event
+
+  3. Security
+    - RLS enabled with no policies; only the API (service role) uses it
+*/
+
+CREATE TABLE IF NOT EXISTS public.stripe_events (
+  event_id text PRIMARY KEY,
+  type text NOT NULL,
+  payload jsonb NOT NULL,
+  status text NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'done', 'dead')),
+  attempts integer NOT NULL DEFAULT 0,
+  available_at timestamptz NOT NULL DEFAULT now(),
+  last_error text,
+  received_at timestamptz NOT NULL DEFAULT now(),
+  processed_at timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS idx_stripe_events_pending
+  ON public.stripe_events(available_at, received_at)
+  WHERE status = 'pending';
+
+ALTER TABLE public.stripe_events ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.claim_stripe_events(batch_size integer, lease_seconds double precision)
+RETURNS TABLE (event_id text, type text, payload jsonb, attempts integer)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH claimed AS (
+    SELECT e.event_id
+    FROM public.stripe_events e
+    WHERE e.status = 'pending' AND e.available_at <= now()
+    ORDER BY e.available_at, e.received_at
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE public.stripe_events e
+  SET attempts = e.attempts + 1,
+      available_at = now() + make_interval(secs => lease_seconds)
+  FROM claimed
+  WHERE e.event_id = claimed.event_id
+  RETURNING e.event_id, e.type, e.payload, e.attempts;
+$$;
+
+REVOKE ALL ON FUNCTION public.claim_stripe_events(integer, double precision) FROM PUBLIC, anon, authenticated;
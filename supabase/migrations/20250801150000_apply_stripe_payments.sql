@@ -0,0 +1,39 @@
+/*
+  # Set-Based Payment Updates for the Stripe Event Worker
+
+  1. Functions
+    - `apply_stripe_payments(payments jsonb)` - marks invitations paid for
+      an array of `{campaign_id, agent_id, payment_session_id, amount_paid}`
+      in one UPDATE, so a burst of checkout.session.completed events costs
+      one round trip instead of one per event. The worker has already
+      collapsed the array to one entry per (campaign_id, agent_id), and
+      the join uses the table's UNIQUE (campaign_id, agent_id) index.
+
+  2. Security
+    - Callable by the service role only
+*/
+
+CREATE OR REPLACE FUNCTION public.apply_stripe_payments(payments jsonb)
+RETURNS integer
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH updated AS (
+    UPDATE public.campaign_invitations i
+    SET status = 'paid',
+        payment_session_id = p.payment_session_id,
+        amount_paid = p.amount_paid
+    FROM jsonb_to_recordset(payments) AS p(
+      campaign_id uuid,
+      agent_id uuid,
+      payment_session_id text,
+      amount_paid bigint
+    )
+    WHERE i.campaign_id = p.campaign_id AND i.agent_id = p.agent_id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+REVOKE ALL ON FUNCTION public.apply_stripe_payments(jsonb) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,25 @@
+/*
+  # Shared Cache of Stripe Onboarding Links
+
+  1. New Tables
+    - `stripe_account_links` - the current onboarding link per
+      (account, refresh_url, return_url), so reloading the onboarding page
+      on any API instance reuses it instead of calling Stripe again:
+      - `cache_key` (text, primary key) - sha256 of the three inputs
+      - `account_id` (text) - the connected account
+      - `url`, `expires_at` - the link as returned by Stripe
+
+  2. Security
+    - RLS enabled with no policies; links are only read and written by the
+      API with the service role
+*/
+
+CREATE TABLE IF NOT EXISTS public.stripe_account_links (
+  cache_key text PRIMARY KEY,
+  account_id text NOT NULL,
+  url text NOT NULL,
+  expires_at timestamptz NOT NULL,
+  created_at timestamptz DEFAULT now()
+);
+
+ALTER TABLE public.stripe_account_links ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,36 @@
+/*
+  # Digital Twin Training Jobs
+
+  1. New Tables
+    - `digital_twin_training_jobs` - one row per training run, so the job's
+      completion can resume the waiting Step Functions execution and the
+      fallback poller can read its status:
+      - `training_job_name` (text, primary key) - `twin-<digital_twin_id>`
+      - `digital_twin_id` (uuid)
+      - `status` (text) - IN_PROGRESS, COMPLETED or FAILED
+      - `task_token` (text) - Step Functions task token of the waiting
+        StartTrainingJob state; null for runs started without one
+      - `result` (jsonb) - the worker's output once COMPLETED
+      - `failure_reason` (text) - set when FAILED
+      - `started_at`, `finished_at`
+
+  2. Security
+    - RLS enabled with no policies; rows are only read and written by the
+      training Lambdas with the service role
+*/
+
+CREATE TABLE IF NOT EXISTS public.digital_twin_training_jobs (
+  training_job_name text PRIMARY KEY,
+  digital_twin_id uuid NOT NULL,
+  status text NOT NULL DEFAULT 'IN_PROGRESS' CHECK (status IN ('IN_PROGRESS', 'COMPLETED', 'FAILED')),
+  task_token text,
+  result jsonb,
+  failure_reason text,
+  started_at timestamptz DEFAULT now(),
+  finished_at timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS digital_twin_training_jobs_twin_idx
+  ON public.digital_twin_training_jobs (digital_twin_id);
+
+ALTER TABLE public.digital_twin_training_jobs ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,26 @@
+/*
+  # Digital Twin Generation Chunks
+
+  1. New Tables
+    - `digital_twin_generation_chunks` - the text a training job has
+      generated so far, appended as it streams from Bedrock. A worker that
+      runs out of time continues from these rows instead of starting over:
+      - `training_job_name` (text) - the job in digital_twin_training_jobs
+      - `seq` (integer) - position of the chunk within the job's output
+      - `content` (text) - the generated text
+      - primary key (training_job_name, seq), so a replayed write is a no-op
+
+  2. Security
+    - RLS enabled with no policies; rows are only read and written by the
+      training Lambdas with the service role
+*/
+
+CREATE TABLE IF NOT EXISTS public.digital_twin_generation_chunks (
+  training_job_name text NOT NULL REFERENCES public.digital_twin_training_jobs(training_job_name) ON DELETE CASCADE,
+  seq integer NOT NULL,
+  content text NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  PRIMARY KEY (training_job_name, seq)
+);
+
+ALTER TABLE public.digital_twin_generation_chunks ENABLE ROW LEVEL SECURITY;
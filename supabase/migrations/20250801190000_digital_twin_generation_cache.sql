@@ -0,0 +1,31 @@
+/*
+  # Digital Twin Generation Cache
+
+  1. New Tables
+    - `digital_twin_generation_cache` - finished generations, reused when a
+      twin is resubmitted with the same training data and prompt inputs:
+      - `cache_key` (text, primary key) - SHA-256 of the training data's
+        content fingerprint, the model id and the Bedrock request body
+      - `model_id` (text)
+      - `result` (jsonb) - the generated output and its metrics
+      - `created_at`
+      - `expires_at` (timestamptz) - lookups ignore rows past it
+
+  2. Security
+    - RLS enabled with no policies; rows are only read and written by the
+      training Lambdas with the service role
+*/
+
+CREATE TABLE IF NOT EXISTS public.digital_twin_generation_cache (
+  cache_key text PRIMARY KEY,
+  model_id text,
+  result jsonb NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  expires_at timestamptz NOT NULL
+);
+
+-- For purging expired rows
+CREATE INDEX IF NOT EXISTS digital_twin_generation_cache_expires_idx
+  ON public.digital_twin_generation_cache (expires_at);
+
+ALTER TABLE public.digital_twin_generation_cache ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,31 @@
+/*
+  # Digital Twin Ingestion Summaries
+
+  1. New Tables
+    - `digital_twin_ingestion_summaries` - partial summaries of a twin's
+      training data, written by the ingestion map-reduce:
+      - `ingestion_id` (text) - the twin's training job name
+      - `level` (integer) - 0 for chunk summaries, +1 per merge
+      - `split` (integer) - byte range split (level 0) or merge group
+      - `seq` (integer) - chunk within the split
+      - `content` (text)
+      - `created_at`
+      Primary key (ingestion_id, level, split, seq), so a retried split or
+      reduce can skip what is already stored
+
+  2. Security
+    - RLS enabled with no policies; rows are only read and written by the
+      ingestion Lambdas with the service role
+*/
+
+CREATE TABLE IF NOT EXISTS public.digital_twin_ingestion_summaries (
+  ingestion_id text NOT NULL,
+  level integer NOT NULL,
+  split integer NOT NULL,
+  seq integer NOT NULL,
+  content text NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  PRIMARY KEY (ingestion_id, level, split, seq)
+);
+
+ALTER TABLE public.digital_twin_ingestion_summaries ENABLE ROW LEVEL SECURITY;
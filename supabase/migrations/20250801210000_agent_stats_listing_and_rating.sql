@@ -0,0 +1,27 @@
+/*
+  # Agent Stats: No Listing Version Bumps, No Rating Before a Completion
+
+  1. Triggers
+    - Drop `bump_agents_listing_version_on_stats`. Every invitation write
+      updates agent_stats, so bumping the single `agents` listing version
+      from it serialized invitation transactions on that row and
+      invalidated every ETag and cached agent pool. Listings now pick up
+      stats within the agent pool TTL (see AGENT_POOL_TTL_SECONDS), and
+      the certified-agents ETag changes on the same schedule
+
+  2. Schema Updates
+    - `agent_stats.rating` is NULL until the agent's first campaign is
+      completed (paid), instead of 0.0 for an agent whose only campaigns
+      are still in progress; readers use their neutral default for NULL
+*/
+
+DROP TRIGGER IF EXISTS bump_agents_listing_version_on_stats ON public.agent_stats;
+
+ALTER TABLE public.agent_stats DROP COLUMN IF EXISTS rating;
+
+-- Share of taken-on campaigns carried through to payment, on a 0-5 scale
+ALTER TABLE public.agent_stats ADD COLUMN rating numeric(2,1) GENERATED ALWAYS AS (
+  CASE WHEN completed_campaigns = 0 THEN NULL
+  ELSE round(5.0 * completed_campaigns / (accepted_count + completed_campaigns), 1)
+  END
+) STORED;
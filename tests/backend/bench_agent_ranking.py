@@ -0,0 +1,106 @@
+"""
+Benchmark for ranking the certified-agent pool against a campaign.
+
+Builds pools of 1k to 100k agents, then times one ranked page (top 50)
+per campaign through AgentRanker. It compares the partial selection with
+a full argsort of the same scores and with a pure-Python scoring loop.
+Ranker build time is paid once per pool load, not per request.
+
+    cd tests/backend && python bench_agent_ranking.py
+"""
+import math
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+from api._lib import ranking
+from api._lib.ranking import AgentRanker, tokenize
+
+SIZES = (1000, 10000, 100000)
+PAGE = 50
+ROUNDS = 20
+
+SPECIALIZATIONS = (
+    'short-form video', 'long-form video', 'podcast', 'livestream', 'ugc', 'product photography',
+    'tiktok creator', 'youtube shorts', 'instagram reels', 'video editing', 'copywriting', 'voice over',
+)
+
+CAMPAIGNS = [
+    {'name': 'Spring launch', 'description': 'Short-form video for TikTok and Instagram Reels', 'target_audience': 'Gen Z', 'budget': 4000},
+    {'name': 'Podcast tour', 'description': 'Weekly podcast ad reads', 'target_audience': 'Commuters 25-40', 'budget': 2500},
+    {'name': 'Product drop', 'description': 'UGC and product photography', 'target_audience': 'Millennials', 'budget': 9000},
+]
+
+def make_pool(size, seed=11):
+    rng = random.Random(seed)
+    return [
+        types.SimpleNamespace(
+            company_id=f'company-{rng.randrange(200)}' if rng.random() < 0.3 else None,
+            specialization=(spec := rng.choice(SPECIALIZATIONS)),
+            tokens=tokenize(spec),
+            rate=float(rng.randrange(40, 200)),
+            rating=rng.choice([None, 3.5, 4.0, 4.5, 5.0]),
+            completed=rng.randrange(0, 40),
+        )
+        for _ in range(size)
+    ]
+
+def full_sort_top(ranker, campaign):
+    scores = ranker.scores(campaign)
+    return np.argsort(-scores, kind='stable')[:PAGE]
+
+def python_top(pool, campaign):
+    """Reference: score each agent in a Python loop, then sort"""
+    terms = set(ranking.campaign_terms(campaign))
+    affordable = campaign['budget'] / ranking.CAMPAIGN_HOURS
+    weights = ranking.RANKING_WEIGHTS
+    scored = []
+    for position, agent in enumerate(pool):
+        overlap = len(terms & set(agent.tokens)) / math.sqrt(max(len(agent.tokens), 1) * max(len(terms), 1))
+        score = (
+            weights['match'] * overlap
+            + weights['budget'] * min(1.0, affordable / agent.rate)
+            + weights['rating'] * (agent.rating or ranking.RATING_PRIOR) / 5
+            + weights['experience'] * math.log1p(agent.completed) / math.log1p(40)
+        )
+        scored.append((-score, position))
+    scored.sort()
+    return scored[:PAGE]
+
+def best_of(fn, rounds=ROUNDS):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[0], timings[len(timings) // 2]
+
+def main():
+    print(f"top {PAGE} of the pool, {len(CAMPAIGNS)} campaigns, {ROUNDS} rounds each\n")
+    print(f"{'agents':>7} {'build ms':>9} {'rank p50 ms':>12} {'rank min ms':>12} {'argsort p50 ms':>15} {'python p50 ms':>14}")
+    for size in SIZES:
+        pool = make_pool(size)
+        start = time.perf_counter()
+        ranker = AgentRanker(pool)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rank = [best_of(lambda: ranker.top(c, exclude_company_id='company-1', limit=PAGE)) for c in CAMPAIGNS]
+        argsort = [best_of(lambda: full_sort_top(ranker, c)) for c in CAMPAIGNS]
+        python = [best_of(lambda: python_top(pool, c), rounds=3) for c in CAMPAIGNS]
+
+        def p50(results):
+            return sorted(median for _, median in results)[len(results) // 2] * 1000
+
+        print(
+            f"{size:>7} {build_ms:>9.1f} {p50(rank):>12.2f} {min(low for low, _ in rank) * 1000:>12.2f} "
+            f"{p50(argsort):>15.2f} {p50(python):>14.1f}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark for the trigger-maintained agent_stats table at 1M invitations.
+
+Mirrors supabase/migrations/*_agent_stats.sql on SQLite: invitation
+triggers apply old/new row differences to agent_stats. It compares
+reading marketplace stats from that table with computing them by
+`GROUP BY` over campaign_invitations on every request, measures the
+per-write cost the triggers add, and checks that the incrementally
+maintained rows match a from-scratch rebuild afterwards.
+
+    cd tests/backend && python bench_agent_stats.py [--invitations 1000000]
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+STATUSES = ('pending', 'accepted', 'declined', 'paid')
+
+SCHEMA = """
+CREATE TABLE agents (
+  id text PRIMARY KEY,
+  name text NOT NULL,
+  certification_status text NOT NULL,
+  hourly_rate real
+);
+CREATE TABLE campaign_invitations (
+  id integer PRIMARY KEY,
+  campaign_id integer NOT NULL,
+  agent_id text NOT NULL,
+  status text NOT NULL,
+  hourly_rate real NOT NULL,
+  amount_paid integer
+);
+CREATE INDEX idx_campaign_invitations_agent_id ON campaign_invitations(agent_id);
+CREATE TABLE agent_stats (
+  agent_id text PRIMARY KEY,
+  invitations_count integer NOT NULL DEFAULT 0,
+  pending_count integer NOT NULL DEFAULT 0,
+  accepted_count integer NOT NULL DEFAULT 0,
+  declined_count integer NOT NULL DEFAULT 0,
+  completed_campaigns integer NOT NULL DEFAULT 0,
+  total_paid integer NOT NULL DEFAULT 0,
+  rate_sum real NOT NULL DEFAULT 0,
+  rate_count integer NOT NULL DEFAULT 0
+);
+"""
+
+EXPECTED = """
+SELECT
+  agent_id,
+  count(*) AS invitations_count,
+  count(*) FILTER (WHERE status = 'pending') AS pending_count,
+  count(*) FILTER (WHERE status = 'accepted') AS accepted_count,
+  count(*) FILTER (WHERE status = 'declined') AS declined_count,
+  count(*) FILTER (WHERE status = 'paid') AS completed_campaigns,
+  COALESCE(sum(amount_paid) FILTER (WHERE status = 'paid'), 0) AS total_paid,
+  COALESCE(sum(hourly_rate) FILTER (WHERE status IN ('accepted', 'paid')), 0) AS rate_sum,
+  count(*) FILTER (WHERE status IN ('accepted', 'paid')) AS rate_count
+FROM campaign_invitations
+{where}
+GROUP BY agent_id
+"""
+
+STAT_COLUMNS = (
+    'invitations_count', 'pending_count', 'accepted_count', 'declined_count',
+    'completed_campaigns', 'total_paid', 'rate_sum', 'rate_count',
+)
+
+def apply_sql(row: str, sign: int) -> str:
+    """Upsert adding (sign=1) or removing (sign=-1) one invitation, like agent_stats_apply()"""
+    engaged = f"{row}.status IN ('accepted', 'paid')"
+    values = (
+        f"{sign}",
+        f"CASE WHEN {row}.status = 'pending' THEN {sign} ELSE 0 END",
+        f"CASE WHEN {row}.status = 'accepted' THEN {sign} ELSE 0 END",
+        f"CASE WHEN {row}.status = 'declined' THEN {sign} ELSE 0 END",
+        f"CASE WHEN {row}.status = 'paid' THEN {sign} ELSE 0 END",
+        f"CASE WHEN {row}.status = 'paid' THEN {sign} * COALESCE({row}.amount_paid, 0) ELSE 0 END",
+        f"CASE WHEN {engaged} THEN {sign} * {row}.hourly_rate ELSE 0 END",
+        f"CASE WHEN {engaged} THEN {sign} ELSE 0 END",
+    )
+    updates = ', '.join(f'{c} = {c} + excluded.{c}' for c in STAT_COLUMNS)
+    return (
+        f"INSERT INTO agent_stats (agent_id, {', '.join(STAT_COLUMNS)}) "
+        f"VALUES ({row}.agent_id, {', '.join(values)}) "
+        f"ON CONFLICT (agent_id) DO UPDATE SET {updates};"
+    )
+
+TRIGGERS = f"""
+CREATE TRIGGER agent_stats_on_insert AFTER INSERT ON campaign_invitations
+BEGIN {apply_sql('NEW', 1)} END;
+CREATE TRIGGER agent_stats_on_delete AFTER DELETE ON campaign_invitations
+BEGIN {apply_sql('OLD', -1)} END;
+CREATE TRIGGER agent_stats_on_update AFTER UPDATE OF agent_id, status, hourly_rate, amount_paid ON campaign_invitations
+BEGIN {apply_sql('OLD', -1)} {apply_sql('NEW', 1)} END;
+"""
+
+def build(invitations: int, agents: int, seed: int = 7) -> sqlite3.Connection:
+    rng = random.Random(seed)
+    db = sqlite3.connect(':memory:')
+    db.executescript(SCHEMA)
+    db.executemany(
+        'INSERT INTO agents VALUES (?, ?, ?, ?)',
+        ((f'agent-{i:07d}', f'Agent {i}', 'certified', 60.0 + i % 40) for i in range(agents)),
+    )
+
+    def rows():
+        for i in range(invitations):
+            status = rng.choice(STATUSES)
+            yield (
+                i, i // 20, f'agent-{rng.randrange(agents):07d}', status,
+                float(rng.randrange(40, 150)), rng.randrange(10000, 500000) if status == 'paid' else None,
+            )
+
+    db.executemany('INSERT INTO campaign_invitations VALUES (?, ?, ?, ?, ?, ?)', rows())
+    # Bulk backfill, like rebuild_agent_stats(), then maintain incrementally
+    db.execute(f"INSERT INTO agent_stats (agent_id, {', '.join(STAT_COLUMNS)}) {EXPECTED.format(where='')}")
+    db.executescript(TRIGGERS)
+    db.execute('ANALYZE')
+    db.commit()
+    return db
+
+def best_of(fn, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def stats_from_table(db, limit):
+    return db.execute(
+        'SELECT a.id, a.name, a.hourly_rate, s.completed_campaigns, s.accepted_count '
+        'FROM agents a LEFT JOIN agent_stats s ON s.agent_id = a.id '
+        "WHERE a.certification_status = 'certified' ORDER BY a.id LIMIT ?",
+        (limit,),
+    ).fetchall()
+
+def stats_from_group_by(db, limit):
+    return db.execute(
+        'SELECT a.id, a.name, a.hourly_rate, e.completed_campaigns, e.accepted_count '
+        f"FROM agents a LEFT JOIN ({EXPECTED.format(where='')}) e ON e.agent_id = a.id "
+        "WHERE a.certification_status = 'certified' ORDER BY a.id LIMIT ?",
+        (limit,),
+    ).fetchall()
+
+def stats_from_correlated_group_by(db, limit):
+    """The per-agent (N+1) form: one aggregate per listed agent"""
+    agents = db.execute(
+        "SELECT id, name, hourly_rate FROM agents WHERE certification_status = 'certified' ORDER BY id LIMIT ?",
+        (limit,),
+    ).fetchall()
+    where = 'WHERE agent_id = ?'
+    return [
+        agent + (db.execute(EXPECTED.format(where=where), (agent[0],)).fetchone() or (None,) * 9)[5:6]
+        for agent in agents
+    ]
+
+def time_updates(db, count, seed):
+    rng = random.Random(seed)
+    total = db.execute('SELECT max(id) FROM campaign_invitations').fetchone()[0] + 1
+    start = time.perf_counter()
+    for _ in range(count):
+        status = rng.choice(STATUSES)
+        db.execute(
+            'UPDATE campaign_invitations SET status = ?, amount_paid = ? WHERE id = ?',
+            (status, 25000 if status == 'paid' else None, rng.randrange(total)),
+        )
+    db.commit()
+    return (time.perf_counter() - start) / count
+
+def drift(db):
+    stored = {row[0]: tuple(row[1:]) for row in db.execute(f"SELECT agent_id, {', '.join(STAT_COLUMNS)} FROM agent_stats")}
+    expected = {row[0]: tuple(row[1:]) for row in db.execute(EXPECTED.format(where=''))}
+    zero = (0,) * len(STAT_COLUMNS)
+    return [
+        agent_id for agent_id in stored.keys() | expected.keys()
+        if tuple(round(v, 2) for v in stored.get(agent_id, zero)) != tuple(round(v, 2) for v in expected.get(agent_id, zero))
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invitations', type=int, default=1_000_000)
+    parser.add_argument('--agents', type=int, default=50_000)
+    parser.add_argument('--updates', type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    db = build(args.invitations, args.agents)
+    print(f"{args.invitations} invitations, {args.agents} agents (built in {time.perf_counter() - start:.1f}s)\n")
+
+    print(f"{'read':<34} {'page of 50 ms':>14} {'full pool ms':>13}")
+    for name, fn in (
+        ('agent_stats join', stats_from_table),
+        ('GROUP BY per request', stats_from_group_by),
+        ('GROUP BY per agent (N+1)', stats_from_correlated_group_by),
+    ):
+        page_seconds, page = best_of(lambda: fn(db, 50), rounds=5)
+        pool_seconds, _ = best_of(lambda: fn(db, args.agents), rounds=1)
+        print(f"{name:<34} {page_seconds * 1000:>14.2f} {pool_seconds * 1000:>13.1f}")
+        assert [row[3] for row in page] == [row[3] for row in stats_from_group_by(db, 50)], name
+
+    db.executescript('DROP TRIGGER agent_stats_on_insert; DROP TRIGGER agent_stats_on_delete; DROP TRIGGER agent_stats_on_update;')
+    without_triggers = time_updates(db, args.updates, seed=1)
+
+    # Rebuild after the untracked writes, then maintain incrementally again
+    db.execute('DELETE FROM agent_stats')
+    db.execute(f"INSERT INTO agent_stats (agent_id, {', '.join(STAT_COLUMNS)}) {EXPECTED.format(where='')}")
+    db.executescript(TRIGGERS)
+    with_triggers = time_updates(db, args.updates, seed=2)
+    print(f"\nstatus update: {without_triggers * 1e6:.1f} us without triggers, {with_triggers * 1e6:.1f} us with")
+
+    db.execute("DELETE FROM campaign_invitations WHERE id % 97 = 0")
+    db.execute(
+        "INSERT INTO campaign_invitations SELECT id + 10000000, campaign_id, agent_id, 'accepted', hourly_rate, NULL "
+        "FROM campaign_invitations WHERE id % 89 = 0"
+    )
+    drifted = drift(db)
+    print(f"drift after {args.updates} updates, deletes and inserts: {len(drifted)} agents")
+    assert not drifted
+
+if __name__ == '__main__':
+    main()
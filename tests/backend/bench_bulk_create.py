@@ -0,0 +1,69 @@
+"""
+Throughput of spreadsheet-sized campaign imports: one POST per row to
+/api/campaigns/create versus /api/campaigns/bulk-create.
+
+Both handlers run on local servers against the in-process Supabase fake
+with a per-round-trip latency, as in loadtest.py.
+
+    cd tests/backend && python bench_bulk_create.py [--rows 1000] [--db-latency-ms 5]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loadtest import load_handler, offline_backends, send, serve
+
+def rows(count):
+    return [
+        {'name': f'Imported campaign {i}', 'company_id': 'company-1', 'budget': 1000 + i, 'target_audience': 'Gen Z'}
+        for i in range(count)
+    ]
+
+def single_rows(port, campaigns, concurrency):
+    def one(campaign):
+        return send(port, 'POST', '/api/campaigns/create', {}, json.dumps(campaign).encode('utf-8'))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(one, campaigns))
+    assert statuses == [201] * len(campaigns), set(statuses)
+
+def bulk(port, campaigns, ndjson=False):
+    if ndjson:
+        body = '\n'.join(json.dumps(campaign) for campaign in campaigns).encode('utf-8')
+        headers = {'Content-Type': 'application/x-ndjson'}
+    else:
+        body, headers = json.dumps(campaigns).encode('utf-8'), {}
+    assert send(port, 'POST', '/api/campaigns/bulk-create', headers, body) == 201
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--db-latency-ms', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    campaigns = rows(args.rows)
+    print(f"{args.rows} campaigns, {args.db_latency_ms} ms per database round trip\n")
+    print(f"{'path':<30} {'seconds':>8} {'rows/s':>9} {'db calls':>9}")
+
+    with offline_backends(args.db_latency_ms / 1000, 0, 0) as backends:
+        supabase = backends['supabase']
+        runs = [
+            ('create, sequential', 'campaigns/create.py', lambda port: single_rows(port, campaigns, 1)),
+            ('create, 16 concurrent', 'campaigns/create.py', lambda port: single_rows(port, campaigns, 16)),
+            ('bulk-create, JSON array', 'campaigns/bulk-create.py', lambda port: bulk(port, campaigns)),
+            ('bulk-create, NDJSON', 'campaigns/bulk-create.py', lambda port: bulk(port, campaigns, ndjson=True)),
+        ]
+        for name, handler_path, run in runs:
+            with serve(load_handler(handler_path)) as port:
+                before = supabase.calls.total()
+                seconds = timed(lambda: run(port))
+                calls = supabase.calls.total() - before
+            print(f"{name:<30} {seconds:>8.2f} {args.rows / seconds:>9.0f} {calls:>9}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark for GET /api/campaigns paging as a company grows from 100 to
+100k campaigns.
+
+Runs the handler's queries against SQLite with the same composite index as
+supabase/migrations/*_campaigns_keyset_index.sql, per page:
+
+  unbounded  the previous behaviour: every row, every column
+  offset     LIMIT/OFFSET to the middle of the list
+  keyset     the handler's (created_at, id) cursor, first and middle page
+
+Keyset pages are an index range scan, so their latency stays flat while
+unbounded and offset grow with the company's campaign count.
+
+    cd tests/backend && python bench_campaigns_pagination.py
+"""
+import os
+import sqlite3
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api._lib import base_handler
+
+SIZES = (100, 1000, 10000, 100000)
+PAGE_SIZE = 50
+ROUNDS = 20
+
+SCHEMA = """
+CREATE TABLE campaigns (
+  id text PRIMARY KEY,
+  company_id text NOT NULL,
+  name text NOT NULL,
+  description text,
+  budget real,
+  status text,
+  target_audience text,
+  created_at text NOT NULL
+);
+CREATE INDEX idx_campaigns_company_created_at_id ON campaigns(company_id, created_at DESC, id);
+"""
+
+COLUMNS = 'id, company_id, name, description, budget, status, target_audience, created_at'
+ORDER = 'ORDER BY created_at DESC, id'
+
+def build_database(sizes):
+    """One company per size, plus background rows from the other companies"""
+    db = sqlite3.connect(':memory:')
+    db.executescript(SCHEMA)
+    for size in sizes:
+        db.executemany(
+            f'INSERT INTO campaigns ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                (
+                    str(uuid.uuid4()), f'company-{size}', f'Campaign {i}',
+                    'Spring launch campaign targeting short-form video audiences ' * 3,
+                    1500.0 + i, 'active', 'Gen Z, 18-24, US',
+                    # Runs of three rows share a timestamp to exercise the id tie-break
+                    f'2025-01-01T00:00:00+00:00#{i // 3:08d}',
+                )
+                for i in range(size)
+            ),
+        )
+    db.execute('ANALYZE')
+    return db
+
+def best_of(fn, rounds=ROUNDS):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def unbounded(db, company_id):
+    return db.execute(f'SELECT {COLUMNS} FROM campaigns WHERE company_id = ? {ORDER}', (company_id,)).fetchall()
+
+def offset_page(db, company_id, offset):
+    return db.execute(
+        f'SELECT {COLUMNS} FROM campaigns WHERE company_id = ? {ORDER} LIMIT ? OFFSET ?',
+        (company_id, PAGE_SIZE + 1, offset),
+    ).fetchall()
+
+def keyset_page(db, company_id, after=None):
+    if after is None:
+        return db.execute(
+            f'SELECT {COLUMNS} FROM campaigns WHERE company_id = ? {ORDER} LIMIT ?',
+            (company_id, PAGE_SIZE + 1),
+        ).fetchall()
+    created_at, campaign_id = after
+    return db.execute(
+        f'SELECT {COLUMNS} FROM campaigns WHERE company_id = ? '
+        f'AND created_at <= ? AND (created_at < ? OR (created_at = ? AND id > ?)) {ORDER} LIMIT ?',
+        (company_id, created_at, created_at, created_at, campaign_id, PAGE_SIZE + 1),
+    ).fetchall()
+
+def main():
+    db = build_database(SIZES)
+    encode = base_handler.select_json_encoder()
+    keys = [column.strip() for column in COLUMNS.split(',')]
+
+    plan = db.execute(
+        f'EXPLAIN QUERY PLAN SELECT {COLUMNS} FROM campaigns WHERE company_id = ? '
+        f'AND created_at <= ? AND (created_at < ? OR (created_at = ? AND id > ?)) {ORDER} LIMIT ?',
+        ('company-100', '', '', '', '', PAGE_SIZE),
+    ).fetchall()
+    print('keyset plan: ' + '; '.join(row[-1] for row in plan))
+    print(f"page size {PAGE_SIZE}, best of {ROUNDS} rounds (query + JSON encode)\n")
+    print(f"{'campaigns':>10} {'unbounded ms':>13} {'body KiB':>9} {'offset ms':>10} {'keyset p1 ms':>13} {'keyset mid ms':>14}")
+
+    for size in SIZES:
+        company_id = f'company-{size}'
+        middle = size // 2
+        row = offset_page(db, company_id, middle - 1)[0]
+        after = (row[-1], row[0])
+
+        def respond(rows):
+            return encode({'campaigns': [dict(zip(keys, r)) for r in rows[:PAGE_SIZE]]})
+
+        full_seconds, body = best_of(lambda: encode({'campaigns': [dict(zip(keys, r)) for r in unbounded(db, company_id)]}), rounds=3)
+        offset_seconds, _ = best_of(lambda: respond(offset_page(db, company_id, middle)))
+        first_seconds, _ = best_of(lambda: respond(keyset_page(db, company_id)))
+        mid_seconds, mid_rows = best_of(lambda: keyset_page(db, company_id, after))
+        mid_seconds, _ = best_of(lambda: respond(keyset_page(db, company_id, after)))
+
+        assert mid_rows == offset_page(db, company_id, middle), 'keyset and offset pages disagree'
+        print(
+            f"{size:>10} {full_seconds * 1000:>13.2f} {len(body) / 1024:>9.0f} {offset_seconds * 1000:>10.3f} "
+            f"{first_seconds * 1000:>13.3f} {mid_seconds * 1000:>14.3f}"
+        )
+
+if __name__ == '__main__':
+    main()
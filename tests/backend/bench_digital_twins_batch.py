@@ -0,0 +1,79 @@
+"""
+Throughput of launching many digital twins: one POST per twin to
+/api/digital-twins/create versus one /api/digital-twins/batch-create.
+
+Both handlers run on local servers against the in-process Step Functions
+stub with a per-call latency, as in loadtest.py. Building a boto3 client
+costs --client-build-ms; the "fresh client" row rebuilds it per request,
+as create.py did before the client was cached per instance.
+
+    cd tests/backend && python bench_digital_twins_batch.py [--twins 200] [--aws-latency-ms 30]
+"""
+import argparse
+import json
+import os
+import time
+from loadtest import load_handler, offline_backends, send, serve
+from api._lib import digital_twins
+
+def specs(count):
+    return [
+        {'name': f'Twin {i}', 'company_id': 'company-1', 'training_data_url': 'https://example.com/data.mp4'}
+        for i in range(count)
+    ]
+
+def single_twins(port, twins, fresh_client=False):
+    for spec in twins:
+        if fresh_client:
+            digital_twins.reset_step_functions_client()
+        assert send(port, 'POST', '/api/digital-twins/create', {}, json.dumps(spec).encode('utf-8')) == 200
+
+def batch(port, twins, size):
+    for start in range(0, len(twins), size):
+        body = json.dumps({'twins': twins[start:start + size]}).encode('utf-8')
+        assert send(port, 'POST', '/api/digital-twins/batch-create', {}, body) == 200
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--twins', type=int, default=200)
+    parser.add_argument('--aws-latency-ms', type=float, default=30)
+    parser.add_argument('--client-build-ms', type=float, default=40)
+    args = parser.parse_args(argv)
+
+    twins = specs(args.twins)
+    print(f"{args.twins} twins, {args.aws_latency_ms} ms per StartExecution, {args.client_build_ms} ms per client build\n")
+    print(f"{'path':<34} {'seconds':>8} {'twins/s':>9} {'clients':>8}")
+
+    with offline_backends(0, 0, args.aws_latency_ms / 1000) as backends:
+        boto3 = backends['boto3']
+        build = boto3.client
+
+        def slow_client(*args_, **kwargs):
+            time.sleep(args.client_build_ms / 1000)
+            return build(*args_, **kwargs)
+
+        boto3.client = slow_client
+        runs = [
+            ('create, fresh client', 'digital-twins/create.py', '1', lambda port: single_twins(port, twins, True)),
+            ('create, cached client', 'digital-twins/create.py', '1', lambda port: single_twins(port, twins)),
+        ]
+        for concurrency in ('1', '8', '16'):
+            runs.append((f'batch-create, concurrency {concurrency}', 'digital-twins/batch-create.py', concurrency,
+                         lambda port: batch(port, twins, 100)))
+        for name, handler_path, concurrency, run in runs:
+            # Read by batch-create.py at import, and load_handler imports afresh
+            os.environ['DIGITAL_TWINS_BATCH_CONCURRENCY'] = concurrency
+            digital_twins.reset_step_functions_client()
+            with serve(load_handler(handler_path)) as port:
+                before = boto3.calls.counts.get('client:stepfunctions', 0)
+                seconds = timed(lambda: run(port))
+                clients = boto3.calls.counts.get('client:stepfunctions', 0) - before
+            print(f"{name:<34} {seconds:>8.2f} {args.twins / seconds:>9.0f} {clients:>8}")
+
+if __name__ == '__main__':
+    main()
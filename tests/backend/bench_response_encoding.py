@@ -0,0 +1,66 @@
+"""
+Micro-benchmark for the api/ response layer on a 10k-campaign payload.
+
+Compares serialization time of the stdlib and orjson encoders and the
+bytes on the wire for identity, gzip and (when installed) brotli bodies.
+
+    cd tests/backend && python bench_response_encoding.py
+"""
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from api._lib import base_handler
+
+CAMPAIGN_COUNT = 10000
+ROUNDS = 20
+
+def make_campaigns(count):
+    return [
+        {
+            'id': str(uuid.UUID(int=i)),
+            'company_id': str(uuid.UUID(int=1)),
+            'name': f'Campaign {i}',
+            'description': 'Spring launch campaign targeting short-form video audiences ' * 3,
+            'budget': 1500.0 + i,
+            'status': ('draft', 'active', 'paused', 'completed')[i % 4],
+            'target_audience': 'Gen Z, 18-24, US',
+            'start_date': '2025-03-01T00:00:00+00:00',
+            'end_date': '2025-06-01T00:00:00+00:00',
+            'created_at': '2025-02-14T09:30:00+00:00',
+            'updated_at': '2025-02-14T09:30:00+00:00',
+        }
+        for i in range(count)
+    ]
+
+def best_of(fn, rounds=ROUNDS):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    payload = {'campaigns': make_campaigns(CAMPAIGN_COUNT), 'count': CAMPAIGN_COUNT}
+    encoders = ['json'] + (['orjson'] if base_handler.orjson is not None else [])
+
+    print(f"{CAMPAIGN_COUNT} campaigns, best of {ROUNDS} rounds\n")
+    print(f"{'encoder':<8} {'serialize ms':>13}")
+    body = None
+    for name in encoders:
+        encode = base_handler.select_json_encoder(name)
+        seconds, body = best_of(lambda: encode(payload))
+        print(f"{name:<8} {seconds * 1000:>13.2f}")
+
+    print(f"\n{'encoding':<8} {'bytes':>10} {'ratio':>7} {'compress ms':>12}")
+    print(f"{'identity':<8} {len(body):>10} {1.0:>7.2f} {0.0:>12.2f}")
+    for encoding in reversed(base_handler.supported_encodings()):
+        seconds, compressed = best_of(lambda: base_handler.compress(body, encoding), rounds=5)
+        print(f"{encoding:<8} {len(compressed):>10} {len(compressed) / len(body):>7.2f} {seconds * 1000:>12.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Database round trips (and time) to apply a burst of Stripe webhook events:
+one update per event, as the webhook used to do inline, versus the
+queue worker's coalesced, set-based batches.
+
+The burst mimics a Connect onboarding drive: repeated account.updated
+events for a few hundred accounts plus checkout.session.completed events,
+some for the same (campaign, agent), and some redelivered.
+
+    cd tests/backend && python bench_stripe_events.py [--events 1000] [--db-latency-ms 5]
+"""
+import argparse
+import contextlib
+import os
+import random
+import time
+from loadtest import offline_backends
+from api._lib import stripe_events
+
+def burst(count, seed=7):
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        if rng.random() < 0.6:
+            account = {'id': f'acct_{rng.randrange(200)}', 'charges_enabled': rng.random() < 0.7}
+            events.append({'id': f'evt_{i}', 'type': 'account.updated', 'created': i, 'data': {'object': account}})
+        else:
+            campaign, agent = f'campaign-{rng.randrange(20)}', f'agent-{rng.randrange(20)}'
+            session = {
+                'id': f'cs_{i}', 'amount_total': 1000 * rng.randrange(1, 50),
+                'metadata': {'campaign_id': campaign, 'agent_id': agent, 'company_id': 'company-1'},
+            }
+            events.append({'id': f'evt_{i}', 'type': 'checkout.session.completed', 'created': i, 'data': {'object': session}})
+    # Stripe redelivers some events
+    events += rng.sample(events, count // 20)
+    return events
+
+def invitations():
+    return [
+        {'id': f'inv-{c}-{a}', 'campaign_id': f'campaign-{c}', 'agent_id': f'agent-{a}', 'status': 'accepted'}
+        for c in range(20) for a in range(20)
+    ]
+
+def per_event(supabase, events):
+    for event in events:
+        stripe_events.apply_event(supabase, stripe_events.QueuedEvent(event['id'], event['type'], event, 1))
+
+def coalesced(supabase, events, batch_size):
+    queue = stripe_events.PostgresEventQueue(supabase)
+    seen = set()
+    for event in events:
+        if event['id'] not in seen:
+            seen.add(event['id'])
+            supabase.tables['stripe_events'].append({'event_id': event['id'], 'type': event['type'], 'payload': event})
+    return stripe_events.drain(queue, supabase, batch_size=batch_size)
+
+def distinct(events):
+    """Each event once, in the order Stripe created them"""
+    return sorted({event['id']: event for event in events}.values(), key=lambda event: event['created'])
+
+def snapshot(supabase):
+    paid = sorted((row['id'], row.get('payment_session_id')) for row in supabase.tables['campaign_invitations'])
+    onboarded = sorted(agent['stripe_account_id'] for agent in supabase.tables['agents'] if agent.get('onboarding_completed'))
+    return paid, onboarded
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=stripe_events.STRIPE_EVENTS_BATCH_SIZE)
+    parser.add_argument('--db-latency-ms', type=float, default=5)
+    args = parser.parse_args(argv)
+
+    events = burst(args.events)
+    print(f"{len(events)} deliveries ({args.events} distinct events), {args.db_latency_ms} ms per database round trip\n")
+    print(f"{'path':<34} {'seconds':>8} {'db calls':>9} {'per 1k events':>14}")
+
+    results = {}
+    with offline_backends(args.db_latency_ms / 1000, 0, 0) as backends:
+        supabase = backends['supabase']
+        agents = [{'id': f'agent-{i}', 'stripe_account_id': f'acct_{i}'} for i in range(200)]
+        runs = [
+            ('one update per event', lambda: per_event(supabase, events)),
+            (f'coalesced, batches of {args.batch_size}', lambda: coalesced(supabase, events, args.batch_size)),
+            # Reference result, not timed for comparison
+            ('each distinct event once, in order', lambda: per_event(supabase, distinct(events))),
+        ]
+        for name, run in runs:
+            supabase.tables.update({'campaign_invitations': invitations(), 'agents': [dict(a) for a in agents], 'stripe_events': []})
+            before = supabase.calls.total()
+            start = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                run()
+            seconds = time.perf_counter() - start
+            calls = supabase.calls.total() - before
+            results[name] = snapshot(supabase)
+            print(f"{name:<34} {seconds:>8.2f} {calls:>9} {calls * 1000 / args.events:>14.0f}")
+
+    _, coalesced_result, reference = results.values()
+    print(f"\nCoalesced result matches applying each distinct event once, in order: {coalesced_result == reference}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import importlib.util
+import os
+import sys
+import pytest
+
+# Lambda functions are deployed from aws/lambda/ as top-level modules, so
+# tests import them the same way (e.g. `from authorizer import ...`).
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+LAMBDA_DIR = os.path.join(REPO_ROOT, 'aws', 'lambda')
+
+for path in (REPO_ROOT, LAMBDA_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+def import_api_module(relative_path):
+    """
+    Import a Vercel function by its path under api/.
+
+    Route files such as `campaigns/[id]/certified-agents.py` are not valid
+    module names, so they are loaded from their file path instead.
+    """
+    module_name = 'api_' + ''.join(c if c.isalnum() else '_' for c in relative_path[:-3])
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            module_name, os.path.join(REPO_ROOT, 'api', relative_path)
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+@pytest.fixture
+def load_api_module():
+    return import_api_module
@@ -0,0 +1,997 @@
+"""
+In-process stand-ins for Supabase, Stripe and boto3.
+
+Each fake sleeps for a configurable latency per remote call so handlers
+can be exercised and benchmarked offline, and counts the calls it served.
+"""
+import hashlib
+import io
+import json
+import operator
+import threading
+import time
+import types
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+class CallCounter:
+    """Thread-safe per-operation call counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+# PostgREST filter operators understood by FakeQuery.or_
+FILTER_OPERATORS = {
+    'eq': operator.eq, 'neq': operator.ne,
+    'lt': operator.lt, 'lte': operator.le,
+    'gt': operator.gt, 'gte': operator.ge,
+}
+
+def _split_terms(expression: str) -> List[str]:
+    """Split a logic tree on top-level commas, respecting parens and quotes"""
+    terms, depth, quoted, start = [], 0, False, 0
+    i = 0
+    while i < len(expression):
+        char = expression[i]
+        if char == '\\' and quoted:
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            terms.append(expression[start:i])
+            start = i + 1
+        i += 1
+    terms.append(expression[start:])
+    return terms
+
+def parse_logic_tree(expression: str):
+    """Row predicate for a PostgREST `or=`/`and=` filter string"""
+    expression = expression.strip()
+    for name, combine in (('and(', all), ('or(', any)):
+        if expression.startswith(name) and expression.endswith(')'):
+            children = [parse_logic_tree(term) for term in _split_terms(expression[len(name):-1])]
+            return lambda row: combine(child(row) for child in children)
+
+    column, op, value = expression.split('.', 2)
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    compare = FILTER_OPERATORS[op]
+    return lambda row: row.get(column) is not None and compare(str(row.get(column)), value)
+
+class FakeAPIError(Exception):
+    """Stand-in for postgrest.exceptions.APIError"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+class FakeResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    """Chainable subset of the postgrest-py request builder"""
+
+    def __init__(self, client: 'FakeSupabase', table: str):
+        self.client = client
+        self.table_name = table
+        self.operation = 'select'
+        self.payload: Any = None
+        self.filters: List[Any] = []
+        self.order_by: List[Any] = []
+        self.limit_count: Optional[int] = None
+        self.is_single = False
+        self.columns: Optional[List[str]] = None
+
+    def select(self, *columns, **kwargs):
+        self.operation = 'select'
+        names = [name.strip() for column in columns for name in column.split(',')]
+        if names and '*' not in names and all(name.isidentifier() for name in names):
+            self.columns = names
+        return self
+
+    def insert(self, payload):
+        self.operation = 'insert'
+        self.payload = payload
+        return self
+
+    def update(self, payload):
+        self.operation = 'update'
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def lte(self, column, value):
+        return self._compare(column, 'lte', value)
+
+    def gt(self, column, value):
+        return self._compare(column, 'gt', value)
+
+    def _compare(self, column, op, value):
+        compare = FILTER_OPERATORS[op]
+        self.filters.append(lambda row: row.get(column) is not None and compare(str(row.get(column)), str(value)))
+        return self
+
+    def or_(self, filters, reference_table=None):
+        self.filters.append(parse_logic_tree(f'or({filters})'))
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    def execute(self) -> FakeResponse:
+        self.client.calls.add(f'{self.operation}:{self.table_name}')
+        self.client.wait(self.table_name)
+        return getattr(self, f'_execute_{self.operation}')()
+
+    def _matching(self) -> List[Dict[str, Any]]:
+        rows = self.client.tables.setdefault(self.table_name, [])
+        return [row for row in rows if all(f(row) for f in self.filters)]
+
+    def _execute_select(self) -> FakeResponse:
+        rows = self._matching()
+        for column, desc in reversed(self.order_by):
+            rows.sort(key=lambda row: str(row.get(column)), reverse=desc)
+        if self.limit_count is not None:
+            rows = rows[:self.limit_count]
+        if self.client.max_rows is not None:
+            rows = rows[:self.client.max_rows]
+        rows = [self._project(row) for row in rows]
+        if self.is_single:
+            return FakeResponse(rows[0] if rows else None)
+        return FakeResponse(rows)
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self.columns is None:
+            return dict(row)
+        return {column: row.get(column) for column in self.columns}
+
+    def _execute_insert(self) -> FakeResponse:
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        check = self.client.constraints.get(self.table_name)
+        if check is not None:
+            # Like Postgres, one violating row fails the whole statement
+            for row in payload:
+                violation = check(row)
+                if violation:
+                    raise FakeAPIError(violation, code='23514')
+        inserted = []
+        unique = self.client.unique.get(self.table_name, ())
+        with self.client.lock:
+            rows = self.client.tables.setdefault(self.table_name, [])
+            for column in unique:
+                taken = {row.get(column) for row in rows}
+                if any(row.get(column) in taken for row in payload):
+                    raise FakeAPIError(f'duplicate key value violates unique constraint on "{column}"', code='23505')
+            for row in payload:
+                row = {'id': str(uuid.uuid4()), **row}
+                rows.append(row)
+                inserted.append(dict(row))
+        return FakeResponse(inserted)
+
+    def _execute_update(self) -> FakeResponse:
+        with self.client.lock:
+            rows = self._matching()
+            for row in rows:
+                row.update(self.payload)
+        return FakeResponse([dict(row) for row in rows])
+
+    def _execute_delete(self) -> FakeResponse:
+        with self.client.lock:
+            rows = self._matching()
+            doomed = {id(row) for row in rows}
+            table = self.client.tables[self.table_name]
+            table[:] = [row for row in table if id(row) not in doomed]
+        return FakeResponse([dict(row) for row in rows])
+
+class FakeRPC:
+    """A pending supabase.rpc() call"""
+
+    def __init__(self, client: 'FakeSupabase', name: str, params: Dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        self.client.calls.add(f'rpc:{self.name}')
+        self.client.wait(f'rpc:{self.name}')
+        with self.client.lock:
+            return FakeResponse(self.client.functions[self.name](self.client, self.params))
+
+class FakeUser:
+    def __init__(self, user_id: str):
+        self.id = user_id
+
+class FakeUserResponse:
+    def __init__(self, user: FakeUser):
+        self.user = user
+
+class FakeAuth:
+    """
+    Subset of supabase.auth: a bearer token verifies as the user `users`
+    maps it to, or a user of its own, unless it is in `rejected`
+    """
+
+    def __init__(self, client: 'FakeSupabase'):
+        self.client = client
+        # token -> user id, for tests with several tokens per user
+        self.users: Dict[str, str] = {}
+        self.rejected: set = set()
+
+    def get_user(self, jwt: Optional[str] = None) -> FakeUserResponse:
+        self.client.calls.add('auth:get_user')
+        self.client.wait('auth')
+        if not jwt or jwt in self.rejected:
+            raise FakeAPIError('invalid JWT', code='401')
+        return FakeUserResponse(FakeUser(self.users.get(jwt, f'user-{jwt}')))
+
+class FakeSupabase:
+    """Supabase client stand-in backed by in-memory tables"""
+
+    def __init__(
+        self,
+        tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        latency: float = 0.0,
+        constraints: Optional[Dict[str, Any]] = None,
+        unique: Optional[Dict[str, Any]] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.tables = tables if tables is not None else {}
+        self.latency = latency
+        # table or rpc:<function> -> latency overriding `latency`
+        self.table_latency: Dict[str, float] = {}
+        # rpc name -> fn(client, params) standing in for a Postgres function
+        self.functions: Dict[str, Any] = {}
+        # table -> check(row) returning an error message for rows the database would reject
+        self.constraints = constraints if constraints is not None else {}
+        # table -> columns with a unique index
+        self.unique = unique if unique is not None else {
+            'idempotency_keys': ('key',),
+            'stripe_events': ('event_id',),
+            'stripe_account_links': ('cache_key',),
+        }
+        # PostgREST's max-rows: selects silently return at most this many rows
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.calls = CallCounter()
+        self.auth = FakeAuth(self)
+
+    def wait(self, name: Optional[str] = None) -> None:
+        latency = self.table_latency.get(name, self.latency)
+        if latency:
+            time.sleep(latency)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> 'FakeRPC':
+        return FakeRPC(self, name, params or {})
+
+    from_ = table
+
+def claim_stripe_events(client: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The claim_stripe_events() Postgres function over the fake's tables"""
+    now = time.time()
+    claimed = []
+    for row in client.tables.setdefault('stripe_events', []):
+        if len(claimed) == params['batch_size']:
+            break
+        if row.get('status', 'pending') == 'pending' and _epoch(row.get('available_at')) <= now:
+            row['status'] = 'pending'
+            row['attempts'] = row.get('attempts', 0) + 1
+            row['available_at'] = now + params['lease_seconds']
+            claimed.append({key: row[key] for key in ('event_id', 'type', 'payload', 'attempts')})
+    return claimed
+
+def apply_stripe_payments(client: FakeSupabase, params: Dict[str, Any]) -> int:
+    """The apply_stripe_payments() Postgres function over the fake's tables"""
+    updated = 0
+    for payment in params['payments']:
+        for row in client.tables.setdefault('campaign_invitations', []):
+            if (row.get('campaign_id'), row.get('agent_id')) == (payment['campaign_id'], payment['agent_id']):
+                row.update({
+                    'status': 'paid',
+                    'payment_session_id': payment['payment_session_id'],
+                    'amount_paid': payment['amount_paid'],
+                })
+                updated += 1
+    return updated
+
+def purge_expired_idempotency_keys(client: FakeSupabase, params: Dict[str, Any]) -> int:
+    """The purge_expired_idempotency_keys() Postgres function over the fake's tables"""
+    now = time.time()
+    rows = client.tables.setdefault('idempotency_keys', [])
+    kept = [row for row in rows if _epoch(row['expires_at']) > now]
+    purged = len(rows) - len(kept)
+    rows[:] = kept
+    return purged
+
+def _epoch(value: Any) -> float:
+    """A timestamp column (unset, epoch seconds or ISO 8601) as epoch seconds"""
+    if value is None:
+        return 0.0
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return value
+
+def seed_tables(campaigns: int = 50, agents: int = 50) -> Dict[str, List[Dict[str, Any]]]:
+    """A small marketplace: one company with campaigns, certified agents elsewhere"""
+    return {
+        'campaigns': [
+            {
+                'id': f'campaign-{i}',
+                'company_id': 'company-1',
+                'name': f'Campaign {i}',
+                'description': 'Seeded campaign',
+                'budget': 1000.0 + i,
+                'status': 'draft',
+                'target_audience': 'Gen Z',
+                'created_at': f'2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}+00:00',
+            }
+            for i in range(campaigns)
+        ],
+        'agents': [
+            {
+                'id': f'agent-{i}',
+                'user_id': f'user-{i}',
+                'company_id': None,
+                'name': f'Agent {i}',
+                'specialization': 'short-form video',
+                'certification_status': 'certified',
+                'stripe_account_id': f'acct_{i}',
+                'hourly_rate': 60.0 + i % 40,
+                'users': {'email': f'agent-{i}@example.com'},
+                'agent_stats': {'completed_campaigns': i % 7, 'rating': round(3.0 + i % 21 / 10, 1)},
+            }
+            for i in range(agents)
+        ],
+        'campaign_invitations': [],
+        'stripe_events': [],
+        'companies': [{'id': 'company-1', 'name': 'Company 1'}],
+    }
+
+class StripeObject(dict):
+    """Dict with attribute access, like stripe.StripeObject"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+class FakeStripeError(Exception):
+    pass
+
+class FakeSignatureVerificationError(FakeStripeError):
+    pass
+
+def make_fake_stripe(latency: float = 0.0) -> types.ModuleType:
+    """
+    Build a module that can replace `stripe` in sys.modules.
+
+    Webhook signatures are accepted when the header equals 'valid'.
+    """
+    stripe = types.ModuleType('stripe')
+    stripe.api_key = None
+    stripe.calls = CallCounter()
+
+    def remote(name, build):
+        def call(**params):
+            stripe.calls.add(name)
+            if latency:
+                time.sleep(latency)
+            return StripeObject(build(params))
+        return call
+
+    stripe.error = types.SimpleNamespace(
+        StripeError=FakeStripeError,
+        SignatureVerificationError=FakeSignatureVerificationError,
+    )
+    stripe.Account = types.SimpleNamespace(create=remote(
+        'Account.create', lambda p: {'id': f'acct_{uuid.uuid4().hex[:16]}', 'email': p.get('email')}
+    ))
+    stripe.AccountLink = types.SimpleNamespace(create=remote(
+        'AccountLink.create', lambda p: {
+            'url': f"https://connect.stripe.test/setup/{p['account']}/{uuid.uuid4().hex[:8]}",
+            'expires_at': int(time.time()) + 300,
+        }
+    ))
+    stripe.checkout = types.SimpleNamespace(Session=types.SimpleNamespace(create=remote(
+        'checkout.Session.create', lambda p: {
+            'id': f'cs_test_{uuid.uuid4().hex[:16]}',
+            'url': 'https://checkout.stripe.test/pay',
+        }
+    )))
+
+    def construct_event(payload, sig_header, secret):
+        stripe.calls.add('Webhook.construct_event')
+        if sig_header != 'valid':
+            raise FakeSignatureVerificationError('Invalid signature')
+        try:
+            return json.loads(payload)
+        except ValueError:
+            raise ValueError('Invalid payload')
+
+    stripe.Webhook = types.SimpleNamespace(construct_event=construct_event)
+    return stripe
+
+class FakeStripeAPI:
+    """
+    Local HTTP server speaking enough of the Stripe REST API for the real SDK.
+
+    `script` maps a path to a list of (status, headers, body) responses
+    served in order before falling back to a 200 echoing an object id.
+    Every request is recorded with its client port, so tests can see
+    retries, Idempotency-Keys and connection reuse.
+    """
+
+    def __init__(self):
+        self.script: Dict[str, List[Any]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                path = self.path.split('?')[0]
+                with api.lock:
+                    api.requests.append({
+                        'path': path,
+                        'port': self.client_address[1],
+                        'idempotency_key': self.headers.get('Idempotency-Key'),
+                        'at': time.monotonic(),
+                    })
+                    scripted = api.script.get(path)
+                    status, headers, body = scripted.pop(0) if scripted else (200, {}, None)
+                if body is None:
+                    body = {'id': f'obj_{uuid.uuid4().hex[:12]}', 'object': path.rsplit('/', 1)[-1].rstrip('s')}
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('Request-Id', f'req_{len(api.requests)}')
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+class FakeClientError(Exception):
+    """Shaped like botocore's ClientError: the error code is in `response`"""
+
+    def __init__(self, code: str, message: str = ''):
+        super().__init__(f"An error occurred ({code}): {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+
+class FakeStepFunctions:
+    def __init__(self, latency: float = 0.0, calls: Optional[CallCounter] = None, callbacks: Optional[Dict[str, Any]] = None):
+        self.latency = latency
+        self.calls = calls or CallCounter()
+        # task token -> ('success', output) / ('failure', error, cause), or
+        # 'expired' for tokens whose state already timed out
+        self.callbacks = callbacks if callbacks is not None else {}
+
+    def start_execution(self, stateMachineArn, name, input):
+        self.calls.add('stepfunctions.start_execution')
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            'executionArn': f'{stateMachineArn.replace(":stateMachine:", ":execution:")}:{name}',
+            'startDate': time.time(),
+        }
+
+    def send_task_success(self, taskToken, output):
+        self.calls.add('stepfunctions.send_task_success')
+        self._resolve(taskToken, ('success', json.loads(output)))
+        return {}
+
+    def send_task_failure(self, taskToken, error=None, cause=None):
+        self.calls.add('stepfunctions.send_task_failure')
+        self._resolve(taskToken, ('failure', error, cause))
+        return {}
+
+    def _resolve(self, token, outcome):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.callbacks.get(token) == 'expired':
+            raise FakeClientError('TaskTimedOut', 'Task Timed Out')
+        if token in self.callbacks:
+            raise FakeClientError('InvalidToken', 'Task already completed')
+        self.callbacks[token] = outcome
+
+class FakeLambda:
+    def __init__(self, latency: float = 0.0, calls: Optional[CallCounter] = None, invocations: Optional[List[Dict[str, Any]]] = None):
+        self.latency = latency
+        self.calls = calls or CallCounter()
+        self.invocations = invocations if invocations is not None else []
+
+    def invoke(self, FunctionName, Payload, InvocationType='RequestResponse'):
+        self.calls.add('lambda.invoke')
+        if self.latency:
+            time.sleep(self.latency)
+        self.invocations.append({
+            'FunctionName': FunctionName,
+            'InvocationType': InvocationType,
+            'Payload': json.loads(Payload),
+        })
+        return {'StatusCode': 202 if InvocationType == 'Event' else 200}
+
+class FakeEventStream:
+    """Iterable of response-stream events, like botocore's EventStream"""
+
+    def __init__(self, events):
+        self._events = events
+        self.closed = False
+
+    def __iter__(self):
+        for event in self._events:
+            if self.closed:
+                return
+            yield event
+
+    def close(self):
+        self.closed = True
+
+class FakeBedrockRuntime:
+    """
+    invoke_model answering with a canned completion, and
+    invoke_model_with_response_stream streaming `tokens` words
+    (' word0 word1 ...'), one per chunk, `token_latency` apart. A prompt
+    ending in a prefix of that text is continued from there, as the model
+    would. `fail_when(body)` returning True makes a call raise
+    ThrottlingException; `error_after` tokens, a stream ends in a
+    modelStreamErrorException event.
+    """
+
+    def __init__(self, latency: float = 0.0, calls: Optional[CallCounter] = None, fail_when: Optional[Any] = None,
+                 tokens: int = 40, token_latency: float = 0.0, error_after: Optional[int] = None):
+        self.latency = latency
+        self.calls = calls or CallCounter()
+        self.fail_when = fail_when
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.error_after = error_after
+        self.prompts: List[str] = []
+
+    def invoke_model(self, modelId, body, contentType='application/json', accept='application/json'):
+        self.calls.add('bedrock-runtime.invoke_model')
+        if self.latency:
+            time.sleep(self.latency)
+        request = json.loads(body)
+        if self.fail_when is not None and self.fail_when(request):
+            raise FakeClientError('ThrottlingException', 'Too many requests')
+        completion = json.dumps({'completion': f"Twin profile ({len(request.get('prompt', ''))} prompt chars)"})
+        return {'body': io.BytesIO(completion.encode('utf-8')), 'contentType': 'application/json'}
+
+    def invoke_model_with_response_stream(self, modelId, body, contentType='application/json', accept='application/json'):
+        self.calls.add('bedrock-runtime.invoke_model_with_response_stream')
+        request = json.loads(body)
+        self.prompts.append(request['prompt'])
+        if self.fail_when is not None and self.fail_when(request):
+            raise FakeClientError('ThrottlingException', 'Too many requests')
+
+        words = [f' word{i}' for i in range(self.tokens)]
+        start = request['prompt'].find(words[0]) if words else -1
+        done = 0
+        if start >= 0:
+            resumed = request['prompt'][start:]
+            while done < len(words) and resumed.startswith(words[done]):
+                resumed = resumed[len(words[done]):]
+                done += 1
+
+        def events():
+            if self.latency:
+                time.sleep(self.latency)
+            for index in range(done, len(words)):
+                if self.error_after is not None and index >= self.error_after:
+                    yield {'modelStreamErrorException': {'message': 'Stream interrupted'}}
+                    return
+                if self.token_latency:
+                    time.sleep(self.token_latency)
+                payload = {'completion': words[index], 'stop_reason': None}
+                if index == len(words) - 1:
+                    payload['stop_reason'] = 'stop_sequence'
+                    payload['amazon-bedrock-invocationMetrics'] = {
+                        'inputTokenCount': len(request['prompt']) // 4,
+                        'outputTokenCount': len(words) - done,
+                    }
+                yield {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+        return {'body': FakeEventStream(events()), 'contentType': 'application/json'}
+
+class SyntheticObject:
+    """
+    `size` bytes of `line` repeated, generated as they are read, so tests
+    can stream multi-GB objects without holding them
+    """
+
+    def __init__(self, size: int, line: bytes = b'Spring launch: eco sneakers for city runners, upbeat and direct.\n'):
+        self.size = size
+        self.line = line
+        self.etag = f'"synthetic-{size}"'
+        self._block = line * (TRAINING_DATA_PIECE_BYTES // len(line) + 2)
+
+    def __len__(self):
+        return self.size
+
+    def iter_range(self, start: int, end: int, chunk_size: int):
+        position = start
+        while position < end:
+            offset = position % len(self.line)
+            length = min(chunk_size, end - position, len(self._block) - offset)
+            yield self._block[offset:offset + length]
+            position += length
+
+# Largest piece SyntheticObject yields at once
+TRAINING_DATA_PIECE_BYTES = 1024 * 1024
+
+def _etag(data) -> str:
+    return data.etag if isinstance(data, SyntheticObject) else f'"{hashlib.md5(data).hexdigest()}"'
+
+def _iter_range(data, start: int, end: int, chunk_size: int):
+    if isinstance(data, SyntheticObject):
+        yield from data.iter_range(start, end, chunk_size)
+        return
+    for position in range(start, end, chunk_size):
+        yield data[position:min(position + chunk_size, end)]
+
+def _parse_range(header: Optional[str], size: int):
+    """[start, end) of a `bytes=a-b` / `bytes=a-` header, or the whole object"""
+    if not header:
+        return 0, size
+    first, _, last = header[len('bytes='):].partition('-')
+    return int(first), min(size, int(last) + 1) if last else size
+
+class FakeStreamingBody:
+    """Like botocore's StreamingBody over bytes [start, end) of an object"""
+
+    def __init__(self, data, start: int = 0, end: Optional[int] = None):
+        self._data = data
+        self._start = start
+        self._end = len(data) if end is None else end
+        self.closed = False
+
+    def read(self, amt=None):
+        return b''.join(self.iter_chunks(self._end - self._start))
+
+    def iter_chunks(self, chunk_size=1024):
+        for chunk in _iter_range(self._data, self._start, self._end, chunk_size):
+            if self.closed:
+                return
+            self._start += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+class FakeS3:
+    """head_object/get_object over `objects`: (bucket, key) -> bytes or SyntheticObject"""
+
+    def __init__(self, objects: Dict[Any, Any], latency: float = 0.0, calls: Optional[CallCounter] = None):
+        self.objects = objects
+        self.latency = latency
+        self.calls = calls or CallCounter()
+
+    def head_object(self, Bucket, Key):
+        self.calls.add('s3.head_object')
+        data = self._object(Bucket, Key)
+        return {'ContentLength': len(data), 'ETag': _etag(data)}
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.calls.add('s3.get_object')
+        data = self._object(Bucket, Key)
+        start, end = _parse_range(Range, len(data))
+        return {'ContentLength': end - start, 'ETag': _etag(data), 'Body': FakeStreamingBody(data, start, end)}
+
+    def _object(self, bucket, key):
+        if self.latency:
+            time.sleep(self.latency)
+        if (bucket, key) not in self.objects:
+            raise FakeClientError('NoSuchKey', 'The specified key does not exist.')
+        return self.objects[(bucket, key)]
+
+class FakeHTTPResponse:
+    def __init__(self, url: str, status_code: int, data=b'', headers: Optional[Dict[str, str]] = None,
+                 start: int = 0, end: int = 0):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._data = data
+        self._start = start
+        self._end = end
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"{self.status_code} Error for url: {self.url}")
+
+    def iter_content(self, chunk_size=1):
+        for chunk in _iter_range(self._data, self._start, self._end, chunk_size):
+            if self.closed:
+                return
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+class FakeHTTPSession:
+    """
+    requests.Session stand-in serving `objects` (url -> bytes or
+    SyntheticObject). URLs in `etags` answer with that ETag header, and
+    URLs in `last_modified` with that Last-Modified; others send neither,
+    as many signed-URL and CDN origins do. With `ranges` False the origin
+    ignores Range headers and always sends the whole object.
+    """
+
+    def __init__(self, objects: Optional[Dict[str, Any]] = None, etags: Optional[Dict[str, str]] = None,
+                 ranges: bool = True, last_modified: Optional[Dict[str, str]] = None):
+        self.objects = objects if objects is not None else {}
+        self.etags = etags if etags is not None else {}
+        self.last_modified = last_modified if last_modified is not None else {}
+        self.ranges = ranges
+        self.calls = CallCounter()
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+
+    def head(self, url, allow_redirects=False, timeout=None):
+        self.calls.add('head')
+        if url not in self.objects:
+            return FakeHTTPResponse(url, 404)
+        return FakeHTTPResponse(url, 200, headers=self._headers(url))
+
+    def get(self, url, stream=False, headers=None, timeout=None):
+        self.calls.add('get')
+        if url not in self.objects:
+            return FakeHTTPResponse(url, 404)
+        data = self.objects[url]
+        requested = (headers or {}).get('Range') if self.ranges else None
+        start, end = _parse_range(requested, len(data))
+        with self._lock:
+            self.bytes_served += end - start
+        return FakeHTTPResponse(url, 206 if requested else 200, data, self._headers(url), start, end)
+
+    def _headers(self, url):
+        headers = {'Content-Length': str(len(self.objects[url]))}
+        if self.ranges:
+            headers['Accept-Ranges'] = 'bytes'
+        if url in self.etags:
+            headers['ETag'] = self.etags[url]
+        if url in self.last_modified:
+            headers['Last-Modified'] = self.last_modified[url]
+        return headers
+
+def make_fake_boto3(latency: float = 0.0) -> types.ModuleType:
+    """Build a module that can replace `boto3` in sys.modules"""
+    boto3 = types.ModuleType('boto3')
+    boto3.calls = CallCounter()
+    boto3.task_callbacks = {}
+    boto3.lambda_invocations = []
+    boto3.bedrock_fail_when = None
+    boto3.bedrock_options = {}
+    boto3.s3_objects = {}
+
+    def client(service_name, *args, **kwargs):
+        boto3.calls.add(f'client:{service_name}')
+        if service_name == 'stepfunctions':
+            return FakeStepFunctions(latency=latency, calls=boto3.calls, callbacks=boto3.task_callbacks)
+        if service_name == 'lambda':
+            return FakeLambda(latency=latency, calls=boto3.calls, invocations=boto3.lambda_invocations)
+        if service_name == 'bedrock-runtime':
+            return FakeBedrockRuntime(latency=latency, calls=boto3.calls, fail_when=lambda body: bool(
+                boto3.bedrock_fail_when and boto3.bedrock_fail_when(body)
+            ), **boto3.bedrock_options)
+        if service_name == 's3':
+            return FakeS3(boto3.s3_objects, latency=latency, calls=boto3.calls)
+        raise ValueError(f"Unknown service: {service_name}")
+
+    boto3.client = client
+    return boto3
+
+class FakeTrainingJobStore:
+    """In-memory stand-in for training_jobs.TrainingJobStore"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = CallCounter()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.chunks: Dict[str, Dict[int, str]] = {}
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.summaries: Dict[str, Dict[Any, str]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job):
+        self._call('save')
+        with self._lock:
+            self.jobs[job['training_job_name']] = dict(job)
+
+    def get(self, name):
+        self._call('get')
+        with self._lock:
+            job = self.jobs.get(name)
+            return dict(job) if job is not None else None
+
+    def update(self, name, fields):
+        self._call('update')
+        with self._lock:
+            if name in self.jobs:
+                self.jobs[name].update(fields)
+
+    def append_chunks(self, name, chunks):
+        self._call('append_chunks')
+        with self._lock:
+            rows = self.chunks.setdefault(name, {})
+            for chunk in chunks:
+                rows.setdefault(chunk['seq'], chunk['content'])
+
+    def delete_chunks(self, name):
+        self._call('delete_chunks')
+        with self._lock:
+            self.chunks.pop(name, None)
+
+    def get_chunks(self, name):
+        self._call('get_chunks')
+        with self._lock:
+            return [{'seq': seq, 'content': content} for seq, content in sorted(self.chunks.get(name, {}).items())]
+
+    def get_cached_result(self, key):
+        self._call('get_cached_result')
+        with self._lock:
+            row = self.cache.get(key)
+            if row is None or row['expires_at'] <= datetime.now(timezone.utc).isoformat():
+                return None
+            return dict(row)
+
+    def save_cached_result(self, row):
+        self._call('save_cached_result')
+        with self._lock:
+            self.cache[row['cache_key']] = dict(row)
+
+    def append_summaries(self, ingestion_id, summaries):
+        self._call('append_summaries')
+        with self._lock:
+            rows = self.summaries.setdefault(ingestion_id, {})
+            for summary in summaries:
+                rows.setdefault((summary['level'], summary['split'], summary['seq']), summary['content'])
+
+    def get_summaries(self, ingestion_id, level, offset=0, limit=100):
+        self._call('get_summaries')
+        with self._lock:
+            rows = sorted(item for item in self.summaries.get(ingestion_id, {}).items() if item[0][0] == level)
+            return [{'split': split, 'seq': seq, 'content': content} for (_, split, seq), content in rows[offset:offset + limit]]
+
+    def get_summary_positions(self, ingestion_id, level, split=None):
+        self._call('get_summary_positions')
+        with self._lock:
+            return [
+                {'split': row_split, 'seq': seq}
+                for row_level, row_split, seq in sorted(self.summaries.get(ingestion_id, {}))
+                if row_level == level and split in (None, row_split)
+            ]
+
+    def delete_summaries(self, ingestion_id):
+        self._call('delete_summaries')
+        with self._lock:
+            self.summaries.pop(ingestion_id, None)
+
+    def _call(self, operation):
+        self.calls.add(operation)
+        if self.latency:
+            time.sleep(self.latency)
+
+class FakeTrainingBackend:
+    """
+    Stand-in for training_jobs.LambdaTrainingBackend: each job finishes
+    after a scripted delay and reports through training_jobs.complete_job,
+    as the worker does.
+
+    `script` maps digital_twin_id to (outcome, delay); other jobs use
+    (`outcome`, `delay`). Outcomes: 'complete', 'fail', 'silent' (finishes
+    but its completion event is lost, so only polling sees it) and 'hang'
+    (never finishes).
+    """
+
+    def __init__(self, outcome: str = 'complete', delay: float = 0.0, script: Optional[Dict[str, Any]] = None):
+        self.outcome = outcome
+        self.delay = delay
+        self.script = script or {}
+        self.started: List[Dict[str, Any]] = []
+        self._timers: List[threading.Timer] = []
+        self._lock = threading.Lock()
+
+    def start(self, job):
+        outcome, delay = self.script.get(job['digital_twin_id'], (self.outcome, self.delay))
+        with self._lock:
+            self.started.append(job)
+        if outcome == 'hang':
+            return
+        timer = threading.Timer(delay, self._finish, (job, outcome))
+        timer.daemon = True
+        with self._lock:
+            self._timers.append(timer)
+        timer.start()
+
+    def _finish(self, job, outcome):
+        import training_jobs
+
+        name = job['training_job_name']
+        result = {
+            'statusCode': 200,
+            'digital_twin_id': job['digital_twin_id'],
+            'training_job_name': name,
+            'model_output': f"Profile for {job.get('name', 'Digital Twin')}",
+            'model_endpoint': f"https://api.reelagents.com/models/{job['digital_twin_id']}",
+            'training_status': training_jobs.COMPLETED,
+        }
+        if outcome == 'fail':
+            training_jobs.complete_job(name, error='Training data could not be read')
+        elif outcome == 'silent':
+            training_jobs.get_job_store().update(name, {'status': training_jobs.COMPLETED, 'result': result})
+        else:
+            training_jobs.complete_job(name, result)
+
+    def join(self, timeout: float = 5.0):
+        """Wait for every scheduled job to finish"""
+        with self._lock:
+            timers = list(self._timers)
+        for timer in timers:
+            timer.join(timeout)
@@ -0,0 +1,128 @@
+"""
+Cold-import report and budget check for every Lambda and Vercel entry point.
+
+Each entry point is imported in a fresh interpreter under
+`python -X importtime`; the report lists the wall-clock import time, the
+heaviest top-level imports and any SDKs that should have been deferred
+but were loaded. Budgets live in import_budgets.json.
+
+    cd tests/backend && python importtime_report.py [--top 5] [--json report.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_budgets.json')
+
+# SDKs whose presence in sys.modules after a cold import is reported
+HEAVY_MODULES = ('boto3', 'botocore', 'stripe', 'supabase', 'httpx', 'postgrest')
+
+_MARKER = '-- entry point import --'
+
+_IMPORT_SNIPPET = """
+import importlib.util, json, sys, time
+sys.path[:0] = [{repo_root!r}, {lambda_dir!r}]
+sys.stderr.write({marker!r} + '\\n')
+sys.stderr.flush()
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('entry_point', {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'import_ms': elapsed * 1000,
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+def load_budgets(path: str = BUDGETS_FILE) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Top-level imports from `-X importtime` output, heaviest first"""
+    imports = []
+    # Only count imports made by the entry point, not interpreter startup
+    if _MARKER in stderr:
+        stderr = stderr.split(_MARKER, 1)[1]
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented two spaces per level
+        if name[1:].startswith(' '):
+            continue
+        imports.append({'module': name.strip(), 'cumulative_ms': int(cumulative_us) / 1000})
+    return sorted(imports, key=lambda entry: entry['cumulative_ms'], reverse=True)
+
+def measure(relative_path: str) -> Dict[str, Any]:
+    """Cold-import one entry point in a fresh interpreter"""
+    snippet = _IMPORT_SNIPPET.format(
+        repo_root=REPO_ROOT,
+        lambda_dir=os.path.join(REPO_ROOT, 'aws', 'lambda'),
+        path=os.path.join(REPO_ROOT, relative_path),
+        heavy=HEAVY_MODULES,
+        marker=_MARKER,
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', snippet],
+        capture_output=True, text=True, cwd=REPO_ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {relative_path} failed:\n{result.stderr[-2000:]}")
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['imports'] = parse_importtime(result.stderr)
+    return report
+
+def run(repeat: int = 1, top: int = 5, budgets: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Measure every configured entry point, keeping the fastest of `repeat` runs"""
+    budgets = budgets or load_budgets()
+    report = {}
+    for relative_path, config in budgets['entry_points'].items():
+        runs = [measure(relative_path) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run['import_ms'])
+        budget_ms = config.get('budget_ms', budgets['default_budget_ms'])
+        deferred = config.get('deferred', [])
+        report[relative_path] = {
+            'import_ms': round(best['import_ms'], 1),
+            'budget_ms': budget_ms,
+            'over_budget': best['import_ms'] > budget_ms,
+            'deferred_but_loaded': [name for name in deferred if name in best['heavy_modules']],
+            'heavy_modules': best['heavy_modules'],
+            'top_imports': best['imports'][:top],
+        }
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args(argv)
+
+    report = run(repeat=args.repeat, top=args.top)
+    failed = False
+    for relative_path, entry in report.items():
+        status = 'OK'
+        if entry['over_budget'] or entry['deferred_but_loaded']:
+            status = 'OVER' if entry['over_budget'] else 'EAGER'
+            failed = True
+        print(f"{status:<5} {entry['import_ms']:>8.1f} / {entry['budget_ms']:>5} ms  {relative_path}")
+        for imported in entry['top_imports']:
+            print(f"      {imported['cumulative_ms']:>8.1f} ms  {imported['module']}")
+        if entry['deferred_but_loaded']:
+            print(f"      eagerly loaded: {', '.join(entry['deferred_but_loaded'])}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
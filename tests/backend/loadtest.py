@@ -0,0 +1,325 @@
+"""
+Offline load test for every Vercel function under api/.
+
+Each `handler` class is mounted on its own local ThreadingHTTPServer with
+Supabase, Stripe and boto3 replaced by the in-process fakes from
+fakes.py (with injected latency), then driven concurrently over HTTP.
+Results are written as JSON so runs can be diffed across commits:
+
+    cd tests/backend && python loadtest.py --requests 500 --concurrency 16
+"""
+import argparse
+import contextlib
+import http.client
+import importlib.util
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes
+
+ENVIRONMENT = {
+    'VITE_SUPABASE_URL': 'https://loadtest.supabase.co',
+    'SUPABASE_SERVICE_ROLE_KEY': 'header.payload.signature',
+    'STRIPE_SECRET_KEY': 'sk_test_loadtest',
+    'STRIPE_WEBHOOK_SECRET': 'whsec_loadtest',
+    'STEP_FUNCTION_ARN': 'arn:aws:states:us-east-1:123456789012:stateMachine:CreateDigitalTwin',
+    'CRON_SECRET': 'cron_loadtest',
+}
+
+def _json(data: Any) -> bytes:
+    return json.dumps(data).encode('utf-8')
+
+# name -> (handler file under api/, method, path, headers, body)
+ENDPOINTS = {
+    'campaigns.create': (
+        'campaigns/create.py', 'POST', '/api/campaigns/create', {},
+        _json({'name': 'Load test campaign', 'company_id': 'company-1', 'budget': 2500}),
+    ),
+    'campaigns.bulk_create': (
+        'campaigns/bulk-create.py', 'POST', '/api/campaigns/bulk-create', {},
+        _json([{'name': f'Imported campaign {i}', 'company_id': 'company-1', 'budget': 1000 + i} for i in range(50)]),
+    ),
+    'campaigns.get': (
+        'campaigns/get.py', 'GET', '/api/campaigns/get?company_id=company-1', {}, None,
+    ),
+    'campaigns.certified_agents': (
+        'campaigns/[id]/certified-agents.py', 'GET', '/api/campaigns/campaign-1/certified-agents', {}, None,
+    ),
+    'digital_twins.create': (
+        'digital-twins/create.py', 'POST', '/api/digital-twins/create', {},
+        _json({'name': 'Twin', 'company_id': 'company-1', 'training_data_url': 'https://example.com/data.mp4'}),
+    ),
+    'digital_twins.batch_create': (
+        'digital-twins/batch-create.py', 'POST', '/api/digital-twins/batch-create', {},
+        _json({'twins': [
+            {'name': f'Twin {i}', 'company_id': 'company-1', 'training_data_url': 'https://example.com/data.mp4'}
+            for i in range(20)
+        ]}),
+    ),
+    'stripe.create_checkout_session': (
+        'stripe/create-checkout-session.py', 'POST', '/api/stripe/create-checkout-session', {},
+        _json({'campaign_id': 'campaign-1', 'agent_id': 'agent-1', 'amount': 50000}),
+    ),
+    'stripe.create_connect_account': (
+        'stripe/create-connect-account.py', 'POST', '/api/stripe/create-connect-account', {},
+        _json({'email': 'agent@example.com', 'type': 'agent'}),
+    ),
+    'stripe.create_account_link': (
+        'stripe/create-account-link.py', 'POST', '/api/stripe/create-account-link', {},
+        _json({'account_id': 'acct_1', 'refresh_url': 'https://app.test/r', 'return_url': 'https://app.test/done'}),
+    ),
+    'stripe.webhook': (
+        'stripe/webhook.py', 'POST', '/api/stripe/webhook', {'Stripe-Signature': 'valid'},
+        _json({'id': 'evt_1', 'type': 'account.updated', 'data': {'object': {'id': 'acct_1', 'charges_enabled': True}}}),
+    ),
+    'stripe.process_events': (
+        'stripe/process-events.py', 'GET', '/api/stripe/process-events', {'Authorization': 'Bearer cron_loadtest'}, None,
+    ),
+}
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+@contextlib.contextmanager
+def offline_backends(db_latency: float, stripe_latency: float, aws_latency: float):
+    """Swap Supabase, Stripe and boto3 for in-process fakes"""
+    supabase = fakes.FakeSupabase(fakes.seed_tables(), latency=db_latency)
+    supabase.functions['claim_stripe_events'] = fakes.claim_stripe_events
+    supabase.functions['apply_stripe_payments'] = fakes.apply_stripe_payments
+    supabase.functions['purge_expired_idempotency_keys'] = fakes.purge_expired_idempotency_keys
+    stripe = fakes.make_fake_stripe(latency=stripe_latency)
+    boto3 = fakes.make_fake_boto3(latency=aws_latency)
+
+    stripe.api_key = ENVIRONMENT['STRIPE_SECRET_KEY']
+
+    from api._lib import account_links, agent_pool, digital_twins, idempotency, payout_accounts, stripe_events, supabase_client, stripe_sdk
+    supabase_client.reset_supabase_client()
+    digital_twins.reset_step_functions_client()
+    idempotency.reset_idempotency_keys()
+    stripe_events.reset_event_queue()
+    stripe_events.QUEUED_EVENTS.clear()
+    stripe_events.APPLIED_EVENTS.clear()
+    agent_pool.AGENT_POOL.invalidate()
+    payout_accounts.PAYOUT_ACCOUNTS.invalidate()
+    account_links.ACCOUNT_LINKS.invalidate()
+
+    with patch.dict(os.environ, ENVIRONMENT), \
+            patch.dict(sys.modules, {'stripe': stripe, 'boto3': boto3}), \
+            patch.object(stripe_sdk, 'stripe', stripe), \
+            patch.object(supabase_client, 'create_client', lambda *args, **kwargs: supabase):
+        try:
+            yield {'supabase': supabase, 'stripe': stripe, 'boto3': boto3}
+        finally:
+            supabase_client._client = None
+            digital_twins.reset_step_functions_client()
+            idempotency.reset_idempotency_keys()
+            stripe_events.reset_event_queue()
+
+def load_handler(relative_path: str):
+    """Import a handler module fresh so it binds to the currently installed fakes"""
+    module_name = 'loadtest_' + ''.join(c if c.isalnum() else '_' for c in relative_path[:-3])
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_ROOT, 'api', relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    class Handler(module.handler):
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+@contextlib.contextmanager
+def serve(handler_class):
+    server = QuietServer(('127.0.0.1', 0), handler_class)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server.server_port
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def send(port: int, method: str, path: str, headers: Dict[str, str], body: Optional[bytes]) -> int:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        request_headers = {'Authorization': 'Bearer loadtest-token', 'Accept-Encoding': 'gzip', **headers}
+        if body is not None:
+            request_headers['Content-Type'] = 'application/json'
+        conn.request(method, path, body=body, headers=request_headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+def measure_allocations(port: int, request: tuple, samples: int) -> Dict[str, float]:
+    """Peak traced allocation per request, measured sequentially"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            send(port, *request)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_peak_kib_p50': round(statistics.median(peaks) / 1024, 2),
+        'alloc_peak_kib_max': round(max(peaks) / 1024, 2),
+    }
+
+def run_endpoint(name: str, requests: int, concurrency: int, alloc_samples: int) -> Dict[str, Any]:
+    relative_path, method, path, headers, body = ENDPOINTS[name]
+    request = (method, path, headers, body)
+
+    with serve(load_handler(relative_path)) as port:
+        # Warm up: module state, pooled clients and the server thread
+        send(port, *request)
+
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        lock = threading.Lock()
+
+        def one(_):
+            start = time.perf_counter()
+            status = send(port, *request)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(requests)))
+        wall = time.perf_counter() - started
+
+        result = {
+            'requests': requests,
+            'concurrency': concurrency,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'errors': sum(count for status, count in statuses.items() if status >= 400),
+            'rps': round(requests / wall, 1),
+        }
+        latencies.sort()
+        for pct in (50, 95, 99):
+            result[f'p{pct}_ms'] = round(percentile(latencies, pct) * 1000, 2)
+
+        if alloc_samples:
+            result.update(measure_allocations(port, request, alloc_samples))
+
+    return result
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def run(
+    endpoints: Optional[List[str]] = None,
+    requests: int = 200,
+    concurrency: int = 16,
+    db_latency_ms: float = 5,
+    stripe_latency_ms: float = 20,
+    aws_latency_ms: float = 10,
+    alloc_samples: int = 20,
+) -> Dict[str, Any]:
+    """Run the load test and return the report"""
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'settings': {
+            'requests': requests,
+            'concurrency': concurrency,
+            'db_latency_ms': db_latency_ms,
+            'stripe_latency_ms': stripe_latency_ms,
+            'aws_latency_ms': aws_latency_ms,
+        },
+        'endpoints': {},
+    }
+
+    from api._lib import account_links, agent_pool, payout_accounts
+
+    with offline_backends(db_latency_ms / 1000, stripe_latency_ms / 1000, aws_latency_ms / 1000) as backends:
+        for name in endpoints or list(ENDPOINTS):
+            # Fresh tables per endpoint so earlier writes don't skew later reads
+            backends['supabase'].tables = fakes.seed_tables()
+            agent_pool.AGENT_POOL.invalidate()
+            payout_accounts.PAYOUT_ACCOUNTS.invalidate()
+            account_links.ACCOUNT_LINKS.invalidate()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                report['endpoints'][name] = run_endpoint(name, requests, concurrency, alloc_samples)
+
+        report['backend_calls'] = {
+            'supabase': dict(backends['supabase'].calls.counts),
+            'stripe': dict(backends['stripe'].calls.counts),
+            'boto3': dict(backends['boto3'].calls.counts),
+        }
+
+    return report
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<32} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'alloc KiB':>10} {'errors':>7}")
+    for name, result in report['endpoints'].items():
+        print(
+            f"{name:<32} {result['rps']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+            f"{result['p99_ms']:>8} {result.get('alloc_peak_kib_p50', '-'):>10} {result['errors']:>7}"
+        )
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', action='append', choices=sorted(ENDPOINTS), help='Limit to these endpoints')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--db-latency-ms', type=float, default=5)
+    parser.add_argument('--stripe-latency-ms', type=float, default=20)
+    parser.add_argument('--aws-latency-ms', type=float, default=10)
+    parser.add_argument('--alloc-samples', type=int, default=20, help='0 disables allocation tracing')
+    parser.add_argument('--output', default='loadtest-results.json')
+    args = parser.parse_args(argv)
+
+    report = run(
+        endpoints=args.endpoint,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        db_latency_ms=args.db_latency_ms,
+        stripe_latency_ms=args.stripe_latency_ms,
+        aws_latency_ms=args.aws_latency_ms,
+        alloc_samples=args.alloc_samples,
+    )
+    print_report(report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nWrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,735 @@
+"""
+Local in-process interpreter for the Step Functions state machines under
+aws/step-functions/.
+
+Supports Task, Choice, Wait, Map, Pass, Succeed and Fail states with
+InputPath/Parameters/ResultSelector/ResultPath/OutputPath, Retry and
+Catch. Lambda ARNs (plain, `lambda:invoke` and `.waitForTaskToken`) are
+mapped to the `lambda_handler`s in aws/lambda/. While an execution runs,
+`boto3` is replaced by LocalAWS: Step Functions task callbacks resume the
+waiting execution, Lambda invokes run the local handler (asynchronously
+for InvocationType='Event'), and every other service comes from
+fakes.make_fake_boto3 with injected latency.
+
+Wait states, task timeouts and retry intervals are multiplied by
+`time_scale`, so a run with --time-scale 0.001 exercises the polling
+fallback in milliseconds. As a capacity-planning tool:
+
+    cd tests/backend && python statemachine.py --executions 500 --concurrency 32
+"""
+import argparse
+import contextlib
+import copy
+import importlib
+import itertools
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from unittest.mock import patch
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+LAMBDA_DIR = os.path.join(REPO_ROOT, 'aws', 'lambda')
+for path in (LAMBDA_DIR, REPO_ROOT, os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import fakes
+from loadtest import percentile
+
+CREATE_DIGITAL_TWIN = os.path.join(REPO_ROOT, 'aws', 'step-functions', 'create-digital-twin.json')
+
+# Deployed function name -> handler in aws/lambda/. Other names fall back
+# to `<name with - as _>.lambda_handler`.
+FUNCTIONS = {
+    'validate-digital-twin-input': 'validate_input.lambda_handler',
+    'check-generation-cache': 'check_generation_cache.lambda_handler',
+    'plan-training-data-ingestion': 'ingest_training_data.plan_handler',
+    'summarize-training-data-split': 'ingest_training_data.split_handler',
+    'reduce-training-data-summaries': 'ingest_training_data.reduce_handler',
+    'start-training-job': 'start_training_job.lambda_handler',
+    'run-training-job': 'start_training_job.worker_handler',
+    'check-training-status': 'check_training_status.lambda_handler',
+    'update-digital-twin-status': 'update_status.lambda_handler',
+    'handle-training-failure': 'handle_failure.lambda_handler',
+}
+
+TRAINING_DATA_URL = 'https://example.com/data.mp4'
+
+# Function timeout handed to handlers through context (template.yaml Globals)
+LAMBDA_TIMEOUT_SECONDS = 30
+
+MAP_MAX_CONCURRENCY = 40
+
+class StatesError(Exception):
+    """A Step Functions error: `error` is what Retry/Catch ErrorEquals match"""
+
+    def __init__(self, error: str, cause: str = ''):
+        super().__init__(f"{error}: {cause}" if cause else error)
+        self.error = error
+        self.cause = cause
+
+def error_matches(patterns: Iterable[str], error: str) -> bool:
+    for pattern in patterns:
+        if pattern == 'States.ALL' or pattern == error:
+            return True
+        if pattern == 'States.TaskFailed' and error != 'States.Timeout':
+            return True
+    return False
+
+# JSONPath subset: $, $.a.b, $.a[0], $$.Task.Token
+_PATH_SEGMENT = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+
+def _segments(path: str) -> List[Any]:
+    body = path[1:]
+    segments = []
+    position = 0
+    for match in _PATH_SEGMENT.finditer(body):
+        if match.start() != position:
+            break
+        segments.append(match.group(1) if match.group(1) is not None else int(match.group(2)))
+        position = match.end()
+    if position != len(body):
+        raise StatesError('States.Runtime', f"Unsupported path: {path}")
+    return segments
+
+def get_path(data: Any, path: str, context: Optional[Dict[str, Any]] = None) -> Any:
+    if path.startswith('$$'):
+        data, path = context or {}, path[1:]
+    if not path.startswith('$'):
+        raise StatesError('States.Runtime', f"Invalid path: {path}")
+    for segment in _segments(path):
+        try:
+            data = data[segment]
+        except (KeyError, IndexError, TypeError):
+            raise StatesError('States.Runtime', f"Path {path} not found in input") from None
+    return data
+
+def has_path(data: Any, path: str) -> bool:
+    try:
+        get_path(data, path)
+        return True
+    except StatesError:
+        return False
+
+def set_path(data: Any, path: Optional[str], value: Any) -> Any:
+    """Apply a ResultPath: `$` replaces the input, null keeps it, `$.a.b` sets a field"""
+    if path is None:
+        return data
+    if path == '$':
+        return value
+    segments = _segments(path)
+    result = copy.deepcopy(data) if isinstance(data, dict) else {}
+    target = result
+    for segment in segments[:-1]:
+        if not isinstance(target.get(segment), dict):
+            target[segment] = {}
+        target = target[segment]
+    target[segments[-1]] = value
+    return result
+
+def resolve_parameters(template: Any, data: Any, context: Dict[str, Any]) -> Any:
+    """Evaluate `"key.$": "$.path"` entries of a Parameters/ResultSelector template"""
+    if isinstance(template, dict):
+        resolved = {}
+        for key, value in template.items():
+            if key.endswith('.$'):
+                resolved[key[:-2]] = get_path(data, value, context)
+            else:
+                resolved[key] = resolve_parameters(value, data, context)
+        return resolved
+    if isinstance(template, list):
+        return [resolve_parameters(value, data, context) for value in template]
+    return template
+
+def _compare(op: str, value: Any, expected: Any) -> bool:
+    kind = op[:-len('Path')] if op.endswith('Path') else op
+    if kind.startswith('String') and not isinstance(value, str):
+        return False
+    if kind.startswith('Numeric') and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+        return False
+    if kind.startswith('Timestamp'):
+        value, expected = _timestamp(value), _timestamp(expected)
+    if kind.endswith('GreaterThanEquals'):
+        return value >= expected
+    if kind.endswith('LessThanEquals'):
+        return value <= expected
+    if kind.endswith('GreaterThan'):
+        return value > expected
+    if kind.endswith('LessThan'):
+        return value < expected
+    if kind == 'BooleanEquals':
+        return isinstance(value, bool) and value == expected
+    if kind.endswith('Equals'):
+        return value == expected
+    if kind == 'StringMatches':
+        return re.fullmatch(re.escape(expected).replace(r'\*', '.*'), value) is not None
+    raise StatesError('States.Runtime', f"Unsupported Choice operator: {op}")
+
+def evaluate_rule(rule: Dict[str, Any], data: Any) -> bool:
+    if 'And' in rule:
+        return all(evaluate_rule(r, data) for r in rule['And'])
+    if 'Or' in rule:
+        return any(evaluate_rule(r, data) for r in rule['Or'])
+    if 'Not' in rule:
+        return not evaluate_rule(rule['Not'], data)
+
+    variable = rule['Variable']
+    present = has_path(data, variable)
+    value = get_path(data, variable) if present else None
+    for op, expected in rule.items():
+        if op in ('Variable', 'Next'):
+            continue
+        if op == 'IsPresent':
+            return present == expected
+        if not present:
+            return False
+        if op == 'IsNull':
+            return (value is None) == expected
+        if op == 'IsString':
+            return isinstance(value, str) == expected
+        if op == 'IsNumeric':
+            return (isinstance(value, (int, float)) and not isinstance(value, bool)) == expected
+        if op == 'IsBoolean':
+            return isinstance(value, bool) == expected
+        if op.endswith('Path'):
+            expected = get_path(data, expected)
+        return _compare(op, value, expected)
+    raise StatesError('States.Runtime', f"Choice rule has no comparison: {rule}")
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+class LambdaContext:
+    """The parts of the Lambda context object the handlers use"""
+
+    def __init__(self, function_name: str, timeout_seconds: float = LAMBDA_TIMEOUT_SECONDS):
+        self.function_name = function_name
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+class _TokenWaiter:
+    __slots__ = ('event', 'outcome', 'closed')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.outcome: Optional[Tuple[Any, ...]] = None
+        self.closed = False
+
+class LocalAWS:
+    """
+    Replacement for `boto3` while executions run.
+
+    Task tokens handed to `.waitForTaskToken` tasks are resumed by this
+    module's stepfunctions client; lambda invokes run the local handlers;
+    any other service is delegated to `fallback`.
+    """
+
+    def __init__(
+        self,
+        fallback: Optional[ModuleType] = None,
+        functions: Optional[Dict[str, str]] = None,
+        async_workers: int = 64,
+        time_scale: float = 1.0,
+    ):
+        self.fallback = fallback or fakes.make_fake_boto3()
+        self.functions = {**FUNCTIONS, **(functions or {})}
+        self.time_scale = time_scale
+        self.calls = fakes.CallCounter()
+        self._handlers: Dict[str, Callable] = {}
+        self._tokens: Dict[str, _TokenWaiter] = {}
+        self._lock = threading.Lock()
+        self._async = ThreadPoolExecutor(max_workers=async_workers, thread_name_prefix='lambda-async')
+        self.async_errors: List[str] = []
+
+    # boto3 surface
+
+    def client(self, service_name: str, *args, **kwargs):
+        if service_name == 'stepfunctions':
+            return _LocalStepFunctions(self)
+        if service_name == 'lambda':
+            return _LocalLambda(self)
+        return self.fallback.client(service_name, *args, **kwargs)
+
+    def module(self) -> ModuleType:
+        boto3 = ModuleType('boto3')
+        boto3.client = self.client
+        return boto3
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Route aws_clients.get_client to this LocalAWS"""
+        import aws_clients
+
+        aws_clients.reset_clients()
+        try:
+            with patch.dict(sys.modules, {'boto3': self.module()}):
+                yield self
+        finally:
+            aws_clients.reset_clients()
+
+    def close(self):
+        self._async.shutdown(wait=True)
+
+    # Lambda
+
+    def register(self, name: str, handler: Callable[[Dict[str, Any], Any], Any]) -> None:
+        """Serve function `name` with `handler` instead of a module from aws/lambda/"""
+        self._handlers[name] = handler
+
+    def handler(self, function: str) -> Callable[[Dict[str, Any], Any], Any]:
+        """Handler for a function name or ARN (arn:aws:lambda:...:function:NAME)"""
+        name = function.split(':function:', 1)[-1].split(':', 1)[0]
+        handler = self._handlers.get(name)
+        if handler is None:
+            target = self.functions.get(name, f"{name.replace('-', '_')}.lambda_handler")
+            module_name, _, attr = target.rpartition('.')
+            try:
+                handler = getattr(importlib.import_module(module_name), attr)
+            except (ImportError, AttributeError):
+                raise StatesError('Lambda.ResourceNotFoundException', f"No local handler for {function}") from None
+            self._handlers[name] = handler
+        return handler
+
+    def invoke(self, function: str, payload: Any) -> Any:
+        name = function.split(':function:', 1)[-1]
+        self.calls.add(f'invoke:{name}')
+        handler = self.handler(function)
+        try:
+            return handler(copy.deepcopy(payload), LambdaContext(name))
+        except Exception as e:
+            raise StatesError(type(e).__name__, json.dumps({'errorMessage': str(e), 'errorType': type(e).__name__})) from e
+
+    def invoke_async(self, function: str, payload: Any) -> None:
+        def run():
+            try:
+                self.invoke(function, payload)
+            except StatesError as e:
+                with self._lock:
+                    self.async_errors.append(e.error)
+
+        self._async.submit(run)
+
+    # Task tokens
+
+    def new_token(self) -> str:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._tokens[token] = _TokenWaiter()
+        return token
+
+    def discard_token(self, token: str) -> None:
+        with self._lock:
+            waiter = self._tokens.pop(token, None)
+            if waiter is not None:
+                waiter.closed = True
+
+    def wait_for_token(self, token: str, timeout: Optional[float]) -> Any:
+        waiter = self._tokens[token]
+        finished = waiter.event.wait(timeout * self.time_scale if timeout is not None else None)
+        self.discard_token(token)
+        if not finished:
+            raise StatesError('States.Timeout', 'Task timed out waiting for its callback')
+        kind, *rest = waiter.outcome
+        if kind == 'success':
+            return rest[0]
+        raise StatesError(rest[0] or 'States.TaskFailed', rest[1] or '')
+
+    def resolve(self, token: str, outcome: Tuple[Any, ...]) -> None:
+        with self._lock:
+            self.calls.add(f'callback:{outcome[0]}')
+            waiter = self._tokens.get(token)
+            if waiter is None or waiter.closed:
+                raise fakes.FakeClientError('TaskTimedOut', 'Task Timed Out')
+            if waiter.outcome is not None:
+                raise fakes.FakeClientError('InvalidToken', 'Task already completed')
+            waiter.outcome = outcome
+        waiter.event.set()
+
+class _LocalStepFunctions:
+    def __init__(self, aws: LocalAWS):
+        self.aws = aws
+
+    def send_task_success(self, taskToken, output):
+        self.aws.resolve(taskToken, ('success', json.loads(output)))
+        return {}
+
+    def send_task_failure(self, taskToken, error=None, cause=None):
+        self.aws.resolve(taskToken, ('failure', error, cause))
+        return {}
+
+    def send_task_heartbeat(self, taskToken):
+        return {}
+
+class _LocalLambda:
+    def __init__(self, aws: LocalAWS):
+        self.aws = aws
+
+    def invoke(self, FunctionName, Payload=b'{}', InvocationType='RequestResponse'):
+        payload = json.loads(Payload)
+        if InvocationType == 'Event':
+            self.aws.invoke_async(FunctionName, payload)
+            return {'StatusCode': 202}
+        return {'StatusCode': 200, 'Payload': self.aws.invoke(FunctionName, payload)}
+
+class Execution:
+    """One run: status, output or error, and the states it went through with their latencies"""
+
+    def __init__(self, name: str, input: Any):
+        self.name = name
+        self.input = input
+        self.status = 'RUNNING'
+        self.output: Any = None
+        self.error: Optional[str] = None
+        self.cause: Optional[str] = None
+        self.states: List[Tuple[str, float]] = []
+        self.caught: List[Tuple[str, str]] = []
+        self.retries = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> List[str]:
+        return [name for name, _ in self.states]
+
+    def record(self, state: str, seconds: float) -> None:
+        with self._lock:
+            self.states.append((state, seconds))
+
+class StateMachine:
+    def __init__(self, definition: Dict[str, Any], aws: LocalAWS, time_scale: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.definition = definition
+        self.aws = aws
+        self.time_scale = time_scale
+        self.sleep = sleep
+        self._names = itertools.count(1)
+
+    @classmethod
+    def from_file(cls, path: str = CREATE_DIGITAL_TWIN, **kwargs) -> 'StateMachine':
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def execute(self, input: Any, name: Optional[str] = None) -> Execution:
+        execution = Execution(name or f'local-{next(self._names)}', input)
+        context = {
+            'Execution': {
+                'Id': f'arn:aws:states:local:000000000000:execution:local:{execution.name}',
+                'Name': execution.name,
+                'Input': input,
+                'StartTime': _now(),
+            },
+            'StateMachine': {'Id': 'arn:aws:states:local:000000000000:stateMachine:local'},
+        }
+        start = time.perf_counter()
+        try:
+            execution.output = self._run(self.definition, input, context, execution)
+            execution.status = 'SUCCEEDED'
+        except StatesError as e:
+            execution.status = 'FAILED'
+            execution.error, execution.cause = e.error, e.cause
+        execution.seconds = time.perf_counter() - start
+        return execution
+
+    def _run(self, machine: Dict[str, Any], data: Any, context: Dict[str, Any], execution: Execution) -> Any:
+        name = machine['StartAt']
+        while True:
+            state = machine['States'][name]
+            context = {**context, 'State': {'Name': name, 'EnteredTime': _now()}}
+            start = time.perf_counter()
+            try:
+                data, next_name = self._state(name, state, data, context, execution)
+            finally:
+                execution.record(name, time.perf_counter() - start)
+            if next_name is None:
+                return data
+            name = next_name
+
+    def _state(self, name: str, state: Dict[str, Any], data: Any, context: Dict[str, Any],
+               execution: Execution) -> Tuple[Any, Optional[str]]:
+        kind = state['Type']
+        if kind == 'Succeed':
+            return self._output(state, self._input(state, data)), None
+        if kind == 'Fail':
+            raise StatesError(state.get('Error', 'States.Fail'), state.get('Cause', ''))
+        if kind == 'Choice':
+            effective = self._input(state, data)
+            for rule in state.get('Choices', []):
+                if evaluate_rule(rule, effective):
+                    return self._output(state, effective), rule['Next']
+            if 'Default' not in state:
+                raise StatesError('States.NoChoiceMatched', f"No Choice rule matched in {name}")
+            return self._output(state, effective), state['Default']
+        if kind == 'Wait':
+            effective = self._input(state, data)
+            self.sleep(self._wait_seconds(state, effective) * self.time_scale)
+            return self._output(state, effective), self._next(state)
+        if kind == 'Pass':
+            effective = self._input(state, data)
+            if 'Parameters' in state:
+                effective = resolve_parameters(state['Parameters'], effective, context)
+            result = state.get('Result', effective)
+            return self._output(state, set_path(data, state.get('ResultPath', '$'), result)), self._next(state)
+        if kind in ('Task', 'Map', 'Parallel'):
+            return self._with_retry_and_catch(name, state, data, context, execution)
+        raise StatesError('States.Runtime', f"Unsupported state type {kind} in {name}")
+
+    def _with_retry_and_catch(self, name: str, state: Dict[str, Any], data: Any, context: Dict[str, Any],
+                              execution: Execution) -> Tuple[Any, Optional[str]]:
+        attempts: Dict[int, int] = {}
+        while True:
+            try:
+                effective = self._input(state, data)
+                if state['Type'] == 'Map':
+                    result = self._map(state, effective, context, execution)
+                else:
+                    token = None
+                    if state['Resource'].endswith('.waitForTaskToken'):
+                        token = self.aws.new_token()
+                        context = {**context, 'Task': {'Token': token}}
+                    if 'Parameters' in state:
+                        effective = resolve_parameters(state['Parameters'], effective, context)
+                    result = self._task(state, effective, token)
+                if 'ResultSelector' in state:
+                    result = resolve_parameters(state['ResultSelector'], result, context)
+                output = set_path(data, state.get('ResultPath', '$'), result)
+                return self._output(state, output), self._next(state)
+            except StatesError as e:
+                delay = self._retry_delay(state, e.error, attempts)
+                if delay is not None:
+                    execution.retries += 1
+                    self.sleep(delay * self.time_scale)
+                    continue
+                for catcher in state.get('Catch', []):
+                    if error_matches(catcher['ErrorEquals'], e.error):
+                        with execution._lock:
+                            execution.caught.append((name, e.error))
+                        output = set_path(data, catcher.get('ResultPath', '$'), {'Error': e.error, 'Cause': e.cause})
+                        return output, catcher['Next']
+                raise
+
+    def _retry_delay(self, state: Dict[str, Any], error: str, attempts: Dict[int, int]) -> Optional[float]:
+        for index, retrier in enumerate(state.get('Retry', [])):
+            if not error_matches(retrier['ErrorEquals'], error):
+                continue
+            attempt = attempts.get(index, 0)
+            if attempt >= retrier.get('MaxAttempts', 3):
+                return None
+            attempts[index] = attempt + 1
+            return retrier.get('IntervalSeconds', 1) * retrier.get('BackoffRate', 2.0) ** attempt
+        return None
+
+    def _task(self, state: Dict[str, Any], effective: Any, token: Optional[str]) -> Any:
+        resource = state['Resource']
+        if resource.startswith('arn:aws:lambda:'):
+            return self.aws.invoke(resource, effective)
+        if resource == 'arn:aws:states:::lambda:invoke':
+            return {'StatusCode': 200, 'Payload': self.aws.invoke(effective['FunctionName'], effective.get('Payload', {}))}
+        if resource == 'arn:aws:states:::lambda:invoke.waitForTaskToken':
+            try:
+                self.aws.invoke(effective['FunctionName'], effective.get('Payload', {}))
+            except StatesError:
+                self.aws.discard_token(token)
+                raise
+            return self.aws.wait_for_token(token, state.get('TimeoutSeconds'))
+        raise StatesError('States.Runtime', f"Unsupported resource: {resource}")
+
+    def _map(self, state: Dict[str, Any], effective: Any, context: Dict[str, Any], execution: Execution) -> List[Any]:
+        items = get_path(effective, state.get('ItemsPath', '$'))
+        if not isinstance(items, list):
+            raise StatesError('States.Runtime', "Map ItemsPath must select an array")
+        processor = state.get('ItemProcessor') or state['Iterator']
+        selector = state.get('ItemSelector', state.get('Parameters'))
+
+        def one(indexed: Tuple[int, Any]) -> Any:
+            index, item = indexed
+            item_context = {**context, 'Map': {'Item': {'Index': index, 'Value': item}}}
+            item_input = resolve_parameters(selector, effective, item_context) if selector is not None else item
+            return self._run(processor, item_input, item_context, execution)
+
+        # MaxConcurrency 0 means no limit; inline Map runs up to 40 at once
+        concurrency = state.get('MaxConcurrency', 0) or MAP_MAX_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(items))), thread_name_prefix='map') as pool:
+            return list(pool.map(one, enumerate(items)))
+
+    def _wait_seconds(self, state: Dict[str, Any], data: Any) -> float:
+        if 'Seconds' in state:
+            return float(state['Seconds'])
+        if 'SecondsPath' in state:
+            return float(get_path(data, state['SecondsPath']))
+        timestamp = state.get('Timestamp') or get_path(data, state['TimestampPath'])
+        return max(0.0, _timestamp(timestamp) - time.time())
+
+    @staticmethod
+    def _input(state: Dict[str, Any], data: Any) -> Any:
+        path = state.get('InputPath', '$')
+        return {} if path is None else get_path(data, path)
+
+    @staticmethod
+    def _output(state: Dict[str, Any], data: Any) -> Any:
+        path = state.get('OutputPath', '$')
+        return {} if path is None else get_path(data, path)
+
+    @staticmethod
+    def _next(state: Dict[str, Any]) -> Optional[str]:
+        return None if state.get('End') else state['Next']
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def run_many(machine: StateMachine, inputs: List[Any], concurrency: int) -> Dict[str, Any]:
+    """Run every input, `concurrency` at a time, and summarise throughput, per-state latency and paths"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='execution') as pool:
+        executions = list(pool.map(machine.execute, inputs))
+    seconds = time.perf_counter() - start
+    return summarize(executions, seconds, concurrency)
+
+def summarize(executions: List[Execution], seconds: float, concurrency: int) -> Dict[str, Any]:
+    total = len(executions)
+    by_state: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    end_states: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    failure_paths = 0
+
+    for execution in executions:
+        statuses[execution.status] = statuses.get(execution.status, 0) + 1
+        if execution.states:
+            end = execution.states[-1][0]
+            end_states[end] = end_states.get(end, 0) + 1
+        for name, elapsed in execution.states:
+            by_state.setdefault(name, []).append(elapsed)
+        for _, error in execution.caught:
+            errors[error] = errors.get(error, 0) + 1
+        if execution.error:
+            errors[execution.error] = errors.get(execution.error, 0) + 1
+        if execution.caught or execution.status != 'SUCCEEDED':
+            failure_paths += 1
+
+    durations = sorted(execution.seconds for execution in executions)
+    return {
+        'executions': total,
+        'concurrency': concurrency,
+        'seconds': round(seconds, 3),
+        'executions_per_second': round(total / seconds, 1) if seconds else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(durations, 50) * 1000, 2),
+            'p95': round(percentile(durations, 95) * 1000, 2),
+            'max': round(durations[-1] * 1000, 2) if durations else 0.0,
+        },
+        'status': statuses,
+        'end_states': {name: round(count / total, 4) for name, count in sorted(end_states.items())} if total else {},
+        'failure_path_rate': round(failure_paths / total, 4) if total else 0.0,
+        'errors': errors,
+        'retries': sum(execution.retries for execution in executions),
+        'states': {
+            name: {
+                'count': len(values),
+                'mean_ms': round(statistics.fmean(values) * 1000, 2),
+                'p50_ms': round(percentile(sorted(values), 50) * 1000, 2),
+                'p95_ms': round(percentile(sorted(values), 95) * 1000, 2),
+            }
+            for name, values in by_state.items()
+        },
+    }
+
+@contextlib.contextmanager
+def digital_twin_pipeline(aws_latency: float = 0.0, db_latency: float = 0.0, time_scale: float = 1.0,
+                          bedrock_fail_when: Optional[Callable[[Dict[str, Any]], bool]] = None):
+    """
+    The create-digital-twin machine wired to local handlers: the training
+    worker runs through LocalAWS, Bedrock, the job store and the training
+    data (TRAINING_DATA_URL over HTTP, with Last-Modified but no ETag) are
+    fakes. The generation cache starts empty.
+    """
+    import generation_cache
+    import training_data
+    import training_jobs
+
+    fallback = fakes.make_fake_boto3(latency=aws_latency)
+    fallback.bedrock_fail_when = bedrock_fail_when
+    aws = LocalAWS(fallback=fallback, time_scale=time_scale)
+    store = fakes.FakeTrainingJobStore(latency=db_latency)
+    http = fakes.FakeHTTPSession({TRAINING_DATA_URL: b'campaign footage ' * 4096},
+                                 last_modified={TRAINING_DATA_URL: 'Tue, 01 Jul 2025 09:00:00 GMT'})
+    try:
+        with aws.installed(), \
+                patch.object(training_jobs, '_store', store), \
+                patch.object(training_jobs, '_backend', None), \
+                patch.object(training_data, '_session', http), \
+                patch.object(generation_cache, '_cache', generation_cache.GenerationCache()):
+            yield StateMachine.from_file(aws=aws, time_scale=time_scale), aws, store
+    finally:
+        aws.close()
+
+def twin_inputs(count: int, invalid_rate: float = 0.0, failing_rate: float = 0.0) -> List[Dict[str, Any]]:
+    """Execution inputs; the given shares are invalid or will fail generation (`fail-` names)"""
+    inputs = []
+    for i in range(count):
+        name = f'Twin {i}'
+        if invalid_rate and i % round(1 / invalid_rate) == 0:
+            name = 'X'
+        elif failing_rate and i % round(1 / failing_rate) == 1:
+            name = f'fail-{i}'
+        inputs.append({
+            'digital_twin_id': str(uuid.UUID(int=i)),
+            'name': name,
+            'company_id': 'company-1',
+            'training_data_url': TRAINING_DATA_URL,
+            'description': '',
+        })
+    return inputs
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['executions']} executions, concurrency {report['concurrency']}: "
+          f"{report['executions_per_second']} exec/s, p50 {report['latency_ms']['p50']} ms, "
+          f"p95 {report['latency_ms']['p95']} ms")
+    print(f"status {report['status']}  failure-path rate {report['failure_path_rate']}  errors {report['errors']}")
+    print(f"end states {report['end_states']}\n")
+    print(f"{'state':<24} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, state in report['states'].items():
+        print(f"{name:<24} {state['count']:>7} {state['mean_ms']:>9} {state['p50_ms']:>9} {state['p95_ms']:>9}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--executions', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--aws-latency-ms', type=float, default=20, help='Per call to Bedrock and other AWS fakes')
+    parser.add_argument('--db-latency-ms', type=float, default=5, help='Per training job store call')
+    parser.add_argument('--time-scale', type=float, default=0.001, help='Multiplier for Wait states and timeouts')
+    parser.add_argument('--invalid-rate', type=float, default=0.05, help='Share of inputs that fail validation')
+    parser.add_argument('--failing-rate', type=float, default=0.05, help='Share of inputs whose generation fails')
+    parser.add_argument('--output', help='Also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    inputs = twin_inputs(args.executions, args.invalid_rate, args.failing_rate)
+    with digital_twin_pipeline(
+        aws_latency=args.aws_latency_ms / 1000,
+        db_latency=args.db_latency_ms / 1000,
+        time_scale=args.time_scale,
+        bedrock_fail_when=lambda body: "'fail-" in body.get('prompt', ''),
+    ) as (machine, _, _):
+        report = run_many(machine, inputs, args.concurrency)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nWrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import http.client
+import json
+import time
+import pytest
+from unittest.mock import patch
+from loadtest import load_handler, offline_backends, serve
+from api._lib.account_links import ACCOUNT_LINKS, link_key, _timestamp
+
+LINK = {'account_id': 'acct_1', 'refresh_url': 'https://app.test/onboarding', 'return_url': 'https://app.test/done'}
+
+@pytest.fixture
+def api():
+    with offline_backends(0, 0, 0) as backends:
+        with serve(load_handler('stripe/create-account-link.py')) as port:
+            yield port, backends
+
+def post(port, **overrides):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/stripe/create-account-link', body=json.dumps({**LINK, **overrides}),
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+def stripe_calls(backends):
+    return backends['stripe'].calls.counts.get('AccountLink.create', 0)
+
+def test_reloads_reuse_the_link_across_instances(api):
+    port, backends = api
+
+    first = post(port)
+    again = post(port)
+    # A cold instance has an empty in-process cache but shares the table
+    ACCOUNT_LINKS.invalidate()
+    cold = post(port)
+
+    assert first == again == cold
+    assert first[0] == 200 and first[1]['url'].startswith('https://connect.stripe.test/setup/acct_1/')
+    assert stripe_calls(backends) == 1
+    assert len(backends['supabase'].tables['stripe_account_links']) == 1
+
+def test_links_about_to_expire_are_replaced(api):
+    port, backends = api
+    _, first = post(port)
+
+    key = link_key(LINK['account_id'], LINK['refresh_url'], LINK['return_url'])
+    soon = time.time() + 30
+    ACCOUNT_LINKS._entries[key]['expires_at'] = soon
+    backends['supabase'].tables['stripe_account_links'][0]['expires_at'] = _timestamp(soon)
+
+    _, second = post(port)
+
+    assert second['url'] != first['url']
+    assert stripe_calls(backends) == 2
+    assert post(port)[1] == second
+    assert len(backends['supabase'].tables['stripe_account_links']) == 1
+
+def test_refresh_and_different_urls_get_new_links(api):
+    port, backends = api
+    _, first = post(port)
+
+    _, refreshed = post(port, refresh=True)
+    _, other = post(port, return_url='https://app.test/elsewhere')
+
+    assert len({first['url'], refreshed['url'], other['url']}) == 3
+    assert post(port)[1] == refreshed
+    assert stripe_calls(backends) == 3
+
+def test_consumed_link_is_replaced_from_the_refresh_url(api):
+    port, backends = api
+    refresh_page = {'refresh_url': 'https://app.test/onboarding?onboarding=refresh&account=acct_1'}
+    _, consumed = post(port, **refresh_page)
+
+    # Stripe sends the user to refresh_url, which asks for a new link; a
+    # refresh whose Stripe call fails still drops the used one
+    with patch.object(backends['stripe'].AccountLink, 'create', side_effect=backends['stripe'].error.StripeError('down')):
+        assert post(port, refresh=True, **refresh_page)[0] == 400
+    ACCOUNT_LINKS.invalidate()
+    _, reloaded = post(port, **refresh_page)
+    _, refreshed = post(port, refresh=True, **refresh_page)
+
+    assert reloaded['url'] != consumed['url']
+    assert refreshed['url'] not in (consumed['url'], reloaded['url'])
+    assert post(port, **refresh_page)[1] == refreshed
+    assert [row['url'] for row in backends['supabase'].tables['stripe_account_links']] == [refreshed['url']]
+
+def test_hit_rate_and_saved_calls_are_logged(api, capsys):
+    port, backends = api
+    before = ACCOUNT_LINKS.metrics()
+    for _ in range(4):
+        post(port)
+
+    # Each request logs after its response is sent
+    output = ''
+    for _ in range(100):
+        output += capsys.readouterr().out
+        if output.count('"stripe.create_account_link"') == 4:
+            break
+        time.sleep(0.01)
+
+    lines = [json.loads(line) for line in output.splitlines() if '"stripe.create_account_link"' in line]
+    assert [line['link_source'] for line in lines] == ['miss', 'memory', 'memory', 'memory']
+    metrics = lines[-1]['link_cache']
+    assert metrics['stripe_calls_saved'] - before['stripe_calls_saved'] == 3
+    assert 0 < metrics['hit_rate'] <= 1
@@ -0,0 +1,130 @@
+import http.client
+import json
+from urllib.parse import urlencode
+import fakes
+from loadtest import load_handler, offline_backends, serve
+from api._lib.agent_pool import AgentPoolCache
+
+SPECIALIZATIONS = ('short-form video', 'livestream', 'podcast')
+
+def marketplace():
+    tables = fakes.seed_tables(agents=30)
+    for i, agent in enumerate(tables['agents']):
+        agent['specialization'] = SPECIALIZATIONS[i % 3]
+        agent['company_id'] = 'company-2' if i % 5 == 0 else None
+    tables['agents'].append({**tables['agents'][1], 'id': 'agent-pending', 'certification_status': 'pending'})
+    tables['campaigns'].append({'id': 'campaign-other', 'company_id': 'company-2'})
+    return tables
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_pool_is_loaded_once_and_reloaded_on_version_change():
+    supabase = fakes.FakeSupabase(marketplace())
+    clock = Clock()
+    pool = AgentPoolCache(ttl_seconds=60, clock=clock)
+
+    first, _ = pool.page(supabase, 1, 'company-1', limit=100)
+    second, _ = pool.page(supabase, 1, 'company-2', limit=100)
+    assert len(first) == 30 and len(second) == 24
+    assert 'agent-pending' not in {agent['id'] for agent in first}
+    assert supabase.calls.counts == {'select:agents': 1}
+
+    pool.page(supabase, 2, 'company-1')
+    assert supabase.calls.counts == {'select:agents': 2}
+
+    clock.now = 61
+    pool.page(supabase, 2, 'company-1')
+    assert supabase.calls.counts == {'select:agents': 3}
+
+def test_pool_is_loaded_in_batches_under_the_row_cap():
+    tables = fakes.seed_tables(agents=2500)
+    supabase = fakes.FakeSupabase(tables, max_rows=1000)
+    pool = AgentPoolCache()
+
+    listings, _ = pool.page(supabase, 1, None, limit=5000)
+
+    assert len(listings) == 2500
+    assert len({agent['id'] for agent in listings}) == 2500
+    assert supabase.calls.counts == {'select:agents': 3}
+
+def test_page_filters_and_walks_in_id_order():
+    supabase = fakes.FakeSupabase(marketplace())
+    pool = AgentPoolCache()
+
+    seen, after = [], None
+    while True:
+        page, has_more = pool.page(supabase, 1, 'company-2', specializations=['Livestream'], after_id=after, limit=3)
+        seen.extend(page)
+        if not has_more:
+            break
+        after = page[-1]['id']
+
+    expected = sorted(
+        agent['id'] for agent in marketplace()['agents']
+        if agent['specialization'] == 'livestream' and agent['company_id'] != 'company-2'
+        and agent['certification_status'] == 'certified'
+    )
+    assert [agent['id'] for agent in seen] == expected
+
+def get(port, campaign_id, **params):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', f'/api/campaigns/{campaign_id}/certified-agents?' + urlencode(params),
+                 headers={'Authorization': 'Bearer mock-token'})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+def test_endpoint_serves_every_campaign_from_one_pool_load():
+    with offline_backends(0, 0, 0) as backends:
+        backends['supabase'].tables = marketplace()
+        with serve(load_handler('campaigns/[id]/certified-agents.py')) as port:
+            status, first = get(port, 'campaign-1', limit=10)
+            assert status == 200
+            assert first['count'] == 10 and first['has_more'] is True
+
+            status, second = get(port, 'campaign-1', limit=10, cursor=first['next_cursor'])
+            assert status == 200
+            assert not {a['id'] for a in first['agents']} & {a['id'] for a in second['agents']}
+
+            status, other = get(port, 'campaign-other', specialization='podcast,livestream', limit=100)
+            assert status == 200
+            assert other['count'] == 16
+            assert {a['specialization'] for a in other['agents']} == {'podcast', 'livestream'}
+
+        assert backends['supabase'].calls.counts['select:agents'] == 1
+
+def test_listing_uses_precomputed_stats():
+    """Rating, completed campaigns and rate come from agent_stats and agents"""
+    tables = marketplace()
+    tables['agents'][1]['agent_stats'] = [{'completed_campaigns': 9, 'rating': '4.5'}]
+    tables['agents'][2]['agent_stats'] = None
+    pool = AgentPoolCache()
+
+    listings = {agent['id']: agent for agent in pool.page(fakes.FakeSupabase(tables), 1, None, limit=100)[0]}
+
+    assert (listings['agent-1']['rating'], listings['agent-1']['completed_campaigns']) == (4.5, 9)
+    assert listings['agent-1']['hourly_rate'] == 61.0
+    assert (listings['agent-2']['rating'], listings['agent-2']['completed_campaigns']) == (None, 0)
+
+def test_endpoint_ranks_against_the_campaign():
+    """sort=match puts specialization matches first and pages by rank"""
+    with offline_backends(0, 0, 0) as backends:
+        tables = marketplace()
+        tables['campaigns'][1].update({'name': 'Podcast tour', 'description': 'Weekly podcast ads', 'budget': 5000})
+        backends['supabase'].tables = tables
+        with serve(load_handler('campaigns/[id]/certified-agents.py')) as port:
+            status, first = get(port, 'campaign-1', limit=5)
+            status, second = get(port, 'campaign-1', limit=5, cursor=first['next_cursor'])
+            assert get(port, 'campaign-1', sort='rating')[0] == 400
+
+    assert status == 200
+    ranked = first['agents'] + second['agents']
+    assert [a['specialization'] for a in ranked[:10]] == ['podcast'] * 10
+    scores = [a['match_score'] for a in ranked]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import Mock, patch
+from agent_stats_job import lambda_handler
+
+DRIFT = [{'agent_id': 'agent-1', 'stored': {'completed_campaigns': 3}, 'expected': {'completed_campaigns': 4}}]
+
+def rpc_responses(results):
+    """requests.post stand-in answering each RPC from `results`"""
+    def post(url, json, headers, timeout):
+        function = url.rsplit('/', 1)[1]
+        response = Mock()
+        response.json.return_value = results[function]
+        response.raise_for_status.return_value = None
+        post.calls.append(function)
+        return response
+    post.calls = []
+    return post
+
+def test_backfill_rebuilds_all_stats():
+    post = rpc_responses({'rebuild_agent_stats': 42})
+    with patch('agent_stats_job.requests.post', post):
+        result = lambda_handler({'action': 'backfill'}, None)
+
+    assert result == {'statusCode': 200, 'action': 'backfill', 'rebuilt': 42}
+    assert post.calls == ['rebuild_agent_stats']
+
+def test_check_reports_drift_without_repairing():
+    post = rpc_responses({'agent_stats_drift': DRIFT})
+    with patch('agent_stats_job.requests.post', post):
+        result = lambda_handler({}, None)
+
+    assert result['drifted'] == 1 and result['sample'] == DRIFT
+    assert result['repaired'] is False
+    assert post.calls == ['agent_stats_drift']
+
+def test_check_repairs_drift_when_asked():
+    post = rpc_responses({'agent_stats_drift': DRIFT, 'rebuild_agent_stats': 1})
+    with patch('agent_stats_job.requests.post', post):
+        result = lambda_handler({'action': 'check', 'repair': True}, None)
+
+    assert result['repaired'] is True
+    assert post.calls == ['agent_stats_drift', 'rebuild_agent_stats']
+
+def test_consistent_stats_are_left_alone():
+    post = rpc_responses({'agent_stats_drift': []})
+    with patch('agent_stats_job.requests.post', post):
+        result = lambda_handler({'action': 'check', 'repair': True}, None)
+
+    assert (result['drifted'], result['repaired']) == (0, False)
+    assert post.calls == ['agent_stats_drift']
+
+def test_unknown_action_fails():
+    with pytest.raises(Exception, match='Unknown action'):
+        lambda_handler({'action': 'vacuum'}, None)
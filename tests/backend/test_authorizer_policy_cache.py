@@ -0,0 +1,143 @@
+import random
+import pytest
+from fnmatch import fnmatchcase
+from unittest.mock import Mock, patch
+import authorizer
+from authorizer import lambda_handler
+
+STAGE_ARN = 'arn:aws:execute-api:us-east-1:123456789012:abcdef123/prod'
+
+ROUTES = [
+    'GET/campaigns',
+    'POST/campaigns',
+    'GET/campaigns/c-1/certified-agents',
+    'POST/digital-twins',
+    'POST/stripe/create-checkout-session',
+    'POST/stripe/create-account-link',
+]
+
+USERS = {
+    f'token-{i}': {
+        'sub': f'user-{i}',
+        'email': f'user-{i}@example.com',
+        'user_metadata': {'role': 'company' if i % 3 else 'agent'},
+        'exp': 9999999999,
+    }
+    for i in range(20)
+}
+
+@pytest.fixture(autouse=True)
+def reset_authorizer_caches():
+    authorizer.JWKS_CACHE.clear()
+    authorizer.TOKEN_CACHE.clear()
+    authorizer.ROLE_RESOURCES.clear()
+    yield
+
+@pytest.fixture
+def mock_context():
+    return Mock()
+
+def covers(policy, method_arn):
+    """Evaluate an authorizer policy against a methodArn the way API Gateway does"""
+    statement = policy['policyDocument']['Statement'][0]
+    resources = statement['Resource']
+    if isinstance(resources, str):
+        resources = [resources]
+    matched = any(fnmatchcase(method_arn, resource) for resource in resources)
+    return matched and statement['Effect'] == 'Allow'
+
+def replay(request_log, context, ttl_seconds=300):
+    """
+    Replay (time, token, route) requests through a model of API Gateway's
+    authorizer result cache, keyed by the Authorization header.
+
+    A cached policy that does not cover the route would make API Gateway
+    answer 403; those are counted and treated as misses.
+    """
+    cache = {}
+    stats = {'requests': 0, 'hits': 0, 'invocations': 0, 'uncovered': 0}
+
+    with patch('authorizer.validate_jwt_token', side_effect=lambda token: USERS[token]):
+        for now, token, route in request_log:
+            stats['requests'] += 1
+            method_arn = f'{STAGE_ARN}/{route}'
+            cached = cache.get(token)
+
+            if cached and cached[0] > now:
+                if covers(cached[1], method_arn):
+                    stats['hits'] += 1
+                    continue
+                stats['uncovered'] += 1
+
+            event = {
+                'methodArn': method_arn,
+                'headers': {'Authorization': f'Bearer {token}'},
+            }
+            policy = lambda_handler(event, context)
+            stats['invocations'] += 1
+            cache[token] = (now + ttl_seconds, policy)
+
+    stats['hit_ratio'] = stats['hits'] / stats['requests']
+    return stats
+
+@pytest.fixture
+def mixed_route_log():
+    rng = random.Random(42)
+    tokens = sorted(USERS)
+    return [
+        (second, rng.choice(tokens), rng.choice(ROUTES))
+        for second in range(0, 3600, 2)
+    ]
+
+def test_stage_mode_policy_is_hit_across_routes(monkeypatch, mixed_route_log, mock_context):
+    """Stage-wide policies turn route changes into authorizer cache hits"""
+    monkeypatch.setattr(authorizer, 'POLICY_MODE', 'method')
+    method_stats = replay(mixed_route_log, mock_context)
+
+    authorizer.TOKEN_CACHE.clear()
+    monkeypatch.setattr(authorizer, 'POLICY_MODE', 'stage')
+    stage_stats = replay(mixed_route_log, mock_context)
+
+    assert stage_stats['uncovered'] == 0
+    assert stage_stats['hit_ratio'] > 0.85
+    assert method_stats['hit_ratio'] < 0.5
+    assert stage_stats['invocations'] * 4 < method_stats['invocations']
+
+def test_role_mode_builds_resources_once_per_role(monkeypatch, mixed_route_log, mock_context):
+    """Role policies share one resource list per role and still cache well"""
+    monkeypatch.setattr(authorizer, 'POLICY_MODE', 'role')
+    stats = replay(mixed_route_log, mock_context)
+
+    assert set(authorizer.ROLE_RESOURCES) == {(STAGE_ARN, 'company'), (STAGE_ARN, 'agent')}
+    # Only agents calling company-only routes fall outside their cached policy
+    assert stats['hit_ratio'] > 0.75
+
+def test_role_mode_scopes_routes_by_role(monkeypatch, mock_context):
+    """Agents get read access to campaigns but cannot create them"""
+    monkeypatch.setattr(authorizer, 'POLICY_MODE', 'role')
+    event = {
+        'methodArn': f'{STAGE_ARN}/GET/campaigns',
+        'headers': {'Authorization': 'Bearer token-0'},
+    }
+
+    with patch('authorizer.validate_jwt_token', return_value=USERS['token-0']):
+        policy = lambda_handler(event, mock_context)
+
+    assert policy['context']['userRole'] == 'agent'
+    assert covers(policy, f'{STAGE_ARN}/GET/campaigns/c-1/certified-agents')
+    assert not covers(policy, f'{STAGE_ARN}/POST/campaigns')
+
+def test_unknown_role_is_denied_in_role_mode(monkeypatch, mock_context):
+    """Roles without routes get a stage-wide Deny instead of an empty Allow"""
+    monkeypatch.setattr(authorizer, 'POLICY_MODE', 'role')
+    event = {
+        'methodArn': f'{STAGE_ARN}/GET/campaigns',
+        'headers': {'Authorization': 'Bearer token-x'},
+    }
+    claims = {'sub': 'user-x', 'exp': 9999999999, 'user_metadata': {}}
+
+    with patch('authorizer.validate_jwt_token', return_value=claims):
+        policy = lambda_handler(event, mock_context)
+
+    assert policy['policyDocument']['Statement'][0]['Effect'] == 'Deny'
+    assert policy['policyDocument']['Statement'][0]['Resource'] == f'{STAGE_ARN}/*'
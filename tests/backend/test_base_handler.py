@@ -0,0 +1,108 @@
+import gzip
+import http.client
+import json
+import threading
+import pytest
+from http.server import ThreadingHTTPServer
+from api._lib import base_handler
+from api._lib.base_handler import BaseHandler, negotiate_encoding
+
+CAMPAIGNS = [
+    {'id': f'campaign-{i}', 'name': f'Campaign {i}', 'budget': 1000.0 + i, 'status': 'draft'}
+    for i in range(1200)
+]
+
+class ListHandler(BaseHandler):
+    ALLOWED_METHODS = 'GET, OPTIONS'
+
+    def do_GET(self):
+        count = int(self.path.rsplit('/', 1)[1])
+        self.send_json_list(200, 'campaigns', CAMPAIGNS[:count], {'count': count})
+
+    def log_message(self, format, *args):
+        pass
+
+class KeepAliveListHandler(ListHandler):
+    protocol_version = 'HTTP/1.1'
+
+@pytest.fixture(params=[ListHandler, KeepAliveListHandler], ids=['http10', 'http11'])
+def server(request):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), request.param)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+def fetch(server, path, accept_encoding=None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=10)
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    raw = response.read()
+    conn.close()
+    return response, raw
+
+def test_small_response_is_uncompressed_with_content_length(server):
+    """Bodies under the threshold are sent as-is with a Content-Length"""
+    response, raw = fetch(server, '/campaigns/1', accept_encoding='gzip')
+
+    assert response.getheader('Content-Encoding') is None
+    assert int(response.getheader('Content-Length')) == len(raw)
+    assert json.loads(raw)['count'] == 1
+
+def test_large_response_is_gzipped_when_accepted(server):
+    """Bodies over the threshold are compressed for clients that accept gzip"""
+    response, raw = fetch(server, '/campaigns/100', accept_encoding='gzip, deflate')
+
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert int(response.getheader('Content-Length')) == len(raw)
+    assert json.loads(gzip.decompress(raw))['campaigns'] == CAMPAIGNS[:100]
+
+def test_identity_when_gzip_not_accepted(server):
+    """Clients that do not send Accept-Encoding get plain JSON"""
+    response, raw = fetch(server, '/campaigns/100')
+
+    assert response.getheader('Content-Encoding') is None
+    assert json.loads(raw)['count'] == 100
+
+def test_large_list_is_streamed(server):
+    """Lists above STREAM_MIN_ITEMS are streamed and still decode to the full payload"""
+    response, raw = fetch(server, '/campaigns/1200', accept_encoding='gzip')
+
+    assert response.getheader('Content-Length') is None
+    if response.version == 11:
+        assert response.getheader('Transfer-Encoding') == 'chunked'
+    data = json.loads(gzip.decompress(raw))
+    assert data['campaigns'] == CAMPAIGNS
+    assert data['count'] == 1200
+
+def test_cors_preflight_uses_allowed_methods(server):
+    """OPTIONS advertises the handler's own methods"""
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=10)
+    conn.request('OPTIONS', '/campaigns/1')
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+
+    assert response.status == 200
+    assert response.getheader('Access-Control-Allow-Methods') == 'GET, OPTIONS'
+
+@pytest.mark.parametrize('header,expected', [
+    ('gzip', 'gzip'),
+    ('deflate, gzip;q=0.5', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('*', base_handler.supported_encodings()[0]),
+    ('', None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+def test_json_encoders_agree():
+    """The orjson and stdlib encoders produce the same document"""
+    if base_handler.orjson is None:
+        pytest.skip('orjson not installed')
+
+    fast = base_handler.select_json_encoder('orjson')
+    slow = base_handler.select_json_encoder('json')
+
+    assert json.loads(fast(CAMPAIGNS)) == json.loads(slow(CAMPAIGNS))
@@ -0,0 +1,155 @@
+import json
+import sys
+import time
+import pytest
+from unittest.mock import patch
+import fakes
+import aws_clients
+import bedrock_stream
+import start_training_job
+import training_jobs
+
+TWIN = {
+    'digital_twin_id': 'twin-1',
+    'name': 'Brand Twin',
+    'company_id': 'company-1',
+    'training_data_url': 'https://example.com/data.mp4',
+    'description': '',
+    'training_job_name': 'twin-twin-1'
+}
+FULL_TEXT = ''.join(f' word{i}' for i in range(40))
+
+class Context:
+    """Lambda context whose invocation ends `seconds` from now"""
+
+    function_name = 'run-training-job'
+
+    def __init__(self, seconds):
+        self.deadline = time.monotonic() + seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+@pytest.fixture
+def aws(caplog):
+    boto3 = fakes.make_fake_boto3()
+    boto3.bedrock_options = {'tokens': 40, 'token_latency': 0.002}
+    store = fakes.FakeTrainingJobStore()
+    store.save({'training_job_name': 'twin-twin-1', 'digital_twin_id': 'twin-1', 'status': 'IN_PROGRESS', 'task_token': 'token-1'})
+    aws_clients.reset_clients()
+    caplog.set_level('INFO')
+    with patch.dict(sys.modules, {'boto3': boto3}), \
+            patch.object(training_jobs, '_store', store), \
+            patch.object(bedrock_stream, 'GENERATION_FLUSH_CHARS', 60), \
+            patch.object(bedrock_stream, 'GENERATION_DEADLINE_MARGIN_SECONDS', 1.0):
+        yield boto3, store
+    aws_clients.reset_clients()
+
+def generation_logs(caplog):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.getMessage().startswith('{"stage": "generate"')]
+
+def test_stream_is_persisted_incrementally_with_metrics(aws, caplog):
+    boto3, store = aws
+
+    result = start_training_job.worker_handler(dict(TWIN), Context(60))
+
+    chunks = store.get_chunks('twin-twin-1')
+    assert len(chunks) > 3
+    assert all(len(chunk['content']) < len(FULL_TEXT) for chunk in chunks)
+    assert ''.join(chunk['content'] for chunk in chunks) == FULL_TEXT
+    assert result['model_output'] == FULL_TEXT
+    assert boto3.task_callbacks['token-1'][0] == 'success'
+
+    [metrics] = generation_logs(caplog)
+    assert metrics['time_to_first_token_ms'] > 0
+    assert metrics['tokens_per_second'] > 0
+    assert (metrics['output_tokens'], metrics['chunks'], metrics['finished']) == (40, 40, True)
+    assert metrics['flushes'] == len(chunks)
+    assert not any(FULL_TEXT in r.getMessage() for r in caplog.records)
+
+def test_worker_checkpoints_before_timeout_and_continues(aws, caplog):
+    boto3, store = aws
+
+    # 1.05s left with a 1s margin: the stream is cut after a few tokens
+    first = start_training_job.worker_handler(dict(TWIN), Context(1.05))
+
+    assert first['training_status'] == 'IN_PROGRESS'
+    assert 'token-1' not in boto3.task_callbacks
+    [continuation] = boto3.lambda_invocations
+    assert continuation['FunctionName'] == 'run-training-job'
+    assert continuation['InvocationType'] == 'Event'
+    assert continuation['Payload']['continuations'] == 1
+    persisted = ''.join(chunk['content'] for chunk in store.get_chunks('twin-twin-1'))
+    assert 0 < len(persisted) < len(FULL_TEXT)
+
+    second = start_training_job.worker_handler(continuation['Payload'], Context(60))
+
+    assert second['model_output'] == FULL_TEXT
+    assert ''.join(chunk['content'] for chunk in store.get_chunks('twin-twin-1')) == FULL_TEXT
+    assert boto3.task_callbacks['token-1'][0] == 'success'
+    cut, resumed = generation_logs(caplog)
+    assert cut['finished'] is False
+    assert resumed['resumed_chars'] == len(persisted)
+    assert resumed['chunks'] == 40 - cut['chunks']
+
+def test_interrupted_stream_continues_from_its_text(aws):
+    boto3, store = aws
+    boto3.bedrock_options = {'tokens': 40, 'error_after': 25}
+
+    interrupted = start_training_job.worker_handler(dict(TWIN), Context(60))
+
+    assert interrupted['training_status'] == 'IN_PROGRESS'
+    assert 'modelStreamErrorException' in interrupted['error']
+    assert 'token-1' not in boto3.task_callbacks
+    assert ''.join(chunk['content'] for chunk in store.get_chunks('twin-twin-1')) == FULL_TEXT[:FULL_TEXT.index(' word25')]
+    [continuation] = boto3.lambda_invocations
+    assert continuation['Payload']['continuations'] == 1
+
+    boto3.bedrock_options = {'tokens': 40}
+    aws_clients.reset_clients()
+    resumed = start_training_job.worker_handler(continuation['Payload'], Context(60))
+
+    assert resumed['model_output'] == FULL_TEXT
+    assert resumed['generation']['resumed_chars'] == FULL_TEXT.index(' word25')
+    assert boto3.task_callbacks['token-1'][0] == 'success'
+
+def test_failing_stream_gives_up_after_the_continuations(aws):
+    boto3, _ = aws
+    boto3.bedrock_options = {'tokens': 40, 'error_after': 0}
+
+    with patch.object(start_training_job, 'GENERATION_MAX_CONTINUATIONS', 2):
+        result = start_training_job.worker_handler({**TWIN, 'continuations': 2}, Context(60))
+
+    assert result['training_status'] == 'FAILED'
+    assert result['error'].startswith('Generation did not finish within 2 continuations (last error: ')
+    assert boto3.task_callbacks['token-1'][0] == 'failure'
+    assert boto3.lambda_invocations == []
+
+def test_continuations_are_capped(aws):
+    boto3, _ = aws
+
+    with patch.object(start_training_job, 'GENERATION_MAX_CONTINUATIONS', 2):
+        result = start_training_job.worker_handler({**TWIN, 'continuations': 2}, Context(1.0))
+
+    assert result['training_status'] == 'FAILED'
+    assert result['error'] == 'Generation did not finish within 2 continuations'
+    assert boto3.lambda_invocations == []
+
+def test_new_run_starts_from_scratch(aws):
+    _, store = aws
+    store.append_chunks('twin-twin-1', [{'seq': 0, 'content': ' stale output'}])
+
+    with patch.object(training_jobs, '_backend', fakes.FakeTrainingBackend(outcome='hang')):
+        start_training_job.lambda_handler({**TWIN, 'task_token': 'token-2'}, None)
+
+    assert store.get_chunks('twin-twin-1') == []
+
+def test_non_streaming_mode(aws):
+    boto3, store = aws
+
+    with patch.object(start_training_job, 'BEDROCK_STREAMING', False):
+        result = start_training_job.worker_handler(dict(TWIN), Context(60))
+
+    assert result['training_status'] == 'COMPLETED'
+    assert boto3.calls.counts['bedrock-runtime.invoke_model'] == 1
+    assert store.get_chunks('twin-twin-1') == []
@@ -0,0 +1,94 @@
+import http.client
+import json
+import pytest
+import fakes
+from loadtest import load_handler, offline_backends, serve
+from api._lib.campaigns import build_campaign, insert_rows
+
+def budget_fits(row):
+    """campaigns.budget is numeric(10,2)"""
+    if row['budget'] >= 1e8:
+        return 'numeric field overflow'
+
+@pytest.fixture
+def api():
+    with offline_backends(0, 0, 0) as backends:
+        backends['supabase'].constraints['campaigns'] = budget_fits
+        with serve(load_handler('campaigns/bulk-create.py')) as port:
+            yield port, backends['supabase']
+
+def post(port, body, content_type='application/json'):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/campaigns/bulk-create', body=body,
+                 headers={'Authorization': 'Bearer mock-token', 'Content-Type': content_type})
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    conn.close()
+    return response.status, data
+
+def campaign(i, **overrides):
+    return {'name': f'Imported {i}', 'company_id': 'company-1', 'budget': 100 + i, **overrides}
+
+def test_valid_array_is_inserted_in_one_round_trip(api):
+    port, supabase = api
+    before = len(supabase.tables['campaigns'])
+
+    status, body = post(port, json.dumps([campaign(i) for i in range(120)]))
+
+    assert status == 201
+    assert (body['created'], body['failed']) == (120, 0)
+    assert [r['index'] for r in body['results']] == list(range(120))
+    assert supabase.calls.counts == {'insert:campaigns': 1}
+    assert len(supabase.tables['campaigns']) == before + 120
+
+def test_ndjson_reports_errors_per_row(api):
+    port, supabase = api
+    lines = [
+        json.dumps(campaign(0)),
+        '{"name": "broken",',
+        json.dumps({'name': 'No budget', 'company_id': 'company-1'}),
+        json.dumps(campaign(3, budget='lots')),
+        json.dumps(campaign(4, budget=5e8)),
+        json.dumps(campaign(5)),
+    ]
+
+    status, body = post(port, '\n'.join(lines) + '\n', 'application/x-ndjson')
+
+    assert status == 207
+    assert [r['status'] for r in body['results']] == ['created', 'error', 'error', 'error', 'error', 'created']
+    assert body['results'][2]['error'] == 'Missing required field: budget'
+    assert body['results'][4]['error'] == 'numeric field overflow'
+    assert (body['created'], body['failed']) == (2, 4)
+
+def test_request_limits(api):
+    port, _ = api
+    assert post(port, '[]')[0] == 400
+    assert post(port, '[{"name": ')[0] == 400
+
+def test_failed_chunk_is_bisected_to_the_bad_rows():
+    """Only the rows the database rejects fail; the rest of the chunk lands"""
+    supabase = fakes.FakeSupabase({'campaigns': []}, constraints={'campaigns': budget_fits})
+    rows = [build_campaign(campaign(i, budget=5e8 if i in (3, 17) else 100)) for i in range(32)]
+
+    results = insert_rows(supabase, 'campaigns', rows, chunk_size=16)
+
+    assert [i for i, (row, error) in enumerate(results) if error] == [3, 17]
+    assert len(supabase.tables['campaigns']) == 30
+    assert supabase.calls.counts['insert:campaigns'] < 32
+
+def test_transport_error_is_not_bisected():
+    """A timeout may have written the chunk, so it is raised, not retried"""
+    def timeout(row):
+        raise TimeoutError('read timed out')
+    supabase = fakes.FakeSupabase({'campaigns': []}, constraints={'campaigns': timeout})
+    rows = [build_campaign(campaign(i)) for i in range(16)]
+
+    with pytest.raises(TimeoutError):
+        insert_rows(supabase, 'campaigns', rows, chunk_size=16)
+    assert supabase.calls.counts['insert:campaigns'] == 1
+
+def test_build_campaign_rules():
+    assert build_campaign(campaign(1))['status'] == 'draft'
+    for bad in ([], {'name': 'x', 'company_id': 'c'}, campaign(1, budget='NaN'), campaign(1, budget=None)):
+        with pytest.raises(ValueError):
+            build_campaign(bad)
@@ -0,0 +1,73 @@
+import http.client
+import json
+import pytest
+from urllib.parse import urlencode
+from loadtest import load_handler, offline_backends, serve
+
+def seed_campaigns(count):
+    """Campaigns for company-1, with runs of rows sharing a created_at"""
+    return {'campaigns': [
+        {
+            'id': f'campaign-{i:05d}',
+            'company_id': 'company-1',
+            'name': f'Campaign {i}',
+            'description': 'x' * 200,
+            'budget': 1000.0 + i,
+            'status': 'draft',
+            'created_at': f'2025-01-01T00:{i // 180:02d}:{i // 3 % 60:02d}+00:00',
+        }
+        for i in range(count)
+    ] + [{'id': 'campaign-other', 'company_id': 'company-2', 'created_at': '2025-01-01T00:00:00+00:00'}]}
+
+@pytest.fixture
+def api():
+    with offline_backends(0, 0, 0) as backends:
+        backends['supabase'].tables = seed_campaigns(250)
+        with serve(load_handler('campaigns/get.py')) as port:
+            yield port
+
+def get(port, **params):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/api/campaigns/get?' + urlencode({'company_id': 'company-1', **params}),
+                 headers={'Authorization': 'Bearer mock-token'})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+def test_cursor_walks_every_campaign_once_in_order(api):
+    """Following next_cursor visits each row exactly once, ties broken by id"""
+    seen, cursor = [], None
+    while True:
+        status, body = get(api, limit=7, **({'cursor': cursor} if cursor else {}))
+        assert status == 200
+        assert body['count'] == len(body['campaigns']) <= 7
+        seen.extend(body['campaigns'])
+        if not body['has_more']:
+            assert body['next_cursor'] is None
+            break
+        cursor = body['next_cursor']
+
+    expected = sorted(seed_campaigns(250)['campaigns'][:250], key=lambda c: c['id'])
+    expected.sort(key=lambda c: c['created_at'], reverse=True)
+    assert [c['id'] for c in seen] == [c['id'] for c in expected]
+
+def test_page_size_is_capped(api):
+    """Clients cannot ask for more than MAX_PAGE_SIZE rows"""
+    assert get(api)[1]['count'] == 50
+    status, body = get(api, limit=100000)
+    assert status == 200
+    assert body['count'] == 200
+    assert body['has_more'] is True
+    assert get(api, limit='many')[0] == 400
+
+def test_fields_projection_keeps_cursor_columns(api):
+    """`fields` narrows each row but always includes the sort keys"""
+    status, body = get(api, fields='name,budget', limit=2)
+
+    assert status == 200
+    assert set(body['campaigns'][0]) == {'created_at', 'id', 'name', 'budget'}
+    assert get(api, fields='name,password_hash')[0] == 400
+
+def test_invalid_cursor_is_rejected(api):
+    assert get(api, cursor='not-a-cursor')[0] == 400
@@ -0,0 +1,63 @@
+import json
+import pytest
+from loadtest import load_handler, offline_backends, send, serve
+from api._lib.concurrency import gather
+
+CHECKOUT = ('POST', '/api/stripe/create-checkout-session', {},
+            json.dumps({'campaign_id': 'campaign-1', 'agent_id': 'agent-1', 'amount': 50000}).encode('utf-8'))
+
+def account_updated(account_id):
+    body = {'id': 'evt_1', 'type': 'account.updated', 'data': {'object': {'id': account_id, 'charges_enabled': True}}}
+    return ('POST', '/api/stripe/webhook', {'Stripe-Signature': 'valid'}, json.dumps(body).encode('utf-8'))
+
+def timing_lines(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"route": "stripe.create_checkout_session"')]
+
+@pytest.fixture
+def backends():
+    with offline_backends(0.05, 0, 0) as backends:
+        yield backends
+
+def test_campaign_and_agent_are_read_concurrently(backends, capsys):
+    with serve(load_handler('stripe/create-checkout-session.py')) as port:
+        assert send(port, *CHECKOUT) == 200
+
+    [line] = timing_lines(capsys.readouterr().out)
+    assert set(line['timings_ms']) == {'db', 'stripe', 'serialize', 'total'}
+    # Two 50 ms reads, overlapped
+    assert 50 <= line['timings_ms']['db'] < 95
+    assert line['agent_cached'] is False
+
+def test_payout_account_is_cached_until_account_updated(backends, capsys):
+    supabase = backends['supabase']
+    with serve(load_handler('stripe/create-checkout-session.py')) as checkout, \
+            serve(load_handler('stripe/webhook.py')) as webhook:
+        assert send(checkout, *CHECKOUT) == 200
+        assert send(checkout, *CHECKOUT) == 200
+        assert supabase.calls.counts['select:agents'] == 1
+
+        assert send(webhook, *account_updated('acct_1')) == 200
+        assert send(checkout, *CHECKOUT) == 200
+        assert supabase.calls.counts['select:agents'] == 2
+
+    assert [line['agent_cached'] for line in timing_lines(capsys.readouterr().out)] == [False, True, False]
+
+def test_agents_without_payout_account_are_not_cached(backends):
+    supabase = backends['supabase']
+    supabase.tables['agents'][1]['stripe_account_id'] = None
+
+    with serve(load_handler('stripe/create-checkout-session.py')) as port:
+        assert send(port, *CHECKOUT) == 400
+        supabase.tables['agents'][1]['stripe_account_id'] = 'acct_new'
+        assert send(port, *CHECKOUT) == 200
+
+    assert supabase.calls.counts['select:agents'] == 2
+
+def test_gather_returns_in_order_and_reraises():
+    assert gather(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+    def fail():
+        raise KeyError('lookup')
+
+    with pytest.raises(KeyError):
+        gather(lambda: 1, fail)
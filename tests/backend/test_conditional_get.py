@@ -0,0 +1,111 @@
+import http.client
+import json
+import time
+import pytest
+from unittest.mock import patch
+from loadtest import load_handler, offline_backends, serve
+from api._lib.agent_pool import AGENT_POOL
+from api._lib.listing_versions import etag_matches
+
+@pytest.fixture
+def backends():
+    with offline_backends(0, 0, 0) as backends:
+        backends['supabase'].tables['listing_versions'] = [
+            {'scope': 'campaigns:company-1', 'version': 7},
+            {'scope': 'agents', 'version': 3},
+        ]
+        # Pin the agent stats period so a test never straddles two
+        with patch.object(AGENT_POOL, 'stats_epoch', return_value=1) as stats_epoch:
+            backends['stats_epoch'] = stats_epoch
+            yield backends
+
+def bump(backends, scope):
+    """What the listing_versions triggers do on a write"""
+    for row in backends['supabase'].tables['listing_versions']:
+        if row['scope'] == scope:
+            row['version'] += 1
+
+def get(port, path, etag=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    headers = {'Authorization': 'Bearer mock-token'}
+    if etag:
+        headers['If-None-Match'] = etag
+    conn.request('GET', path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, response.getheader('ETag'), body
+
+def test_campaigns_revalidation_skips_listing_query(backends):
+    """A matching If-None-Match is answered from the version stamp alone"""
+    calls = backends['supabase'].calls.counts
+    path = '/api/campaigns/get?company_id=company-1'
+
+    with serve(load_handler('campaigns/get.py')) as port:
+        status, etag, body = get(port, path)
+        assert status == 200
+        assert etag.startswith('"') and json.loads(body)['count'] == 50
+        assert calls == {'select:listing_versions': 1, 'select:campaigns': 1}
+
+        status, revalidated, body = get(port, path, etag)
+        assert (status, revalidated, body) == (304, etag, b'')
+        assert calls == {'select:listing_versions': 2, 'select:campaigns': 1}
+
+        bump(backends, 'campaigns:company-1')
+        status, changed, _ = get(port, path, etag)
+        assert status == 200 and changed != etag
+        assert calls['select:campaigns'] == 2
+
+def test_campaigns_etag_varies_by_page(backends):
+    """Each page and projection has its own validator"""
+    with serve(load_handler('campaigns/get.py')) as port:
+        first = get(port, '/api/campaigns/get?company_id=company-1&limit=10')[1]
+        projected = get(port, '/api/campaigns/get?company_id=company-1&limit=10&fields=name')[1]
+        status, _, _ = get(port, '/api/campaigns/get?company_id=company-1&limit=20', first)
+
+    assert first != projected
+    assert status == 200
+
+def test_certified_agents_revalidation_skips_agents_query(backends):
+    calls = backends['supabase'].calls.counts
+    path = '/api/campaigns/campaign-1/certified-agents'
+
+    with serve(load_handler('campaigns/[id]/certified-agents.py')) as port:
+        status, etag, _ = get(port, path)
+        assert status == 200
+        assert calls['select:agents'] == 1
+
+        assert get(port, path, etag)[0] == 304
+        assert calls['select:agents'] == 1
+
+        bump(backends, 'agents')
+        assert get(port, path, etag)[0] == 200
+        assert calls['select:agents'] == 2
+
+def test_certified_agents_pick_up_stats_each_pool_period(backends):
+    """Stats writes do not bump the agents version; the next period's ETag and pool reload show them"""
+    calls = backends['supabase'].calls.counts
+    path = '/api/campaigns/campaign-1/certified-agents?sort=id&limit=1'
+
+    with serve(load_handler('campaigns/[id]/certified-agents.py')) as port:
+        _, etag, body = get(port, path)
+        [agent] = json.loads(body)['agents']
+        backends['supabase'].tables['agents'][0]['agent_stats'] = {'completed_campaigns': 1, 'rating': 5.0}
+        assert get(port, path, etag)[0] == 304
+
+        backends['stats_epoch'].return_value = 2
+        with patch.object(AGENT_POOL, 'clock', lambda: time.monotonic() + AGENT_POOL.ttl_seconds):
+            status, changed, body = get(port, path, etag)
+
+    assert agent['id'] == 'agent-0' and agent['rating'] != 5.0
+    assert status == 200 and changed != etag
+    assert json.loads(body)['agents'][0]['rating'] == 5.0
+    assert calls['select:agents'] == 2
+    assert calls['select:listing_versions'] == 3
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches('', '"abc"')
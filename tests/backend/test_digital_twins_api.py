@@ -1,7 +1,10 @@
 import pytest
 import json
 from unittest.mock import Mock, patch
-from api.digital_twins.create import handler
+from conftest import import_api_module
+from api._lib.digital_twins import reset_step_functions_client
+
+handler = import_api_module('digital-twins/create.py').handler
 
 class MockRequest:
     def __init__(self, method='POST', headers=None, body=None):
@@ -31,6 +34,13 @@ class MockHandler(handler):
     def wfile_write(self, data):
         self.response_body = data
 
+@pytest.fixture(autouse=True)
+def fresh_step_functions_client():
+    # The client is cached per instance; rebuild it under each test's patch
+    reset_step_functions_client()
+    yield
+    reset_step_functions_client()
+
 @pytest.fixture
 def mock_boto3():
     with patch('boto3.client') as mock_client:
@@ -174,4 +184,28 @@ def test_step_function_failure(mock_boto3_client, valid_request_data):
     # Should return 500 error
     assert handler_instance.response_status == 500
     response_data = json.loads(handler_instance.response_body.decode('utf-8'))
-    assert 'error' in response_data
\ No newline at end of file
+    assert 'error' in response_data
+
+def test_force_regenerate_is_passed_to_the_execution(mock_boto3, valid_request_data):
+    """Test that force_regenerate reaches the state machine input"""
+    mock_boto3.start_execution.return_value = {
+        'executionArn': 'arn:aws:states:us-east-1:123456789012:execution:test'
+    }
+    inputs = []
+    for data in (valid_request_data, {**valid_request_data, 'force_regenerate': True}):
+        request_body = json.dumps(data).encode('utf-8')
+        handler_instance = MockHandler()
+        handler_instance.headers = {
+            'Content-Length': str(len(request_body)),
+            'Authorization': 'Bearer mock-token'
+        }
+        handler_instance.rfile = Mock()
+        handler_instance.rfile.read.return_value = request_body
+        
+        handler_instance.do_POST()
+        
+        assert handler_instance.response_status == 200
+        inputs.append(json.loads(mock_boto3.start_execution.call_args.kwargs['input']))
+    
+    assert 'force_regenerate' not in inputs[0]
+    assert inputs[1]['force_regenerate'] is True
@@ -0,0 +1,101 @@
+import http.client
+import json
+import threading
+import time
+import pytest
+import fakes
+from loadtest import load_handler, offline_backends, serve
+from api._lib.digital_twins import start_twins
+
+@pytest.fixture
+def api():
+    with offline_backends(0, 0, 0) as backends:
+        with serve(load_handler('digital-twins/batch-create.py')) as port:
+            yield port, backends['boto3']
+
+def post(port, body, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/digital-twins/batch-create', body=json.dumps(body),
+                 headers={'Authorization': 'Bearer mock-token', 'Content-Type': 'application/json', **(headers or {})})
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    conn.close()
+    return response.status, data
+
+def twin(i, **overrides):
+    return {'name': f'Twin {i}', 'company_id': 'company-1', 'training_data_url': 'https://example.com/data.mp4', **overrides}
+
+def test_batch_returns_every_job_id_from_one_client(api):
+    port, boto3 = api
+
+    status, first = post(port, {'twins': [twin(i) for i in range(25)]})
+    status_again, second = post(port, [twin(i) for i in range(5)])
+
+    assert (status, status_again) == (200, 200)
+    assert (first['started'], first['failed']) == (25, 0)
+    assert [r['index'] for r in first['results']] == list(range(25))
+    assert first['job_ids'] == [r['job_id'] for r in first['results']]
+    assert len(set(first['job_ids'] + second['job_ids'])) == 30
+    assert all(r['execution_arn'].endswith(f"digital-twin-{r['job_id']}") for r in first['results'])
+    assert boto3.calls.counts == {'client:stepfunctions': 1, 'stepfunctions.start_execution': 30}
+
+def test_invalid_twins_and_failed_starts_are_reported_per_item(api, monkeypatch):
+    port, boto3 = api
+    start_execution = fakes.FakeStepFunctions.start_execution
+
+    def flaky(self, stateMachineArn, name, input):
+        if json.loads(input)['name'] == 'Twin 3':
+            raise Exception('ExecutionLimitExceeded')
+        return start_execution(self, stateMachineArn, name, input)
+
+    monkeypatch.setattr(fakes.FakeStepFunctions, 'start_execution', flaky)
+    specs = [twin(0), {'name': 'No data', 'company_id': 'company-1'}, 'not a twin', twin(3), twin(4)]
+
+    status, body = post(port, {'twins': specs})
+
+    assert status == 207
+    assert [r['status'] for r in body['results']] == ['started', 'error', 'error', 'error', 'started']
+    assert body['results'][1]['error'] == 'Missing required field: training_data_url'
+    assert body['results'][3]['error'] == 'ExecutionLimitExceeded'
+    assert (body['started'], body['failed']) == (2, 3)
+    assert body['job_ids'] == [body['results'][0]['job_id'], body['results'][4]['job_id']]
+
+def test_fan_out_is_bounded(api, monkeypatch):
+    lock = threading.Lock()
+    in_flight = {'now': 0, 'peak': 0}
+    start_execution = fakes.FakeStepFunctions.start_execution
+
+    def tracked(self, stateMachineArn, name, input):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        time.sleep(0.01)
+        with lock:
+            in_flight['now'] -= 1
+        return start_execution(self, stateMachineArn, name, input)
+
+    monkeypatch.setattr(fakes.FakeStepFunctions, 'start_execution', tracked)
+    launches = [(twin(i), f'job-{i}', f'twin-{i}') for i in range(20)]
+
+    results = start_twins(launches, concurrency=4)
+
+    assert [job['job_id'] for job, _ in results] == [f'job-{i}' for i in range(20)]
+    assert 1 < in_flight['peak'] <= 4
+
+def test_rejects_oversized_and_empty_batches(api):
+    port, boto3 = api
+
+    assert post(port, {'twins': []})[0] == 400
+    assert post(port, {'twins': [twin(i) for i in range(101)]})[0] == 413
+    assert boto3.calls.counts == {}
+
+def test_idempotent_retry_replays_the_same_jobs(api):
+    port, boto3 = api
+    body = {'twins': [twin(i) for i in range(3)]}
+
+    status, first = post(port, body, {'Idempotency-Key': 'batch-1'})
+    replay_status, replay = post(port, body, {'Idempotency-Key': 'batch-1'})
+
+    assert (status, replay_status) == (200, 200)
+    assert replay['job_ids'] == first['job_ids']
+    assert boto3.calls.counts['stepfunctions.start_execution'] == 3
@@ -0,0 +1,171 @@
+import json
+import sys
+import uuid
+import pytest
+from unittest.mock import patch
+import fakes
+import aws_clients
+import check_generation_cache
+import generation_cache
+import training_data
+import training_jobs
+from statemachine import TRAINING_DATA_URL, digital_twin_pipeline, twin_inputs
+
+# Wait states and task timeouts run 10,000x faster
+TIME_SCALE = 0.0001
+STREAMED = 'bedrock-runtime.invoke_model_with_response_stream'
+SKIPPED = ['ValidateInput', 'CheckGenerationCache', 'GenerationCached', 'UpdateStatusToActive']
+GENERATED = ['ValidateInput', 'CheckGenerationCache', 'GenerationCached', 'PlanIngestion', 'SummarizeSplit', 'IngestChunks',
+             'ReduceSummaries', 'SummaryReady', 'StartTrainingJob', 'UpdateStatusToActive']
+
+@pytest.fixture
+def pipeline():
+    with digital_twin_pipeline(time_scale=TIME_SCALE) as running:
+        yield running
+
+def resubmission(**overrides):
+    """The same twin submitted again: a new digital_twin_id, everything else equal"""
+    return {**twin_inputs(1)[0], 'digital_twin_id': str(uuid.uuid4()), **overrides}
+
+def cache_logs(caplog):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.getMessage().startswith('{"stage": "generation_cache"')]
+
+def test_resubmitted_twin_skips_generation(pipeline, caplog):
+    machine, aws, store = pipeline
+    caplog.set_level('INFO')
+
+    first = machine.execute(resubmission())
+    again = resubmission()
+    second = machine.execute(again)
+
+    assert first.path == GENERATED
+    assert second.path == SKIPPED
+    assert second.output['status'] == 'active'
+    assert second.output['model_endpoint'] == f"https://api.reelagents.com/models/{again['digital_twin_id']}"
+    reused = store.jobs[training_jobs.training_job_name(again['digital_twin_id'])]
+    generated = store.jobs[training_jobs.training_job_name(first.input['digital_twin_id'])]
+    assert reused['status'] == training_jobs.COMPLETED
+    assert reused['result']['model_output'] == generated['result']['model_output']
+    assert reused['result']['model_endpoint'] == second.output['model_endpoint']
+    assert aws.fallback.calls.counts[STREAMED] == 1
+    assert aws.calls.counts['invoke:run-training-job'] == 1
+    assert len(store.cache) == 1
+
+    miss, hit = cache_logs(caplog)
+    assert (miss['hit'], miss['source'], miss['fingerprint_method']) == (False, 'miss', 'last_modified')
+    assert (hit['hit'], hit['source']) == (True, 'memory')
+    assert (hit['generations_saved'], hit['hit_rate'], hit['writes']) == (1, 0.5, 1)
+
+def test_changed_inputs_or_content_miss(pipeline):
+    machine, aws, _ = pipeline
+    http = training_data.get_http_session()
+
+    machine.execute(resubmission())
+    renamed = machine.execute(resubmission(name='Twin renamed'))
+    http.objects[TRAINING_DATA_URL] += b'one more scene'
+    new_footage = machine.execute(resubmission())
+
+    assert renamed.path == GENERATED
+    assert new_footage.path == GENERATED
+    assert aws.fallback.calls.counts[STREAMED] == 3
+
+def test_force_regenerate_replaces_the_cached_result(pipeline):
+    machine, aws, store = pipeline
+
+    machine.execute(resubmission())
+    [key] = store.cache
+    store.cache[key]['result']['model_output'] = 'stale'
+    forced = machine.execute(resubmission(force_regenerate=True))
+    reused = machine.execute(resubmission())
+
+    assert forced.path == GENERATED
+    assert reused.path == SKIPPED
+    assert aws.fallback.calls.counts[STREAMED] == 2
+    assert store.cache[key]['result']['model_output'].startswith(' word0')
+    assert generation_cache.get_generation_cache().metrics()['bypassed'] == 1
+
+def test_failed_lookup_falls_through_to_generation(pipeline):
+    machine, aws, store = pipeline
+
+    def unavailable(event, context):
+        raise TimeoutError('Task timed out after 120.00 seconds')
+
+    aws.register('check-generation-cache', unavailable)
+    execution = machine.execute(resubmission())
+
+    assert execution.path[:4] == ['ValidateInput', 'CheckGenerationCache', 'SkipGenerationCache', 'PlanIngestion']
+    assert execution.path[-2:] == ['StartTrainingJob', 'UpdateStatusToActive']
+    assert execution.output['status'] == 'active'
+    assert store.cache == {}
+
+@pytest.fixture
+def cache_store():
+    store = fakes.FakeTrainingJobStore()
+    with patch.object(training_jobs, '_store', store):
+        yield store
+
+def test_store_backs_new_containers_until_the_ttl(cache_store):
+    clock = [0.0]
+    writer = generation_cache.GenerationCache(memory_ttl_seconds=60, clock=lambda: clock[0])
+    writer.put('key-1', {'model_output': 'profile'})
+    cold = generation_cache.GenerationCache(memory_ttl_seconds=60, clock=lambda: clock[0])
+
+    assert cold.get('key-1') == ({'model_output': 'profile'}, 'store')
+    assert cold.get('key-1') == ({'model_output': 'profile'}, 'memory')
+    clock[0] = 61
+    assert cold.get('key-1')[1] == 'store'
+    assert cache_store.calls.counts['get_cached_result'] == 2
+
+    expired = generation_cache.GenerationCache(ttl_seconds=0)
+    expired.put('key-2', {'model_output': 'profile'})
+    assert generation_cache.GenerationCache().get('key-2') == (None, 'miss')
+
+def test_memory_front_is_bounded(cache_store):
+    cache = generation_cache.GenerationCache(memory_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'model_output': key})
+
+    assert [cache.get(key)[1] for key in ('c', 'b', 'a')] == ['memory', 'memory', 'store']
+
+def test_fingerprints_never_read_the_training_data():
+    boto3 = fakes.make_fake_boto3()
+    boto3.s3_objects[('training', 'brand/footage.mp4')] = b'footage' * 1000
+    urls = [f'https://cdn.example.com/{name}.mp4' for name in ('strong', 'weak', 'bare')]
+    http = fakes.FakeHTTPSession(
+        {url: b'footage' for url in urls},
+        etags={urls[0]: '"v1"', urls[1]: 'W/"v1"'},
+        last_modified={urls[1]: 'Tue, 01 Jul 2025 09:00:00 GMT'}
+    )
+    aws_clients.reset_clients()
+    with patch.dict(sys.modules, {'boto3': boto3}), patch.object(training_data, '_session', http):
+        s3 = training_data.content_fingerprint('s3://training/brand/footage.mp4')
+        strong, weak, bare = [training_data.content_fingerprint(url) for url in urls]
+    aws_clients.reset_clients()
+
+    assert s3['method'] == 'etag'
+    assert 's3.get_object' not in boto3.calls.counts
+    assert (strong['method'], weak['method'], bare) == ('etag', 'last_modified', None)
+    assert 'get' not in http.calls.counts
+
+def test_training_data_without_validators_is_not_cached(cache_store):
+    url = 'https://signed.example.com/data.mp4'
+    http = fakes.FakeHTTPSession({url: b'campaign footage ' * 4096})
+    generation_cache.reset_generation_cache()
+    with patch.object(training_data, '_session', http):
+        output = check_generation_cache.lambda_handler(resubmission(training_data_url=url), None)
+    generation_cache.reset_generation_cache()
+
+    assert (output['cache']['key'], output['cache']['hit'], output['cache']['source']) == (None, False, 'uncacheable')
+    assert http.bytes_served == 0
+
+def test_unreadable_training_data_is_a_miss_without_a_key(cache_store):
+    http = fakes.FakeHTTPSession({})
+    generation_cache.reset_generation_cache()
+    with patch.object(training_data, '_session', http):
+        output = check_generation_cache.lambda_handler(resubmission(), None)
+    generation_cache.reset_generation_cache()
+
+    assert output['cache']['key'] is None
+    assert output['cache']['hit'] is False
+    assert '404' in output['cache']['error']
+    assert 'model_endpoint' not in output
@@ -0,0 +1,200 @@
+import http.client
+import json
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from loadtest import load_handler, offline_backends, serve
+from api._lib import idempotency
+
+CAMPAIGN = {'name': 'Launch', 'company_id': 'company-1', 'budget': 2500}
+TWIN = {'name': 'Twin', 'company_id': 'company-1', 'training_data_url': 'https://example.com/data.mp4'}
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(params=['postgres', 'sqlite'])
+def backends(request, tmp_path):
+    with offline_backends(0.005, 0, 0.005) as backends:
+        if request.param == 'postgres':
+            store = idempotency.PostgresIdempotencyStore(backends['supabase'])
+        else:
+            store = idempotency.SQLiteIdempotencyStore(str(tmp_path / 'keys.sqlite3'))
+        backends['keys'] = idempotency.IdempotencyKeys(store, wait_seconds=5)
+        with patch.object(idempotency, '_keys', backends['keys']):
+            yield backends
+
+def post(port, path, data, key=None, token='mock-token'):
+    headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+    if key is not None:
+        headers['Idempotency-Key'] = key
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', path, body=json.dumps(data), headers=headers)
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    replayed = response.getheader('Idempotent-Replayed')
+    conn.close()
+    return response.status, body, replayed
+
+def test_concurrent_duplicates_create_one_campaign(backends):
+    supabase = backends['supabase']
+    before = len(supabase.tables['campaigns'])
+    results = []
+
+    with serve(load_handler('campaigns/create.py')) as port:
+        def one():
+            results.append(post(port, '/api/campaigns/create', CAMPAIGN, key='launch-1'))
+        threads = [threading.Thread(target=one) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert [status for status, _, _ in results] == [201] * 8
+    assert len({body['campaign']['id'] for _, body, _ in results}) == 1
+    assert sorted(replayed or '' for _, _, replayed in results) == [''] + ['true'] * 7
+    assert supabase.calls.counts['insert:campaigns'] == 1
+    assert len(supabase.tables['campaigns']) == before + 1
+
+def test_keys_are_scoped_by_caller_and_body(backends):
+    supabase = backends['supabase']
+    with serve(load_handler('campaigns/create.py')) as port:
+        first = post(port, '/api/campaigns/create', CAMPAIGN, key='k')
+        other_caller = post(port, '/api/campaigns/create', CAMPAIGN, key='k', token='someone-else')
+        mismatch = post(port, '/api/campaigns/create', {**CAMPAIGN, 'budget': 9}, key='k')
+        too_long = post(port, '/api/campaigns/create', CAMPAIGN, key='x' * 256)
+        no_key = [post(port, '/api/campaigns/create', CAMPAIGN) for _ in range(2)]
+
+    assert first[0] == other_caller[0] == 201
+    assert first[1]['campaign']['id'] != other_caller[1]['campaign']['id']
+    assert mismatch[0] == 422
+    assert too_long[0] == 400
+    assert [status for status, _, _ in no_key] == [201, 201]
+    assert supabase.calls.counts['insert:campaigns'] == 4
+
+def test_keys_follow_the_verified_user_across_tokens(backends):
+    """A retry with a refreshed JWT replays instead of creating a second campaign"""
+    supabase = backends['supabase']
+    supabase.auth.users.update({'token-before-refresh': 'user-1', 'token-after-refresh': 'user-1'})
+    supabase.auth.rejected.add('forged-token')
+    with serve(load_handler('campaigns/create.py')) as port:
+        first = post(port, '/api/campaigns/create', CAMPAIGN, key='k', token='token-before-refresh')
+        retry = post(port, '/api/campaigns/create', CAMPAIGN, key='k', token='token-after-refresh')
+        forged = post(port, '/api/campaigns/create', CAMPAIGN, key='k', token='forged-token')
+
+    assert (first[0], retry[0], retry[2]) == (201, 201, 'true')
+    assert retry[1]['campaign']['id'] == first[1]['campaign']['id']
+    assert forged[0] == 401
+    assert supabase.calls.counts['insert:campaigns'] == 1
+
+def test_server_errors_release_the_key(backends):
+    supabase = backends['supabase']
+    supabase.constraints['campaigns'] = lambda row: 'database unavailable' if row['budget'] == 13 else None
+
+    with serve(load_handler('campaigns/create.py')) as port:
+        failed = post(port, '/api/campaigns/create', {**CAMPAIGN, 'budget': 13}, key='retry-me')
+        supabase.constraints.clear()
+        retried = post(port, '/api/campaigns/create', {**CAMPAIGN, 'budget': 13}, key='retry-me')
+
+    assert failed[0] == 500
+    assert retried[0] == 201 and retried[2] is None
+
+def test_replays_come_from_the_front_cache(backends):
+    keys = backends['keys']
+    keys.complete('scope:caller:k', 'hash', 201, {'ok': True})
+    claims = keys.stats['claims']
+
+    outcome = keys.begin('scope:caller:k', 'hash')
+
+    assert outcome.kind == idempotency.Outcome.REPLAY
+    assert outcome.record.response_body == {'ok': True}
+    assert keys.stats['cache_hits'] == 1 and keys.stats['claims'] == claims
+
+def test_expired_keys_can_be_claimed_again(backends, tmp_path):
+    clock = Clock()
+    keys = idempotency.IdempotencyKeys(backends['keys'].store, ttl_seconds=60, clock=clock)
+
+    with patch.object(idempotency.time, 'time', clock):
+        assert keys.begin('s:c:k', 'a').kind == idempotency.Outcome.PROCEED
+        keys.complete('s:c:k', 'a', 201, {'n': 1})
+        assert keys.begin('s:c:k', 'a').kind == idempotency.Outcome.REPLAY
+
+        clock.now += 61
+        assert keys.begin('s:c:k', 'b').kind == idempotency.Outcome.PROCEED
+
+def test_killed_request_holds_its_key_only_for_the_lease(backends):
+    clock = Clock()
+    keys = idempotency.IdempotencyKeys(backends['keys'].store, ttl_seconds=3600, lease_seconds=60, wait_seconds=0, clock=clock)
+
+    with patch.object(idempotency.time, 'time', clock):
+        # The first request never completes or releases (its function was killed)
+        assert keys.begin('s:c:k', 'a').kind == idempotency.Outcome.PROCEED
+        clock.now += 30
+        assert keys.begin('s:c:k', 'a').kind == idempotency.Outcome.IN_PROGRESS
+
+        clock.now += 31
+        assert keys.begin('s:c:k', 'a').kind == idempotency.Outcome.PROCEED
+        keys.complete('s:c:k', 'a', 201, {'n': 1})
+
+        # Completed responses are kept for the full TTL
+        clock.now += 1800
+        assert keys.store.get('s:c:k').completed
+
+def test_expired_keys_are_purged_from_the_handler_path(backends):
+    clock = Clock()
+    keys = idempotency.IdempotencyKeys(backends['keys'].store, ttl_seconds=60, purge_interval_seconds=100, clock=clock)
+    purge = keys.purge_expired
+    purges = []
+
+    def recorded_purge():
+        purges.append(purge())
+        return purges[-1]
+
+    def purged_after(key):
+        expected = len(purges) + 1
+        post(port, '/api/campaigns/create', CAMPAIGN, key=key)
+        # The purge runs after the response is sent
+        for _ in range(100):
+            if len(purges) == expected:
+                break
+            time.sleep(0.01)
+        return purges[-1]
+
+    with patch.object(idempotency.time, 'time', clock), patch.object(idempotency, '_keys', keys), \
+            patch.object(keys, 'purge_expired', recorded_purge):
+        with serve(load_handler('campaigns/create.py')) as port:
+            assert purged_after('old') == 0
+            clock.now += 120
+            assert purged_after('new') == 1
+            clock.now += 70
+            # 'new' has expired too, but the last purge was under 100s ago
+            assert purged_after('newer') == 0
+
+    assert len(purges) == 3 and keys.stats['purged'] == 1
+
+def test_in_progress_duplicate_times_out(backends):
+    clock = Clock()
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    keys = idempotency.IdempotencyKeys(backends['keys'].store, wait_seconds=1, clock=clock, sleep=sleep)
+
+    assert keys.begin('s:c:slow', 'a').kind == idempotency.Outcome.PROCEED
+    assert keys.begin('s:c:slow', 'a').kind == idempotency.Outcome.IN_PROGRESS
+    assert 19 <= keys.stats['waits'] <= 21
+
+def test_digital_twin_retries_start_one_execution(backends):
+    boto3 = backends['boto3']
+    with serve(load_handler('digital-twins/create.py')) as port:
+        first = post(port, '/api/digital-twins/create', TWIN, key='twin-1')
+        second = post(port, '/api/digital-twins/create', TWIN, key='twin-1')
+
+    assert first[0] == second[0] == 200
+    assert first[1] == second[1]
+    assert second[2] == 'true'
+    assert boto3.calls.counts['stepfunctions.start_execution'] == 1
@@ -0,0 +1,140 @@
+import sys
+import tracemalloc
+import pytest
+from unittest.mock import patch
+import fakes
+import aws_clients
+import ingestion
+import ingest_training_data
+import training_data
+import training_jobs
+from statemachine import digital_twin_pipeline, twin_inputs
+
+# Wait states and task timeouts run 10,000x faster
+TIME_SCALE = 0.0001
+URL = 's3://training/brand/notes.txt'
+TEXT = ''.join(f'Line {i}: café crème brûlée, eco sneakers for city runners.\n' for i in range(2000))
+
+def small_ingestion(split_bytes=16 * 1024, chunk_chars=4000, fanin=4):
+    return patch.multiple(ingestion, INGEST_SPLIT_BYTES=split_bytes, INGEST_CHUNK_CHARS=chunk_chars, INGEST_REDUCE_FANIN=fanin)
+
+@pytest.fixture
+def aws():
+    boto3 = fakes.make_fake_boto3()
+    boto3.s3_objects[('training', 'brand/notes.txt')] = TEXT.encode('utf-8')
+    store = fakes.FakeTrainingJobStore()
+    aws_clients.reset_clients()
+    with patch.dict(sys.modules, {'boto3': boto3}), patch.object(training_jobs, '_store', store):
+        yield boto3, store
+    aws_clients.reset_clients()
+
+def test_chunks_are_bounded_and_cut_at_line_breaks():
+    pieces = [TEXT.encode('utf-8')[i:i + 1000] for i in range(0, len(TEXT.encode('utf-8')), 1000)]
+
+    chunks = list(ingestion.iter_text_chunks(pieces, chunk_chars=4000))
+
+    assert ''.join(chunks) == TEXT
+    assert all(len(chunk) <= 4000 for chunk in chunks)
+    assert all(chunk.endswith('\n') for chunk in chunks)
+
+def test_splits_cover_the_object_and_lose_at_most_a_character_each(aws):
+    size = len(TEXT.encode('utf-8'))
+    with small_ingestion():
+        splits = ingestion.plan_splits(size, ranges=True)
+
+    text = ''.join(
+        chunk
+        for split in splits
+        for chunk in ingestion.iter_text_chunks(training_data.iter_bytes(URL, 1000, split['start'], split['end']),
+                                                skip_partial=split['start'] > 0)
+    )
+
+    assert [(s['start'], s['end']) for s in splits][-1][1] == size
+    assert all(a['end'] == b['start'] for a, b in zip(splits, splits[1:]))
+    assert len(TEXT) - len(splits) <= len(text) <= len(TEXT)
+    assert text[:1000] == TEXT[:1000]
+
+def test_split_count_is_capped():
+    with patch.multiple(ingestion, INGEST_SPLIT_BYTES=1024, INGEST_MAX_SPLITS=10):
+        splits = ingestion.plan_splits(1024 * 1024, ranges=True)
+
+    assert len(splits) == 10
+    assert ingestion.plan_splits(None, ranges=True) == [{'index': 0, 'start': 0, 'end': None}]
+
+def test_origin_without_range_support_is_trimmed_to_the_split():
+    data = bytes(range(256)) * 100
+    http = fakes.FakeHTTPSession({'https://cdn.example.com/data.bin': data}, ranges=False)
+
+    with patch.object(training_data, '_session', http):
+        assert training_data.head('https://cdn.example.com/data.bin')['ranges'] is False
+        assert b''.join(training_data.iter_bytes('https://cdn.example.com/data.bin', 999, 5000, 12000)) == data[5000:12000]
+
+def test_pipeline_summarizes_splits_and_reduces_into_the_prompt():
+    import start_training_job
+    size = len(TEXT.encode('utf-8'))
+
+    with small_ingestion(), digital_twin_pipeline(time_scale=TIME_SCALE) as (machine, aws, store), \
+            patch.object(start_training_job, 'build_request', wraps=start_training_job.build_request) as build_request:
+        aws.fallback.s3_objects[('training', 'brand/notes.txt')] = TEXT.encode('utf-8')
+
+        execution = machine.execute({**twin_inputs(1)[0], 'training_data_url': URL})
+
+    [summaries] = store.summaries.values()
+    per_level = [len([key for key in summaries if key[0] == level]) for level in range(4)]
+    assert execution.output['status'] == 'active'
+    assert execution.path.count('SummarizeSplit') == -(-size // (16 * 1024))
+    assert per_level == [32, 8, 2, 1]
+    assert execution.path.count('ReduceSummaries') == 3
+    assert aws.fallback.calls.counts['bedrock-runtime.invoke_model'] == sum(per_level)
+    generation = build_request.call_args_list[-1].args[0]
+    assert generation['training_summary'] == summaries[(3, 0, 0)]
+
+def test_generation_prompt_carries_the_summary_not_the_url():
+    import start_training_job
+
+    request = start_training_job.build_request({**twin_inputs(1)[0], 'training_summary': 'Eco sneakers, upbeat tone'})
+
+    assert 'Eco sneakers, upbeat tone' in request['prompt']
+    assert twin_inputs(1)[0]['training_data_url'] not in request['prompt']
+
+def test_retried_split_skips_summarized_chunks(aws):
+    boto3, store = aws
+    calls = []
+
+    def fail_on_seventh(body):
+        calls.append(body)
+        return len(calls) == 7
+
+    boto3.bedrock_fail_when = fail_on_seventh
+    split = {'index': 0, 'start': 0, 'end': None}
+    with patch.object(ingestion, 'INGEST_CONCURRENCY', 1), small_ingestion():
+        with pytest.raises(Exception, match='ThrottlingException'):
+            ingest_training_data.split_handler({'ingestion_id': 'twin-1', 'training_data_url': URL, 'split': split}, None)
+        stats = ingest_training_data.split_handler({'ingestion_id': 'twin-1', 'training_data_url': URL, 'split': split}, None)
+
+    assert stats['skipped'] == 6
+    assert stats['summarized'] == stats['chunks'] - 6
+    assert len(calls) == stats['chunks'] + 1
+
+def test_multi_gb_object_is_ingested_in_flat_memory():
+    size = 2 * 1024 ** 3
+
+    with patch.object(ingestion, 'INGEST_CHUNK_CHARS', 1024 * 1024), \
+            digital_twin_pipeline(time_scale=TIME_SCALE) as (machine, aws, store):
+        aws.fallback.s3_objects[('training', 'brand/archive.txt')] = fakes.SyntheticObject(size)
+
+        # Peak bytes allocated while the object streams through, not the
+        # process's lifetime high-water mark
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            execution = machine.execute({**twin_inputs(1)[0], 'training_data_url': 's3://training/brand/archive.txt'})
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert execution.output['status'] == 'active'
+    assert execution.path.count('SummarizeSplit') == size // ingestion.INGEST_SPLIT_BYTES
+    assert len([key for key in next(iter(store.summaries.values())) if key[0] == 0]) >= size // (1024 * 1024)
+    # A few MiB per concurrent chunk in flight, an eighth of the object at most
+    assert peak - baseline < 256 * 1024 * 1024
@@ -0,0 +1,141 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from jwks_cache import JWKSCache
+
+JWKS_URL = 'https://test.supabase.co/.well-known/jwks.json'
+
+def make_jwks(*kids):
+    return {
+        'keys': [{'kid': kid, 'kty': 'RSA', 'n': 'test-n', 'e': 'AQAB'} for kid in kids]
+    }
+
+def make_response(jwks):
+    response = Mock()
+    response.json.return_value = jwks
+    response.raise_for_status.return_value = None
+    return response
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@patch('requests.get')
+def test_keys_are_parsed_once_and_served_from_cache(mock_requests, clock):
+    """Repeat lookups for a known kid hit the cache without refetching or reparsing"""
+    mock_requests.return_value = make_response(make_jwks('key-1'))
+    cache = JWKSCache(JWKS_URL, clock=clock)
+
+    with patch('jwt.algorithms.RSAAlgorithm.from_jwk', return_value=object()) as mock_from_jwk:
+        first = cache.get_signing_key('key-1')
+        for _ in range(50):
+            assert cache.get_signing_key('key-1') is first
+
+    assert mock_requests.call_count == 1
+    assert mock_from_jwk.call_count == 1
+    assert cache.stats['hits'] == 51
+    assert cache.stats['misses'] == 0
+
+@patch('requests.get')
+def test_unknown_kid_triggers_one_rate_limited_refetch(mock_requests, clock):
+    """A rotated key is picked up with one refetch; repeated unknown kids do not hammer JWKS"""
+    mock_requests.side_effect = [
+        make_response(make_jwks('key-1')),
+        make_response(make_jwks('key-1', 'key-2')),
+    ]
+    cache = JWKSCache(JWKS_URL, min_refetch_interval=30, clock=clock)
+    cache.get_signing_key('key-1')
+
+    clock.now += 31
+    assert cache.get_signing_key('key-2') is not None
+    assert cache.stats['rotation_refetches'] == 1
+
+    for _ in range(10):
+        assert cache.get_signing_key('unknown') is None
+    assert mock_requests.call_count == 2
+    assert cache.stats['misses'] == 11
+
+@patch('requests.get')
+def test_expired_keys_are_refetched(mock_requests, clock):
+    """Keys past the TTL are reloaded before use"""
+    mock_requests.return_value = make_response(make_jwks('key-1'))
+    cache = JWKSCache(JWKS_URL, ttl_seconds=600, clock=clock)
+    cache.get_signing_key('key-1')
+
+    clock.now += 601
+    cache.get_signing_key('key-1')
+
+    assert mock_requests.call_count == 2
+
+@patch('requests.get')
+def test_refresh_window_serves_current_keys_and_refreshes_in_background(mock_requests, clock):
+    """Near expiry the current key is returned while the refetch runs off the request path"""
+    mock_requests.return_value = make_response(make_jwks('key-1'))
+    cache = JWKSCache(JWKS_URL, ttl_seconds=600, refresh_window_seconds=60, clock=clock)
+    cache.get_signing_key('key-1')
+
+    clock.now += 550
+    assert cache.get_signing_key('key-1') is not None
+    cache._background_refresh.join(timeout=5)
+
+    assert cache.stats['background_refreshes'] == 1
+    assert mock_requests.call_count == 2
+
+@patch('requests.get')
+def test_failed_refresh_keeps_serving_stale_keys(mock_requests, clock):
+    """A JWKS outage after the first load does not deny every request"""
+    mock_requests.side_effect = [make_response(make_jwks('key-1')), Exception('Network error')]
+    cache = JWKSCache(JWKS_URL, ttl_seconds=600, clock=clock)
+    cache.get_signing_key('key-1')
+
+    clock.now += 601
+    assert cache.get_signing_key('key-1') is not None
+    assert cache.stats['fetch_errors'] == 1
+
+@patch('requests.get')
+def test_failed_cold_fetch_is_rate_limited(mock_requests, clock):
+    """While the JWKS endpoint is down, a cold cache refetches once per interval, not per request"""
+    mock_requests.side_effect = Exception('Network error')
+    cache = JWKSCache(JWKS_URL, min_refetch_interval=30, clock=clock)
+
+    with pytest.raises(Exception, match='Network error'):
+        cache.get_signing_key('key-1')
+    for _ in range(5):
+        assert cache.get_signing_key('key-1') is None
+    assert mock_requests.call_count == 1
+
+    clock.now += 30
+    mock_requests.side_effect = [make_response(make_jwks('key-1'))]
+    assert cache.get_signing_key('key-1') is not None
+    assert (cache.stats['fetches'], cache.stats['fetch_errors']) == (2, 1)
+
+@patch('requests.get')
+def test_cold_start_fetch_is_single_flight(mock_requests, clock):
+    """Concurrent cold lookups share a single JWKS request"""
+    def slow_get(*args, **kwargs):
+        time.sleep(0.05)
+        return make_response(make_jwks('key-1'))
+
+    mock_requests.side_effect = slow_get
+    cache = JWKSCache(JWKS_URL, clock=clock)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_signing_key('key-1')))
+        for _ in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mock_requests.call_count == 1
+    assert all(key is not None for key in results)
@@ -2,7 +2,14 @@ import pytest
 import json
 import jwt
 from unittest.mock import Mock, patch
-from aws.lambda.authorizer import lambda_handler
+import authorizer
+from authorizer import lambda_handler
+
+@pytest.fixture(autouse=True)
+def reset_authorizer_caches():
+    authorizer.JWKS_CACHE.clear()
+    authorizer.TOKEN_CACHE.clear()
+    yield
 
 @pytest.fixture
 def mock_event():
@@ -163,4 +170,63 @@ def test_invalid_jwt_signature(mock_get_header, mock_jwt_decode, mock_requests,
     
     # Should return Deny policy
     assert result['principalId'] == 'user'
-    assert result['policyDocument']['Statement'][0]['Effect'] == 'Deny'
\ No newline at end of file
+    assert result['policyDocument']['Statement'][0]['Effect'] == 'Deny'
+
+@patch('requests.get')
+@patch('jwt.decode')
+@patch('jwt.get_unverified_header')
+def test_repeat_token_skips_verification(mock_get_header, mock_jwt_decode, mock_requests, mock_event, mock_context, valid_jwt_payload):
+    """A token verified once is served from the decision cache on later calls"""
+    mock_response = Mock()
+    mock_response.json.return_value = {
+        'keys': [{
+            'kid': 'test-key-id',
+            'kty': 'RSA',
+            'n': 'test-n',
+            'e': 'AQAB'
+        }]
+    }
+    mock_response.raise_for_status.return_value = None
+    mock_requests.return_value = mock_response
+    mock_get_header.return_value = {'kid': 'test-key-id'}
+    mock_jwt_decode.return_value = valid_jwt_payload
+    
+    first = lambda_handler(mock_event, mock_context)
+    second = lambda_handler(mock_event, mock_context)
+    
+    assert mock_jwt_decode.call_count == 1
+    assert second == first
+    assert authorizer.TOKEN_CACHE.stats['hits'] == 1
+    
+    # A different route reuses the claims but gets its own resource
+    mock_event['methodArn'] = 'arn:aws:execute-api:us-east-1:123456789012:abcdef123/test/POST/campaigns'
+    third = lambda_handler(mock_event, mock_context)
+    
+    assert mock_jwt_decode.call_count == 1
+    assert third['policyDocument']['Statement'][0]['Resource'] == mock_event['methodArn']
+
+@patch('requests.get')
+@patch('jwt.decode')
+@patch('jwt.get_unverified_header')
+def test_invalid_token_is_negatively_cached(mock_get_header, mock_jwt_decode, mock_requests, mock_event, mock_context):
+    """A rejected token is denied from cache without another verification"""
+    mock_response = Mock()
+    mock_response.json.return_value = {
+        'keys': [{
+            'kid': 'test-key-id',
+            'kty': 'RSA',
+            'n': 'test-n',
+            'e': 'AQAB'
+        }]
+    }
+    mock_response.raise_for_status.return_value = None
+    mock_requests.return_value = mock_response
+    mock_get_header.return_value = {'kid': 'test-key-id'}
+    mock_jwt_decode.side_effect = jwt.InvalidTokenError('Invalid signature')
+    
+    lambda_handler(mock_event, mock_context)
+    result = lambda_handler(mock_event, mock_context)
+    
+    assert mock_jwt_decode.call_count == 1
+    assert result['policyDocument']['Statement'][0]['Effect'] == 'Deny'
+    assert authorizer.TOKEN_CACHE.stats['negative_hits'] == 1
@@ -0,0 +1,29 @@
+import json
+import loadtest
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+
+    assert loadtest.percentile(values, 50) == 50.0
+    assert loadtest.percentile(values, 95) == 95.0
+    assert loadtest.percentile(values, 99) == 99.0
+    assert loadtest.percentile([], 50) == 0.0
+
+def test_every_endpoint_runs_offline(tmp_path):
+    """Every api/ handler answers successfully against the fakes"""
+    output = tmp_path / 'results.json'
+
+    loadtest.main([
+        '--requests', '8', '--concurrency', '4', '--alloc-samples', '2',
+        '--db-latency-ms', '1', '--stripe-latency-ms', '1', '--aws-latency-ms', '1',
+        '--output', str(output),
+    ])
+
+    report = json.loads(output.read_text())
+    assert set(report['endpoints']) == set(loadtest.ENDPOINTS)
+    for name, result in report['endpoints'].items():
+        assert result['errors'] == 0, (name, result['statuses'])
+        assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+        assert result['rps'] > 0
+        assert result['alloc_peak_kib_p50'] > 0
+    assert report['backend_calls']['stripe']['checkout.Session.create'] == 8 + 1 + 2  # load + warm-up + allocation samples
@@ -0,0 +1,75 @@
+import random
+import types
+import pytest
+from api._lib.ranking import AgentRanker, campaign_terms, tokenize
+
+def agent(specialization, rate=75.0, rating=None, completed=0, company_id=None):
+    return types.SimpleNamespace(
+        company_id=company_id, specialization=specialization.lower(), tokens=tokenize(specialization),
+        rate=rate, rating=rating, completed=completed,
+    )
+
+CAMPAIGN = {'name': 'Spring launch', 'description': 'Short-form video for TikTok', 'target_audience': 'Gen Z', 'budget': 4000}
+
+def test_tokenize_drops_stopwords_and_single_letters():
+    assert tokenize('Short-form video for Gen Z') == ['short', 'form', 'video', 'gen']
+    assert campaign_terms({'name': 'Video', 'description': None, 'target_audience': 'video fans'}) == ['fans', 'video']
+
+def test_specialization_match_ranks_first():
+    ranker = AgentRanker([agent('podcast'), agent('short-form video'), agent('livestream')])
+
+    top, has_more = ranker.top(CAMPAIGN, limit=3)
+
+    assert [position for position, _ in top][0] == 1
+    assert has_more is False
+
+def test_budget_rating_and_experience_break_equal_matches():
+    ranker = AgentRanker([
+        agent('video', rate=300.0),
+        agent('video', rate=90.0),
+        agent('video', rate=90.0, rating=5.0, completed=20),
+    ])
+
+    assert [position for position, _ in ranker.top(CAMPAIGN)[0]] == [2, 1, 0]
+
+def test_exclusion_and_specialization_filter():
+    ranker = AgentRanker([
+        agent('short-form video', company_id='company-1'),
+        agent('short-form video'),
+        agent('podcast'),
+    ])
+
+    assert [p for p, _ in ranker.top(CAMPAIGN, exclude_company_id='company-1')[0]] == [1, 2]
+    assert [p for p, _ in ranker.top(CAMPAIGN, specializations=['Podcast'])[0]] == [2]
+    assert ranker.top(CAMPAIGN, specializations=['unknown'])[0] == []
+
+@pytest.mark.parametrize('limit', [1, 7, 50])
+def test_partial_top_k_pages_match_a_full_sort(limit):
+    """Paging the partial sort gives exactly the fully sorted order, ties in pool order"""
+    rng = random.Random(limit)
+    specializations = ['short-form video', 'podcast', 'livestream', 'video editing', 'ugc']
+    entries = [
+        agent(rng.choice(specializations), rate=float(rng.choice([60, 90, 120])),
+              rating=rng.choice([None, 4.0, 5.0]), completed=rng.choice([0, 3]),
+              company_id=rng.choice([None, 'company-1']))
+        for _ in range(300)
+    ]
+    ranker = AgentRanker(entries)
+    scores = ranker.scores(CAMPAIGN)
+    expected = sorted(
+        (p for p, e in enumerate(entries) if e.company_id != 'company-1'),
+        key=lambda p: (-scores[p], p),
+    )
+
+    seen, offset = [], 0
+    while True:
+        page, has_more = ranker.top(CAMPAIGN, exclude_company_id='company-1', offset=offset, limit=limit)
+        seen.extend(position for position, _ in page)
+        offset += len(page)
+        if not has_more:
+            break
+
+    assert seen == expected
+
+def test_empty_pool():
+    assert AgentRanker([]).top(CAMPAIGN) == ([], False)
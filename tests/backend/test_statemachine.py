@@ -0,0 +1,158 @@
+import pytest
+import fakes
+import training_jobs
+from unittest.mock import patch
+from statemachine import LocalAWS, StateMachine, digital_twin_pipeline, run_many, twin_inputs
+
+# Wait states and task timeouts run 10,000x faster
+TIME_SCALE = 0.0001
+# A Map iteration's states are recorded before the Map state itself
+INGESTION = ['PlanIngestion', 'SummarizeSplit', 'IngestChunks', 'ReduceSummaries', 'SummaryReady']
+
+def fails_generation(body):
+    return "'fail-" in body['prompt']
+
+@pytest.fixture
+def pipeline():
+    with digital_twin_pipeline(time_scale=TIME_SCALE, bedrock_fail_when=fails_generation) as running:
+        yield running
+
+def twin(**overrides):
+    return {**twin_inputs(1)[0], **overrides}
+
+def test_training_callback_completes_the_execution(pipeline):
+    machine, aws, store = pipeline
+
+    execution = machine.execute(twin())
+
+    assert execution.status == 'SUCCEEDED'
+    assert execution.path == ['ValidateInput', 'CheckGenerationCache', 'GenerationCached', *INGESTION, 'StartTrainingJob', 'UpdateStatusToActive']
+    assert execution.output['status'] == 'active'
+    assert execution.output['model_endpoint'].endswith(twin()['digital_twin_id'])
+    assert aws.calls.counts['invoke:run-training-job'] == 1
+    assert aws.calls.counts['callback:success'] == 1
+    assert store.jobs[f"twin-{twin()['digital_twin_id']}"]['status'] == 'COMPLETED'
+
+def test_invalid_input_takes_the_failure_path(pipeline):
+    machine, aws, _ = pipeline
+
+    execution = machine.execute(twin(name='X'))
+
+    assert execution.path == ['ValidateInput', 'HandleFailure']
+    assert execution.caught == [('ValidateInput', 'Exception')]
+    assert 'invoke:start-training-job' not in aws.calls.counts
+
+def test_failed_generation_fails_the_waiting_task(pipeline):
+    machine, aws, _ = pipeline
+
+    execution = machine.execute(twin(name='fail-1'))
+
+    assert execution.path == ['ValidateInput', 'CheckGenerationCache', 'GenerationCached', *INGESTION, 'StartTrainingJob', 'HandleFailure']
+    assert execution.caught == [('StartTrainingJob', 'TrainingFailed')]
+    assert aws.calls.counts['callback:failure'] == 1
+
+def test_lost_callback_falls_back_to_polling(pipeline):
+    machine, _, _ = pipeline
+    backend = fakes.FakeTrainingBackend(outcome='silent', delay=0.2)
+
+    with patch.object(training_jobs, '_backend', backend):
+        execution = machine.execute(twin())
+
+    path = execution.path
+    assert path[:10] == ['ValidateInput', 'CheckGenerationCache', 'GenerationCached', *INGESTION, 'StartTrainingJob', 'CheckTrainingStatus']
+    assert path[-1] == 'UpdateStatusToActive'
+    assert path.count('WaitForTraining') >= 1
+    assert execution.caught == [('StartTrainingJob', 'States.Timeout')]
+    assert execution.output['model_endpoint'].endswith(twin()['digital_twin_id'])
+
+def test_hung_job_fails_after_the_polling_cap(pipeline):
+    machine, _, _ = pipeline
+
+    with patch.object(training_jobs, '_backend', fakes.FakeTrainingBackend(outcome='hang')), \
+            patch.object(training_jobs, 'TRAINING_POLL_MAX_ATTEMPTS', 4):
+        execution = machine.execute(twin())
+
+    assert execution.path.count('CheckTrainingStatus') == 4
+    assert execution.path[-1] == 'HandleFailure'
+    assert execution.output['error_message'] == 'Training did not finish after 4 status checks'
+
+def test_concurrent_run_reports_throughput_and_paths(pipeline):
+    machine, _, _ = pipeline
+    inputs = twin_inputs(40, invalid_rate=0.1, failing_rate=0.1)
+
+    report = run_many(machine, inputs, concurrency=8)
+
+    assert report['executions'] == 40
+    assert report['status'] == {'SUCCEEDED': 40}
+    assert report['end_states'] == {'HandleFailure': 0.2, 'UpdateStatusToActive': 0.8}
+    assert report['failure_path_rate'] == 0.2
+    assert report['errors'] == {'Exception': 4, 'TrainingFailed': 4}
+    assert report['states']['ValidateInput']['count'] == 40
+    assert report['states']['StartTrainingJob']['count'] == 36
+    assert report['executions_per_second'] > 0
+
+def machine(states, start, **kwargs):
+    return StateMachine({'StartAt': start, 'States': states}, aws=LocalAWS(), **kwargs)
+
+def test_map_choice_and_pass_states():
+    states = {
+        'Each': {
+            'Type': 'Map',
+            'ItemsPath': '$.items',
+            'MaxConcurrency': 2,
+            'ItemSelector': {'value.$': '$$.Map.Item.Value', 'index.$': '$$.Map.Item.Index'},
+            'ItemProcessor': {
+                'StartAt': 'Big?',
+                'States': {
+                    'Big?': {
+                        'Type': 'Choice',
+                        'Choices': [
+                            {'And': [{'Variable': '$.value', 'IsNumeric': True},
+                                     {'Variable': '$.value', 'NumericGreaterThanEquals': 10}], 'Next': 'Big'},
+                        ],
+                        'Default': 'Small'
+                    },
+                    'Big': {'Type': 'Pass', 'Parameters': {'size': 'big', 'index.$': '$.index'}, 'End': True},
+                    'Small': {'Type': 'Pass', 'Parameters': {'size': 'small', 'index.$': '$.index'}, 'End': True},
+                },
+            },
+            'ResultPath': '$.sizes',
+            'Next': 'Done',
+        },
+        'Done': {'Type': 'Succeed', 'OutputPath': '$.sizes'},
+    }
+
+    execution = machine(states, 'Each').execute({'items': [3, 12, 10]})
+
+    assert execution.status == 'SUCCEEDED'
+    assert execution.output == [
+        {'size': 'small', 'index': 0}, {'size': 'big', 'index': 1}, {'size': 'big', 'index': 2}
+    ]
+
+def test_retry_then_catch_then_fail():
+    attempts = []
+
+    def flaky(event, context):
+        attempts.append(event)
+        raise ValueError('still broken')
+
+    states = {
+        'Work': {
+            'Type': 'Task',
+            'Resource': 'arn:aws:lambda:us-east-1:ACCOUNT_ID:function:flaky',
+            'Retry': [{'ErrorEquals': ['ValueError'], 'MaxAttempts': 2, 'IntervalSeconds': 1}],
+            'Catch': [{'ErrorEquals': ['States.ALL'], 'ResultPath': '$.error', 'Next': 'Give up'}],
+            'End': True,
+        },
+        'Give up': {'Type': 'Fail', 'Error': 'WorkFailed', 'Cause': 'retries exhausted'},
+    }
+    sleeps = []
+    local = machine(states, 'Work', time_scale=0.5, sleep=sleeps.append)
+    local.aws.register('flaky', flaky)
+
+    execution = local.execute({'job': 1})
+
+    assert len(attempts) == 3
+    assert sleeps == [0.5, 1.0]
+    assert (execution.status, execution.error) == ('FAILED', 'WorkFailed')
+    assert execution.caught == [('Work', 'ValueError')]
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import time
+import pytest
+from unittest.mock import patch
+from conftest import REPO_ROOT, import_api_module
+from loadtest import load_handler, offline_backends, send, serve
+from api._lib import stripe_events
+
+def checkout_completed(event_id, agent_id='agent-1', created=0):
+    return {
+        'id': event_id,
+        'type': 'checkout.session.completed',
+        'created': created,
+        'data': {'object': {
+            'id': f'cs_{event_id}',
+            'amount_total': 50000,
+            'metadata': {'campaign_id': 'campaign-1', 'agent_id': agent_id, 'company_id': 'company-1'},
+        }},
+    }
+
+def deliver(port, event):
+    return send(port, 'POST', '/api/stripe/webhook', {'Stripe-Signature': 'valid'}, json.dumps(event).encode('utf-8'))
+
+def run_worker(port, token='cron_loadtest'):
+    return send(port, 'GET', '/api/stripe/process-events', {'Authorization': f'Bearer {token}'}, None)
+
+@pytest.fixture(params=['postgres', 'sqlite'])
+def backends(request, tmp_path):
+    with offline_backends(0, 0, 0) as backends:
+        supabase = backends['supabase']
+        supabase.tables['campaign_invitations'] = [
+            {'id': 'inv-1', 'campaign_id': 'campaign-1', 'agent_id': 'agent-1', 'status': 'accepted'},
+        ]
+        if request.param == 'postgres':
+            backends['queue'] = stripe_events.PostgresEventQueue(supabase)
+        else:
+            backends['queue'] = stripe_events.SQLiteEventQueue(str(tmp_path / 'events.sqlite3'))
+        with patch.object(stripe_events, '_queue', backends['queue']):
+            yield backends
+
+def test_ack_does_not_wait_for_event_processing(backends):
+    supabase = backends['supabase']
+    supabase.table_latency.update({'campaign_invitations': 0.5, 'agents': 0.5})
+
+    with serve(load_handler('stripe/webhook.py')) as port:
+        started = time.perf_counter()
+        assert deliver(port, checkout_completed('evt_slow')) == 200
+        acked = time.perf_counter() - started
+
+    assert acked < 0.25
+    assert 'update:campaign_invitations' not in supabase.calls.counts
+    assert supabase.tables['campaign_invitations'][0]['status'] == 'accepted'
+
+def test_worker_applies_each_event_once(backends):
+    supabase = backends['supabase']
+    with serve(load_handler('stripe/webhook.py')) as webhook, \
+            serve(load_handler('stripe/process-events.py')) as worker:
+        for event in (checkout_completed('evt_1'), checkout_completed('evt_1'), checkout_completed('evt_2', 'agent-2')):
+            assert deliver(webhook, event) == 200
+        assert run_worker(worker, token='wrong') == 401
+        assert run_worker(worker) == 200
+        assert run_worker(worker) == 200
+
+    assert supabase.calls.counts['rpc:apply_stripe_payments'] == 1
+    assert supabase.tables['campaign_invitations'][0]['status'] == 'paid'
+    assert supabase.tables['campaign_invitations'][0]['payment_session_id'] == 'cs_evt_1'
+
+def test_bursts_collapse_to_one_write_per_kind(backends):
+    queue, supabase = backends['queue'], backends['supabase']
+    for i, created in enumerate([30, 10, 20]):
+        queue.enqueue(f'evt_pay_{i}', 'checkout.session.completed', checkout_completed(f'evt_pay_{i}', created=created))
+    for i in range(6):
+        account = {'id': f'acct_{i % 2}', 'charges_enabled': i != 5}
+        queue.enqueue(f'evt_acct_{i}', 'account.updated', {'type': 'account.updated', 'data': {'object': account}})
+
+    assert stripe_events.drain(queue, supabase)['processed'] == 9
+
+    assert supabase.calls.counts['rpc:apply_stripe_payments'] == 1
+    assert supabase.calls.counts['update:agents'] == 1
+    assert supabase.tables['campaign_invitations'][0]['payment_session_id'] == 'cs_evt_pay_0'
+    onboarded = {agent['stripe_account_id'] for agent in supabase.tables['agents'] if agent.get('onboarding_completed')}
+    assert onboarded == {'acct_0', 'acct_1'}
+
+def test_redeliveries_seen_by_the_instance_skip_the_database(backends):
+    queue = backends['queue']
+    enqueued = []
+    enqueue = queue.enqueue
+
+    with patch.object(queue, 'enqueue', lambda *args: enqueued.append(args[0]) or enqueue(*args)), \
+            serve(load_handler('stripe/webhook.py')) as port:
+        for _ in range(3):
+            assert deliver(port, checkout_completed('evt_again')) == 200
+
+    assert enqueued == ['evt_again']
+    assert [event.event_id for event in queue.claim(10, 60)] == ['evt_again']
+
+def test_drain_budget_fits_the_declared_max_duration():
+    with open(os.path.join(REPO_ROOT, 'vercel.json')) as f:
+        functions = json.load(f)['functions']
+    worker = import_api_module('stripe/process-events.py')
+
+    assert functions['api/stripe/process-events.py']['maxDuration'] == worker.MAX_DURATION_SECONDS
+    assert 0 < worker.DRAIN_SECONDS < worker.MAX_DURATION_SECONDS
+
+def test_seen_events_are_bounded():
+    seen = stripe_events.SeenEvents(max_entries=3)
+    seen.add(['a', 'b', 'c'])
+    seen.add(['a', 'd'])
+
+    assert [event_id in seen for event_id in 'abcd'] == [True, False, True, True]
+
+def test_failed_events_back_off_then_succeed(backends):
+    queue, supabase = backends['queue'], backends['supabase']
+    assert queue.enqueue('evt_flaky', 'checkout.session.completed', checkout_completed('evt_flaky'))
+    outage = {'down': True}
+
+    def unless_down(apply):
+        def wrapper(*args):
+            if outage['down']:
+                raise RuntimeError('database unavailable')
+            return apply(*args)
+        return wrapper
+
+    with patch.object(stripe_events, 'apply_events', unless_down(stripe_events.apply_events)), \
+            patch.object(stripe_events, 'apply_event', unless_down(stripe_events.apply_event)), \
+            patch.object(stripe_events, 'STRIPE_EVENTS_BACKOFF_SECONDS', 0.2):
+        assert stripe_events.drain(queue, supabase) == {'batches': 1, 'processed': 0, 'retried': 1, 'dead': 0}
+        outage['down'] = False
+        # Still backing off
+        assert stripe_events.drain(queue, supabase)['processed'] == 0
+        time.sleep(0.25)
+        assert stripe_events.drain(queue, supabase) == {'batches': 1, 'processed': 1, 'retried': 0, 'dead': 0}
+
+    assert supabase.tables['campaign_invitations'][0]['status'] == 'paid'
+
+def test_one_bad_event_does_not_hold_up_its_batch(backends):
+    queue, supabase = backends['queue'], backends['supabase']
+    queue.enqueue('evt_good', 'checkout.session.completed', checkout_completed('evt_good'))
+    queue.enqueue('evt_bad', 'checkout.session.completed', {'data': {'object': {}}})
+
+    assert stripe_events.drain(queue, supabase) == {'batches': 1, 'processed': 1, 'retried': 1, 'dead': 0}
+    assert supabase.tables['campaign_invitations'][0]['status'] == 'paid'
+
+def test_events_that_keep_failing_are_parked(backends):
+    queue, supabase = backends['queue'], backends['supabase']
+    queue.enqueue('evt_bad', 'checkout.session.completed', {'data': {'object': {}}})
+
+    with patch.object(stripe_events, 'STRIPE_EVENTS_BACKOFF_SECONDS', 0), \
+            patch.object(stripe_events, 'STRIPE_EVENTS_MAX_ATTEMPTS', 3):
+        reports = [stripe_events.drain(queue, supabase) for _ in range(4)]
+
+    assert [(r['retried'], r['dead']) for r in reports] == [(1, 0), (1, 0), (0, 1), (0, 0)]
+
+def test_failed_sqlite_claim_leases_nothing(tmp_path):
+    queue = stripe_events.SQLiteEventQueue(str(tmp_path / 'events.sqlite3'))
+    for event_id in ('evt_1', 'evt_2'):
+        queue.enqueue(event_id, 'checkout.session.completed', checkout_completed(event_id))
+
+    class FailingUpdate:
+        """Applies the lease to the first row, then fails like a full disk"""
+
+        def __init__(self, conn):
+            self.conn = conn
+
+        def execute(self, *args):
+            return self.conn.execute(*args)
+
+        def executemany(self, sql, params):
+            self.conn.execute(sql, params[0])
+            raise sqlite3.OperationalError('database or disk is full')
+
+    conn, queue._conn = queue._conn, FailingUpdate(queue._conn)
+    with pytest.raises(sqlite3.OperationalError):
+        queue.claim(10, lease_seconds=300)
+    queue._conn = conn
+
+    assert [(event.event_id, event.attempts) for event in queue.claim(10, lease_seconds=300)] == [('evt_1', 1), ('evt_2', 1)]
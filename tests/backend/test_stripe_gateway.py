@@ -0,0 +1,122 @@
+import time
+import pytest
+import stripe
+from unittest.mock import patch
+import fakes
+from api._lib import stripe_gateway
+from api._lib.stripe_gateway import StripeGateway, TokenBucket, api_family
+
+ERROR = {'error': {'type': 'api_error', 'message': 'Something went wrong'}}
+
+@pytest.fixture
+def api():
+    server = fakes.FakeStripeAPI()
+    yield server
+    server.close()
+
+@pytest.fixture
+def gateway(api):
+    gateway = StripeGateway(rate_per_second=1000)
+    with patch.object(stripe, 'api_base', api.url), \
+            patch.object(stripe, 'api_key', 'sk_test_gateway'), \
+            patch.object(stripe, 'default_http_client', gateway), \
+            patch.object(stripe, 'max_network_retries', 3), \
+            patch.object(stripe_gateway, 'STRIPE_RETRY_BASE_SECONDS', 0.01):
+        yield gateway
+    gateway.close()
+
+def create_account():
+    return stripe.Account.create(type='express', email='agent@example.com')
+
+def test_throttled_calls_wait_for_retry_after(api, gateway):
+    api.script['/v1/accounts'] = [(429, {'Retry-After': '0.2'}, ERROR)]
+
+    account = create_account()
+
+    first, second = api.requests
+    assert account.id.startswith('obj_')
+    assert second['at'] - first['at'] >= 0.2
+    # The SDK's Idempotency-Key makes the replayed POST safe
+    assert first['idempotency_key'] == second['idempotency_key'] is not None
+    assert gateway.metrics()['accounts']['throttled'] == 1
+
+def test_server_errors_are_retried_then_surface(api, gateway):
+    api.script['/v1/accounts'] = [(500, {}, ERROR), (503, {}, ERROR)]
+    assert create_account().id
+    assert gateway.metrics()['accounts']['retries'] == 2
+
+    api.script['/v1/accounts'] = [(500, {}, ERROR)] * 4
+    with pytest.raises(stripe.error.APIError):
+        create_account()
+    assert len(api.requests) == 3 + 4
+
+def test_client_errors_and_should_retry_false_are_not_retried(api, gateway):
+    api.script['/v1/accounts'] = [
+        (400, {}, {'error': {'type': 'invalid_request_error', 'message': 'Invalid email'}}),
+        (500, {'Stripe-Should-Retry': 'false'}, ERROR),
+    ]
+
+    with pytest.raises(stripe.error.InvalidRequestError):
+        create_account()
+    with pytest.raises(stripe.error.APIError):
+        create_account()
+    assert len(api.requests) == 2
+
+def test_connections_are_reused(api, gateway):
+    for _ in range(5):
+        create_account()
+    stripe.AccountLink.create(account='acct_1', refresh_url='https://a.test/r', return_url='https://a.test/d', type='account_onboarding')
+
+    assert len({request['port'] for request in api.requests}) == 1
+    assert set(gateway.metrics()) == {'accounts', 'account_links'}
+    assert gateway.metrics()['accounts']['calls'] == 5
+
+def test_each_family_has_its_own_budget(api, gateway):
+    gateway.rate_limits = {'accounts': 20}
+    start = time.monotonic()
+    for _ in range(30):
+        create_account()
+    throttled_family = time.monotonic() - start
+
+    start = time.monotonic()
+    for _ in range(30):
+        stripe.AccountLink.create(account='acct_1', refresh_url='https://a.test/r', return_url='https://a.test/d', type='account_onboarding')
+    other_family = time.monotonic() - start
+
+    # 20 burst, then 10 more at 20/s
+    assert throttled_family >= 0.45
+    assert other_family < throttled_family
+    assert gateway.metrics()['accounts']['wait_ms'] > 0
+    assert gateway.metrics()['account_links']['wait_ms'] == 0
+
+def test_families_share_the_global_budget(api, gateway):
+    gateway.global_bucket = TokenBucket(rate=20)
+    start = time.monotonic()
+    for _ in range(15):
+        create_account()
+    for _ in range(15):
+        stripe.AccountLink.create(account='acct_1', refresh_url='https://a.test/r', return_url='https://a.test/d', type='account_onboarding')
+    elapsed = time.monotonic() - start
+
+    # 20 burst across both families, then 10 more at 20/s
+    assert elapsed >= 0.45
+    assert gateway.metrics()['account_links']['wait_ms'] > 0
+
+def test_token_bucket_pause_holds_every_caller():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0], sleep=sleep)
+    assert (bucket.acquire(), bucket.acquire()) == (0.0, 0.0)
+    assert bucket.acquire() == pytest.approx(0.1)
+
+    bucket.pause(1.0)
+    assert bucket.acquire() == pytest.approx(1.1)
+
+def test_api_family():
+    assert api_family('https://api.stripe.com/v1/checkout/sessions') == 'checkout'
+    assert api_family('https://api.stripe.com/v1/account_links') == 'account_links'
+    assert stripe_gateway.retry_after_seconds({'Retry-After': '2'}) == 2.0
+    assert stripe_gateway.parse_rate_limits('accounts=10, checkout=40') == {'accounts': 10.0, 'checkout': 40.0}
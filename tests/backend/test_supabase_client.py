@@ -0,0 +1,98 @@
+import http.client
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from api._lib import supabase_client
+
+class FakePostgREST(BaseHTTPRequestHandler):
+    """Keep-alive PostgREST stand-in that counts TCP connections"""
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    requests = []
+
+    def setup(self):
+        super().setup()
+        FakePostgREST.connections += 1
+
+    def do_GET(self):
+        FakePostgREST.requests.append((self.path, dict(self.headers)))
+        rows = [] if self.path.startswith('/rest/v1/listing_versions') else [{'id': 'campaign-1', 'company_id': 'company-123'}]
+        body = json.dumps(rows).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(handler_class):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    FakePostgREST.connections = 0
+    FakePostgREST.requests = []
+    server = start_server(FakePostgREST)
+    monkeypatch.setenv('VITE_SUPABASE_URL', f'http://127.0.0.1:{server.server_port}')
+    monkeypatch.setenv('SUPABASE_SERVICE_ROLE_KEY', 'header.payload.signature')
+    supabase_client.reset_supabase_client()
+    yield server
+    supabase_client.reset_supabase_client()
+    server.shutdown()
+
+def get_campaigns(api_server):
+    conn = http.client.HTTPConnection('127.0.0.1', api_server.server_port, timeout=10)
+    conn.request('GET', '/api/campaigns/get?company_id=company-123', headers={'Authorization': 'Bearer mock-token'})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+def test_client_is_built_once_per_instance(fake_supabase):
+    """Every caller in a warm instance gets the same client"""
+    first = supabase_client.get_supabase_client()
+    second = supabase_client.get_supabase_client()
+
+    assert first is second
+
+def test_missing_configuration_returns_none(monkeypatch):
+    """Handlers can still answer 500 when Supabase is not configured"""
+    supabase_client.reset_supabase_client()
+    monkeypatch.delenv('VITE_SUPABASE_URL', raising=False)
+    monkeypatch.delenv('SUPABASE_SERVICE_ROLE_KEY', raising=False)
+
+    assert supabase_client.get_supabase_client() is None
+
+def test_second_request_reuses_connection(fake_supabase, load_api_module):
+    """The second request in a warm instance opens no new connection to PostgREST"""
+    api_server = start_server(load_api_module('campaigns/get.py').handler)
+    try:
+        status, body = get_campaigns(api_server)
+        assert status == 200
+        assert body['count'] == 1
+        assert FakePostgREST.connections == 1
+
+        status, body = get_campaigns(api_server)
+        assert status == 200
+        assert FakePostgREST.connections == 1
+    finally:
+        api_server.shutdown()
+
+    # Each request reads the listing version stamp, then the campaigns
+    assert len(FakePostgREST.requests) == 4
+    path, headers = FakePostgREST.requests[3]
+    assert path.startswith('/rest/v1/campaigns')
+    assert headers['Authorization'] == 'Bearer header.payload.signature'
+
+def test_pool_settings_are_applied(fake_supabase):
+    """Pool size and timeouts come from the module settings"""
+    http_client = supabase_client.get_supabase_client().options.httpx_client
+
+    assert http_client.timeout.connect == supabase_client.SUPABASE_CONNECT_TIMEOUT
+    assert http_client.timeout.read == supabase_client.SUPABASE_READ_TIMEOUT
+    assert http_client._transport._pool._max_connections == supabase_client.SUPABASE_POOL_SIZE
@@ -0,0 +1,71 @@
+import pytest
+from token_cache import TokenDecisionCache, token_digest, ENTRY_OVERHEAD_BYTES
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def claims(sub, exp):
+    return {'sub': sub, 'exp': exp, 'aud': 'authenticated'}
+
+def test_allowed_entry_expires_at_token_exp(clock):
+    """Verified claims live exactly as long as the token itself"""
+    cache = TokenDecisionCache(clock=clock)
+    digest = token_digest('token-a')
+    cache.put_allowed(digest, claims('user-1', clock.now + 60))
+
+    assert cache.get(digest).claims['sub'] == 'user-1'
+
+    clock.now += 60
+    assert cache.get(digest) is None
+    assert cache.stats['expirations'] == 1
+
+def test_expired_token_is_not_cached(clock):
+    """Claims whose exp has already passed never enter the cache"""
+    cache = TokenDecisionCache(clock=clock)
+    digest = token_digest('token-a')
+    cache.put_allowed(digest, claims('user-1', clock.now - 1))
+
+    assert cache.get(digest) is None
+    assert cache.snapshot()['entries'] == 0
+
+def test_denied_entry_uses_negative_ttl(clock):
+    """Rejections are remembered only briefly"""
+    cache = TokenDecisionCache(negative_ttl_seconds=30, clock=clock)
+    digest = token_digest('bad-token')
+    cache.put_denied(digest)
+
+    assert cache.get(digest).allowed is False
+    clock.now += 30
+    assert cache.get(digest) is None
+
+def test_entry_cap_evicts_least_recently_used(clock):
+    """The oldest untouched entry is evicted first once max_entries is reached"""
+    cache = TokenDecisionCache(max_entries=2, clock=clock)
+    a, b, c = token_digest('a'), token_digest('b'), token_digest('c')
+    cache.put_allowed(a, claims('a', clock.now + 600))
+    cache.put_allowed(b, claims('b', clock.now + 600))
+    cache.get(a)
+    cache.put_allowed(c, claims('c', clock.now + 600))
+
+    assert cache.get(a) is not None
+    assert cache.get(b) is None
+    assert cache.stats['evictions'] == 1
+
+def test_byte_cap_bounds_memory(clock):
+    """The approximate byte budget is never exceeded"""
+    max_bytes = 5 * ENTRY_OVERHEAD_BYTES + 500
+    cache = TokenDecisionCache(max_bytes=max_bytes, clock=clock)
+    for i in range(100):
+        cache.put_allowed(token_digest(f'token-{i}'), claims(f'user-{i}', clock.now + 600))
+
+    snapshot = cache.snapshot()
+    assert snapshot['bytes'] <= max_bytes
+    assert snapshot['entries'] + snapshot['evictions'] == 100
@@ -0,0 +1,150 @@
+import json
+import os
+import sys
+import pytest
+from unittest.mock import patch
+import fakes
+import aws_clients
+import training_jobs
+import check_training_status
+import start_training_job
+from conftest import REPO_ROOT
+
+TWIN = {
+    'digital_twin_id': 'twin-1',
+    'name': 'Brand Twin',
+    'company_id': 'company-1',
+    'training_data_url': 'https://example.com/data.mp4',
+    'description': ''
+}
+
+@pytest.fixture
+def aws():
+    boto3 = fakes.make_fake_boto3()
+    store = fakes.FakeTrainingJobStore()
+    aws_clients.reset_clients()
+    with patch.dict(sys.modules, {'boto3': boto3}), \
+            patch.object(training_jobs, '_store', store), \
+            patch.object(training_jobs, '_backend', None):
+        yield boto3, store
+    aws_clients.reset_clients()
+
+def use_backend(backend):
+    return patch.object(training_jobs, '_backend', backend)
+
+def start(token='token-1', **spec):
+    return start_training_job.lambda_handler({**TWIN, **spec, 'task_token': token}, None)
+
+def test_completion_resumes_the_waiting_execution(aws):
+    boto3, store = aws
+    backend = fakes.FakeTrainingBackend(delay=0.05)
+
+    with use_backend(backend):
+        started = start()
+        assert started['training_status'] == 'IN_PROGRESS'
+        assert store.jobs['twin-twin-1']['task_token'] == 'token-1'
+        backend.join()
+
+    kind, output = boto3.task_callbacks['token-1']
+    assert kind == 'success'
+    assert output['model_endpoint'] == 'https://api.reelagents.com/models/twin-1'
+    assert store.jobs['twin-twin-1']['status'] == 'COMPLETED'
+    assert 'stepfunctions.start_execution' not in boto3.calls.counts
+
+def test_failure_fails_the_waiting_task(aws):
+    boto3, store = aws
+    backend = fakes.FakeTrainingBackend(outcome='fail')
+
+    with use_backend(backend):
+        start()
+        backend.join()
+
+    assert boto3.task_callbacks['token-1'] == ('failure', 'TrainingFailed', 'Training data could not be read')
+    assert store.jobs['twin-twin-1']['failure_reason'] == 'Training data could not be read'
+
+def test_late_callback_is_recorded_for_the_poller(aws):
+    boto3, store = aws
+    boto3.task_callbacks['token-1'] = 'expired'
+    backend = fakes.FakeTrainingBackend()
+
+    with use_backend(backend):
+        start()
+        backend.join()
+
+    result = check_training_status.lambda_handler({'digital_twin_id': 'twin-1'}, None)
+    assert result['training_status'] == 'COMPLETED'
+    assert result['model_endpoint'] == 'https://api.reelagents.com/models/twin-1'
+
+def test_polling_backs_off_until_a_silent_job_finishes(aws):
+    _, store = aws
+    backend = fakes.FakeTrainingBackend(outcome='hang')
+
+    with use_backend(backend):
+        start()
+
+    waits = []
+    state = {'digital_twin_id': 'twin-1'}
+    for check in range(6):
+        if check == 5:
+            store.update('twin-twin-1', {'status': 'COMPLETED', 'result': {'model_endpoint': 'https://models/twin-1'}})
+        state = check_training_status.lambda_handler(state, None)
+        waits.append(state['poll']['wait_seconds'])
+
+    assert waits[:5] == [30, 60, 120, 240, 300]
+    assert state['training_status'] == 'COMPLETED'
+    assert state['model_endpoint'] == 'https://models/twin-1'
+
+def test_polling_gives_up_after_max_attempts(aws):
+    with use_backend(fakes.FakeTrainingBackend(outcome='hang')):
+        start()
+
+    state = {'digital_twin_id': 'twin-1'}
+    statuses = []
+    while not statuses or statuses[-1] == 'IN_PROGRESS':
+        state = check_training_status.lambda_handler(state, None)
+        statuses.append(state['training_status'])
+
+    assert len(statuses) == training_jobs.TRAINING_POLL_MAX_ATTEMPTS
+    assert state['Error'] == f"Training did not finish after {training_jobs.TRAINING_POLL_MAX_ATTEMPTS} status checks"
+
+def test_worker_runs_generation_and_reports_it(aws):
+    boto3, store = aws
+    with use_backend(fakes.FakeTrainingBackend(outcome='hang')):
+        start()
+    generated = {'statusCode': 200, 'digital_twin_id': 'twin-1', 'model_endpoint': 'https://models/twin-1', 'training_status': 'COMPLETED'}
+
+    with patch.object(start_training_job, 'generate', return_value=generated):
+        start_training_job.worker_handler({**TWIN, 'training_job_name': 'twin-twin-1'}, None)
+    with patch.object(start_training_job, 'generate', side_effect=Exception('Bedrock throttled')):
+        result = start_training_job.worker_handler({**TWIN, 'training_job_name': 'twin-twin-1'}, None)
+
+    assert boto3.task_callbacks['token-1'] == ('success', generated)
+    assert result['training_status'] == 'FAILED'
+    assert boto3.calls.counts['stepfunctions.send_task_failure'] == 1
+
+def test_lambda_backend_invokes_the_worker_asynchronously(aws):
+    boto3, _ = aws
+    start()
+
+    [invocation] = boto3.lambda_invocations
+    assert invocation['InvocationType'] == 'Event'
+    assert invocation['Payload']['training_job_name'] == 'twin-twin-1'
+    assert 'task_token' not in invocation['Payload']
+
+def test_state_machine_waits_on_the_callback_then_falls_back_to_polling():
+    with open(os.path.join(REPO_ROOT, 'aws', 'step-functions', 'create-digital-twin.json')) as f:
+        states = json.load(f)['States']
+
+    start_state = states['StartTrainingJob']
+    assert start_state['Resource'] == 'arn:aws:states:::lambda:invoke.waitForTaskToken'
+    assert start_state['Parameters']['Payload']['task_token.$'] == '$$.Task.Token'
+    assert start_state['Next'] == 'UpdateStatusToActive'
+    timeout = next(c for c in start_state['Catch'] if c['ErrorEquals'] == ['States.Timeout'])
+    assert timeout['Next'] == 'CheckTrainingStatus'
+
+    assert states['CheckTrainingStatus']['Next'] == 'TrainingFinished'
+    choices = {c['StringEquals']: c['Next'] for c in states['TrainingFinished']['Choices']}
+    assert choices == {'COMPLETED': 'UpdateStatusToActive', 'FAILED': 'HandleFailure'}
+    assert states['TrainingFinished']['Default'] == 'WaitForTraining'
+    assert states['WaitForTraining']['SecondsPath'] == '$.poll.wait_seconds'
+    assert states['WaitForTraining']['Next'] == 'CheckTrainingStatus'